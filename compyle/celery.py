@@ -1,6 +1,6 @@
 import os
 
-from celery import Celery
+from celery import Celery, concurrency, signals
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "compyle.settings")
 
@@ -8,3 +8,16 @@ app = Celery("compyle")
 
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+@signals.worker_init.connect
+def configure_database_pools(sender, **kwargs) -> None:  # pylint: disable=unused-argument
+    """Sizes the database connection pools of the worker by its pool, before its children are forked."""
+    # pylint: disable=import-outside-toplevel
+    from compyle.lib.postgresql.pool import set_process_type
+
+    # the pool is still an alias at that point, the prefork children and the solo pool run one task at a time
+    pool_module = concurrency.get_implementation(sender.pool_cls).__module__
+    set_process_type(
+        "prefork" if pool_module in ("celery.concurrency.prefork", "celery.concurrency.solo") else "threads"
+    )
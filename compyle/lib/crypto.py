@@ -0,0 +1,63 @@
+import pickle  # nosec
+from typing import Any
+
+from cryptography.hazmat.primitives.kdf import pbkdf2
+from django.conf import settings
+from django.utils.encoding import force_bytes
+from django_cryptography.utils.crypto import FernetBytes
+
+
+def derive_key(secret: str | bytes | None = None) -> bytes:
+    """Derives an encryption key the same way `django_cryptography` does from its `CRYPTOGRAPHY_KEY` setting.
+
+    Args:
+        secret: The raw secret to derive the key from. Defaults to the current key.
+
+    Returns:
+        The derived key, suitable for :class:`django_cryptography.utils.crypto.FernetBytes`.
+    """
+    if secret is None:
+        return settings.CRYPTOGRAPHY_KEY
+
+    kdf = pbkdf2.PBKDF2HMAC(
+        algorithm=settings.CRYPTOGRAPHY_DIGEST,
+        length=settings.CRYPTOGRAPHY_DIGEST.digest_size,
+        salt=settings.CRYPTOGRAPHY_SALT,
+        iterations=30000,
+        backend=settings.CRYPTOGRAPHY_BACKEND,
+    )
+    return kdf.derive(force_bytes(secret))
+
+
+def encrypt_value(value: Any, key: bytes) -> bytes | None:
+    """Encrypts a value exactly as an `encrypt()` model field would store it.
+
+    Args:
+        value: The value to encrypt.
+        key: The derived encryption key.
+
+    Returns:
+        The ciphertext, or None if the value is None.
+    """
+    if value is None:
+        return None
+    return FernetBytes(key).encrypt(pickle.dumps(value))
+
+
+def decrypt_value(ciphertext: bytes | memoryview | None, key: bytes) -> Any:
+    """Decrypts a value stored by an `encrypt()` model field.
+
+    Args:
+        ciphertext: The raw stored bytes.
+        key: The derived encryption key.
+
+    Returns:
+        The decrypted value, or None if the ciphertext is None.
+
+    Raises:
+        django_cryptography.core.signing.BadSignature: if the value was not signed with the current secret.
+        django_cryptography.utils.crypto.InvalidToken: if the value was not encrypted with that key.
+    """
+    if ciphertext is None:
+        return None
+    return pickle.loads(FernetBytes(key).decrypt(force_bytes(ciphertext)))  # nosec
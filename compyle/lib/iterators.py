@@ -0,0 +1,92 @@
+import itertools
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, TypeVar
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import QuerySet
+
+T = TypeVar("T")  # pylint: disable=invalid-name
+R = TypeVar("R")  # pylint: disable=invalid-name
+
+
+def batched(iterable: Iterable[T], size: int) -> Generator[list[T], None, None]:
+    """Lazily splits an iterable into lists of at most `size` items.
+
+    Args:
+        iterable: The iterable to split, consumed one batch at a time.
+        size: The maximum number of items per batch.
+
+    Returns:
+        A generator that yields the batches in order.
+    """
+    if size < 1:
+        raise ValueError("size must be at least one")
+
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def parallel_map(
+    func: Callable[[T], R], iterable: Iterable[T], processes: int | None = None
+) -> Generator[R, None, None]:
+    """Applies a function to every item of an iterable across a process pool, preserving order.
+
+    Unlike :meth:`concurrent.futures.Executor.map`, the iterable is consumed lazily:
+    at most twice as many items as there are processes are in flight at any time,
+    so memory stays bounded for arbitrarily long inputs.
+
+    Args:
+        func: A picklable, module-level callable.
+        iterable: The items to map `func` over.
+        processes: The number of worker processes. If lower or equal to one, items are mapped in-process.
+
+    Returns:
+        A generator that yields the results in the order of the input items.
+    """
+    if processes is not None and processes <= 1:
+        yield from map(func, iterable)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        window = 2 * executor._max_workers  # pylint: disable=protected-access
+        pending: deque[Future[R]] = deque()
+
+        for item in iterable:
+            pending.append(executor.submit(func, item))
+
+            if len(pending) >= window:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def fetch_chunks(queryset: QuerySet[Any], size: int) -> Generator[list[tuple[Any, ...]], None, None]:
+    """Reads the rows of a queryset in lists of at most `size` rows, through a server-side cursor.
+
+    The rows are fetched from the cursor as they are, without the conversions of the queryset iterator, so that
+    memory stays bounded by the size of a chunk whatever the number of rows.
+
+    Args:
+        queryset: The queryset, usually of values lists, evaluated as SQL.
+        size: The maximum number of rows per chunk.
+
+    Returns:
+        A generator that yields the chunks in the order of the queryset.
+    """
+    if size < 1:
+        raise ValueError("size must be at least one")
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return
+
+    with connections[queryset.db].chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        while chunk := cursor.fetchmany(size):
+            yield chunk
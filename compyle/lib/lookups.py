@@ -0,0 +1,18 @@
+from django.db.models import Lookup
+
+
+class AnyOf(Lookup):
+    """A lookup matching any value of an array, e.g. `ArraySubquery`, as `lhs = ANY(rhs)`.
+
+    Unlike `IN (subquery)` in a disjunction, which is evaluated row by row, the array is computed once and looked up
+    on the indexes of the left-hand side.
+    """
+
+    lookup_name = "any_of"
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection) -> tuple[str, tuple]:  # type: ignore[no-untyped-def]
+        """Returns the SQL of the lookup and its parameters."""
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} = ANY({rhs})", (*lhs_params, *rhs_params)
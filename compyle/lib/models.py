@@ -24,6 +24,30 @@ class CreateUpdateMixin(models.Model):
         abstract = True
 
 
+class SoftDeleteMixin(models.Model):
+    """A mixin class that provides a deletion mark, for the rows whose deletion is deferred to a background job."""
+
+    deleted_at = models.DateTimeField(
+        verbose_name=_("deleted at"),
+        help_text=_("The datetime of the deletion, the row and its children being removed in the background."),
+        default=None,
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    class Meta:
+        abstract = True
+
+
+class LiveManager(models.Manager):
+    """A manager that excludes the rows marked as deleted by :class:`SoftDeleteMixin`."""
+
+    def get_queryset(self) -> models.QuerySet:
+        """Returns the queryset of the rows not marked as deleted."""
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class BaseModel(models.Model):
     """A base model class that provides a reference field as pk."""
 
@@ -41,3 +65,31 @@ class BaseModel(models.Model):
 
     def __str__(self) -> str:
         return self.reference
+
+
+class CompactBaseModel(models.Model):
+    """A base model class for high-volume tables, that provides a compact integer pk and a unique public reference.
+
+    The reference is what the API and the admin expose, the integer pk keeps the primary key, the foreign keys
+    pointing to the model and every index several times smaller than with a string reference as pk.
+    """
+
+    id = models.BigAutoField(
+        verbose_name=_("id"),
+        help_text=_("The internal identifier of the entity."),
+        primary_key=True,
+    )
+    reference = models.CharField(
+        verbose_name=_("reference"),
+        help_text=_("The entity reference."),
+        max_length=255,
+        default=uuid.uuid4,
+        unique=True,
+        validators=[ReferenceValidator()],
+    )
+
+    class Meta:
+        abstract = True
+
+    def __str__(self) -> str:
+        return self.reference
@@ -0,0 +1,346 @@
+import base64
+import binascii
+import datetime
+import json
+from typing import Any
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Model, Q, QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    LimitOffsetPagination,
+    _positive_int,
+)
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def estimate_count(queryset: QuerySet[Any]) -> int:
+    """Returns the number of rows of a queryset as estimated by the query planner, without reading them.
+
+    Args:
+        queryset: The queryset.
+
+    Returns:
+        The estimated number of rows.
+    """
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_with_estimate(queryset: QuerySet[Any], threshold: int | None = None) -> tuple[int, bool]:
+    """Counts the rows of a queryset exactly up to a threshold, and estimates the count above it.
+
+    The exact count stops reading after `threshold + 1` rows, so its cost is bounded whatever the size of the table.
+
+    Args:
+        queryset: The queryset.
+        threshold: The number of rows up to which the count is exact. Defaults to `COUNT_ESTIMATE_THRESHOLD`.
+
+    Returns:
+        The number of rows and whether it is estimated.
+    """
+    threshold = threshold if threshold is not None else settings.COUNT_ESTIMATE_THRESHOLD
+
+    count = queryset[: threshold + 1].count()
+    if count <= threshold:
+        return count, False
+
+    return max(estimate_count(queryset), count), True
+
+
+class EstimatedCountPaginator(Paginator):
+    """Django paginator whose count is estimated above `COUNT_ESTIMATE_THRESHOLD` rows, e.g. for admin changelists."""
+
+    @cached_property
+    def count(self) -> int:
+        """Returns the exact or estimated number of objects."""
+        # pylint: disable=attribute-defined-outside-init
+        count, self.count_estimated = count_with_estimate(self.object_list)
+        return count
+
+
+class EstimatedCountPagination(LimitOffsetPagination):
+    """Limit/offset pagination whose count is estimated above `COUNT_ESTIMATE_THRESHOLD` rows.
+
+    The response tells whether the count is estimated with `count_estimated`. One more row than the limit is read so
+    that the link to the next page does not depend on the count.
+    """
+
+    def paginate_queryset(self, queryset: QuerySet[Any], request: Request, view: Any = None) -> list[Any] | None:
+        """Returns the rows of the requested page.
+
+        Args:
+            queryset: The filtered queryset.
+            request: The request.
+            view: The view.
+
+        Returns:
+            The rows of the page.
+        """
+        # pylint: disable=attribute-defined-outside-init
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.offset = self.get_offset(request)
+        self.count, self.count_estimated = count_with_estimate(queryset)
+
+        # one row past the page tells whether there is a next one
+        start, end = self.offset, self.offset + self.limit + 1
+        rows = list(queryset[start:end])
+
+        if len(rows) <= self.limit and (rows or not self.offset):
+            # the last page was reached, which tells the exact count
+            self.count, self.count_estimated = self.offset + len(rows), False
+        elif len(rows) > self.limit:
+            self.count = max(self.count, self.offset + len(rows))
+
+        return rows[: self.limit]
+
+    def get_paginated_response(self, data: list[Any]) -> Response:
+        """Wraps the serialized rows of the page with the count and the links to the next and previous pages.
+
+        Args:
+            data: The serialized rows.
+
+        Returns:
+            The response.
+        """
+        response = super().get_paginated_response(data)
+        response.data["count_estimated"] = self.count_estimated
+        return response
+
+    def get_paginated_response_schema(self, schema: dict[str, Any]) -> dict[str, Any]:
+        """Returns the schema of the paginated response."""
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_estimated"] = {"type": "boolean", "example": False}
+        return response_schema
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique tuple of fields, such as `(started_at, reference)`.
+
+    Each page is read with a range condition on the fields of the last row of the previous page, so that deep pages
+    cost the same as the first one and rows inserted meanwhile neither shift nor duplicate the results. No count is
+    made. The ordering must be one of `keyset_fields` ascending or descending, other orderings and requests with
+    an `offset` parameter fall back to :class:`EstimatedCountPagination`.
+    """
+
+    keyset_fields: tuple[str, ...] = ("started_at", "reference")
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 1000
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    offset_query_param = "offset"
+    ordering_query_param = api_settings.ORDERING_PARAM
+
+    offset_pagination_class = EstimatedCountPagination
+    invalid_cursor_message = _("Invalid cursor.")
+
+    def paginate_queryset(self, queryset: QuerySet[Any], request: Request, view: Any = None) -> list[Any] | None:
+        """Returns the rows of the requested page.
+
+        Args:
+            queryset: The filtered queryset.
+            request: The request.
+            view: The view.
+
+        Returns:
+            The rows of the page.
+        """
+        # pylint: disable=attribute-defined-outside-init
+        self.request = request
+        self.offset_pagination = None
+
+        descending = self.get_descending(request)
+        if descending is None or self.offset_query_param in request.query_params:
+            self.offset_pagination = self.offset_pagination_class()
+            return self.offset_pagination.paginate_queryset(queryset, request, view)
+
+        limit = self.get_limit(request)
+        values, reverse = self.decode_cursor(request, queryset.model)
+
+        # a page read backwards, towards the previous page, is read in the opposite order then put back in order
+        backwards = descending != reverse
+        sign = "-" if backwards else ""
+        queryset = queryset.order_by(*(f"{sign}{field}" for field in self.keyset_fields))
+
+        if values is not None:
+            try:
+                queryset = queryset.filter(self.get_keyset_condition(values, backwards))
+            except ValidationError as error:
+                raise NotFound(self.invalid_cursor_message) from error
+
+        rows = list(queryset[: limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        if reverse:
+            rows.reverse()
+
+        self.next_values = self.get_values(rows[-1]) if rows and (has_more or reverse) else None
+        self.previous_values = self.get_values(rows[0]) if rows and (has_more if reverse else values) else None
+
+        return rows
+
+    def get_paginated_response(self, data: list[Any]) -> Response:
+        """Wraps the serialized rows of the page with the links to the next and previous pages.
+
+        Args:
+            data: The serialized rows.
+
+        Returns:
+            The response.
+        """
+        if self.offset_pagination is not None:
+            return self.offset_pagination.get_paginated_response(data)
+
+        return Response(
+            {
+                "next": self.get_link(self.next_values, reverse=False),
+                "previous": self.get_link(self.previous_values, reverse=True),
+                "results": data,
+            }
+        )
+
+    def get_descending(self, request: Request) -> bool | None:
+        """Returns the direction of the requested ordering, None if the ordering is not supported by the cursor."""
+        ordering = request.query_params.get(self.ordering_query_param)
+
+        if not ordering:
+            return False
+        if ordering == self.keyset_fields[0]:
+            return False
+        if ordering == f"-{self.keyset_fields[0]}":
+            return True
+        return None
+
+    def get_limit(self, request: Request) -> int:
+        """Returns the requested page size, capped by `max_page_size`."""
+        try:
+            return _positive_int(request.query_params[self.limit_query_param], strict=True, cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_keyset_condition(self, values: list[Any], descending: bool) -> Q:
+        """Returns the condition of the rows following the given keyset values, in the given direction.
+
+        This is the expansion of the row comparison `(a, b) > (x, y)` into `a >= x AND (a > x OR (a = x AND b > y))`,
+        whose leading bound is the range scanned on the index.
+        """
+        lookup = "lt" if descending else "gt"
+        condition = Q()
+
+        for index in reversed(range(len(self.keyset_fields))):
+            equals = dict(zip(self.keyset_fields[:index], values))
+            strict = Q(**equals, **{f"{self.keyset_fields[index]}__{lookup}": values[index]})
+            condition = strict if index == len(self.keyset_fields) - 1 else strict | (Q(**equals) & condition)
+
+        return Q(**{f"{self.keyset_fields[0]}__{lookup}e": values[0]}) & condition
+
+    def get_values(self, row: Model) -> list[Any]:
+        """Returns the keyset values of a row."""
+        return [getattr(row, field) for field in self.keyset_fields]
+
+    def decode_cursor(self, request: Request, model: type[Model]) -> tuple[list[Any] | None, bool]:
+        """Returns the keyset values and the direction encoded in the cursor of the request, if any.
+
+        Args:
+            request: The request.
+            model: The model of the paginated rows, whose fields parse the keyset values.
+
+        Raises:
+            NotFound: if the cursor is malformed.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            values, reverse = data["v"], bool(data.get("r"))
+        except (binascii.Error, ValueError, TypeError, KeyError) as error:
+            raise NotFound(self.invalid_cursor_message) from error
+
+        if not isinstance(values, list) or len(values) != len(self.keyset_fields):
+            raise NotFound(self.invalid_cursor_message)
+
+        # the values are encoded as strings, anything else did not come from a link
+        if not all(isinstance(value, str) for value in values):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            # pylint: disable=protected-access
+            values = [model._meta.get_field(field).to_python(value) for field, value in zip(self.keyset_fields, values)]
+        except ValidationError as error:
+            raise NotFound(self.invalid_cursor_message) from error
+
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    def encode_cursor(self, values: list[Any], reverse: bool) -> str:
+        """Returns the cursor of the given keyset values and direction."""
+        # datetimes keep their microseconds, unlike with the DjangoJSONEncoder, for the rows not to be skipped
+        values = [value.isoformat() if isinstance(value, datetime.datetime) else str(value) for value in values]
+        data = {"v": values, "r": 1} if reverse else {"v": values}
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+    def get_link(self, values: list[Any] | None, reverse: bool) -> str | None:
+        """Returns the URL of the page following, or preceding if reverse, the given keyset values."""
+        if values is None:
+            return None
+
+        url = remove_query_param(self.request.build_absolute_uri(), self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    def get_paginated_response_schema(self, schema: dict[str, Any]) -> dict[str, Any]:
+        """Returns the schema of the paginated response, the count only being returned in offset mode."""
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "count_estimated": {"type": "boolean", "example": False},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view: Any) -> list[dict[str, Any]]:
+        """Returns the query parameters of the pagination."""
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": str(_("The pagination cursor value.")),
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.limit_query_param,
+                "required": False,
+                "in": "query",
+                "description": str(_("Number of results to return per page.")),
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.offset_query_param,
+                "required": False,
+                "in": "query",
+                "description": str(_("The initial index from which to return the results, disables the cursor.")),
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -0,0 +1,44 @@
+import os
+from typing import Any
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from compyle.lib.postgresql.pool import ConnectionPool, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """The PostgreSQL backend of Django, taking the connections from the pool of the process if `PROXY_DB_POOL`.
+
+    Django closes the connections at the end of each request and task, they are returned to the pool instead, and
+    taken back at the next query without the cost of a new connection.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.pool: ConnectionPool | None = None
+
+    def get_new_connection(self, conn_params: dict[str, Any]) -> extensions.connection:
+        """Hands out a connection of the pool of the database, or opens a new one if the pooling is disabled."""
+        if not settings.PROXY_DB_POOL:
+            return super().get_new_connection(conn_params)
+
+        connect = super().get_new_connection
+        self.pool = get_pool(self.alias, lambda: connect(conn_params))
+        connection = self.pool.checkout()
+
+        # as set by the opening of a connection, which was validated then
+        # pylint: disable=attribute-defined-outside-init
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        self.isolation_level = base.IsolationLevel(isolation_level or base.IsolationLevel.READ_COMMITTED)
+        return connection
+
+    def _close(self) -> None:
+        """Returns the connection to the pool it was handed out by, if any and of this process, or closes it."""
+        pool, self.pool = self.pool, None
+        if self.connection is None or pool is None or pool.closed or pool.pid != os.getpid():
+            return super()._close()
+
+        with self.wrap_database_errors:
+            return pool.checkin(self.connection)
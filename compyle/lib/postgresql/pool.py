@@ -0,0 +1,222 @@
+import os
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+import psycopg2
+from django.conf import settings
+from psycopg2 import extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+PROCESS_TYPES = ("web", "prefork", "threads")
+"""The types of processes, whose pools are sized by `PROXY_DB_POOL_SIZES`."""
+
+_process_type = "web"  # pylint: disable=invalid-name
+_pools: dict[str, "ConnectionPool"] = {}
+_pools_lock = threading.Lock()
+_inherited_pools: list["ConnectionPool"] = []
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    """A thread-safe pool of the connections of a process to a database.
+
+    At most `maxconn` connections are handed out at once, a checkout waiting for one to be returned when all are in
+    use, and `minconn` of them are kept open once returned, the others being closed. The connections are checked on
+    checkout, with a query if they have been idle for long, the broken ones being replaced.
+
+    Args:
+        connect: The callable opening a new connection.
+        minconn: The number of connections kept open.
+        maxconn: The maximum number of connections open at once.
+        timeout: The number of seconds a checkout waits for a connection.
+        check_idle: The number of seconds from which an idle connection is checked with a query.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        connect: Callable[[], extensions.connection],
+        minconn: int,
+        maxconn: int,
+        timeout: float,
+        check_idle: float,
+    ) -> None:
+        self.connect = connect
+        self.timeout = timeout
+        self.check_idle = check_idle
+        self.pid = os.getpid()
+        self.stats: Counter[str] = Counter()
+
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._returned_at: dict[int, float] = {}
+
+        super().__init__(minconn, maxconn)
+
+    def _connect(self, key: Any = None) -> extensions.connection:
+        """Opens a new connection, assigned to the key if not None or else idle."""
+        conn = self.connect()
+        self.stats["created"] += 1
+        self._returned_at[id(conn)] = time.monotonic()
+
+        if key is not None:
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+        else:
+            self._pool.append(conn)
+        return conn
+
+    def _putconn(self, conn: extensions.connection, key: Any = None, close: bool = False) -> None:
+        """Returns a connection, rolled back and kept open if there are less than `minconn` idle ones."""
+        self._returned_at.pop(id(conn), None)
+        super()._putconn(conn, key, close)
+        if conn in self._pool:
+            self._returned_at[id(conn)] = time.monotonic()
+
+    def is_usable(self, conn: extensions.connection) -> bool:
+        """Returns whether an idle connection can be handed out, querying it if it has been idle for long."""
+        if conn.closed or conn.info.transaction_status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - self._returned_at.get(id(conn), 0) < self.check_idle:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not conn.autocommit:
+                conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def checkout(self) -> extensions.connection:
+        """Hands out a usable connection, waiting for one if all are in use.
+
+        Returns:
+            The connection, to give back with :meth:`checkin`.
+
+        Raises:
+            PoolError: if no connection was returned within the timeout.
+        """
+        start = time.monotonic()
+        # the slot is released on checkin, once the connection is given back
+        # pylint: disable=consider-using-with
+        if not self._slots.acquire(blocking=False):
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                raise PoolError(f"no database connection available within {self.timeout} seconds")
+
+            with self._lock:
+                self.stats["waits"] += 1
+                self.stats["wait_ms"] += round((time.monotonic() - start) * 1000)
+
+        try:
+            while True:
+                conn = self.getconn()
+                if self.is_usable(conn):
+                    break
+
+                self.putconn(conn, close=True)
+                with self._lock:
+                    self.stats["discarded"] += 1
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self.stats["checkouts"] += 1
+        return conn
+
+    def checkin(self, conn: extensions.connection) -> None:
+        """Gives back a connection handed out by :meth:`checkout`."""
+        try:
+            self.putconn(conn)
+        finally:
+            self._slots.release()
+
+    def get_metrics(self) -> dict[str, Any]:
+        """Returns the sizes and the counters of the pool since the start of the process."""
+        with self._lock:
+            return {
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "size": len(self._pool) + len(self._used),
+                "idle": len(self._pool),
+                "in_use": len(self._used),
+                **{
+                    name: self.stats[name]
+                    for name in ("checkouts", "waits", "wait_ms", "timeouts", "created", "discarded")
+                },
+            }
+
+
+def set_process_type(process_type: str) -> None:
+    """Sets the type of the process, one of :data:`PROCESS_TYPES`, before its pools are created."""
+    global _process_type  # pylint: disable=global-statement
+    if process_type not in PROCESS_TYPES:
+        raise ValueError(f"unknown process type {process_type}")
+    _process_type = process_type
+
+
+def get_process_type() -> str:
+    """Returns the type of the process, `web` unless set by the Celery workers."""
+    return _process_type
+
+
+def get_pool(alias: str, connect: Callable[[], extensions.connection]) -> ConnectionPool:
+    """Returns the pool of the connections of the process to a database, created on first use.
+
+    Args:
+        alias: The alias of the database.
+        connect: The callable opening a new connection to the database.
+
+    Returns:
+        The pool, sized by `PROXY_DB_POOL_SIZES` for the type of the process.
+    """
+    pool = _pools.get(alias)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        if alias not in _pools:
+            minconn, maxconn = settings.PROXY_DB_POOL_SIZES[_process_type]
+            _pools[alias] = ConnectionPool(
+                connect,
+                minconn,
+                maxconn,
+                timeout=settings.PROXY_DB_POOL_TIMEOUT,
+                check_idle=settings.PROXY_DB_POOL_CHECK_IDLE,
+            )
+        return _pools[alias]
+
+
+def get_pool_metrics() -> list[dict[str, Any]]:
+    """Returns the metrics of the pools of the process, one per database."""
+    return [
+        {"alias": alias, "process_type": _process_type, "pid": pool.pid, **pool.get_metrics()}
+        for alias, pool in sorted(_pools.items())
+    ]
+
+
+def close_pools() -> None:
+    """Closes the pools of the process along with all their connections, even those in use."""
+    with _pools_lock:
+        for pool in _pools.values():
+            if not pool.closed:
+                pool.closeall()
+        _pools.clear()
+
+
+def _forget_pools() -> None:
+    """Forgets the pools inherited by a forked process, whose connections are the parent's.
+
+    They are neither used nor closed, closing them would close the connections of the parent too, but kept for
+    their connections not to be closed once garbage collected.
+    """
+    _inherited_pools.extend(_pools.values())
+    _pools.clear()
+
+
+os.register_at_fork(after_in_child=_forget_pools)
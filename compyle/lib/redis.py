@@ -0,0 +1,25 @@
+import functools
+
+import redis
+from django.conf import settings
+
+
+@functools.cache
+def get_redis() -> redis.Redis:
+    """Returns the Redis client shared by the process, configured from the `REDIS_*` settings.
+
+    The underlying connection pool is reset by redis-py itself when used from a forked process.
+
+    Returns:
+        The Redis client.
+    """
+    return redis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        username=settings.REDIS_USER,
+        password=settings.REDIS_PASSWORD,
+        health_check_interval=10,
+        socket_connect_timeout=5,
+        socket_keepalive=True,
+        retry_on_timeout=True,
+    )
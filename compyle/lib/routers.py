@@ -0,0 +1,81 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, models
+
+_read_database: ContextVar[str | None] = ContextVar("read_database", default=None)
+"""The database the reads are routed to in the current context, None for the default one."""
+
+STICKY_KEY_PREFIX = "replica:sticky:"
+"""The prefix of the cache keys of the clients reading from the primary after their own writes."""
+
+
+def get_replica_alias() -> str | None:
+    """Returns the alias of the read replica, None if `PROXY_READ_REPLICA` is not set to a configured database."""
+    alias = settings.PROXY_READ_REPLICA
+    return alias if alias and alias in settings.DATABASES else None
+
+
+@contextmanager
+def read_from_replica() -> Iterator[str | None]:
+    """Routes the reads of the context to the read replica, if any, the writes still going to the primary.
+
+    Yields:
+        The alias of the replica the reads are routed to, None if there is none.
+    """
+    alias = get_replica_alias()
+    token = _read_database.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_database.reset(token)
+
+
+def mark_sticky(client: str) -> None:
+    """Routes the reads of a client to the primary for `PROXY_READ_REPLICA_STICKINESS` seconds after its writes,
+    for it to read them even before the replica has replayed them.
+
+    Args:
+        client: The identifier of the client.
+    """
+    if settings.PROXY_READ_REPLICA_STICKINESS > 0:
+        cache.set(f"{STICKY_KEY_PREFIX}{client}", True, timeout=settings.PROXY_READ_REPLICA_STICKINESS)
+
+
+def is_sticky(client: str) -> bool:
+    """Returns whether a client wrote recently, its reads having to go to the primary."""
+    return bool(cache.get(f"{STICKY_KEY_PREFIX}{client}"))
+
+
+class ReplicaRouter:
+    """A database router sending the reads to the read replica within :func:`read_from_replica`.
+
+    Outside of it, and for every write, the primary is used. The replica, a copy of the primary, is never migrated.
+    """
+
+    def db_for_read(self, model: type[models.Model], **hints: Any) -> str | None:  # pylint: disable=unused-argument
+        """Returns the read replica within :func:`read_from_replica`, None for the primary otherwise."""
+        return _read_database.get()
+
+    def db_for_write(self, model: type[models.Model], **hints: Any) -> str | None:  # pylint: disable=unused-argument
+        """Returns the primary, the replica being read-only."""
+        return DEFAULT_DB_ALIAS
+
+    # pylint: disable=unused-argument
+    def allow_relation(self, obj1: models.Model, obj2: models.Model, **hints: Any) -> bool | None:
+        """Allows the relations between the objects of the primary and of the replica, which hold the same rows."""
+        databases = {DEFAULT_DB_ALIAS, get_replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:  # pylint: disable=protected-access
+            return True
+        return None
+
+    # pylint: disable=unused-argument
+    def allow_migrate(self, db: str, app_label: str, model_name: str | None = None, **hints: Any) -> bool | None:
+        """Forbids the migrations of the read replica, which replays those of the primary."""
+        if db == get_replica_alias():
+            return False
+        return None
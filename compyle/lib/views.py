@@ -1,9 +1,57 @@
+from contextlib import ExitStack
 from typing import Any
 
-from rest_framework import serializers, viewsets
+from django.db.models import QuerySet
+from rest_framework import permissions, serializers, viewsets
+from rest_framework.request import Request
+from rest_framework.response import Response
 
+from compyle.lib.routers import is_sticky, mark_sticky, read_from_replica
 
-class BaseModelViewSet(viewsets.ModelViewSet[Any]):
+
+class ReplicaReadMixin:
+    """A viewset mixin reading from the read replica for the safe requests, the client's own writes aside.
+
+    The primary absorbs the writes, e.g. the traces of the workers, the reads being offloaded to the replica. A
+    client that has just written reads from the primary for a few seconds, not to miss its writes on a lagging
+    replica.
+    """
+
+    request: Request
+    _replica_reads: ExitStack | None = None
+
+    def get_client_key(self, request: Request) -> str:
+        """Returns the identifier of the client, the authenticated user or else its address."""
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"address:{request.META.get('REMOTE_ADDR')}"
+
+    def initial(self, request: Request, *args, **kwargs) -> None:
+        """Routes the reads of the request to the replica if it is safe and its client has not written recently."""
+        super().initial(request, *args, **kwargs)  # type: ignore[misc]
+
+        if request.method in permissions.SAFE_METHODS and not is_sticky(self.get_client_key(request)):
+            self._replica_reads = ExitStack()
+            self._replica_reads.enter_context(read_from_replica())
+
+    def finalize_response(self, request: Request, response: Response, *args, **kwargs) -> Response:
+        """Restores the routing of the reads, and makes the client read from the primary after a successful write."""
+        if self._replica_reads is not None:
+            self._replica_reads.close()
+            self._replica_reads = None
+        elif request.method not in permissions.SAFE_METHODS and response.status_code < 400:
+            mark_sticky(self.get_client_key(request))
+
+        return super().finalize_response(request, response, *args, **kwargs)  # type: ignore[misc]
+
+    def get_queryset(self) -> QuerySet[Any]:
+        """Returns the queryset bound to the database it is read from, for it to stay there once evaluated after
+        the response, e.g. streamed."""
+        queryset = super().get_queryset()  # type: ignore[misc]
+        return queryset.using(queryset.db)
+
+
+class BaseModelViewSet(ReplicaReadMixin, viewsets.ModelViewSet[Any]):
     """Base class for all read-only model viewsets in the compyle Django app."""
 
     serializer_classes: dict[str, type[serializers.BaseSerializer[Any]]] = {}
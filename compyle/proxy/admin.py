@@ -1,6 +1,8 @@
+from typing import Any
+
 from admin_action_tools import ActionFormMixin, add_form_to_action
 from django.contrib import messages
-from django.contrib.admin import ModelAdmin
+from django.contrib.admin import ModelAdmin, display
 from django.contrib.admin.decorators import register
 from django.db.models.query import QuerySet
 from django.http import HttpRequest
@@ -8,12 +10,58 @@ from django.utils.translation import gettext_lazy as _
 from django_object_actions import DjangoObjectActions, action
 
 from compyle.lib.admin import BaseCreateUpdateModelAdmin, ReadOnlyAdminMixin, linkify
+from compyle.lib.pagination import EstimatedCountPaginator
 from compyle.proxy import choices, forms, inlines, models
+from compyle.proxy.blobs import get_content
+from compyle.proxy.deletions import mark_deleted
+from compyle.proxy.responses import get_body_text
 from compyle.proxy.tasks import async_request
 
 
+class DeferredDeletionAdminMixin:
+    """Admin mixin marking the deleted objects instead of deleting them, their children being deleted in the background.
+
+    The confirmation page does not list the children either, which could be millions of traces.
+    """
+
+    def get_deleted_objects(self, objs, request: HttpRequest) -> tuple[list[str], dict[str, int], set[str], list[str]]:
+        """Return the objects to delete, without collecting their children.
+
+        Args:
+            objs: The objects to delete.
+            request: The request instance.
+
+        Returns:
+            The objects to delete, their count by model, the missing permissions and the protected objects.
+        """
+        objs = list(objs)
+        perms_needed = set() if self.has_delete_permission(request) else {str(self.opts.verbose_name)}
+
+        return [str(obj) for obj in objs], {str(self.opts.verbose_name_plural): len(objs)}, perms_needed, []
+
+    # pylint: disable=unused-argument
+    def delete_model(self, request: HttpRequest, obj: models.Service | models.Endpoint) -> None:
+        """Mark the object as deleted.
+
+        Args:
+            request: The request instance.
+            obj: The object to delete.
+        """
+        mark_deleted(self.model.objects.filter(pk=obj.pk))
+
+    # pylint: disable=unused-argument
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet[models.Service | models.Endpoint]) -> None:
+        """Mark the objects as deleted.
+
+        Args:
+            request: The request instance.
+            queryset: The objects to delete.
+        """
+        mark_deleted(queryset)
+
+
 @register(models.Service)
-class ServiceAdmin(BaseCreateUpdateModelAdmin):
+class ServiceAdmin(DeferredDeletionAdminMixin, BaseCreateUpdateModelAdmin):
     """Admin for :class:`compyle.proxy.models.Service`."""
 
     list_display = [
@@ -48,6 +96,17 @@ class ServiceAdmin(BaseCreateUpdateModelAdmin):
                 )
             },
         ),
+        (
+            _("Tracing"),
+            {
+                "fields": (
+                    "trace_sample_rate",
+                    "trace_slow_threshold",
+                    "trace_retention_days",
+                ),
+                "description": _("Unset values are inherited from the settings."),
+            },
+        ),
         (
             _("Technical info"),
             {
@@ -74,7 +133,7 @@ class ServiceAdmin(BaseCreateUpdateModelAdmin):
 
 
 @register(models.Endpoint)
-class EndpointAdmin(ActionFormMixin, DjangoObjectActions, BaseCreateUpdateModelAdmin):
+class EndpointAdmin(DeferredDeletionAdminMixin, ActionFormMixin, DjangoObjectActions, BaseCreateUpdateModelAdmin):
     """Admin for :class:`compyle.proxy.models.Endpoint`."""
 
     list_display = [
@@ -113,6 +172,27 @@ class EndpointAdmin(ActionFormMixin, DjangoObjectActions, BaseCreateUpdateModelA
                 )
             },
         ),
+        (
+            _("Tracing"),
+            {
+                "fields": (
+                    "trace_sample_rate",
+                    "trace_slow_threshold",
+                    "trace_retention_days",
+                ),
+                "description": _("Unset values are inherited from the service, then from the settings."),
+            },
+        ),
+        (
+            _("Response capture"),
+            {
+                "fields": (
+                    "capture_response",
+                    "response_body_limit",
+                ),
+                "description": _("An unset body limit defaults to the one of the settings."),
+            },
+        ),
         (
             _("Technical info"),
             {
@@ -130,7 +210,7 @@ class EndpointAdmin(ActionFormMixin, DjangoObjectActions, BaseCreateUpdateModelA
     change_actions = ["request"]
 
     def get_queryset(self, request: HttpRequest) -> QuerySet[models.Endpoint]:
-        """Return the queryset with the prefetch of the endpoints.
+        """Return the queryset with the services of the endpoints, their traces being listed by the inline only.
 
         Args:
             request: The request instance.
@@ -138,7 +218,7 @@ class EndpointAdmin(ActionFormMixin, DjangoObjectActions, BaseCreateUpdateModelA
         Returns:
             The queryset with the annotations.
         """
-        return super().get_queryset(request).select_related("service").prefetch_related("endpoint_traces")
+        return super().get_queryset(request).select_related("service")
 
     # pylint: disable=unused-argument
     @add_form_to_action(forms.TraceForm, display_queryset=False)
@@ -188,12 +268,15 @@ class TraceAdmin(ModelAdmin, ReadOnlyAdminMixin):
         "started_at",
         "completed_at",
     ]
-    readonly_fields = list_display
+    readonly_fields = [*list_display, "headers_content", "payload_content", "response_headers", "response_body"]
 
     search_fields = ["reference", "endpoint__name", "endpoint__reference"]
-    list_filter = ["started_at", "completed_at"]
+    list_filter = ["status_class", "started_at", "completed_at"]
     ordering = ["-started_at"]
 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
     fieldsets = [
         (
             None,
@@ -206,11 +289,21 @@ class TraceAdmin(ModelAdmin, ReadOnlyAdminMixin):
                     "started_at",
                     "completed_at",
                     "status_code",
-                    "headers",
-                    "payload",
+                    "headers_content",
+                    "payload_content",
                 )
             },
         ),
+        (
+            _("Response"),
+            {
+                "fields": (
+                    "response_headers",
+                    "response_body",
+                ),
+                "description": _("The response captured if its endpoint requires it, its body truncated."),
+            },
+        ),
         # (
         #     _("Technical info"),
         #     {
@@ -239,6 +332,71 @@ class TraceAdmin(ModelAdmin, ReadOnlyAdminMixin):
         """
         return super().get_queryset(request).select_related("endpoint", "authentication")
 
+    @display(description=_("headers"))
+    def headers_content(self, obj: models.Trace) -> Any:
+        """Return the headers of the trace, whether stored inline or as a blob.
+
+        Args:
+            obj: The trace instance.
+
+        Returns:
+            The headers of the trace.
+        """
+        return get_content(obj, "headers")
+
+    @display(description=_("payload"))
+    def payload_content(self, obj: models.Trace) -> Any:
+        """Return the payload of the trace, whether stored inline or as a blob.
+
+        Args:
+            obj: The trace instance.
+
+        Returns:
+            The payload of the trace.
+        """
+        return get_content(obj, "payload")
+
+    def get_captured_response(self, obj: models.Trace) -> models.TraceResponse | None:
+        """Return the response captured for the trace, loaded once per trace instance.
+
+        Args:
+            obj: The trace instance.
+
+        Returns:
+            The captured response, None if none was captured.
+        """
+        if not hasattr(obj, "captured_response"):
+            obj.captured_response = models.TraceResponse.objects.filter(
+                reference=obj.reference, started_at=obj.started_at
+            ).first()
+        return obj.captured_response
+
+    @display(description=_("response headers"))
+    def response_headers(self, obj: models.Trace) -> Any:
+        """Return the headers of the captured response of the trace, if any.
+
+        Args:
+            obj: The trace instance.
+
+        Returns:
+            The headers of the response.
+        """
+        captured = self.get_captured_response(obj)
+        return captured.headers if captured is not None else None
+
+    @display(description=_("response body"))
+    def response_body(self, obj: models.Trace) -> str | None:
+        """Return the body of the captured response of the trace, decompressed, if any.
+
+        Args:
+            obj: The trace instance.
+
+        Returns:
+            The body of the response.
+        """
+        captured = self.get_captured_response(obj)
+        return get_body_text(captured) if captured is not None else None
+
 
 @register(models.Authentication)
 class AuthenticationAdmin(BaseCreateUpdateModelAdmin):
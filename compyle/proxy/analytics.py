@@ -0,0 +1,365 @@
+import datetime
+import math
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.db.models import DurationField, ExpressionWrapper, F, FloatField, QuerySet
+from django.db.models.functions import Cast, Extract
+
+from compyle.lib.iterators import fetch_chunks
+from compyle.lib.sketches import LatencySketch
+from compyle.proxy.models import Trace
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.compute
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+if TYPE_CHECKING:
+    from compyle.proxy.archives import ArchiveQuery
+
+GROUP_BY_CHOICES = ("endpoint", "status_code", "status_class", "minute", "hour", "day")
+"""The keys the traces can be grouped by, the last ones being time buckets."""
+
+BUCKET_WIDTHS = {"minute": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+"""The widths, in seconds, of the time buckets."""
+
+DEFAULT_HISTOGRAM_EDGES = (0, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+"""The default edges of the latency histogram, in milliseconds, the last bin being open-ended."""
+
+COLUMNS = {
+    "endpoint": F("endpoint"),
+    "status_code": F("status_code"),
+    "started_at": Cast(Extract("started_at", "epoch"), FloatField()),
+    "latency": Cast(
+        Extract(ExpressionWrapper(F("completed_at") - F("started_at"), output_field=DurationField()), "epoch"),
+        FloatField(),
+    )
+    * 1000,
+}
+"""The columns read from the traces, the datetimes being read as timestamps and the latency in milliseconds."""
+
+
+def iter_chunks(queryset: QuerySet[Trace], chunk_size: int | None = None) -> Iterator[dict[str, list[Any]]]:
+    """Reads the analytics columns of traces in chunks, through a server-side cursor.
+
+    The rows are fetched from the cursor as they are, without the conversions of the queryset iterator.
+
+    Args:
+        queryset: The traces.
+        chunk_size: The number of traces per chunk. Defaults to `PROXY_ANALYTICS_CHUNK_SIZE`.
+
+    Yields:
+        The columns of each chunk, by name.
+    """
+    chunk_size = chunk_size or settings.PROXY_ANALYTICS_CHUNK_SIZE
+
+    for chunk in fetch_chunks(queryset.order_by().values_list(*COLUMNS.values()), chunk_size):
+        yield dict(zip(COLUMNS, map(list, zip(*chunk))))
+
+
+def get_archive_chunk(table: "pyarrow.Table") -> dict[str, list[Any]]:
+    """Returns the analytics columns of archived traces, as read by :func:`iter_chunks`.
+
+    Args:
+        table: The archived traces, see :meth:`compyle.proxy.archives.ArchiveQuery.iter_tables`.
+
+    Returns:
+        The columns of the traces, by name.
+    """
+    # the timestamps of the archives are in microseconds
+    started_at = pyarrow.compute.cast(table["started_at"], pyarrow.int64())
+    completed_at = pyarrow.compute.cast(table["completed_at"], pyarrow.int64())
+
+    return {
+        "endpoint": table["endpoint"].to_pylist(),
+        "status_code": table["status_code"].to_pylist(),
+        "started_at": pyarrow.compute.divide(started_at, 1e6).to_pylist(),
+        "latency": pyarrow.compute.divide(pyarrow.compute.subtract(completed_at, started_at), 1e3).to_pylist(),
+    }
+
+
+class TraceAnalytics:
+    """Accumulates the counts, latency sketches and latency histogram of traces, chunk by chunk.
+
+    The memory used depends on the number of groups and sketch buckets, not on the number of traces. The chunks are
+    processed as NumPy arrays if NumPy is installed, and row by row otherwise.
+
+    Args:
+        group_by: The key to group the traces by, one of :data:`GROUP_BY_CHOICES`, None not to group them.
+        histogram_edges: The increasing edges of the latency histogram, in milliseconds.
+        vectorized: Whether to process the chunks with NumPy. Defaults to True if NumPy is installed.
+    """
+
+    def __init__(
+        self,
+        group_by: str | None = None,
+        histogram_edges: Iterable[float] = DEFAULT_HISTOGRAM_EDGES,
+        vectorized: bool | None = None,
+    ) -> None:
+        if group_by is not None and group_by not in GROUP_BY_CHOICES:
+            raise ValueError(f"cannot group traces by {group_by}")
+        if vectorized and numpy is None:
+            raise ValueError("vectorized analytics require NumPy")
+
+        self.group_by = group_by
+        self.histogram_edges = list(histogram_edges)
+        self.vectorized = numpy is not None if vectorized is None else vectorized
+
+        self.counts: Counter[Any] = Counter()
+        self.error_counts: Counter[Any] = Counter()
+        self.sketches: dict[Any, LatencySketch] = defaultdict(lambda: LatencySketch(settings.PROXY_ROLLUP_ACCURACY))
+        self.histogram = [0] * len(self.histogram_edges)
+
+    def get_keys(self, columns: dict[str, Any]) -> Any:
+        """Returns the group keys of the traces of a chunk, as an array or a list depending on the mode."""
+        if self.group_by is None:
+            return [0] * len(columns["endpoint"])
+        if self.group_by in BUCKET_WIDTHS:
+            width = BUCKET_WIDTHS[self.group_by]
+            if self.vectorized:
+                return numpy.floor_divide(columns["started_at"], width) * width
+            return [started_at // width * width for started_at in columns["started_at"]]
+        if self.group_by == "status_class":
+            if self.vectorized:
+                return numpy.floor_divide(columns["status_code"], 100)
+            return [status_code // 100 for status_code in columns["status_code"]]
+        return columns[self.group_by]
+
+    def add_chunk(self, chunk: dict[str, list[Any]]) -> None:
+        """Accumulates a chunk of traces.
+
+        Args:
+            chunk: The columns of the chunk, as yielded by :func:`iter_chunks`.
+        """
+        if self.vectorized:
+            self.add_arrays(chunk)
+        else:
+            self.add_rows(chunk)
+
+    def add_arrays(self, chunk: dict[str, list[Any]]) -> None:
+        """Accumulates a chunk of traces, column by column."""
+        # a missing status code is -1, and a missing latency is NaN
+        status_codes = numpy.asarray([-1 if code is None else code for code in chunk["status_code"]])
+        latencies = numpy.asarray(chunk["latency"], dtype=float)
+        keys, inverse = self.factorize(
+            self.get_keys(
+                {
+                    "endpoint": chunk["endpoint"],
+                    "status_code": status_codes,
+                    "started_at": numpy.asarray(chunk["started_at"], dtype=float),
+                }
+            )
+        )
+        keys = [self.format_key(key) for key in keys]
+
+        self.add_array_counts(keys, inverse, status_codes)
+
+        completed = ~numpy.isnan(latencies)
+        latencies, inverse = numpy.maximum(latencies[completed], 0), inverse[completed]
+        if latencies.size:
+            self.add_array_sketches(keys, inverse, latencies)
+            self.add_array_histogram(latencies)
+
+    def add_array_counts(self, keys: list[Any], inverse: Any, status_codes: Any) -> None:
+        """Counts the traces and the errors of a chunk by group.
+
+        Args:
+            keys: The distinct keys of the chunk.
+            inverse: The index of the key of every trace among them.
+            status_codes: The status code of every trace, -1 if missing.
+        """
+        errors = (status_codes < 0) | (status_codes >= 400)
+        for key, count, error_count in zip(
+            keys,
+            numpy.bincount(inverse, minlength=len(keys)).tolist(),
+            numpy.bincount(inverse, weights=errors, minlength=len(keys)).tolist(),
+        ):
+            self.counts[key] += count
+            self.error_counts[key] += int(error_count)
+
+    def add_array_sketches(self, keys: list[Any], inverse: Any, latencies: Any) -> None:
+        """Adds the latencies of the completed traces of a chunk to the sketches of their groups.
+
+        Args:
+            keys: The distinct keys of the chunk.
+            inverse: The index of the key of every completed trace among them.
+            latencies: The latency of every completed trace, not negative.
+        """
+        positive = latencies > 0
+        self.add_array_buckets(keys, inverse[positive], latencies[positive])
+
+        size = len(keys)
+        zeros = numpy.bincount(inverse[~positive], minlength=size)
+        counts = numpy.bincount(inverse, minlength=size)
+        sums = numpy.bincount(inverse, weights=latencies, minlength=size)
+        minimums, maximums = numpy.full(size, numpy.inf), numpy.full(size, -numpy.inf)
+        numpy.minimum.at(minimums, inverse, latencies)
+        numpy.maximum.at(maximums, inverse, latencies)
+
+        for group in numpy.flatnonzero(counts).tolist():
+            sketch = self.sketches[keys[group]]
+            sketch.zero_count += int(zeros[group])
+            sketch.count += int(counts[group])
+            sketch.sum += float(sums[group])
+            minimum, maximum = float(minimums[group]), float(maximums[group])
+            sketch.min = minimum if sketch.min is None else min(sketch.min, minimum)
+            sketch.max = maximum if sketch.max is None else max(sketch.max, maximum)
+
+    def add_array_buckets(self, keys: list[Any], inverse: Any, latencies: Any) -> None:
+        """Counts the positive latencies of a chunk in the buckets of the sketches of their groups.
+
+        The sketches are filled with one increment per group and bucket, instead of one per trace.
+
+        Args:
+            keys: The distinct keys of the chunk.
+            inverse: The index of the key of every latency among them.
+            latencies: The positive latencies.
+        """
+        if not latencies.size:
+            return
+
+        log_gamma = LatencySketch(settings.PROXY_ROLLUP_ACCURACY).log_gamma
+        indexes = numpy.ceil(numpy.log(latencies) / log_gamma).astype(numpy.int64)
+
+        # the group and the bucket of each latency packed in a single integer, for a one-dimensional count
+        offset, span = int(indexes.min()), int(indexes.max() - indexes.min()) + 1
+        pairs, counts = numpy.unique(inverse * span + (indexes - offset), return_counts=True)
+        for pair, count in zip(pairs.tolist(), counts.tolist()):
+            group, index = divmod(pair, span)
+            self.sketches[keys[group]].buckets[index + offset] += count
+
+    def add_array_histogram(self, latencies: Any) -> None:
+        """Counts the latencies of the completed traces of a chunk in the bins of the histogram."""
+        bins = numpy.searchsorted(self.histogram_edges, latencies, side="right") - 1
+        for index, count in enumerate(numpy.bincount(bins[bins >= 0], minlength=len(self.histogram_edges)).tolist()):
+            self.histogram[index] += count
+
+    def factorize(self, keys: Any) -> tuple[list[Any], Any]:
+        """Returns the distinct keys of a chunk and the index of the key of every trace among them."""
+        if isinstance(keys, numpy.ndarray):
+            distinct, inverse = numpy.unique(keys, return_inverse=True)
+            return distinct.tolist(), inverse
+
+        # hashing is faster than sorting for strings
+        indexes: dict[Any, int] = {}
+        inverse = numpy.fromiter((indexes.setdefault(key, len(indexes)) for key in keys), dtype=numpy.int64)
+        return list(indexes), inverse
+
+    def add_rows(self, chunk: dict[str, list[Any]]) -> None:
+        """Accumulates a chunk of traces, row by row."""
+        chunk = {**chunk, "status_code": [-1 if code is None else code for code in chunk["status_code"]]}
+
+        for key, status_code, latency in zip(self.get_keys(chunk), chunk["status_code"], chunk["latency"]):
+            key = self.format_key(key)
+            self.counts[key] += 1
+            self.error_counts[key] += status_code < 0 or status_code >= 400
+
+            if latency is None:
+                continue
+
+            latency = max(latency, 0.0)
+            self.sketches[key].add(latency)
+
+            for index in reversed(range(len(self.histogram_edges))):
+                if latency >= self.histogram_edges[index]:
+                    self.histogram[index] += 1
+                    break
+
+    def format_key(self, key: Any) -> Any:
+        """Returns the key of a group as exposed in the results."""
+        if self.group_by is None:
+            return None
+        if self.group_by in BUCKET_WIDTHS:
+            return datetime.datetime.fromtimestamp(key, tz=datetime.timezone.utc)
+        if self.group_by in ("status_code", "status_class"):
+            return None if key < 0 else int(key)
+        return key
+
+    def get_results(self, percentiles: Iterable[float]) -> dict[str, Any]:
+        """Returns the accumulated analytics.
+
+        Args:
+            percentiles: The percentiles of the latency to estimate, between 0 and 100.
+
+        Returns:
+            The counts and latency statistics of every group and of all the traces, and the latency histogram.
+        """
+        percentiles = list(percentiles)
+
+        def get_stats(count: int, error_count: int, sketch: LatencySketch) -> dict[str, Any]:
+            return {
+                "count": count,
+                "error_count": error_count,
+                "latency": {
+                    "count": sketch.count,
+                    "mean": sketch.mean,
+                    "min": sketch.min,
+                    "max": sketch.max,
+                    "percentiles": {f"p{p:g}": sketch.quantile(p / 100) for p in percentiles},
+                },
+            }
+
+        total = LatencySketch(settings.PROXY_ROLLUP_ACCURACY)
+        for sketch in self.sketches.values():
+            total.merge(sketch)
+
+        groups = [
+            {"key": key, **get_stats(self.counts[key], self.error_counts[key], self.sketches[key])}
+            for key in sorted(self.counts, key=lambda key: (key is None, key))
+        ]
+
+        return {
+            "total": get_stats(sum(self.counts.values()), sum(self.error_counts.values()), total),
+            "groups": groups if self.group_by is not None else [],
+            "histogram": [
+                {"start": start, "end": end, "count": count}
+                for start, end, count in zip(
+                    self.histogram_edges, [*self.histogram_edges[1:], math.inf], self.histogram
+                )
+            ],
+        }
+
+
+# pylint: disable=too-many-arguments
+def analyze_traces(
+    queryset: QuerySet[Trace],
+    group_by: str | None = None,
+    percentiles: Iterable[float] = (50, 90, 95, 99),
+    histogram_edges: Iterable[float] = DEFAULT_HISTOGRAM_EDGES,
+    chunk_size: int | None = None,
+    vectorized: bool | None = None,
+    archives: "ArchiveQuery | None" = None,
+) -> dict[str, Any]:
+    """Computes group-bys, percentiles and a histogram of the latency of traces, reading them once in chunks.
+
+    Args:
+        queryset: The traces, filtered.
+        group_by: The key to group the traces by, one of :data:`GROUP_BY_CHOICES`, None not to group them.
+        percentiles: The percentiles of the latency to estimate, between 0 and 100.
+        histogram_edges: The increasing edges of the latency histogram, in milliseconds.
+        chunk_size: The number of traces per chunk. Defaults to `PROXY_ANALYTICS_CHUNK_SIZE`.
+        vectorized: Whether to process the chunks with NumPy. Defaults to True if NumPy is installed.
+        archives: The query of the archived traces analyzed along with the others, None not to read the archives.
+
+    Returns:
+        The analytics, see :meth:`TraceAnalytics.get_results`.
+    """
+    analytics = TraceAnalytics(group_by, histogram_edges, vectorized)
+
+    for chunk in iter_chunks(queryset, chunk_size):
+        analytics.add_chunk(chunk)
+
+    if archives is not None:
+        for table in archives.iter_tables(chunk_size or settings.PROXY_ANALYTICS_CHUNK_SIZE):
+            analytics.add_chunk(get_archive_chunk(table))
+
+    return analytics.get_results(percentiles)
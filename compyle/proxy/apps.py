@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.models.signals import post_delete, post_save
 from django.utils.translation import gettext_lazy as _
 
 
@@ -8,3 +10,16 @@ class ProxyConfig(AppConfig):
     name = "compyle.proxy"
     verbose_name = _("proxy")
     verbose_name_plural = _("proxies")
+
+    def ready(self) -> None:
+        """Connects the receivers publishing the changes of the catalog and registers the system checks."""
+        # pylint: disable=import-outside-toplevel
+        from compyle.proxy import catalog
+        from compyle.proxy.checks import check_archive_dependencies
+        from compyle.proxy.models import Endpoint, Service
+
+        for sender in (Service, Endpoint):
+            post_save.connect(catalog.publish_change, sender=sender)
+            post_delete.connect(catalog.publish_change, sender=sender)
+
+        checks.register(check_archive_dependencies)
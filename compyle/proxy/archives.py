@@ -0,0 +1,356 @@
+import datetime
+import os
+import re
+from collections import defaultdict
+from collections.abc import Generator, Iterator
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from compyle.lib.iterators import fetch_chunks
+from compyle.proxy.exports import (
+    EXPORT_COLUMNS,
+    EXPORT_FIELDS,
+    get_arrow_schema,
+    pyarrow,
+)
+from compyle.proxy.filtersets import TraceFilterSet
+from compyle.proxy.models import Endpoint, Trace, TraceRollupCursor
+from compyle.proxy.rollups import CURSOR_NAME
+from compyle.proxy.utils import parse_param_filter
+
+if pyarrow is not None:
+    import pyarrow.compute
+
+PARTITION_FORMAT = "date=%Y-%m-%d"
+"""The name of the directory of the archives of a day, by start date of the traces."""
+
+ARCHIVE_SUFFIX = ".arrow"
+"""The suffix of the archive files, in the Arrow IPC file format."""
+
+REFERENCE, STARTED_AT = EXPORT_FIELDS.index("reference"), EXPORT_FIELDS.index("started_at")
+"""The positions of the reference and of the start datetime in the rows of the traces."""
+
+RECORD_BATCH_SIZE = 64 * 1024
+"""The maximum number of traces per record batch of an archive file, the unit of the reads."""
+
+
+def is_archive_enabled() -> bool:
+    """Returns whether the traces are archived, i.e. `PROXY_TRACE_ARCHIVE_PATH` is set and PyArrow installed."""
+    return bool(settings.PROXY_TRACE_ARCHIVE_PATH) and pyarrow is not None
+
+
+def get_partition_path(day: datetime.date) -> Path:
+    """Returns the directory of the archives of the traces started on a day, in UTC."""
+    return Path(settings.PROXY_TRACE_ARCHIVE_PATH) / day.strftime(PARTITION_FORMAT)
+
+
+def write_archive(path: Path, rows: list[tuple[Any, ...]]) -> None:
+    """Writes traces to a zstd-compressed Arrow IPC file, atomically.
+
+    Args:
+        path: The path of the file.
+        rows: The rows of the traces, with the fields of :data:`compyle.proxy.exports.EXPORT_FIELDS`.
+    """
+    schema = get_arrow_schema()
+    table = pyarrow.Table.from_pydict(dict(zip(EXPORT_FIELDS, map(list, zip(*rows)))), schema=schema)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_suffix(".tmp")
+
+    options = pyarrow.ipc.IpcWriteOptions(compression="zstd")
+    with pyarrow.ipc.new_file(str(temporary_path), schema, options=options) as writer:
+        writer.write_table(table, max_chunksize=RECORD_BATCH_SIZE)
+
+    os.replace(temporary_path, path)
+
+
+def archive_traces(
+    before: datetime.datetime | None = None, batch_size: int | None = None
+) -> Generator[tuple[int, list[Path]], None, None]:
+    """Moves the traces started before a datetime to archive files, then deletes them, in batches.
+
+    The traces are read in the order of their identifiers and written to one file per start day and batch, named
+    after the identifiers of the batch, so that a batch archived again after a failure overwrites its files instead
+    of duplicating them. Only the traces already rolled up are archived, for the rollups to stay complete.
+
+    Args:
+        before: The datetime before which traces are archived. Defaults to `PROXY_TRACE_ARCHIVE_AFTER` days ago.
+        batch_size: The maximum number of traces archived at once. Defaults to `PROXY_TRACE_ARCHIVE_BATCH_SIZE`.
+
+    Returns:
+        A generator that yields, for each batch, the number of traces archived and the files written.
+
+    Raises:
+        RuntimeError: if the archival is not enabled.
+    """
+    if not is_archive_enabled():
+        raise RuntimeError("archiving traces requires PROXY_TRACE_ARCHIVE_PATH and PyArrow")
+
+    before = before or timezone.now() - datetime.timedelta(days=settings.PROXY_TRACE_ARCHIVE_AFTER)
+    batch_size = batch_size or settings.PROXY_TRACE_ARCHIVE_BATCH_SIZE
+
+    cursor = TraceRollupCursor.objects.filter(name=CURSOR_NAME).first()
+    if cursor is None:
+        return
+
+    traces = Trace.objects.filter(started_at__lt=before, id__lte=cursor.last_trace_id).order_by("id")
+
+    # the rows are read as they are, the JSON fields as text
+    while rows := next(fetch_chunks(traces.values_list("id", *EXPORT_COLUMNS.values())[:batch_size], batch_size), None):
+        first_id, last_id = rows[0][0], rows[-1][0]
+
+        days: dict[datetime.date, list[tuple[Any, ...]]] = defaultdict(list)
+        for _, *row in rows:
+            days[row[STARTED_AT].astimezone(datetime.timezone.utc).date()].append(tuple(row))
+
+        paths = []
+        for day, day_rows in sorted(days.items()):
+            path = get_partition_path(day) / f"{first_id:020d}-{last_id:020d}{ARCHIVE_SUFFIX}"
+            write_archive(path, sorted(day_rows, key=lambda row: (row[STARTED_AT], row[REFERENCE])))
+            paths.append(path)
+
+        # the batch is the range of identifiers read, the traces committed since cannot be in it being settled
+        with transaction.atomic():
+            traces.filter(id__gte=first_id, id__lte=last_id).delete()
+
+        yield len(rows), paths
+
+        if len(rows) < batch_size:
+            break
+
+
+# pylint: disable=too-many-instance-attributes
+class ArchiveQuery:
+    """The filters of the traces API applied to the archived traces, read from memory-mapped files.
+
+    Args:
+        start: The start datetime of the traces, inclusive.
+        end: The start datetime of the traces, exclusive.
+        references: The references of the traces.
+        endpoints: The references of the endpoints of the traces.
+        status_codes: The status codes of the traces.
+        status_classes: The status classes of the traces.
+        status_range: The range of the status codes of the traces, start inclusive and end exclusive.
+        url_params: The values of the parameters of the URL of the traces, all required.
+        search: The terms of a search, each one contained in the reference or the URL of the trace, or in the
+            reference of its endpoint or its authentication.
+        empty: Whether no trace matches the filters.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        *,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+        references: list[str] | None = None,
+        endpoints: list[str] | None = None,
+        status_codes: list[int] | None = None,
+        status_classes: list[int] | None = None,
+        status_range: tuple[int, int] | None = None,
+        url_params: dict[str, list[str]] | None = None,
+        search: list[str] | None = None,
+        empty: bool = False,
+    ) -> None:
+        self.start = start
+        self.end = end
+        self.references = references
+        self.endpoints = endpoints
+        self.status_codes = status_codes
+        self.status_classes = status_classes
+        self.status_range = status_range
+        self.url_params = url_params
+        self.search = search
+        self.empty = empty
+
+    @classmethod
+    def from_filterset(cls, filterset: TraceFilterSet, search: str | None = None) -> "ArchiveQuery":
+        """Builds the query of the filters of a valid :class:`compyle.proxy.filtersets.TraceFilterSet`.
+
+        Args:
+            filterset: The filterset, validated.
+            search: The search parameter of the request, if any.
+
+        Returns:
+            The query.
+        """
+        data = filterset.form.cleaned_data
+        query = cls(
+            start=data.get("started_after"),
+            end=data.get("started_before"),
+            references=data.get("references") or None,
+            endpoints=data.get("endpoints") or None,
+            search=search.replace(",", " ").split() if search else None,
+        )
+
+        if services := data.get("services"):
+            endpoints = Endpoint.objects.filter(service__reference__in=services).values_list("reference", flat=True)
+            query.endpoints = [
+                endpoint for endpoint in endpoints if query.endpoints is None or endpoint in query.endpoints
+            ]
+
+        query.add_status_filters(
+            data.get("status_code"), data.get("status_classes"), data.get("status_code_startswith")
+        )
+        if param := data.get("param"):
+            query.add_url_params_filter(param)
+
+        return query
+
+    def add_status_filters(
+        self, status_codes: list[str] | None, status_classes: list[str] | None, prefix: str | None
+    ) -> None:
+        """Restricts the query to the status filters of a :class:`compyle.proxy.filtersets.TraceFilterSet`.
+
+        Args:
+            status_codes: The status codes, if any.
+            status_classes: The status classes, if any.
+            prefix: The leading digits of the status codes, if any.
+        """
+        try:
+            if status_codes:
+                self.status_codes = [int(status_code) for status_code in status_codes]
+            if status_classes:
+                self.status_classes = [int(status_class) for status_class in status_classes]
+        except ValueError:
+            self.empty = True
+
+        if not prefix:
+            return
+
+        # as in TraceFilterSet.filter_status_prefix
+        if not prefix.isdigit() or len(prefix) > 3:
+            self.empty = True
+        elif len(prefix) == 1:
+            status_class = int(prefix)
+            self.status_classes = [value for value in self.status_classes or [status_class] if value == status_class]
+        else:
+            scale = 10 ** (3 - len(prefix))
+            self.status_range = (int(prefix) * scale, (int(prefix) + 1) * scale)
+
+    def add_url_params_filter(self, param: str) -> None:
+        """Restricts the query to the URL parameters filter of a :class:`compyle.proxy.filtersets.TraceFilterSet`.
+
+        Args:
+            param: The comma-separated `name:value` pairs.
+        """
+        # as in TraceFilterSet.filter_url_params
+        self.url_params = parse_param_filter(param)
+        if self.url_params is None:
+            self.empty = True
+
+    def get_expression(self) -> "pyarrow.compute.Expression | None":
+        """Returns the expression filtering the rows of the archives, None if all of them match."""
+        field = pyarrow.compute.field
+        conditions = []
+
+        if self.empty:
+            return pyarrow.compute.scalar(False)
+        if self.start is not None:
+            conditions.append(field("started_at") >= self.start)
+        if self.end is not None:
+            conditions.append(field("started_at") < self.end)
+        if self.references is not None:
+            conditions.append(field("reference").isin(self.references))
+        if self.endpoints is not None:
+            conditions.append(field("endpoint").isin(self.endpoints))
+        conditions.extend(self.get_status_conditions())
+        conditions.extend(self.get_text_conditions())
+
+        if not conditions:
+            return None
+
+        expression = conditions[0]
+        for condition in conditions[1:]:
+            expression &= condition
+        return expression
+
+    def get_status_conditions(self) -> list["pyarrow.compute.Expression"]:
+        """Returns the conditions of the status filters on the rows of the archives."""
+        field = pyarrow.compute.field
+        conditions = []
+
+        if self.status_codes is not None:
+            conditions.append(field("status_code").isin(self.status_codes))
+        if self.status_classes is not None:
+            conditions.append(pyarrow.compute.divide(field("status_code"), 100).isin(self.status_classes))
+        if self.status_range is not None:
+            conditions.append(
+                (field("status_code") >= self.status_range[0]) & (field("status_code") < self.status_range[1])
+            )
+
+        return conditions
+
+    def get_text_conditions(self) -> list["pyarrow.compute.Expression"]:
+        """Returns the conditions of the URL parameters and search filters on the rows of the archives."""
+        field = pyarrow.compute.field
+        conditions = []
+
+        # the archives have no URL parameters column, the pairs are matched in the query string of the URL instead
+        for name, values in (self.url_params or {}).items():
+            for value in values:
+                pattern = f"[?&]{re.escape(urlencode({name: value}))}(&|#|$)"
+                conditions.append(pyarrow.compute.match_substring_regex(field("url"), pattern))
+
+        for term in self.search or []:
+            matches = [
+                pyarrow.compute.match_substring(field(name), term, ignore_case=True)
+                for name in ("reference", "url", "endpoint", "authentication")
+            ]
+            conditions.append(matches[0] | matches[1] | matches[2] | matches[3])
+
+        return conditions
+
+    def get_paths(self) -> list[Path]:
+        """Returns the archive files of the days of the range of the query, in time order."""
+        root = Path(settings.PROXY_TRACE_ARCHIVE_PATH)
+        if self.empty or not root.is_dir():
+            return []
+
+        paths = []
+        for partition in sorted(root.iterdir()):
+            try:
+                day = datetime.datetime.strptime(partition.name, PARTITION_FORMAT).date()
+            except ValueError:
+                continue
+
+            if self.start is not None and day < self.start.astimezone(datetime.timezone.utc).date():
+                continue
+            if self.end is not None and day > self.end.astimezone(datetime.timezone.utc).date():
+                continue
+
+            paths.extend(sorted(partition.glob(f"*{ARCHIVE_SUFFIX}")))
+
+        return paths
+
+    def iter_tables(self, chunk_size: int) -> Iterator["pyarrow.Table"]:
+        """Reads the archived traces matching the query, one record batch at a time.
+
+        The files are memory-mapped, so that only the pages of the batches being read are loaded, and the batches
+        are decompressed and filtered one by one.
+
+        Args:
+            chunk_size: The maximum number of traces per table.
+
+        Yields:
+            The tables of the matching traces, with the fields of :data:`compyle.proxy.exports.EXPORT_FIELDS`.
+        """
+        expression = self.get_expression()
+
+        for path in self.get_paths():
+            with pyarrow.memory_map(str(path)) as source:
+                reader = pyarrow.ipc.open_file(source)
+
+                for index in range(reader.num_record_batches):
+                    table = pyarrow.Table.from_batches([reader.get_batch(index)])
+                    if expression is not None:
+                        table = table.filter(expression)
+
+                    for batch in table.to_batches(max_chunksize=chunk_size):
+                        if batch.num_rows:
+                            yield pyarrow.Table.from_batches([batch])
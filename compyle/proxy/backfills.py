@@ -0,0 +1,31 @@
+from django.conf import settings
+
+from compyle.proxy.models import Trace
+from compyle.proxy.utils import group_url_params
+
+
+def backfill_url_params(batch_size: int | None = None, after_id: int = 0) -> tuple[int, int]:
+    """Stores the URL parameters of a batch of traces written before they were stored.
+
+    Args:
+        batch_size: The maximum number of traces updated. Defaults to `PROXY_TRACE_BACKFILL_BATCH_SIZE`.
+        after_id: The identifier after which traces are read, in order.
+
+    Returns:
+        The number of traces updated and the identifier of the last one.
+    """
+    batch_size = batch_size or settings.PROXY_TRACE_BACKFILL_BATCH_SIZE
+
+    traces = list(
+        Trace.objects.filter(url_params__isnull=True, url__contains="?", id__gt=after_id)
+        .order_by("id")
+        .only("id", "started_at", "url")[:batch_size]
+    )
+    if not traces:
+        return 0, after_id
+
+    for trace in traces:
+        trace.url_params = group_url_params(trace.url)
+    Trace.objects.bulk_update(traces, ["url_params"])
+
+    return len(traces), traces[-1].id
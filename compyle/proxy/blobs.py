@@ -0,0 +1,170 @@
+import hashlib
+import json
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+from cachetools import LRUCache
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+
+from compyle.proxy.models import Trace, TraceBlob
+
+BLOB_FIELDS = {"headers": "headers_blob", "payload": "payload_blob"}
+"""The JSON fields of the traces that can be deduplicated, with the foreign keys of their blobs."""
+
+_cache: LRUCache[str, Any] = LRUCache(maxsize=settings.PROXY_TRACE_BLOB_CACHE_SIZE)
+_lock = threading.Lock()
+
+
+def clear_cache() -> None:
+    """Forgets the blobs cached by this process."""
+    with _lock:
+        _cache.clear()
+
+
+def canonicalize(content: Any) -> bytes:
+    """Returns the canonical JSON of a document, which does not depend on the order of its keys."""
+    return json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def store_blobs(contents: Iterable[Any]) -> list[str | None]:
+    """Stores JSON documents as blobs, unless they already are, in a single statement at most.
+
+    The blobs known to this process, written or read recently, are not written again: for the documents shared
+    by many traces, the cost of a trace write comes down to a digest.
+
+    Args:
+        contents: The documents, None for no document.
+
+    Returns:
+        The digests of the documents, in order, None for no document.
+    """
+    digests: list[str | None] = []
+    missing: dict[str, TraceBlob] = {}
+
+    for content in contents:
+        if content is None:
+            digests.append(None)
+            continue
+
+        canonical = canonicalize(content)
+        digest = hashlib.sha256(canonical).hexdigest()
+        digests.append(digest)
+
+        with _lock:
+            known = digest in _cache
+        if not known:
+            missing[digest] = TraceBlob(digest=digest, content=content, size=len(canonical))
+
+    if missing:
+        TraceBlob.objects.bulk_create(missing.values(), ignore_conflicts=True)
+        with _lock:
+            _cache.update({digest: blob.content for digest, blob in missing.items()})
+
+    return digests
+
+
+def detach_contents(traces: Iterable[Trace]) -> None:
+    """Moves the headers and payloads of unsaved traces to blobs, the traces referencing them instead.
+
+    Args:
+        traces: The traces, not saved yet.
+    """
+    traces = list(traces)
+    digests = store_blobs(getattr(trace, field) for trace in traces for field in BLOB_FIELDS)
+
+    for index, trace in enumerate(traces):
+        for offset, (field, blob_field) in enumerate(BLOB_FIELDS.items()):
+            setattr(trace, f"{blob_field}_id", digests[index * len(BLOB_FIELDS) + offset])
+            setattr(trace, field, None)
+
+
+def load_blobs(digests: Iterable[str | None]) -> dict[str, Any]:
+    """Returns the contents of blobs, the ones not cached by this process being read in a single query.
+
+    Args:
+        digests: The digests of the blobs, None being ignored.
+
+    Returns:
+        The contents of the blobs, by digest.
+    """
+    digests = {digest for digest in digests if digest is not None}
+
+    with _lock:
+        contents = {digest: _cache[digest] for digest in digests if digest in _cache}
+
+    if missing := digests - contents.keys():
+        loaded = dict(TraceBlob.objects.filter(digest__in=missing).values_list("digest", "content"))
+        with _lock:
+            _cache.update(loaded)
+        contents.update(loaded)
+
+    return contents
+
+
+def get_content(trace: Trace, field: str) -> Any:
+    """Returns the headers or the payload of a trace, whether stored inline or as a blob.
+
+    Args:
+        trace: The trace.
+        field: The field, one of :data:`BLOB_FIELDS`.
+
+    Returns:
+        The JSON document.
+    """
+    digest = getattr(trace, f"{BLOB_FIELDS[field]}_id")
+    if digest is None:
+        return getattr(trace, field)
+
+    return load_blobs([digest])[digest]
+
+
+def deduplicate_traces(batch_size: int | None = None, after_id: int = 0) -> tuple[int, int]:
+    """Moves the headers and payloads stored inline by a batch of traces to blobs.
+
+    Args:
+        batch_size: The maximum number of traces updated. Defaults to `PROXY_TRACE_BLOB_BATCH_SIZE`.
+        after_id: The identifier after which traces are read, in order.
+
+    Returns:
+        The number of traces updated and the identifier of the last one.
+    """
+    batch_size = batch_size or settings.PROXY_TRACE_BLOB_BATCH_SIZE
+
+    traces = list(
+        Trace.objects.filter(Q(headers__isnull=False) | Q(payload__isnull=False), id__gt=after_id)
+        .order_by("id")
+        .only("id", "started_at", *BLOB_FIELDS)[:batch_size]
+    )
+    if not traces:
+        return 0, after_id
+
+    detach_contents(traces)
+    Trace.objects.bulk_update(traces, [*BLOB_FIELDS, *BLOB_FIELDS.values()])
+
+    return len(traces), traces[-1].id
+
+
+def get_blob_report() -> dict[str, int]:
+    """Returns the storage and write savings of the blobs, compared to the documents being stored by every trace.
+
+    Returns:
+        The number and size of the blobs, the number and size of the documents referencing them, and the number of
+        traces still storing documents inline.
+    """
+    blobs = TraceBlob.objects.aggregate(count=Count("digest"), size=Sum("size", default=0))
+    references = Trace.objects.aggregate(
+        headers=Count("headers_blob"),
+        payloads=Count("payload_blob"),
+        headers_size=Sum("headers_blob__size", default=0),
+        payloads_size=Sum("payload_blob__size", default=0),
+    )
+
+    return {
+        "blob_count": blobs["count"],
+        "blob_size": blobs["size"],
+        "reference_count": references["headers"] + references["payloads"],
+        "reference_size": references["headers_size"] + references["payloads_size"],
+        "inline_count": Trace.objects.filter(Q(headers__isnull=False) | Q(payload__isnull=False)).count(),
+    }
@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+from collections.abc import Iterable
+from typing import Any
+
+import redis
+from cachetools import TTLCache
+from django.conf import settings
+from django.db import transaction
+
+from compyle.lib.redis import get_redis
+from compyle.proxy.models import Endpoint, Service
+
+CHANNEL = "proxy:catalog:changes"
+"""The Redis pub/sub channel of the endpoints and services that changed, as `endpoint:<reference>` messages."""
+
+RETRY_DELAY = 5
+"""The number of seconds the listener waits before subscribing again once disconnected from Redis."""
+
+_cache: TTLCache[str, Endpoint] = TTLCache(
+    maxsize=settings.PROXY_CATALOG_CACHE_SIZE, ttl=settings.PROXY_CATALOG_CACHE_TTL
+)
+_lock = threading.Lock()
+_generation = 0  # pylint: disable=invalid-name
+_subscribed = threading.Event()
+_listener: threading.Thread | None = None
+
+
+def clear_cache() -> None:
+    """Forgets the endpoints cached by this process."""
+    global _generation  # pylint: disable=global-statement
+    with _lock:
+        _cache.clear()
+        _generation += 1
+
+
+def evict(message: str) -> None:
+    """Forgets the cached endpoints a change is about, all of them if the change is unknown.
+
+    Args:
+        message: The change, `endpoint:<reference>` or `service:<reference>` for all the endpoints of the service.
+    """
+    global _generation  # pylint: disable=global-statement
+    kind, _, reference = message.partition(":")
+
+    with _lock:
+        # the endpoints being read while the change is received are not cached, they may predate it
+        _generation += 1
+        if kind == "endpoint":
+            _cache.pop(reference, None)
+        elif kind == "service":
+            for key in [key for key, endpoint in _cache.items() if endpoint.service_id == reference]:
+                del _cache[key]
+        else:
+            _cache.clear()
+
+
+def subscribe(pubsub: redis.client.PubSub) -> None:
+    """Evicts the cached endpoints as their changes are published, until disconnected from Redis.
+
+    The endpoints are only cached while subscribed, the cache being cleared on subscription as changes may have
+    been missed in between.
+
+    Args:
+        pubsub: The pub/sub connection.
+    """
+    try:
+        pubsub.subscribe(CHANNEL)
+        for message in pubsub.listen():
+            if message["type"] == "subscribe":
+                clear_cache()
+                _subscribed.set()
+            elif message["type"] == "message":
+                evict(message["data"].decode())
+    finally:
+        _subscribed.clear()
+
+
+def listen() -> None:
+    """Subscribes to the changes of the catalog for as long as the process runs, again whenever disconnected."""
+    while True:
+        pubsub = get_redis().pubsub()
+        try:
+            subscribe(pubsub)
+        except redis.RedisError:
+            pass
+        finally:
+            pubsub.close()
+        time.sleep(RETRY_DELAY)
+
+
+def start_listener() -> None:
+    """Starts the thread subscribed to the changes of the catalog, unless already running in this process."""
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None and _listener.is_alive():
+        return
+
+    with _lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(target=listen, name="catalog-listener", daemon=True)
+            _listener.start()
+
+
+def load_endpoint(reference: str) -> Endpoint:
+    """Reads an endpoint along with its service from the database."""
+    return Endpoint.objects.select_related("service").get(reference=reference)
+
+
+def get_endpoint(reference: str) -> Endpoint:
+    """Returns an endpoint along with its service, from the cache of the process if it holds it.
+
+    If `PROXY_CATALOG_CACHE` is enabled, the endpoints are cached by each process for `PROXY_CATALOG_CACHE_TTL`
+    seconds at most, and evicted as soon as they or their service change. The cached endpoints are shared by the
+    threads of the process and must not be modified.
+
+    Args:
+        reference: The reference of the endpoint.
+
+    Returns:
+        The endpoint, with its service.
+
+    Raises:
+        Endpoint.DoesNotExist: if there is no such endpoint, or if it is marked as deleted.
+    """
+    if not settings.PROXY_CATALOG_CACHE:
+        return load_endpoint(reference)
+
+    start_listener()
+    with _lock:
+        # the changes are missed while disconnected from Redis, the cache being cleared once subscribed again
+        endpoint = _cache.get(reference) if _subscribed.is_set() else None
+        generation = _generation
+    if endpoint is not None:
+        return endpoint
+
+    endpoint = load_endpoint(reference)
+    with _lock:
+        if _subscribed.is_set() and generation == _generation:
+            _cache[reference] = endpoint
+    return endpoint
+
+
+def publish_changes(model: type[Service] | type[Endpoint], references: Iterable[str]) -> None:
+    """Publishes the changes of endpoints or services once the transaction is committed, for every process to evict
+    them from its cache.
+
+    Args:
+        model: The model of the changed rows.
+        references: The references of the changed rows.
+    """
+    if not settings.PROXY_CATALOG_CACHE:
+        return
+
+    kind = model._meta.model_name  # pylint: disable=protected-access
+    messages = [f"{kind}:{reference}" for reference in references]
+
+    def publish() -> None:
+        pipeline = get_redis().pipeline(transaction=False)
+        for message in messages:
+            pipeline.publish(CHANNEL, message)
+        pipeline.execute()
+
+    if messages:
+        # a lost change is only cached until its expiry, it must not fail the committed write
+        transaction.on_commit(publish, robust=True)
+
+
+# pylint: disable=unused-argument
+def publish_change(sender: type[Service] | type[Endpoint], instance: Service | Endpoint, **kwargs: Any) -> None:
+    """Publishes the change of a saved or deleted endpoint or service, connected to their signals by the app."""
+    publish_changes(sender, [instance.pk])
+
+
+def _reset() -> None:
+    """Forgets the cache and the listener inherited by a forked process, which does not run the listener thread."""
+    global _lock, _subscribed, _listener  # pylint: disable=global-statement
+    _lock, _subscribed, _listener = threading.Lock(), threading.Event(), None
+    _cache.clear()
+
+
+os.register_at_fork(after_in_child=_reset)
@@ -0,0 +1,20 @@
+from typing import Any
+
+from django.conf import settings
+from django.core.checks import CheckMessage, Error
+
+from compyle.proxy.exports import pyarrow
+
+
+# pylint: disable=unused-argument
+def check_archive_dependencies(app_configs: Any, **kwargs: Any) -> list[CheckMessage]:
+    """Checks that PyArrow is installed when the traces are archived, the archival being disabled without it."""
+    if settings.PROXY_TRACE_ARCHIVE_PATH and pyarrow is None:
+        return [
+            Error(
+                "PROXY_TRACE_ARCHIVE_PATH is set but PyArrow is not installed, the traces would not be archived.",
+                hint="Install the `archives` extra, or unset PROXY_TRACE_ARCHIVE_PATH.",
+                id="proxy.E001",
+            )
+        ]
+    return []
@@ -1,8 +1,9 @@
+import datetime
 from collections.abc import Callable
 from typing import Any
 
 import requests
-from django.db.models import TextChoices
+from django.db.models import IntegerChoices, TextChoices
 from django.utils.translation import pgettext_lazy
 
 
@@ -49,6 +50,54 @@ class HttpMethod(TextChoices):
         return self.func.__str__()
 
 
+class StatusClass(IntegerChoices):
+    """This enum represents the classes of HTTP status codes, the first digit of the code."""
+
+    INFORMATIONAL = 1, pgettext_lazy("status class", "1xx informational")
+    SUCCESS = 2, pgettext_lazy("status class", "2xx success")
+    REDIRECT = 3, pgettext_lazy("status class", "3xx redirect")
+    CLIENT_ERROR = 4, pgettext_lazy("status class", "4xx client error")
+    SERVER_ERROR = 5, pgettext_lazy("status class", "5xx server error")
+
+    @classmethod
+    def of(cls, status_code: int | None) -> "StatusClass | None":
+        """Returns the class of a status code.
+
+        Args:
+            status_code: The status code.
+
+        Returns:
+            The status class, or None if there is no status code or it is out of the standard classes.
+        """
+        if status_code is None or not 100 <= status_code < 600:
+            return None
+        return cls(status_code // 100)
+
+
+class RollupResolution(TextChoices):
+    """This enum represents the time buckets of the trace rollups, from the finest to the coarsest."""
+
+    MINUTE = "minute", pgettext_lazy("rollup resolution", "Minute")
+    HOUR = "hour", pgettext_lazy("rollup resolution", "Hour")
+    DAY = "day", pgettext_lazy("rollup resolution", "Day")
+
+    def truncate(self, value: datetime.datetime) -> datetime.datetime:
+        """Returns the start, in UTC, of the bucket of a datetime.
+
+        Args:
+            value: The datetime.
+
+        Returns:
+            The start of the bucket.
+        """
+        value = value.astimezone(datetime.timezone.utc).replace(second=0, microsecond=0)
+        if self in (RollupResolution.HOUR, RollupResolution.DAY):
+            value = value.replace(minute=0)
+        if self == RollupResolution.DAY:
+            value = value.replace(hour=0)
+        return value
+
+
 class ResponseType(TextChoices):
     """This enum represents the response types supported by the API."""
 
@@ -57,6 +106,13 @@ class ResponseType(TextChoices):
     RAW = "raw", pgettext_lazy("response type", "RAW")
 
 
+class ResponseCompression(TextChoices):
+    """This enum represents the compression algorithms of the captured response bodies."""
+
+    ZSTD = "zstd", pgettext_lazy("response compression", "Zstandard")
+    ZLIB = "zlib", pgettext_lazy("response compression", "zlib")
+
+
 class AuthFlow(TextChoices):
     """This enum represents high-level authentication flow supported by a service."""
 
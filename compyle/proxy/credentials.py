@@ -0,0 +1,181 @@
+from collections.abc import Generator, Iterable
+from typing import Any
+
+from django.conf import settings
+from django.db.models import BinaryField, Value
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from compyle.lib.crypto import decrypt_value, derive_key, encrypt_value
+from compyle.lib.iterators import batched, parallel_map
+from compyle.proxy.models import Authentication
+
+ENCRYPTED_FIELDS = ("login", "password", "client_id", "client_secret", "api_key")
+"""The :class:`compyle.proxy.models.Authentication` fields stored encrypted."""
+
+
+def _deduplicate(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Keeps the last row of each email of a batch, as a single upsert cannot write the same row twice."""
+    return list({row.get("email"): row for row in rows}.values())
+
+
+def _encrypt_batch(args: tuple[list[dict[str, Any]], bytes]) -> list[dict[str, Any]]:
+    """Encrypts the credentials of a batch of rows, run inside the worker processes."""
+    rows, key = args
+    return [{**row, **{field: encrypt_value(row.get(field), key) for field in ENCRYPTED_FIELDS}} for row in rows]
+
+
+def _decrypt_with_any(ciphertext: bytes | None, keys: tuple[bytes, ...]) -> tuple[Any, int]:
+    """Decrypts a ciphertext with the first key that succeeds and returns the value and the index of that key."""
+    for index, key in enumerate(keys):
+        try:
+            value = decrypt_value(ciphertext, key)
+        except Exception:  # pylint: disable=broad-except
+            continue
+        if value is None or isinstance(value, str):
+            return value, index
+    raise ValueError("the value could not be decrypted with any of the given keys")
+
+
+def _reencrypt_batch(args: tuple[list[dict[str, Any]], bytes, bytes]) -> tuple[list[dict[str, Any]], str]:
+    """Re-encrypts the credentials of a batch of rows with the new key, run inside the worker processes.
+
+    Rows whose fields all decrypt with the new key already are left out, which makes a rotation resumable.
+    """
+    rows, old_key, new_key = args
+    rotated = []
+
+    for row in rows:
+        values = {field: _decrypt_with_any(row[field], (new_key, old_key)) for field in ENCRYPTED_FIELDS}
+
+        if any(index == 1 for _, index in values.values()):
+            rotated.append(
+                {
+                    "reference": row["reference"],
+                    **{field: encrypt_value(value, new_key) for field, (value, _) in values.items()},
+                }
+            )
+
+    return rotated, rows[-1]["reference"]
+
+
+def _raw(value: memoryview | None) -> bytes | None:
+    """Converts a binary column value into picklable bytes."""
+    return None if value is None else bytes(value)
+
+
+def _encrypted(value: bytes | None) -> Value | None:
+    """Wraps an already encrypted value so that the ORM writes it as-is instead of encrypting it again."""
+    return None if value is None else Value(value, output_field=BinaryField())
+
+
+def import_authentications(
+    rows: Iterable[dict[str, Any]],
+    batch_size: int | None = None,
+    processes: int | None = None,
+) -> Generator[int, None, None]:
+    """Creates or updates authentications in bulk, encrypting their credentials across a process pool.
+
+    Rows are matched on their email: existing authentications get their credentials replaced, and the last of the
+    rows of a same email wins.
+
+    Args:
+        rows: The authentications to import, as dictionaries of model field values. Consumed lazily.
+        batch_size: The number of rows encrypted and written at once. Defaults to `PROXY_CREDENTIALS_BATCH_SIZE`.
+        processes: The number of encryption processes. Defaults to `PROXY_CREDENTIALS_PROCESSES`.
+
+    Returns:
+        A generator that yields the number of rows written for each batch.
+    """
+    batch_size = batch_size or settings.PROXY_CREDENTIALS_BATCH_SIZE
+    processes = processes if processes is not None else settings.PROXY_CREDENTIALS_PROCESSES
+    key = derive_key()
+
+    batches = ((_deduplicate(batch), key) for batch in batched(rows, batch_size))
+
+    for batch in parallel_map(_encrypt_batch, batches, processes):
+        authentications = [
+            Authentication(
+                **{field: value for field, value in row.items() if field not in ENCRYPTED_FIELDS},
+                **{field: _encrypted(row[field]) for field in ENCRYPTED_FIELDS},
+            )
+            for row in batch
+        ]
+        Authentication.objects.bulk_create(
+            authentications,
+            update_conflicts=True,
+            unique_fields=["email"],
+            update_fields=[*ENCRYPTED_FIELDS, "updated_at"],
+        )
+
+        yield len(authentications)
+
+
+def rotate_authentications(
+    old_secret: str | None,
+    after: str | None = None,
+    batch_size: int | None = None,
+    processes: int | None = None,
+) -> Generator[tuple[int, str], None, None]:
+    """Re-encrypts the credentials of every authentication encrypted with an old key using the current one.
+
+    Authentications are walked in reference order, one batch at a time, so an interrupted rotation can resume
+    from the last reported reference. Rows already encrypted with the current key are skipped.
+
+    Args:
+        old_secret: The previous `CRYPTOGRAPHY_KEY` value, None if it was unset and derived from the `SECRET_KEY`.
+        after: Only rotate authentications whose reference comes after this one.
+        batch_size: The number of rows read and written at once. Defaults to `PROXY_CREDENTIALS_BATCH_SIZE`.
+        processes: The number of encryption processes. Defaults to `PROXY_CREDENTIALS_PROCESSES`.
+
+    Returns:
+        A generator that yields, for each batch, the number of rows rotated and the last reference read.
+    """
+    batch_size = batch_size or settings.PROXY_CREDENTIALS_BATCH_SIZE
+    processes = processes if processes is not None else settings.PROXY_CREDENTIALS_PROCESSES
+    old_key = derive_key(old_secret or settings.SECRET_KEY)
+    new_key = derive_key()
+
+    def read_batches() -> Generator[tuple[list[dict[str, Any]], bytes, bytes], None, None]:
+        last_reference = after
+
+        while True:
+            queryset = Authentication.objects.order_by("reference")
+            if last_reference is not None:
+                queryset = queryset.filter(reference__gt=last_reference)
+
+            # cast to binary so that the raw ciphertexts are read without being decrypted with the current key
+            rows = list(
+                queryset.annotate(**{f"raw_{field}": Cast(field, BinaryField()) for field in ENCRYPTED_FIELDS}).values(
+                    "reference", *(f"raw_{field}" for field in ENCRYPTED_FIELDS)
+                )[:batch_size]
+            )
+            if not rows:
+                return
+
+            last_reference = rows[-1]["reference"]
+            yield (
+                [
+                    {
+                        "reference": row["reference"],
+                        **{field: _raw(row[f"raw_{field}"]) for field in ENCRYPTED_FIELDS},
+                    }
+                    for row in rows
+                ],
+                old_key,
+                new_key,
+            )
+
+    for rotated, last_reference in parallel_map(_reencrypt_batch, read_batches(), processes):
+        now = timezone.now()
+        authentications = [
+            Authentication(
+                reference=row["reference"],
+                updated_at=now,
+                **{field: _encrypted(row[field]) for field in ENCRYPTED_FIELDS},
+            )
+            for row in rotated
+        ]
+        Authentication.objects.bulk_update(authentications, [*ENCRYPTED_FIELDS, "updated_at"])
+
+        yield len(authentications), last_reference
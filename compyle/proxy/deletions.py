@@ -0,0 +1,72 @@
+from collections.abc import Generator
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+
+from compyle.proxy.catalog import publish_changes
+from compyle.proxy.models import Endpoint, Service, Trace, TraceRollup
+
+
+def mark_deleted(queryset: QuerySet[Service] | QuerySet[Endpoint]) -> int:
+    """Marks services or endpoints as deleted, the endpoints of the services too, leaving their removal to a job.
+
+    Once marked, they are left out by the default managers, hence by the API, the admin and the tasks, while their
+    traces are deleted in the background by :func:`purge_deleted` instead of by a cascade locking them all at once.
+
+    Args:
+        queryset: The services or the endpoints.
+
+    Returns:
+        The number of services or endpoints marked.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        # the updates send no signal, the cached endpoints are evicted once they are committed
+        publish_changes(queryset.model, queryset.values_list("pk", flat=True))
+
+        if queryset.model is Service:
+            Endpoint.objects.filter(service__in=queryset).update(deleted_at=now)
+        return queryset.update(deleted_at=now)
+
+
+def purge_deleted(batch_size: int | None = None) -> Generator[tuple[str, str, int], None, None]:
+    """Removes the endpoints and services marked as deleted, deleting the traces and rollups of each endpoint first.
+
+    The children are deleted in chunks, each in its own short transaction, walking the indexes led by the endpoint,
+    so that only the deleted rows are ever locked. Endpoints are removed once they have no more children, and
+    services once they have no more endpoints.
+
+    Args:
+        batch_size: The maximum number of rows deleted at once. Defaults to `PROXY_DELETION_BATCH_SIZE`.
+
+    Returns:
+        A generator that yields, for each chunk, the reference of the endpoint or service whose rows are deleted,
+        the name of the rows and their number.
+    """
+    batch_size = batch_size or settings.PROXY_DELETION_BATCH_SIZE
+
+    endpoints = Endpoint.all_objects.filter(deleted_at__isnull=False).order_by("deleted_at")
+    for reference in endpoints.values_list("reference", flat=True):
+        for model, ordering in ((Trace, "started_at"), (TraceRollup, "bucket")):
+            chunk = model.objects.filter(endpoint_id=reference).order_by(ordering)
+
+            while True:
+                count, _ = model.objects.filter(pk__in=chunk.values("pk")[:batch_size]).delete()
+                if count:
+                    yield reference, str(model._meta.verbose_name_plural), count  # pylint: disable=protected-access
+                if count < batch_size:
+                    break
+
+        # the rows written since, by the requests still in flight, and the statistics are deleted by the cascade
+        count, _ = Endpoint.all_objects.filter(pk=reference).delete()
+        yield reference, str(Endpoint._meta.verbose_name_plural), count  # pylint: disable=protected-access
+
+    services = Service.all_objects.filter(deleted_at__isnull=False).exclude(
+        Exists(Endpoint.all_objects.filter(service=OuterRef("pk")))
+    )
+    for reference in services.values_list("reference", flat=True):
+        count, _ = Service.all_objects.filter(pk=reference).delete()
+        yield reference, str(Service._meta.verbose_name_plural), count  # pylint: disable=protected-access
@@ -0,0 +1,235 @@
+import csv
+import datetime
+import io
+import json
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from django.conf import settings
+from django.db.models import F, QuerySet
+from django.db.models.functions import Coalesce
+
+from compyle.lib.iterators import fetch_chunks
+from compyle.proxy.models import Trace
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+if TYPE_CHECKING:
+    from compyle.proxy.archives import ArchiveQuery
+
+EXPORT_FIELDS = (
+    "reference",
+    "started_at",
+    "completed_at",
+    "method",
+    "url",
+    "status_code",
+    "headers",
+    "payload",
+    "endpoint",
+    "authentication",
+)
+"""The fields of the exported traces, the related objects being exported as their references."""
+
+EXPORT_COLUMNS = {
+    **{field: F(field) for field in EXPORT_FIELDS},
+    # the documents stored as blobs are read from them
+    "headers": Coalesce("headers", "headers_blob__content"),
+    "payload": Coalesce("payload", "payload_blob__content"),
+}
+"""The expressions of the fields of the exported traces."""
+
+JSON_FIELDS = ("headers", "payload")
+"""The fields read from the database as JSON documents, exported as they are."""
+
+TEXT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+"""The formats the traces can be streamed in, with their content types."""
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+"""The formats the traces can be written to a file in, column by column, which require PyArrow."""
+
+EXPORT_FORMATS = (*TEXT_FORMATS, *COLUMNAR_FORMATS)
+"""The formats the traces can be exported in."""
+
+
+def iter_rows(
+    queryset: QuerySet[Trace], chunk_size: int | None = None, archives: "ArchiveQuery | None" = None
+) -> Iterator[list[tuple[Any, ...]]]:
+    """Reads the exported fields of traces in chunks, in the order of their start, through a server-side cursor.
+
+    Args:
+        queryset: The traces.
+        chunk_size: The number of traces per chunk. Defaults to `PROXY_EXPORT_CHUNK_SIZE`.
+        archives: The query of the archived traces read before the others, None not to read the archives.
+
+    Yields:
+        The rows of each chunk, the JSON fields being read as text.
+    """
+    chunk_size = chunk_size or settings.PROXY_EXPORT_CHUNK_SIZE
+
+    if archives is not None:
+        for table in archives.iter_tables(chunk_size):
+            yield list(zip(*(column.to_pylist() for column in table.columns)))
+
+    yield from fetch_chunks(
+        queryset.order_by("started_at", "reference").values_list(*EXPORT_COLUMNS.values()), chunk_size
+    )
+
+
+def format_value(value: Any) -> Any:
+    """Returns a value of a row as exported in the text formats, the datetimes in ISO 8601."""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_ndjson(
+    queryset: QuerySet[Trace], chunk_size: int | None = None, archives: "ArchiveQuery | None" = None
+) -> Iterator[str]:
+    """Streams traces as newline-delimited JSON, one object per line.
+
+    Args:
+        queryset: The traces.
+        chunk_size: The number of traces per chunk. Defaults to `PROXY_EXPORT_CHUNK_SIZE`.
+        archives: The query of the archived traces exported first, None not to export them.
+
+    Yields:
+        The lines of each chunk.
+    """
+    # the JSON fields are already encoded, they are inserted in the objects instead of being decoded and encoded back
+    templates = ", ".join(f"{json.dumps(field)}: {{}}" for field in EXPORT_FIELDS)
+
+    for chunk in iter_rows(queryset, chunk_size, archives):
+        yield "".join(
+            "{"
+            + templates.format(
+                *(
+                    value if field in JSON_FIELDS and value is not None else json.dumps(format_value(value))
+                    for field, value in zip(EXPORT_FIELDS, row)
+                )
+            )
+            + "}\n"
+            for row in chunk
+        )
+
+
+def stream_csv(
+    queryset: QuerySet[Trace], chunk_size: int | None = None, archives: "ArchiveQuery | None" = None
+) -> Iterator[str]:
+    """Streams traces as CSV, with a header row and the JSON fields as text.
+
+    Args:
+        queryset: The traces.
+        chunk_size: The number of traces per chunk. Defaults to `PROXY_EXPORT_CHUNK_SIZE`.
+        archives: The query of the archived traces exported first, None not to export them.
+
+    Yields:
+        The header row, then the rows of each chunk.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_FIELDS)
+    for chunk in iter_rows(queryset, chunk_size, archives):
+        writer.writerows([format_value(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def stream_traces(
+    queryset: QuerySet[Trace], file_format: str, chunk_size: int | None = None, archives: "ArchiveQuery | None" = None
+) -> Iterator[str]:
+    """Streams traces in a text format.
+
+    Args:
+        queryset: The traces.
+        file_format: The format, one of :data:`TEXT_FORMATS`.
+        chunk_size: The number of traces per chunk. Defaults to `PROXY_EXPORT_CHUNK_SIZE`.
+        archives: The query of the archived traces exported first, None not to export them.
+
+    Returns:
+        The chunks of the export.
+    """
+    if file_format == "ndjson":
+        return stream_ndjson(queryset, chunk_size, archives)
+    if file_format == "csv":
+        return stream_csv(queryset, chunk_size, archives)
+    raise ValueError(f"cannot stream traces as {file_format}")
+
+
+def get_arrow_schema() -> "pyarrow.Schema":
+    """Returns the Arrow schema of the exported traces, the JSON fields being stored as text."""
+    timestamp = pyarrow.timestamp("us", tz="UTC")
+
+    return pyarrow.schema(
+        [
+            ("reference", pyarrow.string()),
+            ("started_at", timestamp),
+            ("completed_at", timestamp),
+            ("method", pyarrow.string()),
+            ("url", pyarrow.string()),
+            ("status_code", pyarrow.int32()),
+            ("headers", pyarrow.string()),
+            ("payload", pyarrow.string()),
+            ("endpoint", pyarrow.string()),
+            ("authentication", pyarrow.string()),
+        ]
+    )
+
+
+def write_columnar(
+    queryset: QuerySet[Trace],
+    file: str | BinaryIO,
+    file_format: str,
+    chunk_size: int | None = None,
+    archives: "ArchiveQuery | None" = None,
+) -> int:
+    """Writes traces to a Parquet or Arrow IPC file, one row group or record batch per chunk.
+
+    Args:
+        queryset: The traces.
+        file: The path or the binary file to write to.
+        file_format: The format, one of :data:`COLUMNAR_FORMATS`.
+        chunk_size: The number of traces per row group. Defaults to `PROXY_EXPORT_CHUNK_SIZE`.
+        archives: The query of the archived traces written first, None not to write them.
+
+    Returns:
+        The number of traces written.
+
+    Raises:
+        ValueError: if the format is not columnar.
+        RuntimeError: if PyArrow is not installed.
+    """
+    if file_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"cannot write traces as {file_format}")
+    if pyarrow is None:
+        raise RuntimeError(f"exporting traces as {file_format} requires PyArrow")
+
+    schema = get_arrow_schema()
+    if file_format == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(file, schema, compression="zstd")
+    else:
+        writer = pyarrow.ipc.new_file(file, schema)
+
+    count = 0
+    with writer:
+        if archives is not None:
+            for table in archives.iter_tables(chunk_size or settings.PROXY_EXPORT_CHUNK_SIZE):
+                writer.write_table(table)
+                count += table.num_rows
+
+        for chunk in iter_rows(queryset, chunk_size):
+            columns = dict(zip(EXPORT_FIELDS, map(list, zip(*chunk))))
+            writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema))
+            count += len(chunk)
+
+    return count
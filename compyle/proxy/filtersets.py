@@ -1,10 +1,19 @@
-from django.db.models import QuerySet
+import re
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import F, Q, QuerySet
 from django.utils.translation import gettext_lazy as _
-from django_filters import BooleanFilter, CharFilter, FilterSet
+from django_filters import BooleanFilter, CharFilter, DateTimeFilter, FilterSet
+from rest_framework import filters
 
 from compyle.lib.filters import CharInFilter
 from compyle.lib.filtersets import CreateUpdateFilterSet
+from compyle.lib.lookups import AnyOf
 from compyle.proxy import models
+from compyle.proxy.utils import parse_param_filter
+
+UUID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE)
+"""The shape of the references generated as UUIDs, which a search term of this shape is looked up as."""
 
 
 class ServiceFilterSet(CreateUpdateFilterSet):
@@ -55,11 +64,41 @@ class TraceFilterSet(FilterSet):
         help_text=_("Filter by status code prefix (e.g. '2' for all 2xx)."),
         method="filter_status_prefix",
     )
+    status_classes = CharInFilter(
+        label=_("status classes"),
+        help_text=_(
+            "Filter by status classes (e.g. '4,5' for all errors). Multiple values allowed separated by comma."
+        ),
+        field_name="status_class",
+    )
+    param = CharFilter(
+        label=_("URL parameters"),
+        help_text=_(
+            "Filter by URL parameters as name:value pairs (e.g. 'game_id:123'). Multiple pairs, all required, "
+            "allowed separated by comma."
+        ),
+        method="filter_url_params",
+    )
+    started_after = DateTimeFilter(
+        label=_("started after"),
+        help_text=_("Filter by start date, inclusive. Only the partitions of the range are scanned."),
+        field_name="started_at",
+        lookup_expr="gte",
+    )
+    started_before = DateTimeFilter(
+        label=_("started before"),
+        help_text=_("Filter by start date, exclusive. Only the partitions of the range are scanned."),
+        field_name="started_at",
+        lookup_expr="lt",
+    )
 
     # pylint: disable=unused-argument, no-self-use
     def filter_status_prefix(self, queryset: QuerySet[models.Trace], name: str, value: str) -> QuerySet[models.Trace]:
         """Filters the queryset to include only traces whose status code starts with the given prefix.
 
+        A single digit matches the stored status class, a longer prefix the range of status codes it spans
+        (e.g. '40' for 400 to 409), both of which can use an index unlike a string match on the code.
+
         Args:
             queryset: The base queryset of Trace objects.
             name: The name of the filter field (ignored here).
@@ -68,7 +107,87 @@ class TraceFilterSet(FilterSet):
         Returns:
             A filtered queryset containing only matching Trace objects.
         """
-        return queryset.filter(status_code__startswith=value)
+        if not value.isdigit() or len(value) > 3:
+            return queryset.none()
+
+        if len(value) == 1:
+            return queryset.filter(status_class=int(value))
+
+        scale = 10 ** (3 - len(value))
+        return queryset.filter(status_code__gte=int(value) * scale, status_code__lt=(int(value) + 1) * scale)
+
+    # pylint: disable=unused-argument, no-self-use
+    def filter_url_params(self, queryset: QuerySet[models.Trace], name: str, value: str) -> QuerySet[models.Trace]:
+        """Filters the queryset to include only traces whose URL has all the given parameters values.
+
+        The parameters are matched by containment, which is served by the GIN index of the stored URL parameters.
+
+        Args:
+            queryset: The base queryset of Trace objects.
+            name: The name of the filter field (ignored here).
+            value: The comma-separated name:value pairs.
+
+        Returns:
+            A filtered queryset containing only matching Trace objects.
+        """
+        if (params := parse_param_filter(value)) is None:
+            return queryset.none()
+
+        return queryset.filter(url_params__contains=params)
+
+
+class TraceSearchFilter(filters.SearchFilter):
+    """Search backend for :class:`compyle.proxy.models.Trace`, matching each term on the trace table only.
+
+    A term is contained in the reference or the URL of the trace, on their trigram indexes, or in the reference of
+    its endpoint or its authentication: the matching ones are read first from their small tables, in the same
+    query, then looked up on the foreign key indexes of the traces. A UUID-shaped term is looked up by equality on
+    the references instead.
+    """
+
+    def filter_queryset(self, request, queryset, view) -> QuerySet[models.Trace]:  # type: ignore[no-untyped-def]
+        """Filters the queryset to include only the traces matching every search term.
+
+        Args:
+            request: The request object.
+            queryset: The base queryset of Trace objects.
+            view: The view (ignored here).
+
+        Returns:
+            A filtered queryset containing only matching Trace objects.
+        """
+        for term in self.get_search_terms(request):
+            queryset = queryset.filter(self.get_term_condition(term))
+        return queryset
+
+    # pylint: disable=no-self-use
+    def get_term_condition(self, term: str) -> Q:
+        """Returns the condition of the traces matching a search term.
+
+        Args:
+            term: The search term.
+
+        Returns:
+            The condition on the traces.
+        """
+        if UUID_PATTERN.fullmatch(term):
+            reference = term.lower()
+            return (
+                Q(reference=reference)
+                | Q(endpoint_id=reference)
+                | Q(authentication_id=reference)
+                | Q(url__icontains=term)
+            )
+
+        endpoints = models.Endpoint.objects.filter(reference__icontains=term).values("reference")
+        authentications = models.Authentication.objects.filter(reference__icontains=term).values("reference")
+
+        return (
+            Q(reference__icontains=term)
+            | Q(url__icontains=term)
+            | AnyOf(F("endpoint_id"), ArraySubquery(endpoints))
+            | AnyOf(F("authentication_id"), ArraySubquery(authentications))
+        )
 
 
 class AuthenticationFilterSet(CreateUpdateFilterSet):
@@ -0,0 +1,206 @@
+import json
+import time
+from typing import Any
+
+import redis
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from compyle.lib.redis import get_redis
+from compyle.proxy.blobs import detach_contents
+from compyle.proxy.models import Authentication, Endpoint, Trace
+
+STREAM_FIELDS = (
+    "reference",
+    "started_at",
+    "completed_at",
+    "method",
+    "url",
+    "status_code",
+    "headers",
+    "payload",
+    "sample_rate",
+    "endpoint_id",
+    "authentication_id",
+)
+"""The :class:`compyle.proxy.models.Trace` fields carried by the stream entries."""
+
+
+def serialize_trace(trace: Trace) -> str:
+    """Serializes a trace into the JSON document of a stream entry.
+
+    Args:
+        trace: The trace to serialize.
+
+    Returns:
+        The JSON document.
+    """
+    data = {field: getattr(trace, field) for field in STREAM_FIELDS}
+    data["reference"] = str(data["reference"])
+
+    for field in ("started_at", "completed_at"):
+        if data[field] is not None:
+            data[field] = data[field].isoformat()
+
+    return json.dumps(data)
+
+
+def deserialize_trace(document: str | bytes) -> Trace:
+    """Builds back an unsaved trace from the JSON document of a stream entry.
+
+    Args:
+        document: The JSON document.
+
+    Returns:
+        The unsaved trace.
+    """
+    data = json.loads(document)
+
+    for field in ("started_at", "completed_at"):
+        if data[field] is not None:
+            data[field] = parse_datetime(data[field])
+
+    return Trace(**data)
+
+
+def publish_trace(trace: Trace) -> None:
+    """Appends a trace to the ingestion stream instead of writing it to the database.
+
+    Args:
+        trace: The trace to publish.
+    """
+    get_redis().xadd(settings.PROXY_TRACE_STREAM, {"trace": serialize_trace(trace)})
+
+
+def ensure_consumer_group() -> None:
+    """Creates the consumer group of the ingestion stream, and the stream itself, if they do not exist yet."""
+    try:
+        get_redis().xgroup_create(settings.PROXY_TRACE_STREAM, settings.PROXY_TRACE_STREAM_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as error:
+        if "BUSYGROUP" not in str(error):
+            raise
+
+
+def insert_traces(traces: list[Trace], batch_size: int) -> None:
+    """Inserts traces within a transaction, ignoring the ones already inserted.
+
+    Args:
+        traces: The traces to insert.
+        batch_size: The maximum number of traces per query.
+
+    Raises:
+        IntegrityError: if a trace refers to an endpoint or an authentication that no longer exists.
+    """
+    with transaction.atomic():
+        # the foreign keys are checked by the insert rather than at commit, for the violations to be raised here
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        Trace.objects.bulk_create(
+            traces,
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+
+
+def drop_orphan_traces(traces: list[Trace]) -> list[Trace]:
+    """Leaves out the traces whose endpoint or authentication no longer exists.
+
+    Args:
+        traces: The traces to filter.
+
+    Returns:
+        The traces whose endpoint and authentication, if any, still exist.
+    """
+    endpoint_ids = set(
+        Endpoint.all_objects.filter(pk__in={trace.endpoint_id for trace in traces}).values_list("pk", flat=True)
+    )
+    authentication_ids = set(
+        Authentication.objects.filter(
+            pk__in={trace.authentication_id for trace in traces if trace.authentication_id is not None}
+        ).values_list("pk", flat=True)
+    )
+
+    return [
+        trace
+        for trace in traces
+        if trace.endpoint_id in endpoint_ids
+        and (trace.authentication_id is None or trace.authentication_id in authentication_ids)
+    ]
+
+
+def ingest_traces(consumer: str, batch_size: int = 500, block: int | None = None) -> int:
+    """Loads one batch of traces from the ingestion stream into the database.
+
+    Entries left pending by a consumer that died for longer than `PROXY_TRACE_STREAM_CLAIM_IDLE` milliseconds are
+    claimed first, then new entries are read. Entries are acknowledged and deleted from the stream only once
+    the batch is committed: delivery is at-least-once and the duplicates of a redelivery are ignored thanks to
+    the trace references. The traces of the endpoints and authentications deleted in the meantime are dropped.
+
+    Args:
+        consumer: The name of this consumer within the consumer group.
+        batch_size: The maximum number of traces to load.
+        block: The number of milliseconds to wait for new entries, None not to wait.
+
+    Returns:
+        The number of entries processed.
+    """
+    client = get_redis()
+    stream, group = settings.PROXY_TRACE_STREAM, settings.PROXY_TRACE_STREAM_GROUP
+
+    _, entries, *_ = client.xautoclaim(
+        stream, group, consumer, min_idle_time=settings.PROXY_TRACE_STREAM_CLAIM_IDLE, count=batch_size
+    )
+
+    if not entries:
+        response = client.xreadgroup(group, consumer, {stream: ">"}, count=batch_size, block=block)
+        entries = response[0][1] if response else []
+
+    # entries deleted from the stream while pending are claimed without fields
+    entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+    if not entries:
+        return 0
+
+    traces = [deserialize_trace(fields[b"trace"]) for _, fields in entries]
+    if settings.PROXY_TRACE_BLOBS:
+        detach_contents(traces)
+
+    try:
+        insert_traces(traces, batch_size)
+    except IntegrityError:
+        # the endpoints purged and the authentications deleted since the traces were published would fail the batch
+        # on every redelivery, their traces are dropped
+        insert_traces(drop_orphan_traces(traces), batch_size)
+
+    entry_ids = [entry_id for entry_id, _ in entries]
+    client.xack(stream, group, *entry_ids)
+    client.xdel(stream, *entry_ids)
+
+    return len(entries)
+
+
+def get_ingestion_metrics() -> dict[str, Any]:
+    """Returns the gauges of the ingestion stream.
+
+    As entries are deleted once loaded, the age of the oldest entry of the stream is the ingestion lag.
+
+    Returns:
+        The stream length, the number of entries delivered but not loaded yet and the ingestion lag in seconds.
+    """
+    client = get_redis()
+    stream, group = settings.PROXY_TRACE_STREAM, settings.PROXY_TRACE_STREAM_GROUP
+
+    try:
+        groups = client.xinfo_groups(stream)
+    except redis.ResponseError:  # the stream does not exist yet
+        groups = []
+
+    pending = next((info["pending"] for info in groups if info["name"].decode() == group), 0)
+    oldest = client.xrange(stream, count=1)
+    lag = time.time() - int(oldest[0][0].split(b"-")[0]) / 1000 if oldest else 0.0
+
+    return {
+        "stream_length": client.xlen(stream),
+        "pending": pending,
+        "lag_seconds": round(max(lag, 0.0), 3),
+    }
@@ -0,0 +1,41 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.archives import archive_traces, is_archive_enabled
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Move the traces older than PROXY_TRACE_ARCHIVE_AFTER days to compressed archive files")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `archive_traces`."""
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            help=_("The age in days from which traces are archived, defaults to PROXY_TRACE_ARCHIVE_AFTER."),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help=_("The number of traces archived at once, defaults to PROXY_TRACE_ARCHIVE_BATCH_SIZE."),
+        )
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `archive_traces`."""
+        if not is_archive_enabled():
+            raise CommandError(_("Archiving traces requires PROXY_TRACE_ARCHIVE_PATH to be set and PyArrow."))
+
+        days = options["older_than"] if options["older_than"] is not None else settings.PROXY_TRACE_ARCHIVE_AFTER
+        total = 0
+
+        for count, paths in archive_traces(timezone.now() - datetime.timedelta(days=days), options["batch_size"]):
+            total += count
+            self.stdout.write(f"Archived {count} traces to {len(paths)} files")
+
+        self.stdout.write(self.style.SUCCESS(f"{total} traces archived"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.backfills import backfill_url_params
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Store the URL parameters of the traces written before they were, so that they can be filtered on")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `backfill_url_params`."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help=_("The number of traces updated at once, defaults to PROXY_TRACE_BACKFILL_BATCH_SIZE."),
+        )
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `backfill_url_params`."""
+        total, last_id = 0, 0
+        while True:
+            count, last_id = backfill_url_params(options["batch_size"], last_id)
+            if not count:
+                break
+
+            total += count
+            self.stdout.write(f"Stored the URL parameters of {count} traces")
+
+        self.stdout.write(self.style.SUCCESS(f"{total} traces backfilled"))
@@ -0,0 +1,110 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import close_old_connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.utils.translation import gettext_lazy as _
+
+from compyle.lib.postgresql.pool import close_pools, get_pool_metrics
+from compyle.proxy.models import Endpoint, Service
+from compyle.proxy.tasks import async_request
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    """The handler of the local API requested by the benchmark, answering an empty JSON object at once."""
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Answers an empty JSON object."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+        """Logs nothing."""
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Compare the duration of the task async_request with and without the pooling of the database connections")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `benchmark_connections`."""
+        parser.add_argument(
+            "--calls",
+            type=int,
+            default=200,
+            help=_("The number of calls of the task per run, defaults to 200."),
+        )
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `benchmark_connections`."""
+        if options["calls"] < 1:
+            raise CommandError(_("The number of calls must be positive."))
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), JsonHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        service = Service.objects.create(name="Connections benchmark")
+        endpoint = Endpoint.objects.create(
+            name="Connections benchmark",
+            base_url=f"http://127.0.0.1:{server.server_port}/",
+            slug="benchmark",
+            method="get",
+            service=service,
+        )
+        close_old_connections()
+
+        try:
+            for pooled in (False, True):
+                with override_settings(PROXY_DB_POOL=pooled):
+                    elapsed, connections = self.run(endpoint.reference, options["calls"])
+
+                # with the pooling, most connections of the backend are taken from the pool instead of opened
+                if pooled:
+                    connections = sum(metrics["created"] for metrics in get_pool_metrics())
+                    close_pools()
+
+                self.stdout.write(
+                    f"{'pooled' if pooled else 'unpooled':>8}: {elapsed / options['calls'] * 1000:8.2f} ms per call, "
+                    f"{connections} connections opened"
+                )
+        finally:
+            server.shutdown()
+            # the traces of the endpoint are deleted by the cascade
+            Endpoint.all_objects.filter(pk=endpoint.pk).delete()
+            service.delete()
+
+    def run(self, reference: str, calls: int) -> tuple[float, int]:
+        """Calls the task as a worker does, the connections being closed after each call.
+
+        Args:
+            reference: The reference of the endpoint.
+            calls: The number of calls.
+
+        Returns:
+            The duration of the calls in seconds, and the number of connections of the database backend.
+        """
+        opened = 0
+
+        def count_connection(**kwargs) -> None:  # pylint: disable=unused-argument
+            nonlocal opened
+            opened += 1
+
+        connection_created.connect(count_connection)
+        try:
+            start = time.perf_counter()
+            for _call in range(calls):
+                async_request(reference, None, {}, {}, None)  # pylint: disable=no-value-for-parameter
+                # as the Celery workers do after each task
+                close_old_connections()
+            elapsed = time.perf_counter() - start
+        finally:
+            connection_created.disconnect(count_connection)
+
+        return elapsed, opened
@@ -0,0 +1,122 @@
+import time
+from collections.abc import Callable
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db.models import Aggregate, Avg, Count, F, FloatField, Q
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.analytics import (
+    COLUMNS,
+    DEFAULT_HISTOGRAM_EDGES,
+    GROUP_BY_CHOICES,
+    analyze_traces,
+    numpy,
+)
+from compyle.proxy.models import Trace
+
+PERCENTILES = (50, 90, 95, 99)
+
+GROUP_BY_EXPRESSIONS = {
+    "minute": TruncMinute("started_at"),
+    "hour": TruncHour("started_at"),
+    "day": TruncDay("started_at"),
+}
+
+
+class PercentileCont(Aggregate):
+    """The `PERCENTILE_CONT` ordered-set aggregate of PostgreSQL."""
+
+    function = "PERCENTILE_CONT"
+    template = "%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+
+def orm_aggregates(group_by: str | None) -> int:
+    """Computes with the ORM the analytics of :func:`compyle.proxy.analytics.analyze_traces`.
+
+    Args:
+        group_by: The key to group the traces by.
+
+    Returns:
+        The number of traces.
+    """
+    queryset = Trace.objects.order_by().annotate(latency=COLUMNS["latency"])
+    aggregates = {
+        "count": Count("*"),
+        "error_count": Count("id", filter=Q(status_code__isnull=True) | Q(status_code__gte=400)),
+        "mean": Avg("latency"),
+        **{f"p{p}": PercentileCont("latency", fraction=p / 100) for p in PERCENTILES},
+    }
+
+    total = queryset.aggregate(
+        **aggregates,
+        **{
+            f"bin_{start}": Count("id", filter=Q(latency__gte=start, latency__lt=end) if end else Q(latency__gte=start))
+            for start, end in zip(DEFAULT_HISTOGRAM_EDGES, [*DEFAULT_HISTOGRAM_EDGES[1:], None])
+        },
+    )
+
+    if group_by is not None:
+        key = GROUP_BY_EXPRESSIONS.get(group_by, F(group_by))
+        list(queryset.annotate(key=key).values("key").annotate(**aggregates))
+
+    return total["count"]
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Compare the trace analytics with the equivalent ORM aggregate queries on the current traces")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `benchmark_trace_analytics`."""
+        parser.add_argument(
+            "--group-by",
+            choices=GROUP_BY_CHOICES,
+            default="endpoint",
+            help=_("The key to group the traces by, defaults to endpoint."),
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help=_("The number of runs of each method, the best one being reported."),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help=_("The number of traces read at once, defaults to PROXY_ANALYTICS_CHUNK_SIZE."),
+        )
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `benchmark_trace_analytics`."""
+        if options["repeat"] < 1:
+            raise CommandError(_("The number of runs must be positive."))
+
+        group_by, chunk_size = options["group_by"], options["chunk_size"]
+
+        methods: dict[str, Callable[[], Any]] = {
+            "orm": lambda: orm_aggregates(group_by),
+            "rows": lambda: analyze_traces(
+                Trace.objects.all(), group_by, PERCENTILES, chunk_size=chunk_size, vectorized=False
+            ),
+        }
+        if numpy is not None:
+            methods["numpy"] = lambda: analyze_traces(
+                Trace.objects.all(), group_by, PERCENTILES, chunk_size=chunk_size, vectorized=True
+            )
+        else:
+            self.stdout.write(self.style.WARNING("NumPy is not installed, the vectorized analytics are skipped"))
+
+        self.stdout.write(f"{Trace.objects.count()} traces grouped by {group_by}")
+
+        for name, method in methods.items():
+            timings = []
+            for _run in range(options["repeat"]):
+                start = time.perf_counter()
+                method()
+                timings.append(time.perf_counter() - start)
+
+            self.stdout.write(f"{name:>6}: {min(timings) * 1000:10.1f} ms")
@@ -0,0 +1,74 @@
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.utils import build_url, compile_url, normalize_url
+
+
+@dataclass(frozen=True)
+class UrlCase:
+    """A benchmarked URL, as built for an endpoint from its base URL and slug and the parameters of a call."""
+
+    name: str
+    base_url: str
+    slug: str
+    trailing_slash: bool
+    params: dict[str, Any] = field(default_factory=dict)
+
+
+CASES = (
+    UrlCase("no params", "https://api.example.com/v1/", "users", True),
+    UrlCase("query", "https://api.example.com/v1/", "users", False, {"page": 2, "lang": "en", "id": 12345}),
+    UrlCase("path params", "https://api.example.com/v1/", "users/{user}/repos", False, {"user": "octocat", "page": 2}),
+)
+"""The benchmarked URLs."""
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Compare the building of the URLs of the endpoints from scratch and from their compiled templates")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `benchmark_urls`."""
+        parser.add_argument(
+            "--calls",
+            type=int,
+            default=100_000,
+            help=_("The number of URLs built per run, defaults to 100000."),
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help=_("The number of runs of each method, the best one being reported."),
+        )
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `benchmark_urls`."""
+        if options["calls"] < 1 or options["repeat"] < 1:
+            raise CommandError(_("The number of calls and of runs must be positive."))
+
+        for case in CASES:
+            url, slug, trailing_slash, params = case.base_url, case.slug, case.trailing_slash, case.params
+            # pylint: disable=cell-var-from-loop
+            methods: dict[str, Callable[[], str]] = {
+                # the placeholders are left as is from scratch, the parameters all landing in the query
+                "parse": lambda: normalize_url(build_url(url, slug, **params), trailing_slash),
+                "compiled": lambda: compile_url(url, slug, trailing_slash).expand(**params),
+            }
+
+            self.stdout.write(f"{case.name}: {methods['compiled']()}")
+            for name, method in methods.items():
+                timings = []
+                for _run in range(options["repeat"]):
+                    start = time.perf_counter()
+                    for _call in range(options["calls"]):
+                        method()
+                    timings.append(time.perf_counter() - start)
+
+                self.stdout.write(f"{name:>10}: {min(timings) / options['calls'] * 1e9:8.0f} ns per URL")
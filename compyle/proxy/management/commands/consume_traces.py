@@ -0,0 +1,55 @@
+import socket
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.ingestion import (
+    ensure_consumer_group,
+    get_ingestion_metrics,
+    ingest_traces,
+)
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Load the traces appended to the Redis ingestion stream into the database")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `consume_traces`."""
+        parser.add_argument(
+            "--consumer",
+            default=socket.gethostname(),
+            help=_("The unique name of this consumer within the consumer group, defaults to the hostname."),
+        )
+        parser.add_argument("--batch-size", type=int, default=500, help=_("The number of traces loaded at once."))
+        parser.add_argument(
+            "--block",
+            type=int,
+            default=5000,
+            help=_("The number of milliseconds to wait for new traces before reporting the lag again."),
+        )
+        parser.add_argument("--once", action="store_true", help=_("Stop once the stream is drained."))
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `consume_traces`."""
+        ensure_consumer_group()
+        total = 0
+
+        while True:
+            started_at = time.monotonic()
+            count = ingest_traces(
+                options["consumer"], options["batch_size"], None if options["once"] else options["block"]
+            )
+            total += count
+
+            if count:
+                elapsed = time.monotonic() - started_at
+                self.stdout.write(f"Ingested {count} traces ({count / elapsed:.1f}/s), {total} in total")
+            else:
+                metrics = get_ingestion_metrics()
+                self.stdout.write(f"Ingestion lag {metrics['lag_seconds']}s, {metrics['pending']} pending")
+
+                if options["once"]:
+                    return
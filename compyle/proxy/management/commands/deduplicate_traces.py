@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.blobs import deduplicate_traces, get_blob_report
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Move the headers and payloads stored inline by the traces to blobs, and report the savings")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `deduplicate_traces`."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help=_("The number of traces updated at once, defaults to PROXY_TRACE_BLOB_BATCH_SIZE."),
+        )
+        parser.add_argument(
+            "--report-only",
+            action="store_true",
+            help=_("Only report the savings, without moving the documents of the traces."),
+        )
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `deduplicate_traces`."""
+        if not options["report_only"]:
+            total, last_id = 0, 0
+            while True:
+                count, last_id = deduplicate_traces(options["batch_size"], last_id)
+                if not count:
+                    break
+
+                total += count
+                self.stdout.write(f"Moved the documents of {count} traces to blobs")
+
+            self.stdout.write(self.style.SUCCESS(f"{total} traces deduplicated"))
+
+        report = get_blob_report()
+        saved_size = report["reference_size"] - report["blob_size"]
+        ratio = saved_size / report["reference_size"] if report["reference_size"] else 0.0
+
+        self.stdout.write(
+            f"{report['reference_count']} documents stored as {report['blob_count']} blobs: "
+            f"{report['reference_count'] - report['blob_count']} writes avoided"
+        )
+        self.stdout.write(
+            f"{report['reference_size']} bytes stored as {report['blob_size']} bytes: "
+            f"{saved_size} bytes saved ({ratio:.1%})"
+        )
+        self.stdout.write(f"{report['inline_count']} traces still storing documents inline")
@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.archives import ArchiveQuery, is_archive_enabled
+from compyle.proxy.exports import (
+    COLUMNAR_FORMATS,
+    EXPORT_FORMATS,
+    stream_traces,
+    write_columnar,
+)
+from compyle.proxy.filtersets import TraceFilterSet
+from compyle.proxy.models import Trace
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Export the traces, filtered as in the API, to a NDJSON, CSV, Parquet or Arrow file")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `export_traces`."""
+        parser.add_argument(
+            "--format",
+            choices=EXPORT_FORMATS,
+            default="ndjson",
+            help=_("The format of the export, defaults to ndjson. Parquet and Arrow require PyArrow."),
+        )
+        parser.add_argument(
+            "--output",
+            help=_("The path of the file to write, defaults to the standard output for NDJSON and CSV."),
+        )
+        parser.add_argument(
+            "--filter",
+            action="append",
+            default=[],
+            metavar="NAME=VALUE",
+            help=_("A filter of the traces API, e.g. services=a,b or started_after=2024-01-01. Can be repeated."),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help=_("The number of traces read at once, defaults to PROXY_EXPORT_CHUNK_SIZE."),
+        )
+
+    def get_filterset(self, filters: list[str]) -> TraceFilterSet:
+        """Returns the validated filterset of the `NAME=VALUE` filters of the command `export_traces`."""
+        data = {}
+        for item in filters:
+            name, separator, value = item.partition("=")
+            if not separator:
+                raise CommandError(_("Invalid filter %(filter)s, expected NAME=VALUE.") % {"filter": item})
+            data[name] = value
+
+        filterset = TraceFilterSet(data, queryset=Trace.objects.all())
+        if not filterset.is_valid():
+            raise CommandError(filterset.errors.as_text())
+
+        return filterset
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `export_traces`."""
+        file_format, output, chunk_size = options["format"], options["output"], options["chunk_size"]
+        filterset = self.get_filterset(options["filter"])
+
+        archives = ArchiveQuery.from_filterset(filterset) if is_archive_enabled() else None
+
+        if file_format in COLUMNAR_FORMATS:
+            if output is None:
+                raise CommandError(_("An output file is required for the %(format)s format.") % {"format": file_format})
+            try:
+                count = write_columnar(filterset.qs, output, file_format, chunk_size, archives)
+            except RuntimeError as error:
+                raise CommandError(str(error)) from error
+
+            self.stdout.write(self.style.SUCCESS(f"{count} traces exported to {output}"))
+            return
+
+        if output is None:
+            for chunk in stream_traces(filterset.qs, file_format, chunk_size, archives):
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(output, "w", encoding="utf-8", newline="") as file:
+            for chunk in stream_traces(filterset.qs, file_format, chunk_size, archives):
+                file.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"Traces exported to {output}"))
@@ -0,0 +1,92 @@
+import contextlib
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.synthetic import deferred_indexes, generate_catalog, generate_traces
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Generate synthetic services, endpoints, authentications and traces in bulk, for performance testing")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `generate_synthetic_data`."""
+        parser.add_argument("--services", type=int, default=10, help=_("The number of services, defaults to 10."))
+        parser.add_argument("--endpoints", type=int, default=100, help=_("The number of endpoints, defaults to 100."))
+        parser.add_argument(
+            "--authentications",
+            type=int,
+            default=50,
+            help=_("The number of authentications, defaults to 50."),
+        )
+        parser.add_argument(
+            "--traces",
+            type=int,
+            default=1_000_000,
+            help=_("The number of traces, defaults to 1000000."),
+        )
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=30,
+            help=_("The number of days, up to now, the traces are spread over, defaults to 30."),
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help=_("The exponent of the Zipf law of the traffic of the endpoints, 0 for a uniform traffic."),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100_000,
+            help=_("The number of traces loaded by each COPY, defaults to 100000."),
+        )
+        parser.add_argument("--seed", type=int, help=_("The seed of the random generator, for reproducible loads."))
+        parser.add_argument(
+            "--defer-indexes",
+            action="store_true",
+            help=_("Drop the indexes of the traces during the load and build them again after, much faster."),
+        )
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `generate_synthetic_data`."""
+        if options["services"] < 1 or options["traces"] < 0 or options["chunk_size"] < 1 or options["days"] <= 0:
+            raise CommandError(_("The numbers of services, traces and days and the chunk size must be positive."))
+
+        rng = random.Random(options["seed"])
+        endpoints, authentications = generate_catalog(
+            options["services"], options["endpoints"], options["authentications"], rng
+        )
+        self.stdout.write(
+            f"Created {options['services']} services, {len(endpoints)} endpoints "
+            f"and {len(authentications)} authentications"
+        )
+
+        start = time.perf_counter()
+        total = 0
+
+        with deferred_indexes() if options["defer_indexes"] else contextlib.nullcontext():
+            for count in generate_traces(
+                endpoints,
+                authentications,
+                options["traces"],
+                days=options["days"],
+                chunk_size=options["chunk_size"],
+                seed=options["seed"],
+                skew=options["skew"],
+            ):
+                total += count
+                rate = total / (time.perf_counter() - start) * 60
+                self.stdout.write(f"Loaded {total} traces ({rate:,.0f} traces per minute)")
+
+            if options["defer_indexes"]:
+                self.stdout.write("Building the indexes of the traces")
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"{total} traces generated in {elapsed:.1f} s"))
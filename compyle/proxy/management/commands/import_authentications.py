@@ -0,0 +1,73 @@
+import csv
+import json
+import time
+from collections.abc import Generator, Iterable
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.credentials import import_authentications
+from compyle.proxy.models import Authentication
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Create or update authentications in bulk from a NDJSON or CSV file, matched on their email")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `import_authentications`."""
+        parser.add_argument("path", help=_("The path of the file to import, one authentication per line."))
+        parser.add_argument(
+            "--format",
+            choices=["ndjson", "csv"],
+            default=None,
+            help=_("The file format, guessed from the file extension if not set."),
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help=_("The number of rows written at once."))
+        parser.add_argument("--processes", type=int, default=None, help=_("The number of encryption processes."))
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `import_authentications`."""
+        file_format = options["format"] or ("csv" if options["path"].endswith(".csv") else "ndjson")
+        started_at = time.monotonic()
+        total = 0
+
+        with open(options["path"], encoding="utf-8", newline="") as file:
+            rows = self.read_csv(file) if file_format == "csv" else self.read_ndjson(file)
+
+            for count in import_authentications(self.check_fields(rows), options["batch_size"], options["processes"]):
+                total += count
+                elapsed = time.monotonic() - started_at
+                self.stdout.write(f"Imported {total} authentications ({total / elapsed:.1f}/s)")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported {total} authentications in {time.monotonic() - started_at:.1f}s")
+        )
+
+    @staticmethod
+    def check_fields(rows: Iterable[dict[str, Any]]) -> Generator[dict[str, Any], None, None]:
+        """Lazily check that the rows only have fields of the authentications.
+
+        Raises:
+            CommandError: if a row has an unknown field, the batches before it being imported already.
+        """
+        fields = {field.name for field in Authentication._meta.concrete_fields}  # pylint: disable=protected-access
+
+        for number, row in enumerate(rows, start=1):
+            if unknown := sorted(set(row) - fields):
+                raise CommandError(
+                    _("Unknown fields %(fields)s in row %(number)d.") % {"fields": ", ".join(unknown), "number": number}
+                )
+            yield row
+
+    @staticmethod
+    def read_ndjson(file: Any) -> Generator[dict[str, Any], None, None]:
+        """Lazily read one JSON object per non-empty line."""
+        return (json.loads(line) for line in file if line.strip())
+
+    @staticmethod
+    def read_csv(file: Any) -> Generator[dict[str, Any], None, None]:
+        """Lazily read the rows of a CSV file with a header, empty cells are read as null."""
+        return ({key: value or None for key, value in row.items()} for row in csv.DictReader(file))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.partitions import list_partitions, maintain_partitions
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Create the upcoming monthly partitions of the trace table and drop the expired ones")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `manage_trace_partitions`."""
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            help=_(
+                "The number of months to create partitions for in advance, defaults to PROXY_TRACE_PARTITIONS_AHEAD."
+            ),
+        )
+        parser.add_argument(
+            "--retention-months",
+            type=int,
+            help=_("The number of past months to keep, defaults to PROXY_TRACE_RETENTION_MONTHS."),
+        )
+        parser.add_argument("--list", action="store_true", help=_("Only list the existing partitions."))
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `manage_trace_partitions`."""
+        if options["list"]:
+            for partition in list_partitions():
+                self.stdout.write(f"{partition.name} [{partition.start:%Y-%m-%d}, {partition.end:%Y-%m-%d})")
+            return
+
+        created, dropped = maintain_partitions(options["ahead"], options["retention_months"])
+
+        for partition in created:
+            self.stdout.write(f"Created {partition.name}")
+        for partition in dropped:
+            self.stdout.write(f"Dropped {partition.name}")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partitions created, {len(dropped)} dropped"))
@@ -0,0 +1,31 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.deletions import purge_deleted
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Remove the endpoints and services marked as deleted, with their traces and rollups, in batches")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `purge_deleted`."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help=_("The number of rows deleted at once, defaults to PROXY_DELETION_BATCH_SIZE."),
+        )
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `purge_deleted`."""
+        totals: Counter[str] = Counter()
+
+        for reference, name, count in purge_deleted(options["batch_size"]):
+            totals[name] += count
+            self.stdout.write(f"Deleted {count} {name} of {reference} ({totals[name]} {name} so far)")
+
+        summary = ", ".join(f"{count} {name}" for name, count in totals.items()) or _("nothing")
+        self.stdout.write(self.style.SUCCESS(f"Deleted {summary}"))
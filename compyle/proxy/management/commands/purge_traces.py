@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.retention import purge_expired_traces
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Delete the traces older than the retention of their endpoint or service")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `purge_traces`."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help=_("The number of traces deleted at once, defaults to PROXY_TRACE_PURGE_BATCH_SIZE."),
+        )
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `purge_traces`."""
+        total = 0
+
+        for reference, count in purge_expired_traces(options["batch_size"]):
+            total += count
+            self.stdout.write(f"Deleted {count} traces of endpoint {reference}")
+
+        self.stdout.write(self.style.SUCCESS(f"{total} traces deleted"))
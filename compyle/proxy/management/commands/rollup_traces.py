@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.rollups import compact_rollups, rollup_traces
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Roll up the traces not rolled up yet by endpoint and minute, then compact the old rollups")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `rollup_traces`."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help=_("The number of traces rolled up at once, defaults to PROXY_ROLLUP_BATCH_SIZE."),
+        )
+        parser.add_argument(
+            "--settle-delay",
+            type=int,
+            help=_(
+                "The insertion age in seconds from which traces are rolled up, defaults to PROXY_ROLLUP_SETTLE_DELAY."
+            ),
+        )
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `rollup_traces`."""
+        total = 0
+
+        while count := rollup_traces(options["batch_size"], options["settle_delay"]):
+            total += count
+            self.stdout.write(f"Rolled up {count} traces")
+
+        compacted = compact_rollups()
+
+        self.stdout.write(self.style.SUCCESS(f"{total} traces rolled up, {compacted} rollups compacted"))
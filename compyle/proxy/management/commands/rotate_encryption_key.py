@@ -0,0 +1,49 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils.translation import gettext_lazy as _
+
+from compyle.proxy.credentials import rotate_authentications
+
+
+# pylint: disable=missing-class-docstring
+class Command(BaseCommand):
+    help = _("Re-encrypt the authentications credentials with the current CRYPTOGRAPHY_KEY")
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the arguments of the command `rotate_encryption_key`."""
+        parser.add_argument(
+            "--old-key",
+            default=os.getenv("CRYPTOGRAPHY_OLD_KEY"),
+            help=_("The previous CRYPTOGRAPHY_KEY, defaults to $CRYPTOGRAPHY_OLD_KEY or the SECRET_KEY if unset."),
+        )
+        parser.add_argument(
+            "--after",
+            default=None,
+            help=_("Resume the rotation after this authentication reference, as reported by a previous run."),
+        )
+        parser.add_argument("--batch-size", type=int, default=None, help=_("The number of rows written at once."))
+        parser.add_argument("--processes", type=int, default=None, help=_("The number of encryption processes."))
+
+    # pylint: disable=unused-argument
+    def handle(self, *args, **options) -> None:
+        """Handle the command `rotate_encryption_key`."""
+        started_at = time.monotonic()
+        total = 0
+
+        for count, last_reference in rotate_authentications(
+            options["old_key"],
+            after=options["after"],
+            batch_size=options["batch_size"],
+            processes=options["processes"],
+        ):
+            total += count
+            elapsed = time.monotonic() - started_at
+            self.stdout.write(
+                f"Rotated {total} authentications ({total / elapsed:.1f}/s), resume after {last_reference}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rotated {total} authentications in {time.monotonic() - started_at:.1f}s")
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 07:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="trace",
+            name="started_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, help_text="The datetime of the request.", verbose_name="started at"
+            ),
+        ),
+    ]
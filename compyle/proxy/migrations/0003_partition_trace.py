@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Django has no notion of partitioned tables, the partitioning is set up in SQL without changing the migration state.
+# The primary key of a partitioned table must include the partition key, so it becomes (reference, started_at).
+# Every row lands in the default partition first, the `manage_trace_partitions` command then splits it by month.
+
+PARTITION_TRACE = """
+ALTER TABLE "proxy_trace" RENAME TO "proxy_trace_unpartitioned";
+
+CREATE TABLE "proxy_trace" (LIKE "proxy_trace_unpartitioned" INCLUDING DEFAULTS) PARTITION BY RANGE ("started_at");
+CREATE TABLE "proxy_trace_default" PARTITION OF "proxy_trace" DEFAULT;
+
+INSERT INTO "proxy_trace" SELECT * FROM "proxy_trace_unpartitioned";
+DROP TABLE "proxy_trace_unpartitioned";
+
+ALTER TABLE "proxy_trace" ADD CONSTRAINT "proxy_trace_pkey" PRIMARY KEY ("reference", "started_at");
+ALTER TABLE "proxy_trace" ADD CONSTRAINT "proxy_trace_authentication_id_e34ab62f_fk_proxy_aut"
+    FOREIGN KEY ("authentication_id") REFERENCES "proxy_authentication" ("reference") DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE "proxy_trace" ADD CONSTRAINT "proxy_trace_endpoint_id_e24d9822_fk_proxy_endpoint_reference"
+    FOREIGN KEY ("endpoint_id") REFERENCES "proxy_endpoint" ("reference") DEFERRABLE INITIALLY DEFERRED;
+
+CREATE INDEX "proxy_trace_reference_56860f61_like" ON "proxy_trace" ("reference" varchar_pattern_ops);
+CREATE INDEX "proxy_trace_authentication_id_e34ab62f" ON "proxy_trace" ("authentication_id");
+CREATE INDEX "proxy_trace_authentication_id_e34ab62f_like" ON "proxy_trace" ("authentication_id" varchar_pattern_ops);
+CREATE INDEX "proxy_trace_endpoint_id_e24d9822" ON "proxy_trace" ("endpoint_id");
+CREATE INDEX "proxy_trace_endpoint_id_e24d9822_like" ON "proxy_trace" ("endpoint_id" varchar_pattern_ops);
+"""
+
+UNPARTITION_TRACE = """
+ALTER TABLE "proxy_trace" RENAME TO "proxy_trace_partitioned";
+
+CREATE TABLE "proxy_trace" (LIKE "proxy_trace_partitioned" INCLUDING DEFAULTS);
+INSERT INTO "proxy_trace" SELECT * FROM "proxy_trace_partitioned";
+DROP TABLE "proxy_trace_partitioned" CASCADE;
+
+ALTER TABLE "proxy_trace" ADD CONSTRAINT "proxy_trace_pkey" PRIMARY KEY ("reference");
+ALTER TABLE "proxy_trace" ADD CONSTRAINT "proxy_trace_authentication_id_e34ab62f_fk_proxy_aut"
+    FOREIGN KEY ("authentication_id") REFERENCES "proxy_authentication" ("reference") DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE "proxy_trace" ADD CONSTRAINT "proxy_trace_endpoint_id_e24d9822_fk_proxy_endpoint_reference"
+    FOREIGN KEY ("endpoint_id") REFERENCES "proxy_endpoint" ("reference") DEFERRABLE INITIALLY DEFERRED;
+
+CREATE INDEX "proxy_trace_reference_56860f61_like" ON "proxy_trace" ("reference" varchar_pattern_ops);
+CREATE INDEX "proxy_trace_authentication_id_e34ab62f" ON "proxy_trace" ("authentication_id");
+CREATE INDEX "proxy_trace_authentication_id_e34ab62f_like" ON "proxy_trace" ("authentication_id" varchar_pattern_ops);
+CREATE INDEX "proxy_trace_endpoint_id_e24d9822" ON "proxy_trace" ("endpoint_id");
+CREATE INDEX "proxy_trace_endpoint_id_e24d9822_like" ON "proxy_trace" ("endpoint_id" varchar_pattern_ops);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0002_trace_started_at_default"),
+    ]
+
+    operations = [
+        migrations.RunSQL(PARTITION_TRACE, reverse_sql=UNPARTITION_TRACE),
+    ]
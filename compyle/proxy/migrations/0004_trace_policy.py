@@ -0,0 +1,92 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:08
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0003_partition_trace"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="endpoint",
+            name="trace_retention_days",
+            field=models.PositiveIntegerField(
+                blank=True,
+                default=None,
+                help_text="The number of days the traces are kept for.",
+                null=True,
+                verbose_name="trace retention days",
+            ),
+        ),
+        migrations.AddField(
+            model_name="endpoint",
+            name="trace_sample_rate",
+            field=models.FloatField(
+                blank=True,
+                default=None,
+                help_text="The fraction of successful and fast calls whose trace is kept, between 0 and 1.",
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(0.0),
+                    django.core.validators.MaxValueValidator(1.0),
+                ],
+                verbose_name="trace sample rate",
+            ),
+        ),
+        migrations.AddField(
+            model_name="endpoint",
+            name="trace_slow_threshold",
+            field=models.PositiveIntegerField(
+                blank=True,
+                default=None,
+                help_text="The duration in milliseconds from which a call is slow and its trace always kept.",
+                null=True,
+                verbose_name="trace slow threshold",
+            ),
+        ),
+        migrations.AddField(
+            model_name="service",
+            name="trace_retention_days",
+            field=models.PositiveIntegerField(
+                blank=True,
+                default=None,
+                help_text="The number of days the traces are kept for.",
+                null=True,
+                verbose_name="trace retention days",
+            ),
+        ),
+        migrations.AddField(
+            model_name="service",
+            name="trace_sample_rate",
+            field=models.FloatField(
+                blank=True,
+                default=None,
+                help_text="The fraction of successful and fast calls whose trace is kept, between 0 and 1.",
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(0.0),
+                    django.core.validators.MaxValueValidator(1.0),
+                ],
+                verbose_name="trace sample rate",
+            ),
+        ),
+        migrations.AddField(
+            model_name="service",
+            name="trace_slow_threshold",
+            field=models.PositiveIntegerField(
+                blank=True,
+                default=None,
+                help_text="The duration in milliseconds from which a call is slow and its trace always kept.",
+                null=True,
+                verbose_name="trace slow threshold",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trace",
+            index=models.Index(fields=["endpoint", "started_at"], name="proxy_trace_endpoint_started"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0004_trace_policy"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trace",
+            index=models.Index(fields=["started_at", "reference"], name="proxy_trace_started_reference"),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:17
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0005_trace_started_reference_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trace",
+            name="status_class",
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                choices=[
+                    (1, "1xx informational"),
+                    (2, "2xx success"),
+                    (3, "3xx redirect"),
+                    (4, "4xx client error"),
+                    (5, "5xx server error"),
+                ],
+                default=None,
+                editable=False,
+                help_text="The class of the status code, stored so that it can be filtered on an index.",
+                null=True,
+                verbose_name="status class",
+            ),
+        ),
+        migrations.RunSQL(
+            'UPDATE "proxy_trace" SET "status_class" = "status_code" / 100 WHERE "status_code" BETWEEN 100 AND 599',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name="trace",
+            index=models.Index(fields=["status_class", "started_at"], name="proxy_trace_status_started"),
+        ),
+        migrations.AddIndex(
+            model_name="trace",
+            index=django.contrib.postgres.indexes.BrinIndex(
+                autosummarize=True, fields=["started_at"], name="proxy_trace_started_brin"
+            ),
+        ),
+    ]
@@ -0,0 +1,115 @@
+import uuid
+
+from django.db import migrations, models
+
+import compyle.lib.validators
+
+# Identity columns are not supported on partitioned tables before PostgreSQL 17, the id is backed by a sequence.
+# The primary key of a partitioned table must include the partition key, so it becomes (id, started_at) and
+# the reference stays unique along with the start date.
+
+ADD_ID = """
+CREATE SEQUENCE "proxy_trace_id_seq" AS bigint;
+ALTER TABLE "proxy_trace" ADD COLUMN "id" bigint;
+ALTER SEQUENCE "proxy_trace_id_seq" OWNED BY "proxy_trace"."id";
+ALTER TABLE "proxy_trace" ALTER COLUMN "id" SET DEFAULT nextval('proxy_trace_id_seq');
+"""
+
+SWAP_PRIMARY_KEY = """
+ALTER TABLE "proxy_trace" ALTER COLUMN "id" SET NOT NULL;
+ALTER TABLE "proxy_trace" DROP CONSTRAINT "proxy_trace_pkey";
+ALTER TABLE "proxy_trace" ADD CONSTRAINT "proxy_trace_pkey" PRIMARY KEY ("id", "started_at");
+ALTER TABLE "proxy_trace" ADD CONSTRAINT "proxy_trace_reference_started_unique" UNIQUE ("reference", "started_at");
+DROP INDEX "proxy_trace_reference_56860f61_like";
+"""
+
+RESTORE_PRIMARY_KEY = """
+CREATE INDEX "proxy_trace_reference_56860f61_like" ON "proxy_trace" ("reference" varchar_pattern_ops);
+ALTER TABLE "proxy_trace" DROP CONSTRAINT "proxy_trace_reference_started_unique";
+ALTER TABLE "proxy_trace" DROP CONSTRAINT "proxy_trace_pkey";
+ALTER TABLE "proxy_trace" ADD CONSTRAINT "proxy_trace_pkey" PRIMARY KEY ("reference", "started_at");
+ALTER TABLE "proxy_trace" ALTER COLUMN "id" DROP NOT NULL;
+"""
+
+DROP_ID = """
+ALTER TABLE "proxy_trace" DROP COLUMN "id";
+"""
+
+BATCH_SIZE = 10000
+
+
+def backfill_ids(apps, schema_editor) -> None:  # pylint: disable=unused-argument
+    """Numbers the existing traces in batches, walking the former primary key, each batch in its own transaction."""
+    last = None
+
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            cursor.execute(
+                """
+                SELECT "reference", "started_at" FROM "proxy_trace"
+                WHERE %s OR ("reference", "started_at") > (%s, %s)
+                ORDER BY "reference", "started_at" LIMIT %s
+                """,
+                [last is None, *(last or (None, None)), BATCH_SIZE],
+            )
+            keys = cursor.fetchall()
+            if not keys:
+                return
+
+            cursor.execute(
+                """
+                UPDATE "proxy_trace" SET "id" = nextval('proxy_trace_id_seq')
+                WHERE ("reference", "started_at") BETWEEN (%s, %s) AND (%s, %s) AND "id" IS NULL
+                """,
+                [*keys[0], *keys[-1]],
+            )
+            last = keys[-1]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("proxy", "0006_trace_status_class"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(ADD_ID, reverse_sql=DROP_ID),
+                migrations.RunPython(backfill_ids, reverse_code=migrations.RunPython.noop),
+                migrations.RunSQL(SWAP_PRIMARY_KEY, reverse_sql=RESTORE_PRIMARY_KEY),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="trace",
+                    name="reference",
+                    field=models.CharField(
+                        default=uuid.uuid4,
+                        help_text="The entity reference.",
+                        max_length=255,
+                        validators=[compyle.lib.validators.ReferenceValidator()],
+                        verbose_name="reference",
+                    ),
+                ),
+                migrations.AddField(
+                    model_name="trace",
+                    name="id",
+                    field=models.BigAutoField(
+                        help_text="The internal identifier of the entity.",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="id",
+                    ),
+                    preserve_default=False,
+                ),
+                migrations.AddConstraint(
+                    model_name="trace",
+                    constraint=models.UniqueConstraint(
+                        fields=("reference", "started_at"), name="proxy_trace_reference_started_unique"
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0007_trace_compact_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EndpointStatistics",
+            fields=[
+                (
+                    "endpoint",
+                    models.OneToOneField(
+                        help_text="The endpoint of the statistics.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="statistics",
+                        serialize=False,
+                        to="proxy.endpoint",
+                        verbose_name="endpoint",
+                    ),
+                ),
+                (
+                    "call_count",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="The number of calls, sampled out traces included.",
+                        verbose_name="call count",
+                    ),
+                ),
+                (
+                    "error_count",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="The number of calls that failed or got a 4xx or 5xx status code.",
+                        verbose_name="error count",
+                    ),
+                ),
+                (
+                    "last_status_code",
+                    models.IntegerField(
+                        blank=True,
+                        default=None,
+                        help_text="The status code of the last call, if it got a response.",
+                        null=True,
+                        verbose_name="last status code",
+                    ),
+                ),
+                (
+                    "last_called_at",
+                    models.DateTimeField(
+                        blank=True,
+                        default=None,
+                        help_text="The datetime of the last call.",
+                        null=True,
+                        verbose_name="last called at",
+                    ),
+                ),
+                (
+                    "mean_latency",
+                    models.FloatField(
+                        blank=True,
+                        default=None,
+                        help_text="The exponentially weighted moving average of the latency of the calls, in milliseconds.",
+                        null=True,
+                        verbose_name="mean latency",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "endpoint statistics",
+                "verbose_name_plural": "endpoint statistics",
+            },
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0008_endpoint_statistics"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TraceRollupCursor",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        help_text="The name of the cursor.",
+                        max_length=50,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="name",
+                    ),
+                ),
+                (
+                    "last_trace_id",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="The identifier of the last trace rolled up, those before it being all rolled up too.",
+                        verbose_name="last trace identifier",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "trace rollup cursor",
+                "verbose_name_plural": "trace rollup cursors",
+            },
+        ),
+        migrations.CreateModel(
+            name="TraceRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[("minute", "Minute"), ("hour", "Hour"), ("day", "Day")],
+                        help_text="The duration of the time bucket.",
+                        max_length=10,
+                        verbose_name="resolution",
+                    ),
+                ),
+                ("bucket", models.DateTimeField(help_text="The start of the time bucket.", verbose_name="bucket")),
+                (
+                    "call_count",
+                    models.BigIntegerField(default=0, help_text="The number of traces.", verbose_name="call count"),
+                ),
+                (
+                    "informational_count",
+                    models.BigIntegerField(
+                        default=0, help_text="The number of traces with a 1xx status code.", verbose_name="1xx count"
+                    ),
+                ),
+                (
+                    "success_count",
+                    models.BigIntegerField(
+                        default=0, help_text="The number of traces with a 2xx status code.", verbose_name="2xx count"
+                    ),
+                ),
+                (
+                    "redirect_count",
+                    models.BigIntegerField(
+                        default=0, help_text="The number of traces with a 3xx status code.", verbose_name="3xx count"
+                    ),
+                ),
+                (
+                    "client_error_count",
+                    models.BigIntegerField(
+                        default=0, help_text="The number of traces with a 4xx status code.", verbose_name="4xx count"
+                    ),
+                ),
+                (
+                    "server_error_count",
+                    models.BigIntegerField(
+                        default=0, help_text="The number of traces with a 5xx status code.", verbose_name="5xx count"
+                    ),
+                ),
+                (
+                    "failure_count",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="The number of traces of calls that got no response.",
+                        verbose_name="failure count",
+                    ),
+                ),
+                (
+                    "sketch",
+                    models.JSONField(
+                        help_text="The sketch of the latencies of the completed traces, in milliseconds.",
+                        verbose_name="latency sketch",
+                    ),
+                ),
+                (
+                    "endpoint",
+                    models.ForeignKey(
+                        help_text="The endpoint of the traces.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rollups",
+                        to="proxy.endpoint",
+                        verbose_name="endpoint",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "trace rollup",
+                "verbose_name_plural": "trace rollups",
+                "indexes": [models.Index(fields=["resolution", "bucket"], name="proxy_rollup_resolution_bucket")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="tracerollup",
+            constraint=models.UniqueConstraint(
+                fields=("endpoint", "resolution", "bucket"), name="proxy_rollup_endpoint_resolution_bucket_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0009_trace_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TraceBlob",
+            fields=[
+                (
+                    "digest",
+                    models.CharField(
+                        help_text="The hexadecimal SHA-256 digest of the canonical JSON of the document.",
+                        max_length=64,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="digest",
+                    ),
+                ),
+                ("content", models.JSONField(help_text="The JSON document.", verbose_name="content")),
+                (
+                    "size",
+                    models.PositiveIntegerField(
+                        help_text="The size of the canonical JSON of the document, in bytes.", verbose_name="size"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "trace blob",
+                "verbose_name_plural": "trace blobs",
+            },
+        ),
+        migrations.AddField(
+            model_name="trace",
+            name="headers_blob",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                default=None,
+                editable=False,
+                help_text="The deduplicated headers of the request, if not stored inline.",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="proxy.traceblob",
+                verbose_name="headers blob",
+            ),
+        ),
+        migrations.AddField(
+            model_name="trace",
+            name="payload_blob",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                default=None,
+                editable=False,
+                help_text="The deduplicated body of the request, if not stored inline.",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="proxy.traceblob",
+                verbose_name="payload blob",
+            ),
+        ),
+    ]
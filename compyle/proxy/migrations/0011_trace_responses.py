@@ -0,0 +1,94 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0010_trace_blobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TraceResponse",
+            fields=[
+                (
+                    "reference",
+                    models.CharField(
+                        help_text="The reference of the trace of the response.",
+                        max_length=255,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="reference",
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        db_index=True, help_text="The datetime of the request of the trace.", verbose_name="started at"
+                    ),
+                ),
+                (
+                    "headers",
+                    models.JSONField(
+                        blank=True, default=dict, help_text="The headers of the response.", verbose_name="headers"
+                    ),
+                ),
+                (
+                    "body",
+                    models.BinaryField(
+                        help_text="The compressed body of the response, truncated to the body limit of the endpoint.",
+                        verbose_name="body",
+                    ),
+                ),
+                (
+                    "compression",
+                    models.CharField(
+                        choices=[("zstd", "Zstandard"), ("zlib", "zlib")],
+                        help_text="The compression algorithm of the body.",
+                        max_length=10,
+                        verbose_name="compression",
+                    ),
+                ),
+                (
+                    "size",
+                    models.PositiveIntegerField(
+                        help_text="The size of the captured body once decompressed, in bytes.", verbose_name="size"
+                    ),
+                ),
+                (
+                    "truncated",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Whether the body was longer than the body limit of the endpoint.",
+                        verbose_name="truncated",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "trace response",
+                "verbose_name_plural": "trace responses",
+            },
+        ),
+        migrations.AddField(
+            model_name="endpoint",
+            name="capture_response",
+            field=models.BooleanField(
+                default=False,
+                help_text="Whether the headers and the compressed body of the responses are stored with the traces.",
+                verbose_name="capture response",
+            ),
+        ),
+        migrations.AddField(
+            model_name="endpoint",
+            name="response_body_limit",
+            field=models.PositiveIntegerField(
+                blank=True,
+                default=None,
+                help_text="The maximum number of bytes of the captured response bodies, unset for the default one.",
+                null=True,
+                verbose_name="response body limit",
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:19
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0011_trace_responses"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trace",
+            name="url_params",
+            field=models.JSONField(
+                blank=True,
+                default=None,
+                editable=False,
+                help_text="The values of each parameter of the URL, stored so that they can be filtered on an index.",
+                null=True,
+                verbose_name="URL parameters",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trace",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["url_params"], name="proxy_trace_url_params_gin", opclasses=["jsonb_path_ops"]
+            ),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0012_trace_url_params"),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddIndex(
+            model_name="authentication",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("reference"), name="gin_trgm_ops"
+                ),
+                name="proxy_auth_reference_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="endpoint",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("reference"), name="gin_trgm_ops"
+                ),
+                name="proxy_endpoint_reference_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trace",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("reference"), name="gin_trgm_ops"
+                ),
+                name="proxy_trace_reference_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trace",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("url"), name="gin_trgm_ops"
+                ),
+                name="proxy_trace_url_trgm",
+            ),
+        ),
+    ]
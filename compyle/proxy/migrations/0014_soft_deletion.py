@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0013_trigram_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="endpoint",
+            name="deleted_at",
+            field=models.DateTimeField(
+                blank=True,
+                default=None,
+                editable=False,
+                help_text="The datetime of the deletion, the row and its children being removed in the background.",
+                null=True,
+                verbose_name="deleted at",
+            ),
+        ),
+        migrations.AddField(
+            model_name="service",
+            name="deleted_at",
+            field=models.DateTimeField(
+                blank=True,
+                default=None,
+                editable=False,
+                help_text="The datetime of the deletion, the row and its children being removed in the background.",
+                null=True,
+                verbose_name="deleted at",
+            ),
+        ),
+    ]
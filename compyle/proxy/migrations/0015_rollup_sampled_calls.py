@@ -0,0 +1,92 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("proxy", "0014_soft_deletion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trace",
+            name="inserted_at",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                help_text="The datetime the trace was written to the database, later than its start when ingested late.",
+                verbose_name="inserted at",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="trace",
+            name="sample_rate",
+            field=models.FloatField(
+                default=1.0,
+                editable=False,
+                help_text="The rate at which the trace was kept, the trace standing for 1 / rate calls.",
+                verbose_name="sample rate",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tracerollup",
+            name="call_count",
+            field=models.BigIntegerField(
+                default=0, help_text="The estimated number of calls.", verbose_name="call count"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tracerollup",
+            name="client_error_count",
+            field=models.BigIntegerField(
+                default=0, help_text="The estimated number of calls with a 4xx status code.", verbose_name="4xx count"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tracerollup",
+            name="failure_count",
+            field=models.BigIntegerField(
+                default=0, help_text="The estimated number of calls that got no response.", verbose_name="failure count"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tracerollup",
+            name="informational_count",
+            field=models.BigIntegerField(
+                default=0, help_text="The estimated number of calls with a 1xx status code.", verbose_name="1xx count"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tracerollup",
+            name="redirect_count",
+            field=models.BigIntegerField(
+                default=0, help_text="The estimated number of calls with a 3xx status code.", verbose_name="3xx count"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tracerollup",
+            name="server_error_count",
+            field=models.BigIntegerField(
+                default=0, help_text="The estimated number of calls with a 5xx status code.", verbose_name="5xx count"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tracerollup",
+            name="sketch",
+            field=models.JSONField(
+                help_text="The sketch of the latencies of the completed calls, in milliseconds.",
+                verbose_name="latency sketch",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="tracerollup",
+            name="success_count",
+            field=models.BigIntegerField(
+                default=0, help_text="The estimated number of calls with a 2xx status code.", verbose_name="2xx count"
+            ),
+        ),
+    ]
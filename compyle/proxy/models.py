@@ -1,18 +1,65 @@
+import uuid
 from typing import Any
 
 import requests
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.postgres.indexes import BrinIndex, GinIndex, OpClass
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import RowNumber, Upper
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_cryptography.fields import encrypt
 
-from compyle.lib.models import BaseModel, CreateUpdateMixin
+from compyle.lib.models import (
+    BaseModel,
+    CompactBaseModel,
+    CreateUpdateMixin,
+    LiveManager,
+    SoftDeleteMixin,
+)
+from compyle.lib.validators import ReferenceValidator
 from compyle.proxy import choices
-from compyle.proxy.utils import build_url, normalize_url, request_with_retry
+from compyle.proxy.utils import (
+    UrlTemplate,
+    compile_url,
+    group_url_params,
+    request_with_retry,
+)
 
 
-class Service(BaseModel, CreateUpdateMixin):
+class TracePolicyMixin(models.Model):
+    """This abstract class holds the tracing policy of a service or an endpoint, unset values being inherited."""
+
+    trace_sample_rate = models.FloatField(
+        verbose_name=_("trace sample rate"),
+        help_text=_("The fraction of successful and fast calls whose trace is kept, between 0 and 1."),
+        validators=[MinValueValidator(0.0), MaxValueValidator(1.0)],
+        default=None,
+        null=True,
+        blank=True,
+    )
+    trace_slow_threshold = models.PositiveIntegerField(
+        verbose_name=_("trace slow threshold"),
+        help_text=_("The duration in milliseconds from which a call is slow and its trace always kept."),
+        default=None,
+        null=True,
+        blank=True,
+    )
+    trace_retention_days = models.PositiveIntegerField(
+        verbose_name=_("trace retention days"),
+        help_text=_("The number of days the traces are kept for."),
+        default=None,
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        abstract = True
+
+
+class Service(BaseModel, CreateUpdateMixin, SoftDeleteMixin, TracePolicyMixin):
     """This class represents an external API service."""
 
     name = models.CharField(
@@ -49,6 +96,10 @@ class Service(BaseModel, CreateUpdateMixin):
 
     endpoints: models.QuerySet["Endpoint"]
 
+    # the services marked as deleted are left out, until removed by compyle.proxy.deletions.purge_deleted
+    objects = LiveManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = _("service")
         verbose_name_plural = _("services")
@@ -57,7 +108,40 @@ class Service(BaseModel, CreateUpdateMixin):
         return self.name
 
 
-class Endpoint(BaseModel, CreateUpdateMixin):
+class EndpointQuerySet(models.QuerySet["Endpoint"]):
+    """Queryset for :class:`compyle.proxy.models.Endpoint`."""
+
+    def with_latest_traces(self, count: int | None = None) -> "EndpointQuerySet":
+        """Prefetches the latest traces of the endpoints.
+
+        The latest traces of all the endpoints are read by a single query, numbering the traces of each endpoint
+        newest first and keeping the first ones, instead of loading every trace of every endpoint.
+
+        Args:
+            count: The number of traces to prefetch per endpoint. Defaults to `PROXY_ENDPOINT_LATEST_TRACES`.
+
+        Returns:
+            The queryset, whose endpoints have a `latest_traces` attribute.
+        """
+        count = count if count is not None else settings.PROXY_ENDPOINT_LATEST_TRACES
+
+        latest_traces = (
+            Trace.objects.only("reference", "started_at", "completed_at", "status_code", "endpoint")
+            .annotate(
+                row_number=models.Window(
+                    RowNumber(), partition_by=models.F("endpoint"), order_by=models.F("started_at").desc()
+                )
+            )
+            .filter(row_number__lte=count)
+            .order_by("-started_at")
+        )
+
+        return self.prefetch_related(
+            models.Prefetch("endpoint_traces", queryset=latest_traces, to_attr="latest_traces")
+        )
+
+
+class Endpoint(BaseModel, CreateUpdateMixin, SoftDeleteMixin, TracePolicyMixin):
     """This class represents a specific callable endpoint under a service."""
 
     name = models.CharField(
@@ -96,6 +180,18 @@ class Endpoint(BaseModel, CreateUpdateMixin):
         blank=True,
         max_length=255,
     )
+    capture_response = models.BooleanField(
+        verbose_name=_("capture response"),
+        help_text=_("Whether the headers and the compressed body of the responses are stored with the traces."),
+        default=False,
+    )
+    response_body_limit = models.PositiveIntegerField(
+        verbose_name=_("response body limit"),
+        help_text=_("The maximum number of bytes of the captured response bodies, unset for the default one."),
+        default=None,
+        null=True,
+        blank=True,
+    )
 
     service = models.ForeignKey(
         verbose_name=_("service"),
@@ -105,10 +201,20 @@ class Endpoint(BaseModel, CreateUpdateMixin):
         on_delete=models.CASCADE,
     )
     endpoint_traces: models.QuerySet["Trace"]
+    statistics: "EndpointStatistics"
+    rollups: models.QuerySet["TraceRollup"]
+
+    # the endpoints marked as deleted are left out, until removed by compyle.proxy.deletions.purge_deleted
+    objects = LiveManager.from_queryset(EndpointQuerySet)()
+    all_objects = EndpointQuerySet.as_manager()
 
     class Meta:
         verbose_name = _("endpoint")
         verbose_name_plural = _("endpoints")
+        indexes = [
+            # the substring searches of the references, i.e. the UPPER(reference) LIKE of icontains
+            GinIndex(OpClass(Upper("reference"), name="gin_trgm_ops"), name="proxy_endpoint_reference_trgm"),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -117,22 +223,29 @@ class Endpoint(BaseModel, CreateUpdateMixin):
     # TODO build_header Content-Type: application/json
     # TODO build_header Authorization
 
+    @property
+    def url_template(self) -> UrlTemplate:
+        """The template of the URL of the endpoint, compiled once for its base URL, slug and trailing slash."""
+        return compile_url(self.base_url, self.slug, self.service.trailing_slash)
+
     def build_url(self, **params) -> str:
         """Builds the URL for the specified queryset.
 
         Args:
-            **params: The parameters of the query.
+            **params: The parameters of the query, the ones named after a placeholder of the slug, such as `{id}`,
+                being substituted in the path.
 
         Returns:
             The normalized unparsed URL built with the specified query parameters.
         """
-        return normalize_url(build_url(self.base_url, self.slug, **params), self.service.trailing_slash)
+        return self.url_template.expand(**params)
 
     def request(
         self,
         url: str,
         headers: dict[str, str] = None,
         body: dict[str, Any] = None,
+        timeout: float | None = None,
     ) -> requests.Response:
         """Request the endpoint with the specified parameters.
 
@@ -140,11 +253,12 @@ class Endpoint(BaseModel, CreateUpdateMixin):
             url: The URL to be used for the request.
             headers: The headers to be used for the request. Defaults to None.
             body: The body to be used for the request. Defaults to None.
+            timeout: The timeout of the request in seconds. Defaults to None.
 
         Returns:
             The response of the request.
         """
-        return request_with_retry(choices.HttpMethod(self.method), url, headers=headers, data=body)
+        return request_with_retry(choices.HttpMethod(self.method), url, timeout=timeout, headers=headers, data=body)
 
     def parse_response(self, response: requests.Response) -> Any:
         """Parse the response based on the expected content type.
@@ -162,13 +276,34 @@ class Endpoint(BaseModel, CreateUpdateMixin):
         return response.text
 
 
-class Trace(BaseModel):
+class TraceQuerySet(models.QuerySet["Trace"]):
+    """Queryset for :class:`compyle.proxy.models.Trace`."""
+
+    def bulk_create(self, objs, *args, **kwargs) -> list["Trace"]:  # pylint: disable=arguments-differ
+        """Creates the traces in bulk, filling their status class and URL parameters first as `save` does."""
+        objs = list(objs)
+        for obj in objs:
+            obj.status_class = choices.StatusClass.of(obj.status_code)
+            obj.url_params = group_url_params(obj.url)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class Trace(CompactBaseModel):
     """This class sepresents a trace of an HTTP request and response for debugging, logging, or auditing purposes."""
 
+    # the table is partitioned by start date, whose unique constraints must include it
+    reference = models.CharField(
+        verbose_name=_("reference"),
+        help_text=_("The entity reference."),
+        max_length=255,
+        default=uuid.uuid4,
+        validators=[ReferenceValidator()],
+    )
+
     started_at = models.DateTimeField(
         verbose_name=_("started at"),
         help_text=_("The datetime of the request."),
-        auto_now_add=True,
+        default=timezone.now,
     )
     completed_at = models.DateTimeField(
         verbose_name=_("completed at"),
@@ -177,6 +312,17 @@ class Trace(BaseModel):
         null=True,
         blank=True,
     )
+    inserted_at = models.DateTimeField(
+        verbose_name=_("inserted at"),
+        help_text=_("The datetime the trace was written to the database, later than its start when ingested late."),
+        auto_now_add=True,
+    )
+    sample_rate = models.FloatField(
+        verbose_name=_("sample rate"),
+        help_text=_("The rate at which the trace was kept, the trace standing for 1 / rate calls."),
+        default=1.0,
+        editable=False,
+    )
     method = models.CharField(
         verbose_name=_("method"),
         help_text=_("The HTTP method used to request the endpoint with."),
@@ -190,6 +336,14 @@ class Trace(BaseModel):
         null=True,
         blank=True,
     )
+    url_params = models.JSONField(
+        verbose_name=_("URL parameters"),
+        help_text=_("The values of each parameter of the URL, stored so that they can be filtered on an index."),
+        default=None,
+        null=True,
+        blank=True,
+        editable=False,
+    )
     status_code = models.IntegerField(
         verbose_name=_("status code"),
         help_text=_("The status code of the request response."),
@@ -197,6 +351,15 @@ class Trace(BaseModel):
         null=True,
         blank=True,
     )
+    status_class = models.PositiveSmallIntegerField(
+        verbose_name=_("status class"),
+        help_text=_("The class of the status code, stored so that it can be filtered on an index."),
+        choices=choices.StatusClass.choices,
+        default=None,
+        null=True,
+        blank=True,
+        editable=False,
+    )
     headers = models.JSONField(
         verbose_name=_("headers"),
         help_text=_("The headers associated with the HTTP request."),
@@ -211,6 +374,31 @@ class Trace(BaseModel):
         blank=True,
         null=True,
     )
+    # the headers and payload shared by many traces are stored once, the inline fields being left empty
+    headers_blob = models.ForeignKey(
+        verbose_name=_("headers blob"),
+        help_text=_("The deduplicated headers of the request, if not stored inline."),
+        to="TraceBlob",
+        related_name="+",
+        on_delete=models.PROTECT,
+        default=None,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,
+    )
+    payload_blob = models.ForeignKey(
+        verbose_name=_("payload blob"),
+        help_text=_("The deduplicated body of the request, if not stored inline."),
+        to="TraceBlob",
+        related_name="+",
+        on_delete=models.PROTECT,
+        default=None,
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=False,
+    )
 
     endpoint = models.ForeignKey(
         verbose_name=_("endpoint"),
@@ -229,10 +417,275 @@ class Trace(BaseModel):
         blank=True,
     )
 
+    objects = TraceQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("trace")
         verbose_name_plural = _("traces")
         ordering = ["started_at"]
+        indexes = [
+            # the traces of an endpoint, e.g. filtered by endpoint or purged by retention, in time order
+            models.Index(fields=["endpoint", "started_at"], name="proxy_trace_endpoint_started"),
+            # the keyset pagination of the API
+            models.Index(fields=["started_at", "reference"], name="proxy_trace_started_reference"),
+            # the errors, or any other status class, in time order
+            models.Index(fields=["status_class", "started_at"], name="proxy_trace_status_started"),
+            # time range scans such as aggregations, a few pages for millions of rows inserted in time order
+            BrinIndex(fields=["started_at"], name="proxy_trace_started_brin", autosummarize=True),
+            # the traces by URL parameters, the containment of name and values pairs only
+            GinIndex(fields=["url_params"], name="proxy_trace_url_params_gin", opclasses=["jsonb_path_ops"]),
+            # the substring searches, i.e. the UPPER(field) LIKE of icontains, on trigrams
+            GinIndex(OpClass(Upper("reference"), name="gin_trgm_ops"), name="proxy_trace_reference_trgm"),
+            GinIndex(OpClass(Upper("url"), name="gin_trgm_ops"), name="proxy_trace_url_trgm"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["reference", "started_at"], name="proxy_trace_reference_started_unique"),
+        ]
+
+    def save(self, *args, **kwargs) -> None:
+        """Saves the trace, filling its status class from its status code and its URL parameters from its URL."""
+        self.status_class = choices.StatusClass.of(self.status_code)
+        self.url_params = group_url_params(self.url)
+        super().save(*args, **kwargs)
+
+
+class EndpointStatistics(models.Model):
+    """This class represents the call statistics of an endpoint, maintained incrementally as its calls complete."""
+
+    endpoint = models.OneToOneField(
+        verbose_name=_("endpoint"),
+        help_text=_("The endpoint of the statistics."),
+        to=Endpoint,
+        related_name="statistics",
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    call_count = models.BigIntegerField(
+        verbose_name=_("call count"),
+        help_text=_("The number of calls, sampled out traces included."),
+        default=0,
+    )
+    error_count = models.BigIntegerField(
+        verbose_name=_("error count"),
+        help_text=_("The number of calls that failed or got a 4xx or 5xx status code."),
+        default=0,
+    )
+    last_status_code = models.IntegerField(
+        verbose_name=_("last status code"),
+        help_text=_("The status code of the last call, if it got a response."),
+        default=None,
+        null=True,
+        blank=True,
+    )
+    last_called_at = models.DateTimeField(
+        verbose_name=_("last called at"),
+        help_text=_("The datetime of the last call."),
+        default=None,
+        null=True,
+        blank=True,
+    )
+    mean_latency = models.FloatField(
+        verbose_name=_("mean latency"),
+        help_text=_("The exponentially weighted moving average of the latency of the calls, in milliseconds."),
+        default=None,
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = _("endpoint statistics")
+        verbose_name_plural = _("endpoint statistics")
+
+    def __str__(self) -> str:
+        return str(self.endpoint_id)
+
+
+class TraceRollup(models.Model):
+    """This class represents the calls of an endpoint aggregated over a time bucket.
+
+    Rollups are built from the traces by minute, then compacted to hours and days as they age, every trace being
+    counted in exactly one rollup. A sampled trace counts for the `1 / sample_rate` calls it stands for, so the counts
+    are estimates of the calls rather than numbers of traces. The latencies are summarized by a mergeable sketch, see
+    :class:`compyle.lib.sketches.LatencySketch`.
+    """
+
+    endpoint = models.ForeignKey(
+        verbose_name=_("endpoint"),
+        help_text=_("The endpoint of the traces."),
+        to=Endpoint,
+        related_name="rollups",
+        on_delete=models.CASCADE,
+    )
+    resolution = models.CharField(
+        verbose_name=_("resolution"),
+        help_text=_("The duration of the time bucket."),
+        max_length=10,
+        choices=choices.RollupResolution.choices,
+    )
+    bucket = models.DateTimeField(
+        verbose_name=_("bucket"),
+        help_text=_("The start of the time bucket."),
+    )
+    call_count = models.BigIntegerField(
+        verbose_name=_("call count"),
+        help_text=_("The estimated number of calls."),
+        default=0,
+    )
+    informational_count = models.BigIntegerField(
+        verbose_name=_("1xx count"),
+        help_text=_("The estimated number of calls with a 1xx status code."),
+        default=0,
+    )
+    success_count = models.BigIntegerField(
+        verbose_name=_("2xx count"),
+        help_text=_("The estimated number of calls with a 2xx status code."),
+        default=0,
+    )
+    redirect_count = models.BigIntegerField(
+        verbose_name=_("3xx count"),
+        help_text=_("The estimated number of calls with a 3xx status code."),
+        default=0,
+    )
+    client_error_count = models.BigIntegerField(
+        verbose_name=_("4xx count"),
+        help_text=_("The estimated number of calls with a 4xx status code."),
+        default=0,
+    )
+    server_error_count = models.BigIntegerField(
+        verbose_name=_("5xx count"),
+        help_text=_("The estimated number of calls with a 5xx status code."),
+        default=0,
+    )
+    failure_count = models.BigIntegerField(
+        verbose_name=_("failure count"),
+        help_text=_("The estimated number of calls that got no response."),
+        default=0,
+    )
+    sketch = models.JSONField(
+        verbose_name=_("latency sketch"),
+        help_text=_("The sketch of the latencies of the completed calls, in milliseconds."),
+    )
+
+    class Meta:
+        verbose_name = _("trace rollup")
+        verbose_name_plural = _("trace rollups")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["endpoint", "resolution", "bucket"],
+                name="proxy_rollup_endpoint_resolution_bucket_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["resolution", "bucket"], name="proxy_rollup_resolution_bucket"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.endpoint_id} {self.resolution} {self.bucket:%Y-%m-%d %H:%M}"
+
+
+class TraceRollupCursor(models.Model):
+    """This class represents the progress of the trace rollups, as the identifier of the last trace rolled up."""
+
+    name = models.CharField(
+        verbose_name=_("name"),
+        help_text=_("The name of the cursor."),
+        max_length=50,
+        primary_key=True,
+    )
+    last_trace_id = models.BigIntegerField(
+        verbose_name=_("last trace identifier"),
+        help_text=_("The identifier of the last trace rolled up, those before it being all rolled up too."),
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = _("trace rollup cursor")
+        verbose_name_plural = _("trace rollup cursors")
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class TraceBlob(models.Model):
+    """This class represents a JSON document shared by traces, such as headers or a payload, stored once.
+
+    Blobs are addressed by the SHA-256 digest of their canonical JSON, so that identical documents map to the same
+    blob whoever writes them, and are never updated.
+    """
+
+    digest = models.CharField(
+        verbose_name=_("digest"),
+        help_text=_("The hexadecimal SHA-256 digest of the canonical JSON of the document."),
+        max_length=64,
+        primary_key=True,
+    )
+    content = models.JSONField(
+        verbose_name=_("content"),
+        help_text=_("The JSON document."),
+    )
+    size = models.PositiveIntegerField(
+        verbose_name=_("size"),
+        help_text=_("The size of the canonical JSON of the document, in bytes."),
+    )
+
+    class Meta:
+        verbose_name = _("trace blob")
+        verbose_name_plural = _("trace blobs")
+
+    def __str__(self) -> str:
+        return self.digest
+
+
+class TraceResponse(models.Model):
+    """This class represents the captured response of a trace, its body truncated and compressed.
+
+    Responses are stored apart from the traces, which are read far more often, and are keyed by the reference of
+    their trace, known to the worker before the trace is written, in stream ingestion too.
+    """
+
+    reference = models.CharField(
+        verbose_name=_("reference"),
+        help_text=_("The reference of the trace of the response."),
+        max_length=255,
+        primary_key=True,
+    )
+    started_at = models.DateTimeField(
+        verbose_name=_("started at"),
+        help_text=_("The datetime of the request of the trace."),
+        db_index=True,
+    )
+    headers = models.JSONField(
+        verbose_name=_("headers"),
+        help_text=_("The headers of the response."),
+        default=dict,
+        blank=True,
+    )
+    body = models.BinaryField(
+        verbose_name=_("body"),
+        help_text=_("The compressed body of the response, truncated to the body limit of the endpoint."),
+    )
+    compression = models.CharField(
+        verbose_name=_("compression"),
+        help_text=_("The compression algorithm of the body."),
+        max_length=10,
+        choices=choices.ResponseCompression.choices,
+    )
+    size = models.PositiveIntegerField(
+        verbose_name=_("size"),
+        help_text=_("The size of the captured body once decompressed, in bytes."),
+    )
+    truncated = models.BooleanField(
+        verbose_name=_("truncated"),
+        help_text=_("Whether the body was longer than the body limit of the endpoint."),
+        default=False,
+    )
+
+    class Meta:
+        verbose_name = _("trace response")
+        verbose_name_plural = _("trace responses")
+
+    def __str__(self) -> str:
+        return self.reference
 
 
 class Authentication(BaseModel, CreateUpdateMixin):
@@ -330,6 +783,10 @@ class Authentication(BaseModel, CreateUpdateMixin):
     class Meta:
         verbose_name = _("authentication")
         verbose_name_plural = _("authentications")
+        indexes = [
+            # the substring searches of the references, i.e. the UPPER(reference) LIKE of icontains
+            GinIndex(OpClass(Upper("reference"), name="gin_trgm_ops"), name="proxy_auth_reference_trgm"),
+        ]
 
     def __str__(self) -> str:
         return self.email
@@ -0,0 +1,178 @@
+import datetime
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from compyle.proxy.models import Trace
+
+DEFAULT_PARTITION = f"{Trace._meta.db_table}_default"
+"""The partition catching the traces outside of every monthly partition."""
+
+PARTITION_PREFIX = f"{Trace._meta.db_table}_p"
+"""The prefix of the monthly partitions, followed by the year and the month, e.g. `proxy_trace_p2024_01`."""
+
+
+@dataclass(frozen=True)
+class Partition:
+    """A monthly partition of the trace table, covering `[start, end)`."""
+
+    name: str
+    start: datetime.datetime
+    end: datetime.datetime
+
+
+def month_start(value: datetime.datetime, months: int = 0) -> datetime.datetime:
+    """Returns the first instant, in UTC, of the month of a datetime shifted by a number of months.
+
+    Args:
+        value: The datetime.
+        months: The number of months to shift by, negative to go back in time.
+
+    Returns:
+        The start of the month.
+    """
+    value = value.astimezone(datetime.timezone.utc)
+    year, month = divmod(value.year * 12 + value.month - 1 + months, 12)
+    return datetime.datetime(year, month + 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def get_partition(start: datetime.datetime) -> Partition:
+    """Returns the monthly partition starting at the given month.
+
+    Args:
+        start: Any instant of the month.
+
+    Returns:
+        The partition, which may not exist.
+    """
+    start = month_start(start)
+    return Partition(f"{PARTITION_PREFIX}{start:%Y_%m}", start, month_start(start, 1))
+
+
+def list_partitions() -> list[Partition]:
+    """Lists the monthly partitions attached to the trace table, oldest first.
+
+    Returns:
+        The partitions, the default partition excluded.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s AND child.relname LIKE %s
+            ORDER BY child.relname
+            """,
+            [Trace._meta.db_table, f"{PARTITION_PREFIX}%"],
+        )
+        names = [name for (name,) in cursor.fetchall()]
+
+    return [
+        get_partition(
+            datetime.datetime.strptime(name.removeprefix(PARTITION_PREFIX), "%Y_%m").replace(
+                tzinfo=datetime.timezone.utc
+            )
+        )
+        for name in names
+    ]
+
+
+def create_partition(partition: Partition) -> int:
+    """Creates and attaches a monthly partition, moving in the traces of that month held by the default partition.
+
+    Attaching a partition requires the default partition to hold no row of its range, so those rows are moved in
+    the new table before it is attached, within a single transaction.
+
+    Args:
+        partition: The partition to create.
+
+    Returns:
+        The number of traces moved out of the default partition.
+    """
+    table = connection.ops.quote_name(Trace._meta.db_table)
+    name = connection.ops.quote_name(partition.name)
+    default = connection.ops.quote_name(DEFAULT_PARTITION)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {default} WHERE "started_at" >= %s AND "started_at" < %s RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            [partition.start, partition.end],
+        )
+        moved = cursor.rowcount
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+            [partition.start, partition.end],
+        )
+
+    return moved
+
+
+def drop_partition(partition: Partition) -> None:
+    """Detaches and drops a monthly partition along with all of its traces.
+
+    Args:
+        partition: The partition to drop.
+    """
+    table = connection.ops.quote_name(Trace._meta.db_table)
+    name = connection.ops.quote_name(partition.name)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+        cursor.execute(f"DROP TABLE {name}")
+
+
+def maintain_partitions(
+    ahead: int | None = None, retention: int | None = None
+) -> tuple[list[Partition], list[Partition]]:
+    """Creates the monthly partitions to come, splits the default partition and drops the expired partitions.
+
+    Args:
+        ahead: The number of months to create partitions for, after the current one.
+            Defaults to `PROXY_TRACE_PARTITIONS_AHEAD`.
+        retention: The number of past months whose partitions are kept, after the current one,
+            None to keep them all. Defaults to `PROXY_TRACE_RETENTION_MONTHS`.
+
+    Returns:
+        The partitions created and the partitions dropped.
+    """
+    ahead = ahead if ahead is not None else settings.PROXY_TRACE_PARTITIONS_AHEAD
+    retention = retention if retention is not None else settings.PROXY_TRACE_RETENTION_MONTHS
+    now = timezone.now()
+
+    existing = {partition.name for partition in list_partitions()}
+    wanted = {get_partition(month_start(now, months)) for months in range(ahead + 1)}
+
+    # the months of the traces left in the default partition, e.g. right after the table was partitioned
+    default = connection.ops.quote_name(DEFAULT_PARTITION)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT DISTINCT date_trunc('month', \"started_at\" AT TIME ZONE 'UTC') FROM {default}")
+        wanted.update(get_partition(start.replace(tzinfo=datetime.timezone.utc)) for (start,) in cursor.fetchall())
+
+    if retention is not None:
+        expired_before = month_start(now, -retention)
+        wanted = {partition for partition in wanted if partition.end > expired_before}
+
+    created = sorted((partition for partition in wanted if partition.name not in existing), key=lambda p: p.start)
+    for partition in created:
+        create_partition(partition)
+
+    dropped = []
+    if retention is not None:
+        dropped = [partition for partition in list_partitions() if partition.end <= expired_before]
+        for partition in dropped:
+            drop_partition(partition)
+
+        # expired traces still in the default partition never get a partition of their own
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {default} WHERE "started_at" < %s', [expired_before])
+
+    return created, dropped
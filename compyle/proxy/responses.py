@@ -0,0 +1,128 @@
+import datetime
+import zlib
+from typing import Any
+
+import requests
+import zstandard
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from compyle.proxy.choices import ResponseCompression
+from compyle.proxy.models import Trace, TraceResponse
+
+CHUNK_SIZE = 16 * 1024
+"""The number of bytes of a response body compressed at once."""
+
+
+def get_compressor() -> tuple[str, Any]:
+    """Returns the compression of the captured bodies, zstd unless `PROXY_RESPONSE_COMPRESSION` is zlib, and a
+    compressor."""
+    if settings.PROXY_RESPONSE_COMPRESSION == ResponseCompression.ZLIB:
+        return ResponseCompression.ZLIB, zlib.compressobj()
+    return ResponseCompression.ZSTD, zstandard.ZstdCompressor().compressobj()
+
+
+def capture_response(trace: Trace, response: requests.Response) -> TraceResponse:
+    """Captures the headers and the body of the response of a trace, without writing it to the database.
+
+    The body is fed to the compressor chunk by chunk, up to the body limit of the endpoint, so that neither the
+    body nor its truncation is ever copied uncompressed.
+
+    Args:
+        trace: The trace of the request, with its endpoint.
+        response: The response of the request.
+
+    Returns:
+        The unsaved captured response.
+    """
+    limit = trace.endpoint.response_body_limit
+    if limit is None:
+        limit = settings.PROXY_RESPONSE_BODY_LIMIT
+
+    compression, compressor = get_compressor()
+    parts, size, truncated = [], 0, False
+
+    for chunk in response.iter_content(CHUNK_SIZE):
+        if size + len(chunk) > limit:
+            chunk, truncated = memoryview(chunk)[: limit - size], True
+
+        parts.append(compressor.compress(chunk))
+        size += len(chunk)
+
+        if truncated:
+            break
+
+    parts.append(compressor.flush())
+
+    return TraceResponse(
+        reference=str(trace.reference),
+        started_at=trace.started_at,
+        headers=dict(response.headers),
+        body=b"".join(parts),
+        compression=compression,
+        size=size,
+        truncated=truncated,
+    )
+
+
+def decompress_body(response: TraceResponse) -> bytes:
+    """Returns the captured body of a response, decompressed.
+
+    Args:
+        response: The captured response.
+
+    Returns:
+        The body, truncated to the body limit of the endpoint at the time of the capture.
+    """
+    body = bytes(response.body)
+
+    if response.compression == ResponseCompression.ZSTD:
+        # the frames are written by a streaming compressor, without the size of their content
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+
+    return zlib.decompress(body)
+
+
+def get_body_text(response: TraceResponse) -> str:
+    """Returns the captured body of a response as text, decoded with the charset of its content type or UTF-8.
+
+    Args:
+        response: The captured response.
+
+    Returns:
+        The body, the undecodable bytes, e.g. a character cut by the truncation, being replaced.
+    """
+    encoding = requests.utils.get_encoding_from_headers(requests.structures.CaseInsensitiveDict(response.headers))
+
+    try:
+        return decompress_body(response).decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return decompress_body(response).decode("utf-8", errors="replace")
+
+
+def purge_orphan_responses(batch_size: int | None = None) -> int:
+    """Deletes the captured responses whose trace does not exist, in chunks.
+
+    The trace of a response may have been purged or archived since, or lost by the ingestion. The responses
+    younger than `PROXY_RESPONSE_ORPHAN_DELAY` seconds are kept, their trace being possibly still ingested.
+
+    Args:
+        batch_size: The maximum number of responses deleted at once. Defaults to `PROXY_RESPONSE_PURGE_BATCH_SIZE`.
+
+    Returns:
+        The number of responses deleted.
+    """
+    batch_size = batch_size or settings.PROXY_RESPONSE_PURGE_BATCH_SIZE
+    before = timezone.now() - datetime.timedelta(seconds=settings.PROXY_RESPONSE_ORPHAN_DELAY)
+
+    # the unique constraint of the traces on (reference, started_at) serves the lookup, on a single partition
+    traces = Trace.objects.filter(reference=OuterRef("reference"), started_at=OuterRef("started_at"))
+    orphans = TraceResponse.objects.filter(~Exists(traces), started_at__lt=before).order_by("started_at")
+
+    total = 0
+    while True:
+        count, _ = TraceResponse.objects.filter(pk__in=orphans.values("pk")[:batch_size]).delete()
+        total += count
+        if count < batch_size:
+            return total
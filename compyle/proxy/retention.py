@@ -0,0 +1,45 @@
+import datetime
+from collections.abc import Generator
+
+from django.conf import settings
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from compyle.proxy.models import Endpoint, Trace
+
+
+def purge_expired_traces(batch_size: int | None = None) -> Generator[tuple[str, int], None, None]:
+    """Deletes the traces older than the retention of their endpoint, or of its service, in chunks.
+
+    Each chunk is deleted in its own short transaction, walking the `(endpoint, started_at)` index oldest first,
+    so that only the deleted rows are ever locked.
+
+    Args:
+        batch_size: The maximum number of traces deleted at once. Defaults to `PROXY_TRACE_PURGE_BATCH_SIZE`.
+
+    Returns:
+        A generator that yields, for each chunk, the endpoint reference and the number of traces deleted.
+    """
+    batch_size = batch_size or settings.PROXY_TRACE_PURGE_BATCH_SIZE
+    now = timezone.now()
+
+    endpoints = (
+        Endpoint.objects.annotate(retention_days=Coalesce("trace_retention_days", "service__trace_retention_days"))
+        .filter(retention_days__isnull=False)
+        .values_list("reference", "retention_days")
+    )
+
+    for reference, retention_days in endpoints:
+        expired_before = now - datetime.timedelta(retention_days)
+        chunk = Trace.objects.filter(endpoint_id=reference, started_at__lt=expired_before).order_by("started_at")
+
+        while True:
+            # the bound on started_at lets the planner prune the partitions of the outer delete too
+            count, _ = Trace.objects.filter(
+                started_at__lt=expired_before, pk__in=chunk.values("pk")[:batch_size]
+            ).delete()
+
+            if count:
+                yield reference, count
+            if count < batch_size:
+                break
@@ -0,0 +1,239 @@
+import datetime
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from typing import Any
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from compyle.lib.sketches import LatencySketch
+from compyle.proxy.choices import RollupResolution, StatusClass
+from compyle.proxy.models import Endpoint, Trace, TraceRollup, TraceRollupCursor
+
+CURSOR_NAME = "traces"
+"""The name of the cursor of the traces rolled up by minute."""
+
+STATUS_COUNT_FIELDS = {
+    StatusClass.INFORMATIONAL: "informational_count",
+    StatusClass.SUCCESS: "success_count",
+    StatusClass.REDIRECT: "redirect_count",
+    StatusClass.CLIENT_ERROR: "client_error_count",
+    StatusClass.SERVER_ERROR: "server_error_count",
+    None: "failure_count",
+}
+"""The count fields of the rollups by status class, None being the calls that got no response."""
+
+COUNT_FIELDS = ["call_count", *STATUS_COUNT_FIELDS.values()]
+"""The count fields of the rollups."""
+
+COMPACTIONS = (
+    (RollupResolution.MINUTE, RollupResolution.HOUR, "PROXY_ROLLUP_MINUTE_RETENTION", "hours"),
+    (RollupResolution.HOUR, RollupResolution.DAY, "PROXY_ROLLUP_HOUR_RETENTION", "days"),
+)
+"""The compactions of the rollups: the source and target resolutions and the setting of the source retention."""
+
+
+class RollupGroup:
+    """The counts and the latency sketch of the calls of an endpoint over a bucket, before they are written."""
+
+    def __init__(self) -> None:
+        self.counts: Counter[str] = Counter()
+        self.sketch = LatencySketch(settings.PROXY_ROLLUP_ACCURACY)
+
+    def add_trace(
+        self,
+        status_code: int | None,
+        started_at: datetime.datetime,
+        completed_at: datetime.datetime | None,
+        sample_rate: float = 1.0,
+    ) -> None:
+        """Counts a trace in the group, for the calls it stands for.
+
+        Args:
+            status_code: The status code of the trace.
+            started_at: The start datetime of the trace.
+            completed_at: The completion datetime of the trace, None if the call got no response.
+            sample_rate: The rate at which the trace was kept, the trace counting for `1 / sample_rate` calls.
+        """
+        weight = 1 / sample_rate
+        self.counts["call_count"] += weight
+        self.counts[STATUS_COUNT_FIELDS[StatusClass.of(status_code)]] += weight
+
+        if completed_at is not None:
+            self.sketch.add((completed_at - started_at).total_seconds() * 1000, weight)
+
+    def add_rollup(self, rollup: TraceRollup) -> None:
+        """Counts the calls of a rollup in the group.
+
+        Args:
+            rollup: The rollup.
+        """
+        self.counts.update({field: getattr(rollup, field) for field in COUNT_FIELDS})
+        self.sketch.merge(LatencySketch.from_dict(rollup.sketch))
+
+
+def write_groups(resolution: RollupResolution, groups: dict[tuple[str, datetime.datetime], RollupGroup]) -> None:
+    """Adds groups to the rollups of a resolution, creating the missing rollups.
+
+    Must be called within a transaction, the existing rollups being locked until it ends.
+
+    Args:
+        resolution: The resolution of the rollups.
+        groups: The groups, by endpoint reference and bucket start.
+    """
+    if not groups:
+        return
+
+    existing = {
+        (rollup.endpoint_id, rollup.bucket): rollup
+        for rollup in TraceRollup.objects.select_for_update().filter(
+            resolution=resolution,
+            endpoint__in={endpoint for endpoint, _ in groups},
+            bucket__in={bucket for _, bucket in groups},
+        )
+    }
+
+    to_create, to_update = [], []
+    for (endpoint, bucket), group in groups.items():
+        if rollup := existing.get((endpoint, bucket)):
+            group.add_rollup(rollup)
+            to_update.append(rollup)
+        else:
+            rollup = TraceRollup(endpoint_id=endpoint, resolution=resolution, bucket=bucket)
+            to_create.append(rollup)
+
+        # the counts of the sampled traces are fractional, the estimates are rounded once per bucket
+        for field in COUNT_FIELDS:
+            setattr(rollup, field, round(group.counts[field]))
+        rollup.sketch = group.sketch.to_dict()
+
+    TraceRollup.objects.bulk_update(to_update, [*COUNT_FIELDS, "sketch"])
+    TraceRollup.objects.bulk_create(to_create)
+
+
+def rollup_traces(batch_size: int | None = None, settle_delay: int | None = None) -> int:
+    """Adds one batch of the traces not rolled up yet to the rollups by minute.
+
+    The traces are read in the order of their identifiers from a cursor, which moves forward in the same transaction
+    as the rollups so that every trace is counted exactly once. As identifiers are assigned before the insertions are
+    committed, the batch stops at the first trace inserted less than `settle_delay` seconds ago, for the insertions
+    still running not to be skipped. The insertion datetime is used rather than the start of the trace, which can
+    be much older when the trace is loaded late from the ingestion stream.
+
+    Args:
+        batch_size: The maximum number of traces read. Defaults to `PROXY_ROLLUP_BATCH_SIZE`.
+        settle_delay: The age of insertion, in seconds, from which the traces are rolled up. Defaults to
+            `PROXY_ROLLUP_SETTLE_DELAY`.
+
+    Returns:
+        The number of traces rolled up.
+    """
+    batch_size = batch_size or settings.PROXY_ROLLUP_BATCH_SIZE
+    settle_delay = settle_delay if settle_delay is not None else settings.PROXY_ROLLUP_SETTLE_DELAY
+    settled_before = timezone.now() - datetime.timedelta(seconds=settle_delay)
+
+    with transaction.atomic():
+        TraceRollupCursor.objects.get_or_create(name=CURSOR_NAME)
+        cursor = TraceRollupCursor.objects.select_for_update().get(name=CURSOR_NAME)
+
+        traces = Trace.objects.filter(id__gt=cursor.last_trace_id).order_by("id")[:batch_size]
+        groups: dict[tuple[str, datetime.datetime], RollupGroup] = defaultdict(RollupGroup)
+
+        count = 0
+        for trace_id, endpoint, status_code, started_at, completed_at, sample_rate, inserted_at in traces.values_list(
+            "id", "endpoint", "status_code", "started_at", "completed_at", "sample_rate", "inserted_at"
+        ):
+            if inserted_at >= settled_before:
+                break
+
+            bucket = RollupResolution.MINUTE.truncate(started_at)
+            groups[endpoint, bucket].add_trace(status_code, started_at, completed_at, sample_rate)
+            cursor.last_trace_id = trace_id
+            count += 1
+
+        write_groups(RollupResolution.MINUTE, groups)
+        cursor.save(update_fields=["last_trace_id"])
+
+    return count
+
+
+def compact_rollups(now: datetime.datetime | None = None, batch_size: int | None = None) -> int:
+    """Merges the rollups older than the retention of their resolution into the rollups of the next resolution.
+
+    Minutes older than `PROXY_ROLLUP_MINUTE_RETENTION` hours are merged into hours, and hours older than
+    `PROXY_ROLLUP_HOUR_RETENTION` days into days. Only whole buckets of the target resolution are compacted.
+
+    The rollups are compacted oldest first in chunks, each in its own short transaction, so that only the rollups
+    of the chunk are ever loaded and locked however late the compaction runs. A bucket of the target resolution
+    split across chunks is merged into by each of them.
+
+    Args:
+        now: The current datetime. Defaults to now.
+        batch_size: The maximum number of rollups merged at once. Defaults to `PROXY_ROLLUP_COMPACT_BATCH_SIZE`.
+
+    Returns:
+        The number of rollups merged.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.PROXY_ROLLUP_COMPACT_BATCH_SIZE
+    compacted = 0
+
+    for source, target, setting, unit in COMPACTIONS:
+        before = target.truncate(now - datetime.timedelta(**{unit: getattr(settings, setting)}))
+        chunk = TraceRollup.objects.filter(resolution=source, bucket__lt=before).order_by("bucket", "endpoint")
+
+        while True:
+            with transaction.atomic():
+                rollups = list(chunk.select_for_update()[:batch_size])
+
+                groups: dict[tuple[str, datetime.datetime], RollupGroup] = defaultdict(RollupGroup)
+                for rollup in rollups:
+                    groups[rollup.endpoint_id, target.truncate(rollup.bucket)].add_rollup(rollup)
+
+                write_groups(target, groups)
+                TraceRollup.objects.filter(pk__in=[rollup.pk for rollup in rollups]).delete()
+
+            compacted += len(rollups)
+            if len(rollups) < batch_size:
+                break
+
+    return compacted
+
+
+def get_endpoint_stats(
+    endpoint: Endpoint, start: datetime.datetime, end: datetime.datetime, percentiles: Iterable[float]
+) -> dict[str, Any]:
+    """Computes the statistics of the calls of an endpoint over a time range, from its rollups only.
+
+    The rollups whose bucket starts within the range are merged, whatever their resolution: the range is thus
+    rounded to the buckets, by minute, hour or day depending on the age of the traces, and the traces not rolled up
+    yet are left out. The sampled out calls are accounted for by the traces that were kept.
+
+    Args:
+        endpoint: The endpoint.
+        start: The start of the range, inclusive.
+        end: The end of the range, exclusive.
+        percentiles: The percentiles of the latency to estimate, between 0 and 100.
+
+    Returns:
+        The counts by status class and the latency statistics, in milliseconds.
+    """
+    group = RollupGroup()
+    for rollup in TraceRollup.objects.filter(endpoint=endpoint, bucket__gte=start, bucket__lt=end).only(
+        "sketch", *COUNT_FIELDS
+    ):
+        group.add_rollup(rollup)
+
+    return {
+        "start": start,
+        "end": end,
+        **{field: group.counts[field] for field in COUNT_FIELDS},
+        "latency": {
+            "count": round(group.sketch.count),
+            "mean": group.sketch.mean,
+            "min": group.sketch.min,
+            "max": group.sketch.max,
+            "percentiles": {f"p{percentile:g}": group.sketch.quantile(percentile / 100) for percentile in percentiles},
+        },
+    }
@@ -1,9 +1,55 @@
+import datetime
+from collections import Counter
 from typing import Any
 
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Manager
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers, status
+from rest_framework.utils.urls import replace_query_param
 
+from compyle.lib.validators import ReferenceValidator
 from compyle.proxy import models
+from compyle.proxy.analytics import GROUP_BY_CHOICES
+from compyle.proxy.blobs import BLOB_FIELDS, get_content, load_blobs
+from compyle.proxy.exports import TEXT_FORMATS
+from compyle.proxy.responses import get_body_text
+from compyle.proxy.statistics import aggregate_statistics
+
+
+class StatisticsSerializer(serializers.Serializer):
+    """Serializer for the call statistics of an endpoint or a service."""
+
+    call_count = serializers.IntegerField(
+        read_only=True,
+        help_text=_(
+            "The number of calls as of the last flush of the statistics, the ones whose traces were sampled out, "
+            "purged or archived included; the recorded traces are listed by the traces URL of the endpoint."
+        ),
+    )
+    error_count = serializers.IntegerField(read_only=True)
+    last_status_code = serializers.IntegerField(read_only=True, allow_null=True)
+    last_called_at = serializers.DateTimeField(read_only=True, allow_null=True)
+    mean_latency = serializers.FloatField(read_only=True, allow_null=True)
+
+
+class TraceSummarySerializer(serializers.ModelSerializer[models.Trace]):
+    """Serializer for the outline of a :class:`compyle.proxy.models.Trace`, nested in its endpoint."""
+
+    class Meta:
+        model = models.Trace
+        fields = [
+            "reference",
+            "started_at",
+            "completed_at",
+            "status_code",
+        ]
+        read_only_fields = fields
 
 
 class EndpointSerializer(serializers.ModelSerializer[models.Endpoint]):
@@ -12,11 +58,9 @@ class EndpointSerializer(serializers.ModelSerializer[models.Endpoint]):
     service = serializers.PrimaryKeyRelatedField(
         queryset=models.Service.objects.all(),
     )
-    traces = serializers.PrimaryKeyRelatedField(
-        source="endpoint_traces",
-        many=True,
-        read_only=True,
-    )
+    latest_traces = serializers.SerializerMethodField()
+    traces_url = serializers.SerializerMethodField()
+    statistics = StatisticsSerializer(read_only=True, allow_null=True)
 
     class Meta:
         model = models.Endpoint
@@ -28,8 +72,15 @@ class EndpointSerializer(serializers.ModelSerializer[models.Endpoint]):
             "method",
             "response_type",
             "auth_method",
+            "capture_response",
+            "response_body_limit",
+            "trace_sample_rate",
+            "trace_slow_threshold",
+            "trace_retention_days",
             "service",
-            "traces",
+            "latest_traces",
+            "traces_url",
+            "statistics",
             "created_at",
             "updated_at",
         ]
@@ -45,11 +96,42 @@ class EndpointSerializer(serializers.ModelSerializer[models.Endpoint]):
         if self.context.get("nested", False):
             self.fields["service"].required = False
 
+    # pylint: disable=no-self-use
+    @extend_schema_field(TraceSummarySerializer(many=True))
+    def get_latest_traces(self, obj: models.Endpoint) -> list[dict[str, Any]]:
+        """Get the latest traces of the endpoint, newest first.
+
+        Args:
+            obj: The endpoint instance.
+
+        Returns:
+            The latest traces, as prefetched by :meth:`compyle.proxy.models.EndpointQuerySet.with_latest_traces`.
+        """
+        traces = getattr(obj, "latest_traces", None)
+        if traces is None:
+            traces = obj.endpoint_traces.order_by("-started_at")[: settings.PROXY_ENDPOINT_LATEST_TRACES]
+        return TraceSummarySerializer(traces, many=True).data
+
+    def get_traces_url(self, obj: models.Endpoint) -> str:
+        """Get the URL of the collection of all the traces of the endpoint.
+
+        Args:
+            obj: The endpoint instance.
+
+        Returns:
+            The URL of the traces list filtered on the endpoint.
+        """
+        url = reverse("proxy:traces-list")
+        if request := self.context.get("request"):
+            url = request.build_absolute_uri(url)
+        return replace_query_param(url, "endpoints", obj.reference)
+
 
 class ServiceSerializer(serializers.ModelSerializer[models.Service]):
     """Default serializer for :class:`compyle.proxy.models.Service`."""
 
     endpoints = EndpointSerializer(many=True, read_only=True)
+    statistics = serializers.SerializerMethodField()
 
     class Meta:
         model = models.Service
@@ -59,7 +141,11 @@ class ServiceSerializer(serializers.ModelSerializer[models.Service]):
             "trailing_slash",
             "auth_flow",
             "token_url",
+            "trace_sample_rate",
+            "trace_slow_threshold",
+            "trace_retention_days",
             "endpoints",
+            "statistics",
             "created_at",
             "updated_at",
         ]
@@ -69,6 +155,25 @@ class ServiceSerializer(serializers.ModelSerializer[models.Service]):
             "updated_at",
         ]
 
+    # pylint: disable=no-self-use
+    @extend_schema_field(StatisticsSerializer(allow_null=True))
+    def get_statistics(self, obj: models.Service) -> dict[str, Any] | None:
+        """Get the call statistics of the service, combined from the ones of its endpoints.
+
+        Args:
+            obj: The service instance.
+
+        Returns:
+            The statistics of the service, or None if it has not been called yet.
+        """
+        if "endpoints" in getattr(obj, "_prefetched_objects_cache", {}):
+            statistics = [endpoint.statistics for endpoint in obj.endpoints.all() if hasattr(endpoint, "statistics")]
+        else:
+            statistics = list(models.EndpointStatistics.objects.filter(endpoint__service=obj))
+
+        aggregated = aggregate_statistics(statistics)
+        return StatisticsSerializer(aggregated).data if aggregated is not None else None
+
 
 class ServiceCreateSerializer(ServiceSerializer):
     """Serializer for :class:`compyle.proxy.models.Service` for create action."""
@@ -115,13 +220,34 @@ class RequestSerializer(serializers.Serializer):
     task_id = serializers.CharField(read_only=True)
 
 
+class TraceListSerializer(serializers.ListSerializer):
+    """List serializer for :class:`compyle.proxy.models.Trace`, which reads the blobs of the traces at once."""
+
+    def to_representation(self, data: Any) -> list[Any]:
+        """Loads the blobs of the traces in a single query at most, then serializes them.
+
+        Args:
+            data: The traces.
+
+        Returns:
+            The serialized traces.
+        """
+        traces = list(data.all() if isinstance(data, Manager) else data)
+        load_blobs(getattr(trace, f"{field}_id") for trace in traces for field in BLOB_FIELDS.values())
+
+        return super().to_representation(traces)
+
+
 class TraceSerializer(serializers.ModelSerializer[models.Trace]):
     """Serializer for :class:`compyle.proxy.models.Trace`."""
 
     status_type = serializers.SerializerMethodField()
+    headers = serializers.SerializerMethodField()
+    payload = serializers.SerializerMethodField()
 
     class Meta:
         model = models.Trace
+        list_serializer_class = TraceListSerializer
         fields = [
             "reference",
             "started_at",
@@ -160,6 +286,203 @@ class TraceSerializer(serializers.ModelSerializer[models.Trace]):
                 return "SERVER_ERROR"
         return None
 
+    # pylint: disable=no-self-use
+    @extend_schema_field(OpenApiTypes.OBJECT)
+    def get_headers(self, obj: models.Trace) -> Any:
+        """Get the headers of the trace, whether stored inline or as a blob.
+
+        Args:
+            obj: The trace instance.
+
+        Returns:
+            The headers of the trace.
+        """
+        return get_content(obj, "headers")
+
+    # pylint: disable=no-self-use
+    @extend_schema_field(OpenApiTypes.OBJECT)
+    def get_payload(self, obj: models.Trace) -> Any:
+        """Get the payload of the trace, whether stored inline or as a blob.
+
+        Args:
+            obj: The trace instance.
+
+        Returns:
+            The payload of the trace.
+        """
+        return get_content(obj, "payload")
+
+
+class TraceResponseSerializer(serializers.ModelSerializer[models.TraceResponse]):
+    """Serializer for :class:`compyle.proxy.models.TraceResponse`, with its body decompressed."""
+
+    body = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.TraceResponse
+        fields = [
+            "reference",
+            "started_at",
+            "headers",
+            "body",
+            "size",
+            "truncated",
+        ]
+        read_only_fields = fields
+
+    # pylint: disable=no-self-use
+    @extend_schema_field(OpenApiTypes.STR)
+    def get_body(self, obj: models.TraceResponse) -> str:
+        """Get the captured body of the response, decompressed and decoded.
+
+        Args:
+            obj: The captured response instance.
+
+        Returns:
+            The body of the response.
+        """
+        return get_body_text(obj)
+
+
+class InflightTraceSerializer(serializers.Serializer):
+    """Serializer for the in-flight record of a :class:`compyle.proxy.models.Trace` not written yet."""
+
+    reference = serializers.CharField(read_only=True)
+    endpoint = serializers.CharField(read_only=True)
+    method = serializers.CharField(read_only=True)
+    url = serializers.CharField(read_only=True)
+    started_at = serializers.DateTimeField(read_only=True)
+
+
+class PercentilesQuerySerializer(serializers.Serializer):
+    """Serializer for the percentiles of the latency requested in the query parameters."""
+
+    percentiles = serializers.CharField(
+        required=False,
+        default="50,90,95,99",
+        help_text=_("The comma-separated percentiles of the latency to estimate."),
+    )
+
+    def validate_percentiles(self, value: str) -> list[float]:
+        """Parses the percentiles, each between 0 and 100.
+
+        Args:
+            value: The comma-separated percentiles.
+
+        Returns:
+            The percentiles.
+        """
+        try:
+            percentiles = [float(percentile) for percentile in value.split(",") if percentile.strip()]
+        except ValueError as error:
+            raise serializers.ValidationError(_("The percentiles must be numbers.")) from error
+
+        if not percentiles or not all(0 <= percentile <= 100 for percentile in percentiles):
+            raise serializers.ValidationError(_("The percentiles must be between 0 and 100."))
+
+        return percentiles
+
+
+class EndpointStatsQuerySerializer(PercentilesQuerySerializer):
+    """Serializer for the query parameters of the statistics of an endpoint over a time range."""
+
+    start = serializers.DateTimeField(required=False, help_text=_("The start of the range, defaults to an hour ago."))
+    end = serializers.DateTimeField(required=False, help_text=_("The end of the range, defaults to now."))
+
+    def validate(self, attrs: dict[str, Any]) -> dict[str, Any]:
+        """Fills the default range and checks that it is not empty.
+
+        Args:
+            attrs: The validated query parameters.
+
+        Returns:
+            The query parameters with the range.
+        """
+        attrs.setdefault("end", timezone.now())
+        attrs.setdefault("start", attrs["end"] - datetime.timedelta(hours=1))
+
+        if attrs["start"] >= attrs["end"]:
+            raise serializers.ValidationError({"start": _("The start must be before the end.")})
+
+        return attrs
+
+
+class LatencyStatsSerializer(serializers.Serializer):
+    """Serializer for the latency statistics of an endpoint, in milliseconds."""
+
+    count = serializers.IntegerField(read_only=True)
+    mean = serializers.FloatField(read_only=True, allow_null=True)
+    min = serializers.FloatField(read_only=True, allow_null=True)
+    max = serializers.FloatField(read_only=True, allow_null=True)
+    percentiles = serializers.DictField(child=serializers.FloatField(allow_null=True), read_only=True)
+
+
+class EndpointStatsSerializer(serializers.Serializer):
+    """Serializer for the statistics of an endpoint over a time range, merged from its rollups."""
+
+    start = serializers.DateTimeField(read_only=True)
+    end = serializers.DateTimeField(read_only=True)
+    call_count = serializers.IntegerField(read_only=True)
+    informational_count = serializers.IntegerField(read_only=True)
+    success_count = serializers.IntegerField(read_only=True)
+    redirect_count = serializers.IntegerField(read_only=True)
+    client_error_count = serializers.IntegerField(read_only=True)
+    server_error_count = serializers.IntegerField(read_only=True)
+    failure_count = serializers.IntegerField(read_only=True)
+    latency = LatencyStatsSerializer(read_only=True)
+
+
+class TraceAnalyticsQuerySerializer(PercentilesQuerySerializer):
+    """Serializer for the query parameters of the analytics of the traces."""
+
+    group_by = serializers.ChoiceField(
+        choices=GROUP_BY_CHOICES,
+        required=False,
+        allow_null=True,
+        default=None,
+        help_text=_("The key to group the traces by."),
+    )
+
+
+class GroupStatsSerializer(serializers.Serializer):
+    """Serializer for the counts and latency statistics of a group of traces."""
+
+    count = serializers.IntegerField(read_only=True)
+    error_count = serializers.IntegerField(read_only=True)
+    latency = LatencyStatsSerializer(read_only=True)
+
+
+class TraceGroupSerializer(GroupStatsSerializer):
+    """Serializer for a group of traces, by the key it was grouped by."""
+
+    key = serializers.JSONField(read_only=True, allow_null=True)
+
+
+class HistogramBinSerializer(serializers.Serializer):
+    """Serializer for a bin of the latency histogram, in milliseconds."""
+
+    start = serializers.FloatField(read_only=True)
+    end = serializers.FloatField(read_only=True)
+    count = serializers.IntegerField(read_only=True)
+
+
+class TraceAnalyticsSerializer(serializers.Serializer):
+    """Serializer for the analytics of the traces."""
+
+    total = GroupStatsSerializer(read_only=True)
+    groups = TraceGroupSerializer(many=True, read_only=True)
+    histogram = HistogramBinSerializer(many=True, read_only=True)
+
+
+class TraceExportQuerySerializer(serializers.Serializer):
+    """Serializer for the query parameters of the export of the traces."""
+
+    file_format = serializers.ChoiceField(
+        choices=list(TEXT_FORMATS),
+        default="ndjson",
+        help_text=_("The format of the export, streamed as it is written."),
+    )
+
 
 class AuthenticationSerializer(serializers.ModelSerializer[models.Authentication]):
     """Serializer for :class:`compyle.proxy.models.Authentication`."""
@@ -179,3 +502,89 @@ class AuthenticationSerializer(serializers.ModelSerializer[models.Authentication
             "refresh_token",
         ]
         read_only_fields = fields
+
+
+class AuthenticationImportListSerializer(serializers.ListSerializer):
+    """List serializer for a bulk import of :class:`compyle.proxy.models.Authentication`."""
+
+    def validate(self, attrs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Rejects the rows sharing an email or a reference, which a single upsert cannot both write.
+
+        Args:
+            attrs: The validated rows.
+
+        Returns:
+            The rows.
+
+        Raises:
+            ValidationError: if an email or a reference is given more than once.
+        """
+        for field in ("email", "reference"):
+            counts = Counter(row[field] for row in attrs if row.get(field) is not None)
+            if duplicates := sorted(value for value, count in counts.items() if count > 1):
+                raise serializers.ValidationError(
+                    _("The {field} values must be unique, duplicated: {duplicates}.").format(
+                        field=field, duplicates=", ".join(duplicates)
+                    )
+                )
+
+        return attrs
+
+
+class AuthenticationImportSerializer(serializers.Serializer):
+    """Serializer for one row of a bulk import of :class:`compyle.proxy.models.Authentication`.
+
+    It is a plain serializer on purpose: the email uniqueness is enforced by the import upsert,
+    not by a validation query per row, the rows of a same import being checked against each other only.
+    """
+
+    reference = serializers.CharField(required=False, max_length=255, validators=[ReferenceValidator()])
+    email = serializers.CharField(max_length=255)
+    login = serializers.CharField(required=False, allow_null=True, default=None, max_length=255)
+    password = serializers.CharField(required=False, allow_null=True, default=None, max_length=255)
+    client_id = serializers.CharField(required=False, allow_null=True, default=None, max_length=255)
+    client_secret = serializers.CharField(required=False, allow_null=True, default=None, max_length=255)
+    api_key = serializers.CharField(required=False, allow_null=True, default=None, max_length=255)
+
+    class Meta:
+        list_serializer_class = AuthenticationImportListSerializer
+
+
+class AuthenticationImportResultSerializer(serializers.Serializer):
+    """Serializer for the result of a bulk import of :class:`compyle.proxy.models.Authentication`."""
+
+    count = serializers.IntegerField(read_only=True)
+
+
+class TraceIngestionMetricsSerializer(serializers.Serializer):
+    """Serializer for the gauges of the trace ingestion stream."""
+
+    stream_length = serializers.IntegerField(read_only=True)
+    pending = serializers.IntegerField(read_only=True)
+    lag_seconds = serializers.FloatField(read_only=True)
+
+
+class DatabasePoolMetricsSerializer(serializers.Serializer):
+    """Serializer for the gauges and counters of a database connection pool of the process."""
+
+    alias = serializers.CharField(read_only=True)
+    process_type = serializers.CharField(read_only=True)
+    pid = serializers.IntegerField(read_only=True)
+    min_size = serializers.IntegerField(read_only=True)
+    max_size = serializers.IntegerField(read_only=True)
+    size = serializers.IntegerField(read_only=True)
+    idle = serializers.IntegerField(read_only=True)
+    in_use = serializers.IntegerField(read_only=True)
+    checkouts = serializers.IntegerField(read_only=True)
+    waits = serializers.IntegerField(read_only=True)
+    wait_ms = serializers.IntegerField(read_only=True)
+    timeouts = serializers.IntegerField(read_only=True)
+    created = serializers.IntegerField(read_only=True)
+    discarded = serializers.IntegerField(read_only=True)
+
+
+class MetricsSerializer(serializers.Serializer):
+    """Serializer for the operational gauges of the proxy."""
+
+    trace_ingestion = TraceIngestionMetricsSerializer(read_only=True, required=False)
+    database_pools = DatabasePoolMetricsSerializer(many=True, read_only=True, required=False)
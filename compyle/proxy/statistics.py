@@ -0,0 +1,217 @@
+import datetime
+from collections.abc import Iterable
+from typing import Any
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from compyle.lib.redis import get_redis
+from compyle.proxy.models import Endpoint, EndpointStatistics, Trace
+
+STATISTICS_KEY = "proxy:statistics:{endpoint}"
+"""The Redis hash of the increments of an endpoint statistics not flushed yet."""
+
+DIRTY_KEY = "proxy:statistics:dirty"
+"""The Redis set of the endpoints whose statistics have increments not flushed yet."""
+
+MERGE_STATISTICS = f"""
+INSERT INTO {EndpointStatistics._meta.db_table} AS statistics
+    (endpoint_id, call_count, error_count, last_status_code, last_called_at, mean_latency)
+VALUES (%(endpoint)s, %(calls)s, %(errors)s, %(last_status_code)s, %(last_called_at)s, %(mean_latency)s)
+ON CONFLICT (endpoint_id) DO UPDATE SET
+    call_count = statistics.call_count + EXCLUDED.call_count,
+    error_count = statistics.error_count + EXCLUDED.error_count,
+    last_status_code = CASE
+        WHEN statistics.last_called_at > EXCLUDED.last_called_at THEN statistics.last_status_code
+        ELSE EXCLUDED.last_status_code
+    END,
+    last_called_at = GREATEST(statistics.last_called_at, EXCLUDED.last_called_at),
+    mean_latency = CASE
+        WHEN EXCLUDED.mean_latency IS NULL THEN statistics.mean_latency
+        WHEN statistics.mean_latency IS NULL THEN EXCLUDED.mean_latency
+        ELSE statistics.mean_latency
+            + (1 - power(1 - %(alpha)s, %(latencies)s)) * (EXCLUDED.mean_latency - statistics.mean_latency)
+    END
+"""
+"""Adds increments to the statistics of an endpoint, applying the moving average once per latency of the batch."""
+
+
+# pylint: disable=too-many-arguments
+def merge_statistics(
+    endpoint: str,
+    calls: int,
+    errors: int,
+    last_status_code: int | None,
+    last_called_at: datetime.datetime,
+    latency_sum: float,
+    latencies: int,
+) -> None:
+    """Adds the increments of one or more calls to the statistics of an endpoint, in a single statement.
+
+    Args:
+        endpoint: The endpoint reference.
+        calls: The number of calls.
+        errors: The number of calls that failed.
+        last_status_code: The status code of the last call.
+        last_called_at: The start datetime of the last call.
+        latency_sum: The sum of the latencies of the completed calls, in milliseconds.
+        latencies: The number of completed calls.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            MERGE_STATISTICS,
+            {
+                "endpoint": endpoint,
+                "calls": calls,
+                "errors": errors,
+                "last_status_code": last_status_code,
+                "last_called_at": last_called_at,
+                "mean_latency": latency_sum / latencies if latencies else None,
+                "latencies": latencies,
+                "alpha": settings.PROXY_ENDPOINT_STATISTICS_ALPHA,
+            },
+        )
+
+
+def record_statistics(trace: Trace) -> None:
+    """Counts a call in the statistics of its endpoint, whether its trace is sampled or not.
+
+    Depending on `PROXY_ENDPOINT_STATISTICS`, the statistics are either updated in the database right away
+    ("direct") or incremented in Redis ("redis"), to be flushed in batches by :func:`flush_statistics`.
+
+    Args:
+        trace: The trace of the call, completed or not.
+    """
+    is_error = trace.status_code is None or trace.status_code >= 400
+    latency = None
+    if trace.completed_at is not None:
+        latency = (trace.completed_at - trace.started_at).total_seconds() * 1000
+
+    if settings.PROXY_ENDPOINT_STATISTICS == "direct":
+        merge_statistics(
+            trace.endpoint_id,
+            calls=1,
+            errors=int(is_error),
+            last_status_code=trace.status_code,
+            last_called_at=trace.started_at,
+            latency_sum=latency or 0.0,
+            latencies=int(latency is not None),
+        )
+
+    elif settings.PROXY_ENDPOINT_STATISTICS == "redis":
+        key = STATISTICS_KEY.format(endpoint=trace.endpoint_id)
+
+        pipeline = get_redis().pipeline(transaction=True)
+        pipeline.hincrby(key, "calls", 1)
+        pipeline.hincrby(key, "errors", int(is_error))
+        if latency is not None:
+            pipeline.hincrbyfloat(key, "latency_sum", latency)
+            pipeline.hincrby(key, "latencies", 1)
+        # the last writer wins, which is the last call give or take the calls completing at the same time
+        pipeline.hset(
+            key, mapping={"last_status_code": trace.status_code or "", "last_called_at": trace.started_at.isoformat()}
+        )
+        pipeline.sadd(DIRTY_KEY, trace.endpoint_id)
+        pipeline.execute()
+
+
+def restore_increments(endpoint: str, increments: dict[bytes, Any]) -> None:
+    """Adds back to Redis the increments of an endpoint that could not be flushed, for the next flush.
+
+    The last status code and call made since the increments were read are kept over theirs.
+
+    Args:
+        endpoint: The endpoint reference.
+        increments: The increments read from the Redis hash of the endpoint.
+    """
+    key = STATISTICS_KEY.format(endpoint=endpoint)
+
+    pipeline = get_redis().pipeline(transaction=True)
+    pipeline.hincrby(key, "calls", int(increments[b"calls"]))
+    pipeline.hincrby(key, "errors", int(increments[b"errors"]))
+    pipeline.hincrbyfloat(key, "latency_sum", float(increments.get(b"latency_sum", 0.0)))
+    pipeline.hincrby(key, "latencies", int(increments.get(b"latencies", 0)))
+    pipeline.hsetnx(key, "last_status_code", increments[b"last_status_code"])
+    pipeline.hsetnx(key, "last_called_at", increments[b"last_called_at"])
+    pipeline.sadd(DIRTY_KEY, endpoint)
+    pipeline.execute()
+
+
+def flush_statistics(batch_size: int = 500) -> int:
+    """Moves the statistics increments accumulated in Redis to the database.
+
+    The increments of an endpoint are read and reset atomically, those made meanwhile go to the next flush. The
+    increments that fail to merge are added back for the next flush, and those of the endpoints deleted meanwhile
+    are dropped.
+
+    Args:
+        batch_size: The maximum number of endpoints flushed.
+
+    Returns:
+        The number of endpoints flushed.
+    """
+    client = get_redis()
+    endpoints = [endpoint.decode() for endpoint in client.spop(DIRTY_KEY, batch_size) or []]
+    if not endpoints:
+        return 0
+
+    existing = set(Endpoint.all_objects.filter(pk__in=endpoints).values_list("pk", flat=True))
+    flushed = 0
+
+    for endpoint in endpoints:
+        pipeline = client.pipeline(transaction=True)
+        pipeline.hgetall(STATISTICS_KEY.format(endpoint=endpoint))
+        pipeline.delete(STATISTICS_KEY.format(endpoint=endpoint))
+        increments: dict[bytes, Any] = pipeline.execute()[0]
+
+        if not increments or endpoint not in existing:
+            continue
+
+        try:
+            # the savepoint keeps a failed merge from breaking the transaction of the caller, if any
+            with transaction.atomic():
+                merge_statistics(
+                    endpoint,
+                    calls=int(increments[b"calls"]),
+                    errors=int(increments[b"errors"]),
+                    last_status_code=int(increments[b"last_status_code"]) if increments[b"last_status_code"] else None,
+                    last_called_at=parse_datetime(increments[b"last_called_at"].decode()),
+                    latency_sum=float(increments.get(b"latency_sum", 0.0)),
+                    latencies=int(increments.get(b"latencies", 0)),
+                )
+        except DatabaseError:
+            restore_increments(endpoint, increments)
+        else:
+            flushed += 1
+
+    return flushed
+
+
+def aggregate_statistics(statistics: Iterable[EndpointStatistics]) -> dict[str, Any] | None:
+    """Combines the statistics of several endpoints, e.g. those of a service.
+
+    Args:
+        statistics: The statistics of the endpoints.
+
+    Returns:
+        The combined statistics, the mean latency being weighted by the number of calls, or None if there are none.
+    """
+    statistics = [item for item in statistics if item.call_count]
+    if not statistics:
+        return None
+
+    last = max(statistics, key=lambda item: item.last_called_at)
+    latencies = [(item.mean_latency, item.call_count) for item in statistics if item.mean_latency is not None]
+
+    return {
+        "call_count": sum(item.call_count for item in statistics),
+        "error_count": sum(item.error_count for item in statistics),
+        "last_status_code": last.last_status_code,
+        "last_called_at": last.last_called_at,
+        "mean_latency": (
+            sum(latency * count for latency, count in latencies) / sum(count for _, count in latencies)
+            if latencies
+            else None
+        ),
+    }
@@ -0,0 +1,380 @@
+import csv
+import datetime
+import io
+import itertools
+import json
+import random
+import uuid
+from collections.abc import Generator, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from django.db import connection
+from django.utils import timezone
+
+from compyle.proxy import choices
+from compyle.proxy.models import Authentication, Endpoint, Service, Trace
+from compyle.proxy.utils import group_url_params
+
+TRACE_COLUMNS = (
+    "reference",
+    "started_at",
+    "completed_at",
+    "inserted_at",
+    "sample_rate",
+    "method",
+    "url",
+    "url_params",
+    "status_code",
+    "status_class",
+    "headers",
+    "payload",
+    "endpoint_id",
+    "authentication_id",
+)
+"""The columns of the trace table loaded by :func:`generate_traces`, the others keeping their defaults."""
+
+STATUS_CODES = {
+    200: 0.86,
+    201: 0.03,
+    204: 0.02,
+    304: 0.01,
+    400: 0.02,
+    401: 0.01,
+    404: 0.02,
+    429: 0.01,
+    500: 0.01,
+    502: 0.004,
+    503: 0.004,
+    None: 0.002,
+}
+"""The weights of the status codes of the generated traces, None standing for the requests without response."""
+
+METHODS = {
+    choices.HttpMethod.GET: 0.7,
+    choices.HttpMethod.POST: 0.2,
+    choices.HttpMethod.PUT: 0.05,
+    choices.HttpMethod.PATCH: 0.03,
+    choices.HttpMethod.DELETE: 0.02,
+}
+"""The weights of the methods of the generated endpoints."""
+
+URL_VARIANTS = 64
+"""The number of distinct URLs, by their parameters, requested per generated endpoint."""
+
+DOCUMENT_VARIANTS = 16
+"""The number of distinct headers and payloads sent per generated endpoint."""
+
+COPY_BUFFER_SIZE = 64 * 1024
+"""The number of characters sent to the database at once by a `COPY`."""
+
+TIMEOUT = 30_000
+"""The duration in milliseconds after which the requests without response are given up."""
+
+
+# pylint: disable=too-many-instance-attributes
+@dataclass
+class EndpointProfile:
+    """The precomputed values the traces of a generated endpoint are drawn from, encoded as loaded."""
+
+    reference: str
+    method: str
+    urls: list[tuple[str, str]]
+    headers: list[str]
+    payloads: list[str | None]
+    latency_mu: float
+    latency_sigma: float
+    authenticated: bool
+
+
+def generate_catalog(
+    services: int, endpoints: int, authentications: int, rng: random.Random
+) -> tuple[list[Endpoint], list[Authentication]]:
+    """Creates services, endpoints spread over them and authentications, with realistic fields.
+
+    The catalog is small next to the traces, it is created in bulk by the ORM, with the default references, so
+    that loads with the same seed do not collide.
+
+    Args:
+        services: The number of services.
+        endpoints: The number of endpoints, at least one per service.
+        authentications: The number of authentications.
+        rng: The random generator of the fields.
+
+    Returns:
+        The endpoints, with their service, and the authentications.
+    """
+    created_services = Service.objects.bulk_create(
+        Service(
+            name=f"Synthetic service {index}",
+            trailing_slash=rng.random() < 0.3,
+        )
+        for index in range(services)
+    )
+
+    created_endpoints = Endpoint.objects.bulk_create(
+        (
+            Endpoint(
+                name=f"Synthetic endpoint {index}",
+                base_url=f"https://api{index % services}.example.com/v{rng.randint(1, 3)}/",
+                slug=f"resources{index}",
+                method=rng.choices(list(METHODS), weights=list(METHODS.values()))[0],
+                auth_method=rng.choice(choices.AuthMethod.values) if rng.random() < 0.5 else None,
+                service=created_services[index % services],
+            )
+            for index in range(max(endpoints, services))
+        ),
+        batch_size=1000,
+    )
+
+    created_authentications = Authentication.objects.bulk_create(
+        (Authentication(email=f"synthetic-{uuid.uuid4()}@example.com") for _ in range(authentications)),
+        batch_size=1000,
+    )
+
+    return created_endpoints, created_authentications
+
+
+def get_profile(endpoint: Endpoint, rng: random.Random) -> EndpointProfile:
+    """Precomputes the values the traces of an endpoint are drawn from, so that each trace costs a few lookups.
+
+    Args:
+        endpoint: The endpoint, with its service.
+        rng: The random generator.
+
+    Returns:
+        The profile of the endpoint.
+    """
+    urls = []
+    for _ in range(URL_VARIANTS):
+        params = {"page": rng.randint(1, 50)}
+        if rng.random() < 0.5:
+            params["id"] = rng.randint(1, 100_000)
+        if rng.random() < 0.2:
+            params["lang"] = rng.choice(["en", "fr", "de"])
+
+        url = endpoint.build_url(**params)
+        urls.append((url, json.dumps(group_url_params(url))))
+
+    headers = [
+        json.dumps(
+            {"Accept": "application/json", "User-Agent": f"compyle/{rng.randint(1, 9)}.0", "X-Request-Id": str(i)}
+        )
+        for i in range(DOCUMENT_VARIANTS)
+    ]
+    payloads: list[str | None] = [None]
+    if endpoint.method != choices.HttpMethod.GET:
+        payloads = [
+            json.dumps({"id": rng.randint(1, 100_000), "values": [rng.random() for _ in range(rng.randint(1, 8))]})
+            for _ in range(DOCUMENT_VARIANTS)
+        ]
+
+    return EndpointProfile(
+        reference=endpoint.reference,
+        method=endpoint.method,
+        urls=urls,
+        headers=headers,
+        payloads=payloads,
+        # the median latency of the endpoint, between 20 ms and 1 s, and its tail
+        latency_mu=rng.uniform(3.0, 6.9),
+        latency_sigma=rng.uniform(0.3, 1.0),
+        authenticated=endpoint.auth_method is not None,
+    )
+
+
+# pylint: disable=too-many-arguments, too-many-locals
+def iter_trace_rows(
+    profiles: list[EndpointProfile],
+    authentications: list[str],
+    count: int,
+    start: datetime.datetime,
+    end: datetime.datetime,
+    rng: random.Random,
+    skew: float = 1.1,
+) -> Iterator[tuple[Any, ...]]:
+    """Generates the rows of traces in the order of their start, with the columns of :data:`TRACE_COLUMNS`.
+
+    The endpoints are called following a Zipf law, a few of them receiving most of the traffic, the latencies
+    follow a log-normal law per endpoint and the status codes the weights of :data:`STATUS_CODES`.
+
+    Args:
+        profiles: The profiles of the endpoints, in decreasing popularity.
+        authentications: The references of the authentications of the authenticated endpoints.
+        count: The number of traces.
+        start: The start datetime of the first trace.
+        end: The start datetime after the last trace.
+        rng: The random generator.
+        skew: The exponent of the Zipf law, 0 for a uniform traffic.
+
+    Yields:
+        The rows, the datetimes in ISO 8601 and the JSON fields encoded.
+    """
+    endpoint_weights = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(len(profiles))))
+    status_codes, status_weights = list(STATUS_CODES), list(itertools.accumulate(STATUS_CODES.values()))
+    status_classes = {code: choices.StatusClass.of(code) for code in STATUS_CODES}
+
+    step = (end - start).total_seconds() / max(count, 1)
+    origin = start.timestamp()
+    utc = datetime.timezone.utc
+
+    for index, profile, status_code in zip(
+        range(count),
+        rng.choices(profiles, cum_weights=endpoint_weights, k=count),
+        rng.choices(status_codes, cum_weights=status_weights, k=count),
+    ):
+        # evenly spread with a jitter, so that the rows stay in time order as the ingestion writes them
+        started = origin + (index + rng.random()) * step
+        if status_code is None:
+            completed_at = None
+        else:
+            latency = min(rng.lognormvariate(profile.latency_mu, profile.latency_sigma), TIMEOUT)
+            completed_at = datetime.datetime.fromtimestamp(started + latency / 1000, utc).isoformat()
+
+        started_at = datetime.datetime.fromtimestamp(started, utc).isoformat()
+        url, url_params = rng.choice(profile.urls)
+        yield (
+            str(uuid.uuid4()),
+            started_at,
+            completed_at,
+            # written once completed, every trace being kept
+            completed_at or started_at,
+            1.0,
+            profile.method,
+            url,
+            url_params,
+            status_code,
+            status_classes[status_code],
+            rng.choice(profile.headers),
+            rng.choice(profile.payloads),
+            profile.reference,
+            rng.choice(authentications) if profile.authenticated and authentications else None,
+        )
+
+
+class RowStream:
+    """A file-like object encoding rows as CSV as they are read, for a `COPY` to load the rows already sent while
+    the next ones are being generated.
+
+    Args:
+        rows: The rows, None being encoded as NULL.
+    """
+
+    BATCH_SIZE = 200
+    """The number of rows encoded at once."""
+
+    def __init__(self, rows: Iterator[tuple[Any, ...]]) -> None:
+        self.rows = iter(rows)
+        self.count = 0
+        self.pending = ""
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def read(self, size: int = -1) -> str:
+        """Returns the next characters of the CSV, at most `size` of them, or all of them if negative."""
+        while size < 0 or len(self.pending) < size:
+            batch = list(itertools.islice(self.rows, self.BATCH_SIZE))
+            if not batch:
+                break
+
+            self.writer.writerows(batch)
+            self.count += len(batch)
+            self.pending += self.buffer.getvalue()
+            self.buffer.seek(0)
+            self.buffer.truncate()
+
+        if size < 0:
+            size = len(self.pending)
+        data, self.pending = self.pending[:size], self.pending[size:]
+        return data
+
+
+def copy_rows(table: str, columns: tuple[str, ...], rows: Iterator[tuple[Any, ...]]) -> int:
+    """Loads rows into a table with a single `COPY` from CSV, much faster than inserts.
+
+    The rows are streamed, so that neither they nor the CSV are held in memory at once.
+
+    Args:
+        table: The name of the table.
+        columns: The columns of the rows.
+        rows: The rows, None being loaded as NULL.
+
+    Returns:
+        The number of rows loaded.
+    """
+    stream = RowStream(rows)
+
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", stream, size=COPY_BUFFER_SIZE
+        )
+
+    return stream.count
+
+
+@contextmanager
+def deferred_indexes() -> Iterator[None]:
+    """Drops the secondary indexes of the trace table, then builds them again once the traces are loaded.
+
+    Building an index once over all the rows is much faster than maintaining it row by row, the GIN indexes of the
+    URL parameters and of the substring searches above all.
+    """
+    indexes = Trace._meta.indexes  # pylint: disable=protected-access
+
+    with connection.schema_editor() as schema_editor:
+        for index in indexes:
+            schema_editor.remove_index(Trace, index)
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as schema_editor:
+            # the deferred foreign key checks of traces loaded in the same transaction would prevent the builds
+            schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            for index in indexes:
+                schema_editor.add_index(Trace, index)
+
+
+# pylint: disable=too-many-arguments, too-many-locals
+def generate_traces(
+    endpoints: list[Endpoint],
+    authentications: list[Authentication],
+    count: int,
+    days: float = 30,
+    chunk_size: int = 100_000,
+    seed: int | None = None,
+    skew: float = 1.1,
+) -> Generator[int, None, None]:
+    """Loads synthetic traces of endpoints, started over the last days, in chunks of one `COPY` each.
+
+    Each chunk is committed on its own, so that a large load can be interrupted and its progress reported. The
+    seed governs the distributions, the references being random regardless. The traces land in their monthly
+    partitions, or in the default partition when the month has none.
+
+    Args:
+        endpoints: The endpoints, with their service.
+        authentications: The authentications of the authenticated endpoints.
+        count: The number of traces.
+        days: The number of days the traces are spread over, up to now.
+        chunk_size: The number of traces loaded at once.
+        seed: The seed of the random generator, for reproducible loads.
+        skew: The exponent of the Zipf law of the traffic of the endpoints, 0 for a uniform traffic.
+
+    Returns:
+        A generator that yields the number of traces loaded by each chunk.
+    """
+    rng = random.Random(seed)
+    profiles = [get_profile(endpoint, rng) for endpoint in endpoints]
+    rng.shuffle(profiles)
+    references = [authentication.reference for authentication in authentications]
+
+    end = timezone.now()
+    span = datetime.timedelta(days=days) / max(count, 1)
+    start = end - span * count
+
+    for offset in range(0, count, chunk_size):
+        size = min(chunk_size, count - offset)
+        rows = iter_trace_rows(
+            profiles, references, size, start + span * offset, start + span * (offset + size), rng, skew
+        )
+
+        yield copy_rows(Trace._meta.db_table, TRACE_COLUMNS, rows)  # pylint: disable=protected-access
@@ -16,10 +16,11 @@ def async_request(
     timeout: float | None = None,
 ) -> Any:
     # pylint: disable=import-outside-toplevel
+    from compyle.proxy import catalog, tracing
     from compyle.proxy.choices import AuthFlow
-    from compyle.proxy.models import Authentication, Endpoint, Trace
+    from compyle.proxy.models import Authentication
 
-    endpoint = Endpoint.objects.get(reference=endpoint_id)
+    endpoint = catalog.get_endpoint(endpoint_id)
     authentication = None
 
     if authentication_id:
@@ -60,20 +61,120 @@ def async_request(
 
     url = endpoint.build_url(**params)
 
-    trace = Trace(
-        endpoint=endpoint,
-        authentication=authentication,
-        method=endpoint.method,
-        url=url,
-        headers=headers,
-        payload=body,
-    )
-    trace.save()
+    trace = tracing.start_trace(endpoint, authentication, url, headers, body)
 
-    response = endpoint.request(url, headers=headers, body=body, timeout=timeout)
-
-    trace.completed_at = trace.started_at + response.elapsed
-    trace.status_code = response.status_code
-    trace.save()
+    try:
+        response = endpoint.request(url, headers=headers, body=body, timeout=timeout)
+        tracing.complete_trace(trace, response)
+    finally:
+        tracing.record_trace(trace)
 
     return endpoint.parse_response(response)
+
+
+@shared_task
+def maintain_trace_partitions() -> dict[str, list[str]]:
+    """Creates the upcoming monthly partitions of the traces and drops the expired ones."""
+    # pylint: disable=import-outside-toplevel
+    from compyle.proxy.partitions import maintain_partitions
+
+    created, dropped = maintain_partitions()
+
+    return {
+        "created": [partition.name for partition in created],
+        "dropped": [partition.name for partition in dropped],
+    }
+
+
+@shared_task
+def purge_expired_traces() -> int:
+    """Deletes the traces older than the retention of their endpoint or service, in chunks."""
+    # pylint: disable=import-outside-toplevel
+    from compyle.proxy.retention import purge_expired_traces as purge
+
+    return sum(count for _, count in purge())
+
+
+@shared_task
+def flush_endpoint_statistics() -> int:
+    """Flushes the statistics of the endpoints counted in Redis to the database."""
+    # pylint: disable=import-outside-toplevel
+    from django.conf import settings
+
+    from compyle.proxy.statistics import flush_statistics
+
+    if settings.PROXY_ENDPOINT_STATISTICS != "redis":
+        return 0
+
+    return flush_statistics()
+
+
+@shared_task
+def rollup_traces() -> int:
+    """Rolls up the settled traces by minute, batch after batch until none are left."""
+    # pylint: disable=import-outside-toplevel
+    from django.conf import settings
+
+    from compyle.proxy.rollups import rollup_traces as rollup
+
+    total = 0
+    while (count := rollup()) > 0:
+        total += count
+        if count < settings.PROXY_ROLLUP_BATCH_SIZE:
+            break
+
+    return total
+
+
+@shared_task
+def compact_trace_rollups() -> int:
+    """Compacts the rollups older than the retention of their resolution into coarser ones."""
+    # pylint: disable=import-outside-toplevel
+    from compyle.proxy.rollups import compact_rollups
+
+    return compact_rollups()
+
+
+@shared_task
+def archive_traces() -> int:
+    """Moves the traces older than the archive delay to the archive, if it is enabled."""
+    # pylint: disable=import-outside-toplevel
+    from compyle.proxy.archives import archive_traces as archive, is_archive_enabled
+
+    if not is_archive_enabled():
+        return 0
+
+    return sum(count for count, _ in archive())
+
+
+@shared_task
+def purge_orphan_responses() -> int:
+    """Deletes the captured responses whose trace was never written, purged or archived."""
+    # pylint: disable=import-outside-toplevel
+    from compyle.proxy.responses import purge_orphan_responses as purge
+
+    return purge()
+
+
+@shared_task(bind=True)
+def purge_deleted_endpoints(self) -> int:
+    """Purges the endpoints and services marked as deleted, until the run time is up."""
+    # pylint: disable=import-outside-toplevel
+    import time
+
+    from django.conf import settings
+
+    from compyle.proxy.deletions import purge_deleted
+
+    # the run stops in time for the next one not to overlap, which resumes where it stopped
+    deadline = time.monotonic() + settings.PROXY_DELETION_RUN_TIME
+    total = 0
+
+    for reference, name, count in purge_deleted():
+        total += count
+        if not self.request.called_directly:
+            self.update_state(state="PROGRESS", meta={"reference": reference, "name": name, "deleted": total})
+        if time.monotonic() >= deadline:
+            break
+
+    return total
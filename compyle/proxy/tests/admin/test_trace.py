@@ -0,0 +1,65 @@
+# pylint: disable=missing-function-docstring
+
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+
+from compyle.lib.test import BaseAdminTest
+from compyle.proxy.blobs import detach_contents
+from compyle.proxy.responses import capture_response
+from compyle.proxy.tests.factories import get_trace
+
+changelist_url = reverse("admin:proxy_trace_changelist")
+
+
+class TraceAdminTest(BaseAdminTest):
+    """TestCase for :class:`comprle.proxy.admin.TraceAdmin`."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.client.force_login(self.user)
+
+    def test_changelist_counts_small_sets_exactly(self) -> None:
+        for _ in range(3):
+            get_trace()
+
+        response = self.client.get(changelist_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 3)
+        self.assertFalse(response.context["cl"].paginator.count_estimated)
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=2)
+    def test_changelist_estimates_large_sets(self) -> None:
+        for _ in range(3):
+            get_trace()
+
+        response = self.client.get(changelist_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["cl"].paginator.count_estimated)
+        self.assertEqual(len(response.context["cl"].result_list), 3)
+
+    def test_change_view_shows_blob_contents(self) -> None:
+        trace = get_trace(commit=False, headers={"X-Blob": "stored-once"})
+        detach_contents([trace])
+        trace.save()
+
+        response = self.client.get(reverse("admin:proxy_trace_change", args=[trace.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "stored-once")
+
+    def test_change_view_shows_captured_response(self) -> None:
+        trace = get_trace()
+        http_response = mock.MagicMock(headers={"X-Captured": "yes"})
+        http_response.iter_content.return_value = [b"captured body"]
+        capture_response(trace, http_response).save()
+
+        response = self.client.get(reverse("admin:proxy_trace_change", args=[trace.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "captured body")
+        self.assertContains(response, "X-Captured")
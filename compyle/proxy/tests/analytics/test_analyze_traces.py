@@ -0,0 +1,89 @@
+# pylint: disable=missing-function-docstring
+
+import datetime
+import io
+from unittest import skipIf
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from compyle.proxy.analytics import analyze_traces, numpy
+from compyle.proxy.models import Trace
+from compyle.proxy.tests.factories import get_endpoint, get_trace
+
+
+class TestAnalyzeTraces(TestCase):
+    """TestCase for the `analyze_traces` method in the analytics module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.endpoints = [get_endpoint(), get_endpoint()]
+        self.now = timezone.now().replace(minute=30, second=0, microsecond=0)
+
+        traces = []
+        for index, (endpoint, status_code, latency) in enumerate(
+            [
+                (self.endpoints[0], 200, 5),
+                (self.endpoints[0], 200, 120),
+                (self.endpoints[0], 500, 800),
+                (self.endpoints[1], 404, 40),
+                (self.endpoints[1], None, None),
+            ]
+        ):
+            trace = get_trace(commit=False, endpoint=endpoint, authentication=None, status_code=status_code)
+            trace.started_at = self.now - datetime.timedelta(hours=index % 2)
+            if latency is not None:
+                trace.completed_at = trace.started_at + datetime.timedelta(milliseconds=latency)
+            traces.append(trace)
+        Trace.objects.bulk_create(traces)
+
+    def test_computes_totals_and_histogram(self) -> None:
+        with self.assertNumQueries(1):
+            results = analyze_traces(Trace.objects.all(), percentiles=[50, 100])
+
+        self.assertEqual(results["total"]["count"], 5)
+        self.assertEqual(results["total"]["error_count"], 3)
+        self.assertEqual(results["total"]["latency"]["count"], 4)
+        self.assertAlmostEqual(results["total"]["latency"]["mean"], (5 + 120 + 800 + 40) / 4)
+        self.assertAlmostEqual(results["total"]["latency"]["percentiles"]["p100"], 800, delta=8)
+        self.assertEqual(results["groups"], [])
+        self.assertEqual(
+            {(bin_["start"], bin_["count"]) for bin_ in results["histogram"] if bin_["count"]},
+            {(0, 1), (25, 1), (100, 1), (500, 1)},
+        )
+
+    def test_groups_traces(self) -> None:
+        results = analyze_traces(Trace.objects.all(), group_by="endpoint")
+        self.assertEqual(
+            [(group["key"], group["count"], group["error_count"]) for group in results["groups"]],
+            sorted([(self.endpoints[0].reference, 3, 1), (self.endpoints[1].reference, 2, 2)]),
+        )
+
+        results = analyze_traces(Trace.objects.all(), group_by="status_class")
+        self.assertEqual(
+            [(group["key"], group["count"]) for group in results["groups"]], [(2, 2), (4, 1), (5, 1), (None, 1)]
+        )
+
+        results = analyze_traces(Trace.objects.all(), group_by="hour")
+        self.assertEqual(
+            [(group["key"], group["count"]) for group in results["groups"]],
+            [(self.now.replace(minute=0) - datetime.timedelta(hours=1), 2), (self.now.replace(minute=0), 3)],
+        )
+
+    @skipIf(numpy is None, "NumPy is not installed")
+    def test_vectorized_and_row_results_match(self) -> None:
+        for group_by in (None, "endpoint", "status_code", "minute"):
+            self.assertEqual(
+                analyze_traces(Trace.objects.all(), group_by, chunk_size=2, vectorized=True),
+                analyze_traces(Trace.objects.all(), group_by, chunk_size=3, vectorized=False),
+            )
+
+    def test_benchmark_command(self) -> None:
+        for group_by in ("endpoint", "hour"):
+            stdout = io.StringIO()
+            call_command("benchmark_trace_analytics", "--repeat", "1", "--group-by", group_by, stdout=stdout)
+
+            self.assertIn(f"5 traces grouped by {group_by}", stdout.getvalue())
+            self.assertIn("orm:", stdout.getvalue())
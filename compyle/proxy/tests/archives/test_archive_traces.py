@@ -0,0 +1,161 @@
+# pylint: disable=missing-function-docstring
+
+import datetime
+import io
+import json
+import tempfile
+from unittest import skipIf
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from compyle.proxy.analytics import analyze_traces
+from compyle.proxy.archives import ArchiveQuery, archive_traces
+from compyle.proxy.exports import pyarrow, stream_traces
+from compyle.proxy.filtersets import TraceFilterSet
+from compyle.proxy.models import Trace
+from compyle.proxy.rollups import rollup_traces
+from compyle.proxy.tests.factories import get_endpoint, get_trace
+
+
+@skipIf(pyarrow is None, "PyArrow is not installed")
+class TestArchiveTraces(TestCase):
+    """TestCase for the `archive_traces` method and the archive queries in the archives module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        self.settings_override = override_settings(PROXY_TRACE_ARCHIVE_PATH=directory.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        self.path = directory.name
+
+        self.endpoints = [get_endpoint(), get_endpoint()]
+        self.now = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+        traces = []
+        for endpoint, status_code, days in [
+            (self.endpoints[0], 200, 120),
+            (self.endpoints[0], 500, 120),
+            (self.endpoints[1], 200, 100),
+            (self.endpoints[1], None, 100),
+            (self.endpoints[0], 200, 1),
+        ]:
+            trace = get_trace(
+                commit=False,
+                endpoint=endpoint,
+                authentication=None,
+                url=f"https://example.com/games?days={days}&sort=name",
+                status_code=status_code,
+                payload={"days": days},
+            )
+            trace.started_at = self.now - datetime.timedelta(days=days)
+            if status_code is not None:
+                trace.completed_at = trace.started_at + datetime.timedelta(milliseconds=days)
+            traces.append(trace)
+        self.traces = Trace.objects.bulk_create(traces)
+
+        rollup_traces(settle_delay=0)
+
+    def test_archives_old_traces(self) -> None:
+        batches = list(archive_traces(self.now - datetime.timedelta(days=90), batch_size=3))
+
+        self.assertEqual([count for count, _ in batches], [3, 1])
+        self.assertEqual(
+            sorted(path.parent.name for _, paths in batches for path in paths),
+            sorted(
+                [
+                    (self.now - datetime.timedelta(days=120)).strftime("date=%Y-%m-%d"),
+                    (self.now - datetime.timedelta(days=100)).strftime("date=%Y-%m-%d"),
+                    (self.now - datetime.timedelta(days=100)).strftime("date=%Y-%m-%d"),
+                ]
+            ),
+        )
+        self.assertEqual(list(Trace.objects.values_list("reference", flat=True)), [self.traces[4].reference])
+
+    def test_does_not_archive_traces_not_rolled_up(self) -> None:
+        trace = get_trace(commit=False, endpoint=self.endpoints[0], authentication=None)
+        trace.started_at = self.now - datetime.timedelta(days=200)
+        trace.save()
+
+        self.assertEqual(sum(count for count, _ in archive_traces()), 4)
+        self.assertTrue(Trace.objects.filter(pk=trace.pk).exists())
+
+    def test_analytics_read_archives(self) -> None:
+        list(archive_traces())
+
+        results = analyze_traces(Trace.objects.all(), group_by="endpoint", archives=ArchiveQuery())
+
+        self.assertEqual(results["total"]["count"], 5)
+        self.assertEqual(results["total"]["error_count"], 2)
+        self.assertEqual(results["total"]["latency"]["count"], 4)
+        self.assertAlmostEqual(results["total"]["latency"]["mean"], (120 + 120 + 100 + 1) / 4)
+        self.assertEqual(
+            sorted((group["key"], group["count"]) for group in results["groups"]),
+            sorted([(self.endpoints[0].reference, 3), (self.endpoints[1].reference, 2)]),
+        )
+
+    def test_exports_read_filtered_archives(self) -> None:
+        list(archive_traces())
+
+        filterset = TraceFilterSet(
+            {"endpoints": self.endpoints[0].reference, "status_code_startswith": "2"}, queryset=Trace.objects.all()
+        )
+        self.assertTrue(filterset.is_valid())
+
+        content = "".join(stream_traces(filterset.qs, "ndjson", archives=ArchiveQuery.from_filterset(filterset)))
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["reference"] for row in rows], [self.traces[0].reference, self.traces[4].reference])
+        self.assertEqual(rows[0]["payload"], {"days": 120})
+        self.assertEqual(rows[0]["started_at"], self.traces[0].started_at.isoformat())
+
+    def test_archive_queries_prune_days_and_filter(self) -> None:
+        list(archive_traces())
+
+        def get_references(query: ArchiveQuery) -> list[str]:
+            return [reference for table in query.iter_tables(10) for reference in table["reference"].to_pylist()]
+
+        self.assertEqual(len(ArchiveQuery(start=self.now - datetime.timedelta(days=110)).get_paths()), 1)
+        self.assertEqual(
+            get_references(ArchiveQuery(status_classes=[5])),
+            [self.traces[1].reference],
+        )
+        self.assertEqual(
+            get_references(ArchiveQuery(search=[self.traces[3].reference.upper()])),
+            [self.traces[3].reference],
+        )
+        self.assertEqual(get_references(ArchiveQuery(empty=True)), [])
+
+    def test_archive_queries_filter_url_params(self) -> None:
+        list(archive_traces())
+
+        def get_references(query: ArchiveQuery) -> list[str]:
+            return [reference for table in query.iter_tables(10) for reference in table["reference"].to_pylist()]
+
+        self.assertCountEqual(
+            get_references(ArchiveQuery(url_params={"days": ["100"], "sort": ["name"]})),
+            [self.traces[2].reference, self.traces[3].reference],
+        )
+        self.assertEqual(get_references(ArchiveQuery(url_params={"days": ["10"]})), [])
+
+        filterset = TraceFilterSet({"param": "days:120"}, queryset=Trace.objects.all())
+        self.assertTrue(filterset.is_valid())
+        self.assertCountEqual(
+            get_references(ArchiveQuery.from_filterset(filterset)),
+            [self.traces[0].reference, self.traces[1].reference],
+        )
+
+        filterset = TraceFilterSet({"param": "days"}, queryset=Trace.objects.all())
+        self.assertTrue(filterset.is_valid())
+        self.assertTrue(ArchiveQuery.from_filterset(filterset).empty)
+
+    def test_command_archives_traces(self) -> None:
+        stdout = io.StringIO()
+        call_command("archive_traces", "--older-than", "110", stdout=stdout)
+
+        self.assertIn("2 traces archived", stdout.getvalue())
+        self.assertEqual(Trace.objects.count(), 3)
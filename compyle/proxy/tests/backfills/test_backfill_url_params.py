@@ -0,0 +1,48 @@
+# pylint: disable=missing-function-docstring
+
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from compyle.proxy.backfills import backfill_url_params
+from compyle.proxy.models import Trace
+from compyle.proxy.tests.factories import get_trace
+
+
+class TestBackfillUrlParams(TestCase):
+    """TestCase for the `backfill_url_params` method in the backfills module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.traces = [
+            get_trace(url="https://example.com/games?game_id=1"),
+            get_trace(url="https://example.com/games?game_id=2&game_id=3"),
+            get_trace(url="https://example.com/games"),
+            get_trace(url="https://example.com/games?lang="),
+        ]
+        # as written before the URL parameters were stored
+        Trace.objects.update(url_params=None)
+
+    def test_backfills_in_batches(self) -> None:
+        count, last_id = backfill_url_params(batch_size=2)
+        self.assertEqual((count, last_id), (2, self.traces[1].id))
+
+        count, last_id = backfill_url_params(batch_size=2, after_id=last_id)
+        self.assertEqual((count, last_id), (1, self.traces[3].id))
+
+        self.assertEqual(backfill_url_params(batch_size=2, after_id=last_id), (0, last_id))
+
+        self.assertEqual(
+            list(Trace.objects.order_by("id").values_list("url_params", flat=True)),
+            [{"game_id": ["1"]}, {"game_id": ["2", "3"]}, None, {"lang": [""]}],
+        )
+        self.assertEqual(Trace.objects.filter(url_params__contains={"game_id": ["3"]}).get(), self.traces[1])
+
+    def test_command_backfills_traces(self) -> None:
+        stdout = io.StringIO()
+        call_command("backfill_url_params", "--batch-size", "2", stdout=stdout)
+
+        self.assertIn("3 traces backfilled", stdout.getvalue())
+        self.assertFalse(Trace.objects.filter(url__contains="?", url_params__isnull=True).exists())
@@ -0,0 +1,94 @@
+# pylint: disable=missing-function-docstring
+
+import io
+import json
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from compyle.proxy.blobs import (
+    clear_cache,
+    get_blob_report,
+    get_content,
+    load_blobs,
+    store_blobs,
+)
+from compyle.proxy.exports import stream_traces
+from compyle.proxy.models import Trace, TraceBlob
+from compyle.proxy.tests.factories import get_endpoint, get_trace
+from compyle.proxy.tracing import record_trace
+
+
+class TestStoreBlobs(TestCase):
+    """TestCase for the `store_blobs` method and the deduplication of traces in the blobs module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        clear_cache()
+        self.addCleanup(clear_cache)
+
+    def test_stores_documents_once(self) -> None:
+        with self.assertNumQueries(1):
+            digests = store_blobs([{"a": 1, "b": [1, 2]}, {"b": [1, 2], "a": 1}, None])
+
+        self.assertEqual(digests[0], digests[1])
+        self.assertIsNone(digests[2])
+
+        # known to the process, the blob is not written again
+        with self.assertNumQueries(0):
+            self.assertEqual(store_blobs([{"a": 1, "b": [1, 2]}]), digests[:1])
+
+        clear_cache()
+        with self.assertNumQueries(1):
+            store_blobs([{"a": 1, "b": [1, 2]}])
+
+        blob = TraceBlob.objects.get()
+        self.assertEqual(blob.digest, digests[0])
+        self.assertEqual(blob.size, len('{"a":1,"b":[1,2]}'))
+
+    def test_loads_blobs_from_cache(self) -> None:
+        digest, *_ = store_blobs([{"a": 1}])
+        clear_cache()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(load_blobs([digest, None]), {digest: {"a": 1}})
+        with self.assertNumQueries(0):
+            self.assertEqual(load_blobs([digest]), {digest: {"a": 1}})
+
+    @override_settings(PROXY_TRACE_BLOBS=True)
+    def test_recorded_traces_reference_blobs(self) -> None:
+        endpoint = get_endpoint()
+        traces = [
+            get_trace(commit=False, endpoint=endpoint, authentication=None, headers={"X-Id": "1"}, payload=None)
+            for _ in range(3)
+        ]
+        for trace in traces:
+            record_trace(trace)
+
+        self.assertEqual(TraceBlob.objects.count(), 1)
+        self.assertEqual(Trace.objects.filter(headers__isnull=True, headers_blob__isnull=False).count(), 3)
+
+        trace = Trace.objects.get(pk=traces[0].pk)
+        self.assertEqual(get_content(trace, "headers"), {"X-Id": "1"})
+        self.assertIsNone(get_content(trace, "payload"))
+
+        row = json.loads(next(stream_traces(Trace.objects.filter(pk=trace.pk), "ndjson")))
+        self.assertEqual(row["headers"], {"X-Id": "1"})
+
+    def test_command_deduplicates_traces(self) -> None:
+        endpoint = get_endpoint()
+        for index in range(4):
+            get_trace(endpoint=endpoint, authentication=None, headers={"X-Id": "1"}, payload={"index": index % 2})
+
+        stdout = io.StringIO()
+        call_command("deduplicate_traces", "--batch-size", "3", stdout=stdout)
+
+        self.assertIn("4 traces deduplicated", stdout.getvalue())
+        self.assertIn("8 documents stored as 3 blobs", stdout.getvalue())
+        self.assertEqual(sorted(get_content(trace, "payload")["index"] for trace in Trace.objects.all()), [0, 0, 1, 1])
+
+        report = get_blob_report()
+        self.assertEqual(report["inline_count"], 0)
+        self.assertEqual(report["reference_count"], 8)
+        self.assertLess(report["blob_size"], report["reference_size"])
@@ -0,0 +1,139 @@
+# pylint: disable=missing-function-docstring
+
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from compyle.proxy import catalog
+from compyle.proxy.catalog import CHANNEL, evict, get_endpoint, subscribe
+from compyle.proxy.deletions import mark_deleted
+from compyle.proxy.models import Endpoint, Service
+from compyle.proxy.tests.factories import get_endpoint as create_endpoint, get_service
+
+
+@override_settings(PROXY_CATALOG_CACHE=True)
+@mock.patch("compyle.proxy.catalog.start_listener")
+class TestGetEndpoint(TestCase):
+    """TestCase for the `get_endpoint` method and the invalidations of the catalog module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.service = get_service()
+        self.endpoint = create_endpoint(service=self.service)
+        self.other_endpoint = create_endpoint()
+
+        # as the listener does once subscribed
+        catalog.clear_cache()
+        catalog._subscribed.set()  # pylint: disable=protected-access
+        self.addCleanup(catalog._subscribed.clear)  # pylint: disable=protected-access
+        self.addCleanup(catalog.clear_cache)
+
+    def test_caches_endpoints_with_service(self, _) -> None:
+        with self.assertNumQueries(1):
+            endpoint = get_endpoint(self.endpoint.reference)
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_endpoint(self.endpoint.reference), endpoint)
+            self.assertEqual(endpoint.service.trailing_slash, self.service.trailing_slash)
+
+    def test_does_not_cache_while_unsubscribed(self, _) -> None:
+        catalog._subscribed.clear()  # pylint: disable=protected-access
+
+        with self.assertNumQueries(2):
+            get_endpoint(self.endpoint.reference)
+            get_endpoint(self.endpoint.reference)
+
+    @override_settings(PROXY_CATALOG_CACHE=False)
+    def test_does_not_cache_when_disabled(self, mock_start: mock.MagicMock) -> None:
+        with self.assertNumQueries(2):
+            get_endpoint(self.endpoint.reference)
+            get_endpoint(self.endpoint.reference)
+
+        mock_start.assert_not_called()
+
+    def test_raises_for_deleted_endpoints(self, _) -> None:
+        mark_deleted(Endpoint.objects.filter(pk=self.endpoint.pk))
+
+        with self.assertRaises(Endpoint.DoesNotExist):
+            get_endpoint(self.endpoint.reference)
+
+    def test_evicts_changed_endpoints(self, _) -> None:
+        get_endpoint(self.endpoint.reference)
+        get_endpoint(self.other_endpoint.reference)
+
+        evict(f"endpoint:{self.endpoint.reference}")
+
+        with self.assertNumQueries(1):
+            get_endpoint(self.endpoint.reference)
+            get_endpoint(self.other_endpoint.reference)
+
+    def test_evicts_endpoints_of_changed_services(self, _) -> None:
+        get_endpoint(self.endpoint.reference)
+        get_endpoint(self.other_endpoint.reference)
+
+        evict(f"service:{self.service.reference}")
+
+        with self.assertNumQueries(1):
+            get_endpoint(self.endpoint.reference)
+            get_endpoint(self.other_endpoint.reference)
+
+    def test_does_not_cache_endpoints_read_during_change(self, _) -> None:
+        load_endpoint = catalog.load_endpoint
+
+        def load_while_changed(reference: str) -> Endpoint:
+            endpoint = load_endpoint(reference)
+            evict(f"endpoint:{reference}")
+            return endpoint
+
+        with mock.patch("compyle.proxy.catalog.load_endpoint", side_effect=load_while_changed):
+            get_endpoint(self.endpoint.reference)
+
+        with self.assertNumQueries(1):
+            get_endpoint(self.endpoint.reference)
+
+    def test_evicts_published_changes_while_subscribed(self, _) -> None:
+        get_endpoint(self.endpoint.reference)
+
+        def listen():
+            yield {"type": "subscribe", "data": 1}
+            # the changes missed before the subscription are not known, the cache is cleared
+            with self.assertNumQueries(2):
+                get_endpoint(self.endpoint.reference)
+                get_endpoint(self.other_endpoint.reference)
+
+            yield {"type": "message", "data": f"endpoint:{self.other_endpoint.reference}".encode()}
+            with self.assertNumQueries(1):
+                get_endpoint(self.endpoint.reference)
+                get_endpoint(self.other_endpoint.reference)
+
+        pubsub = mock.MagicMock()
+        pubsub.listen.return_value = listen()
+        subscribe(pubsub)
+
+        pubsub.subscribe.assert_called_once_with(CHANNEL)
+        self.assertFalse(catalog._subscribed.is_set())  # pylint: disable=protected-access
+
+    @mock.patch("compyle.proxy.catalog.get_redis")
+    def test_publishes_saved_and_deleted_endpoints(self, mock_redis: mock.MagicMock, _) -> None:
+        pipeline = mock_redis.return_value.pipeline.return_value
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.endpoint.save()
+        pipeline.publish.assert_called_once_with(CHANNEL, f"endpoint:{self.endpoint.reference}")
+
+        pipeline.reset_mock()
+        reference = self.service.reference
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.delete()
+        pipeline.publish.assert_any_call(CHANNEL, f"service:{reference}")
+        pipeline.publish.assert_any_call(CHANNEL, f"endpoint:{self.endpoint.reference}")
+
+    @mock.patch("compyle.proxy.catalog.get_redis")
+    def test_publishes_deletion_marks(self, mock_redis: mock.MagicMock, _) -> None:
+        pipeline = mock_redis.return_value.pipeline.return_value
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_deleted(Service.objects.filter(pk=self.service.pk))
+
+        pipeline.publish.assert_called_once_with(CHANNEL, f"service:{self.service.reference}")
@@ -0,0 +1,22 @@
+# pylint: disable=missing-function-docstring
+
+from unittest import mock
+
+from django.core import checks
+from django.test import SimpleTestCase, override_settings
+
+
+class TestArchiveDependencies(SimpleTestCase):
+    """TestCase for the `check_archive_dependencies` system check."""
+
+    @override_settings(PROXY_TRACE_ARCHIVE_PATH="/tmp/archives")
+    @mock.patch("compyle.proxy.checks.pyarrow", None)
+    def test_fails_without_pyarrow_when_archiving(self) -> None:
+        errors = checks.run_checks()
+
+        self.assertEqual([error.id for error in errors], ["proxy.E001"])
+
+    @override_settings(PROXY_TRACE_ARCHIVE_PATH=None)
+    @mock.patch("compyle.proxy.checks.pyarrow", None)
+    def test_passes_without_pyarrow_when_not_archiving(self) -> None:
+        self.assertEqual(checks.run_checks(), [])
@@ -0,0 +1,50 @@
+# pylint: disable=missing-function-docstring
+
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from compyle.proxy.credentials import import_authentications
+from compyle.proxy.models import Authentication
+
+
+class TestImportAuthentications(TestCase):
+    """TestCase for the `import_authentications` method in the credentials module and its command."""
+
+    def import_file(self, rows: list[dict[str, str]]) -> str:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "authentications.ndjson")
+            with open(path, "w", encoding="utf-8") as file:
+                file.writelines(f"{json.dumps(row)}\n" for row in rows)
+
+            stdout = io.StringIO()
+            call_command("import_authentications", path, "--batch-size", "2", "--processes", "1", stdout=stdout)
+            return stdout.getvalue()
+
+    def test_keeps_last_row_of_duplicate_emails(self) -> None:
+        rows = [
+            {"email": "user@example.com", "api_key": "first"},
+            {"email": "other@example.com", "api_key": "other"},
+            {"email": "user@example.com", "api_key": "last"},
+        ]
+
+        self.assertEqual(list(import_authentications(rows, batch_size=3, processes=1)), [2])
+
+        self.assertEqual(Authentication.objects.count(), 2)
+        self.assertEqual(Authentication.objects.get(email="user@example.com").api_key, "last")
+
+    def test_command_imports_rows(self) -> None:
+        output = self.import_file([{"email": f"user-{i}@example.com", "password": f"secret-{i}"} for i in range(3)])
+
+        self.assertIn("Imported 3 authentications", output)
+        self.assertEqual(Authentication.objects.get(email="user-2@example.com").password, "secret-2")
+
+    def test_command_rejects_unknown_fields(self) -> None:
+        with self.assertRaisesMessage(CommandError, "Unknown fields token, user in row 2."):
+            self.import_file([{"email": "user@example.com"}, {"email": "other@example.com", "user": "", "token": ""}])
+
+        self.assertFalse(Authentication.objects.exists())
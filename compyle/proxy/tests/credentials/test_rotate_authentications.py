@@ -0,0 +1,59 @@
+# pylint: disable=missing-function-docstring
+
+from django.db.models import BinaryField, Value
+from django.test import TestCase
+
+from compyle.lib.crypto import derive_key, encrypt_value
+from compyle.proxy.credentials import rotate_authentications
+from compyle.proxy.models import Authentication
+from compyle.proxy.tests.factories import get_authentication
+
+
+class TestRotateAuthentications(TestCase):
+    """TestCase for the `rotate_authentications` method in the credentials module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        old_key = derive_key("old-secret")
+        self.authentications = [
+            Authentication(
+                email=f"user-{i}@example.com",
+                api_key=Value(encrypt_value(f"key-{i}", old_key), output_field=BinaryField()),
+                client_secret=Value(encrypt_value(f"secret-{i}", old_key), output_field=BinaryField()),
+            )
+            for i in range(5)
+        ]
+        Authentication.objects.bulk_create(self.authentications)
+
+    def test_rotates_every_authentication(self) -> None:
+        reports = list(rotate_authentications("old-secret", batch_size=2, processes=1))
+
+        self.assertEqual([count for count, _ in reports], [2, 2, 1])
+        self.assertEqual(reports[-1][1], max(str(authentication.pk) for authentication in self.authentications))
+
+        for i, authentication in enumerate(Authentication.objects.order_by("email")):
+            self.assertEqual(authentication.api_key, f"key-{i}")
+            self.assertEqual(authentication.client_secret, f"secret-{i}")
+            self.assertIsNone(authentication.password)
+
+    def test_rotates_across_processes(self) -> None:
+        self.assertEqual(sum(count for count, _ in rotate_authentications("old-secret", batch_size=2, processes=2)), 5)
+        self.assertEqual(
+            sorted(Authentication.objects.values_list("api_key", flat=True)),
+            [f"key-{i}" for i in range(5)],
+        )
+
+    def test_skips_already_rotated_authentications(self) -> None:
+        get_authentication(api_key="current")
+        list(rotate_authentications("old-secret", processes=1))
+
+        self.assertEqual(sum(count for count, _ in rotate_authentications("old-secret", processes=1)), 0)
+        self.assertIn("current", Authentication.objects.values_list("api_key", flat=True))
+
+    def test_resumes_after_reference(self) -> None:
+        references = sorted(str(authentication.pk) for authentication in self.authentications)
+
+        reports = list(rotate_authentications("old-secret", after=references[2], processes=1))
+
+        self.assertEqual(sum(count for count, _ in reports), 2)
@@ -0,0 +1,90 @@
+# pylint: disable=missing-function-docstring, no-value-for-parameter
+
+import datetime
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from compyle.proxy.choices import RollupResolution
+from compyle.proxy.deletions import mark_deleted, purge_deleted
+from compyle.proxy.models import Endpoint, Service, Trace, TraceRollup
+from compyle.proxy.rollups import LatencySketch
+from compyle.proxy.tasks import purge_deleted_endpoints
+from compyle.proxy.tests.factories import get_endpoint, get_service, get_trace
+
+
+class TestPurgeDeleted(TestCase):
+    """TestCase for the `mark_deleted` and `purge_deleted` methods in the deletions module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.service = get_service()
+        self.endpoint = get_endpoint(service=self.service)
+        self.other_endpoint = get_endpoint()
+
+        for endpoint in (self.endpoint, self.endpoint, self.endpoint, self.other_endpoint):
+            get_trace(endpoint=endpoint)
+
+        TraceRollup.objects.create(
+            endpoint=self.endpoint,
+            resolution=RollupResolution.MINUTE,
+            bucket=RollupResolution.MINUTE.truncate(timezone.now() - datetime.timedelta(minutes=5)),
+            call_count=3,
+            success_count=3,
+            sketch=LatencySketch().to_dict(),
+        )
+
+    def test_marks_endpoints_of_services(self) -> None:
+        self.assertEqual(mark_deleted(Service.objects.filter(pk=self.service.pk)), 1)
+
+        self.assertFalse(Service.objects.filter(pk=self.service.pk).exists())
+        self.assertCountEqual(Endpoint.objects.all(), [self.other_endpoint])
+        self.assertIsNotNone(Endpoint.all_objects.get(pk=self.endpoint.pk).deleted_at)
+        # the traces are left to the purge
+        self.assertEqual(Trace.objects.count(), 4)
+
+    def test_purges_in_chunks(self) -> None:
+        mark_deleted(Service.objects.filter(pk=self.service.pk))
+
+        self.assertEqual(
+            list(purge_deleted(batch_size=2)),
+            [
+                (self.endpoint.reference, "traces", 2),
+                (self.endpoint.reference, "traces", 1),
+                (self.endpoint.reference, "trace rollups", 1),
+                (self.endpoint.reference, "endpoints", 1),
+                (self.service.reference, "services", 1),
+            ],
+        )
+
+        self.assertFalse(Endpoint.all_objects.filter(pk=self.endpoint.pk).exists())
+        self.assertFalse(Service.all_objects.filter(pk=self.service.pk).exists())
+        self.assertFalse(TraceRollup.objects.exists())
+        self.assertEqual(list(Trace.objects.values_list("endpoint_id", flat=True)), [self.other_endpoint.reference])
+        self.assertEqual(list(purge_deleted()), [])
+
+    def test_keeps_services_with_live_endpoints(self) -> None:
+        mark_deleted(Endpoint.objects.filter(pk=self.endpoint.pk))
+        Service.objects.filter(pk=self.service.pk).update(deleted_at=timezone.now())
+        get_endpoint(service=self.service)
+
+        self.assertEqual([name for _, name, _ in purge_deleted()], ["traces", "trace rollups", "endpoints"])
+        self.assertTrue(Service.all_objects.filter(pk=self.service.pk).exists())
+
+    def test_task_returns_total(self) -> None:
+        mark_deleted(Endpoint.objects.filter(pk=self.endpoint.pk))
+
+        self.assertEqual(purge_deleted_endpoints(), 5)
+        self.assertEqual(purge_deleted_endpoints(), 0)
+
+    def test_command_prints_progress(self) -> None:
+        mark_deleted(Endpoint.objects.filter(pk=self.endpoint.pk))
+
+        stdout = io.StringIO()
+        call_command("purge_deleted", "--batch-size", "2", stdout=stdout)
+
+        self.assertIn(f"Deleted 1 traces of {self.endpoint.reference} (3 traces so far)", stdout.getvalue())
+        self.assertIn("Deleted 3 traces, 1 trace rollups, 1 endpoints", stdout.getvalue())
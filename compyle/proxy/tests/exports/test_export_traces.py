@@ -0,0 +1,125 @@
+# pylint: disable=missing-function-docstring
+
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+from unittest import skipIf
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from compyle.proxy.exports import EXPORT_FIELDS, pyarrow, stream_traces, write_columnar
+from compyle.proxy.models import Trace
+from compyle.proxy.tests.factories import get_endpoint, get_trace
+
+
+class TestExportTraces(TestCase):
+    """TestCase for the export functions of the exports module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.endpoints = [get_endpoint(), get_endpoint()]
+        self.now = timezone.now().replace(microsecond=0)
+
+        traces = []
+        for index, (endpoint, status_code, payload) in enumerate(
+            [
+                (self.endpoints[0], 200, {"items": [1, 2], "text": 'quoted "value", with comma'}),
+                (self.endpoints[0], 500, None),
+                (self.endpoints[1], None, {}),
+            ]
+        ):
+            trace = get_trace(
+                commit=False,
+                endpoint=endpoint,
+                authentication=None,
+                status_code=status_code,
+                headers={"Accept": "application/json"},
+                payload=payload,
+            )
+            trace.started_at = self.now + datetime.timedelta(seconds=index)
+            if status_code is not None:
+                trace.completed_at = trace.started_at + datetime.timedelta(milliseconds=50)
+            traces.append(trace)
+        self.traces = Trace.objects.bulk_create(traces)
+
+    def test_streams_ndjson(self) -> None:
+        with self.assertNumQueries(1):
+            chunks = list(stream_traces(Trace.objects.all(), "ndjson", chunk_size=2))
+
+        self.assertEqual(len(chunks), 2)
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([row["reference"] for row in rows], [trace.reference for trace in self.traces])
+        self.assertEqual(rows[0]["payload"], self.traces[0].payload)
+        self.assertEqual(rows[0]["headers"], {"Accept": "application/json"})
+        self.assertEqual(rows[0]["started_at"], self.now.isoformat())
+        self.assertEqual(rows[0]["endpoint"], self.endpoints[0].reference)
+        self.assertIsNone(rows[1]["payload"])
+        self.assertIsNone(rows[2]["status_code"])
+        self.assertIsNone(rows[2]["completed_at"])
+
+    def test_streams_filtered_csv(self) -> None:
+        content = "".join(stream_traces(Trace.objects.filter(endpoint=self.endpoints[0]), "csv", chunk_size=1))
+
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], list(EXPORT_FIELDS))
+        self.assertEqual([row[0] for row in rows[1:]], [trace.reference for trace in self.traces[:2]])
+        self.assertEqual(json.loads(rows[1][EXPORT_FIELDS.index("payload")]), self.traces[0].payload)
+        self.assertEqual(rows[2][EXPORT_FIELDS.index("payload")], "")
+
+    def test_streams_nothing_but_the_header(self) -> None:
+        self.assertEqual("".join(stream_traces(Trace.objects.none(), "ndjson")), "")
+        self.assertEqual("".join(stream_traces(Trace.objects.none(), "csv")).strip(), ",".join(EXPORT_FIELDS))
+
+    def test_cannot_stream_columnar_format(self) -> None:
+        with self.assertRaises(ValueError):
+            stream_traces(Trace.objects.all(), "parquet")
+
+    @skipIf(pyarrow is None, "PyArrow is not installed")
+    def test_writes_parquet_row_groups(self) -> None:
+        file = io.BytesIO()
+        self.assertEqual(write_columnar(Trace.objects.all(), file, "parquet", chunk_size=2), 3)
+
+        parquet_file = pyarrow.parquet.ParquetFile(io.BytesIO(file.getvalue()))
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+
+        table = parquet_file.read()
+        self.assertEqual(table.column_names, list(EXPORT_FIELDS))
+        self.assertEqual(table.column("started_at").to_pylist()[0], self.now)
+        self.assertEqual(table.column("status_code").to_pylist(), [200, 500, None])
+
+    @skipIf(pyarrow is None, "PyArrow is not installed")
+    def test_writes_arrow_record_batches(self) -> None:
+        file = io.BytesIO()
+        self.assertEqual(write_columnar(Trace.objects.all(), file, "arrow", chunk_size=2), 3)
+
+        reader = pyarrow.ipc.open_file(io.BytesIO(file.getvalue()))
+        self.assertEqual(reader.num_record_batches, 2)
+        self.assertEqual(reader.read_all().column("reference").to_pylist(), [trace.reference for trace in self.traces])
+
+    def test_command_exports_filtered_traces(self) -> None:
+        stdout = io.StringIO()
+        call_command("export_traces", "--filter", f"endpoints={self.endpoints[1].reference}", stdout=stdout)
+
+        rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([row["reference"] for row in rows], [self.traces[2].reference])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.csv")
+            call_command("export_traces", "--format", "csv", "--output", path, stdout=io.StringIO())
+
+            with open(path, encoding="utf-8", newline="") as file:
+                self.assertEqual(len(list(csv.reader(file))), 4)
+
+    def test_command_rejects_invalid_arguments(self) -> None:
+        with self.assertRaises(CommandError):
+            call_command("export_traces", "--filter", "started_after", stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command("export_traces", "--filter", "started_after=yesterday", stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command("export_traces", "--format", "parquet", stdout=io.StringIO())
@@ -0,0 +1,119 @@
+# pylint: disable=missing-function-docstring
+
+import datetime
+
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase
+
+from compyle.proxy.filtersets import TraceSearchFilter
+from compyle.proxy.models import Trace
+from compyle.proxy.tests.factories import get_endpoint, get_trace
+
+
+def get_index_names(name: str) -> set[str]:
+    """Returns the name of a partitioned index and of the indexes it spans on the partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [name],
+        )
+        return {name, *(child for (child,) in cursor.fetchall())}
+
+
+class TestTraceIndexes(TestCase):
+    """TestCase for the indexes of :class:`compyle.proxy.models.Trace`, checked against the query plans.
+
+    With a handful of rows a sequential scan is always cheaper, so it is disabled for the planner to pick among
+    the indexes as it would on a large table.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.endpoint = get_endpoint()
+        for status_code in (200, 201, 404, 500):
+            get_trace(endpoint=self.endpoint, status_code=status_code)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("ANALYZE proxy_trace")
+
+    def assertUsesIndex(self, queryset, name: str) -> None:  # pylint: disable=invalid-name
+        plan = queryset.explain()
+        self.assertTrue(any(index in plan for index in get_index_names(name)), plan)
+
+    def test_endpoint_traces_in_time_order_use_endpoint_index(self) -> None:
+        for _ in range(10):
+            get_trace()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE proxy_trace")
+
+        queryset = Trace.objects.filter(endpoint=self.endpoint).order_by("-started_at")[:20]
+
+        self.assertUsesIndex(queryset, "proxy_trace_endpoint_started")
+
+    def test_keyset_page_uses_started_reference_index(self) -> None:
+        # the unique constraint on (reference, started_at) can also serve the range through a bitmap scan and a sort,
+        # which the planner may deem as cheap on a handful of rows depending on the statistics left by other tests
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+
+        started_at = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        queryset = Trace.objects.filter(started_at__gte=started_at).order_by("started_at", "reference")[:20]
+
+        self.assertUsesIndex(queryset, "proxy_trace_started_reference")
+
+    def test_status_class_filter_uses_status_index(self) -> None:
+        queryset = Trace.objects.filter(status_class=5).order_by("-started_at")[:20]
+
+        self.assertUsesIndex(queryset, "proxy_trace_status_started")
+
+    def test_status_prefix_uses_status_index(self) -> None:
+        queryset = Trace.objects.filter(status_class__in=[4, 5])
+
+        self.assertUsesIndex(queryset, "proxy_trace_status_started")
+
+    def test_time_range_aggregation_uses_brin_index(self) -> None:
+        started_at = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        Trace.objects.bulk_create(
+            Trace(endpoint=self.endpoint, method="get", status_code=200, started_at=started_at + datetime.timedelta(i))
+            for i in range(2000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE proxy_trace")
+
+        queryset = (
+            Trace.objects.filter(started_at__gte=started_at, started_at__lt=started_at + datetime.timedelta(days=1000))
+            .values("status_class")
+            .annotate(count=Count("pk"))
+            .order_by()
+        )
+
+        self.assertUsesIndex(queryset, "proxy_trace_started_brin")
+
+    def test_url_params_filter_uses_gin_index(self) -> None:
+        queryset = Trace.objects.filter(url_params__contains={"game_id": ["123"]})
+
+        self.assertUsesIndex(queryset, "proxy_trace_url_params_gin")
+
+    def test_search_uses_trigram_and_foreign_key_indexes(self) -> None:
+        queryset = Trace.objects.filter(TraceSearchFilter().get_term_condition("games")).order_by()
+        plan = queryset.explain()
+
+        for name in ("proxy_trace_reference_trgm", "proxy_trace_url_trgm", "proxy_trace_endpoint_started"):
+            self.assertTrue(any(index in plan for index in get_index_names(name)), plan)
+
+    def test_uuid_search_uses_equality_on_references(self) -> None:
+        term = "5F0C6B1E-8A4D-4E7B-9C2A-1D3E5F7A9B0C"
+        queryset = Trace.objects.filter(TraceSearchFilter().get_term_condition(term)).order_by()
+        plan = queryset.explain()
+
+        self.assertIn("'5f0c6b1e-8a4d-4e7b-9c2a-1d3e5f7a9b0c'", plan)
+        self.assertNotIn("upper((reference)::text)", plan)
+        self.assertTrue(any(index in plan for index in get_index_names("proxy_trace_reference_started_unique")), plan)
@@ -0,0 +1,101 @@
+# pylint: disable=missing-function-docstring
+
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from compyle.proxy import ingestion
+from compyle.proxy.models import Endpoint, Trace
+from compyle.proxy.tests.factories import get_trace
+from compyle.proxy.tracing import record_trace
+
+
+@mock.patch("compyle.proxy.ingestion.get_redis")
+class TestIngestTraces(TestCase):
+    """TestCase for the `ingest_traces` method in the ingestion module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.traces = [get_trace(commit_related=True, commit=False, status_code=200) for _ in range(3)]
+        for trace in self.traces:
+            trace.started_at = timezone.now()
+            trace.completed_at = trace.started_at
+
+        self.entries = [
+            (f"{i}-0".encode(), {b"trace": ingestion.serialize_trace(trace).encode()})
+            for i, trace in enumerate(self.traces)
+        ]
+        self.references = [trace.reference for trace in self.traces]
+
+    def test_loads_new_entries(self, mock_redis: mock.MagicMock) -> None:
+        client = mock_redis.return_value
+        client.xautoclaim.return_value = [b"0-0", [], []]
+        client.xreadgroup.return_value = [[b"proxy:traces", self.entries]]
+
+        with self.assertNumQueries(4):
+            count = ingestion.ingest_traces("consumer")
+
+        self.assertEqual(count, 3)
+        self.assertCountEqual(Trace.objects.values_list("reference", flat=True), self.references)
+        self.assertEqual(Trace.objects.filter(status_code=200, completed_at__isnull=False).count(), 3)
+        client.xack.assert_called_once_with("proxy:traces", "proxy:traces:ingestion", b"0-0", b"1-0", b"2-0")
+        client.xdel.assert_called_once_with("proxy:traces", b"0-0", b"1-0", b"2-0")
+
+    def test_drops_traces_of_deleted_endpoints(self, mock_redis: mock.MagicMock) -> None:
+        client = mock_redis.return_value
+        client.xautoclaim.return_value = [b"0-0", self.entries, []]
+        Endpoint.all_objects.filter(pk=self.traces[0].endpoint_id).delete()
+
+        count = ingestion.ingest_traces("consumer")
+
+        self.assertEqual(count, 3)
+        self.assertCountEqual(Trace.objects.values_list("reference", flat=True), self.references[1:])
+        client.xack.assert_called_once_with("proxy:traces", "proxy:traces:ingestion", b"0-0", b"1-0", b"2-0")
+
+    def test_ignores_redelivered_entries(self, mock_redis: mock.MagicMock) -> None:
+        client = mock_redis.return_value
+        client.xautoclaim.return_value = [b"0-0", self.entries, []]
+
+        ingestion.ingest_traces("consumer")
+        count = ingestion.ingest_traces("consumer")
+
+        self.assertEqual(count, 3)
+        self.assertEqual(Trace.objects.count(), 3)
+        client.xreadgroup.assert_not_called()
+
+    def test_skips_deleted_entries(self, mock_redis: mock.MagicMock) -> None:
+        client = mock_redis.return_value
+        client.xautoclaim.return_value = [b"0-0", [(b"0-0", None)], []]
+        client.xreadgroup.return_value = []
+
+        with self.assertNumQueries(0):
+            self.assertEqual(ingestion.ingest_traces("consumer"), 0)
+
+        client.xack.assert_not_called()
+
+    def test_reports_lag(self, mock_redis: mock.MagicMock) -> None:
+        client = mock_redis.return_value
+        client.xinfo_groups.return_value = [{"name": b"proxy:traces:ingestion", "pending": 2}]
+        client.xrange.return_value = [(f"{int((time.time() - 30) * 1000)}-0".encode(), {})]
+        client.xlen.return_value = 5
+
+        metrics = ingestion.get_ingestion_metrics()
+
+        self.assertEqual(metrics["stream_length"], 5)
+        self.assertEqual(metrics["pending"], 2)
+        self.assertAlmostEqual(metrics["lag_seconds"], 30, delta=1)
+
+    @override_settings(PROXY_TRACE_INGESTION="stream")
+    def test_record_trace_publishes_to_stream(self, mock_redis: mock.MagicMock) -> None:
+        trace = get_trace(commit=False)
+
+        with self.assertNumQueries(1):
+            record_trace(trace)
+
+        ((stream, fields), _) = mock_redis.return_value.xadd.call_args
+        self.assertEqual(stream, "proxy:traces")
+        self.assertEqual(ingestion.deserialize_trace(fields["trace"]).reference, trace.reference)
+        self.assertFalse(Trace.objects.exists())
@@ -0,0 +1,98 @@
+# pylint: disable=missing-function-docstring
+
+import datetime
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+
+from compyle.proxy import partitions
+from compyle.proxy.models import Trace
+from compyle.proxy.tests.factories import get_trace
+
+NOW = datetime.datetime(2024, 6, 10, 12, tzinfo=datetime.timezone.utc)
+
+
+def get_trace_at(started_at: datetime.datetime) -> Trace:
+    trace = get_trace()
+    Trace.objects.filter(pk=trace.pk).update(started_at=started_at)
+    return trace
+
+
+def get_partition_of(trace: Trace) -> str:
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT tableoid::regclass::text FROM {Trace._meta.db_table} WHERE id = %s", [trace.pk])
+        return cursor.fetchone()[0]
+
+
+@mock.patch("compyle.proxy.partitions.timezone.now", return_value=NOW)
+class TestMaintainPartitions(TestCase):
+    """TestCase for the `maintain_partitions` method in the partitions module."""
+
+    def test_creates_partitions_ahead(self, _) -> None:
+        created, dropped = partitions.maintain_partitions(ahead=2, retention=None)
+
+        self.assertEqual(
+            [partition.name for partition in created],
+            ["proxy_trace_p2024_06", "proxy_trace_p2024_07", "proxy_trace_p2024_08"],
+        )
+        self.assertEqual(dropped, [])
+        self.assertEqual(partitions.list_partitions(), created)
+
+    def test_is_idempotent(self, _) -> None:
+        partitions.maintain_partitions(ahead=1, retention=None)
+
+        created, dropped = partitions.maintain_partitions(ahead=1, retention=None)
+
+        self.assertEqual((created, dropped), ([], []))
+
+    def test_new_traces_land_in_their_partition(self, _) -> None:
+        partitions.maintain_partitions(ahead=1, retention=None)
+
+        trace = get_trace_at(NOW)
+
+        self.assertEqual(get_partition_of(trace), "proxy_trace_p2024_06")
+
+    def test_splits_default_partition(self, _) -> None:
+        old_trace = get_trace_at(datetime.datetime(2023, 12, 31, 23, tzinfo=datetime.timezone.utc))
+        trace = get_trace_at(NOW)
+        self.assertEqual(get_partition_of(old_trace), partitions.DEFAULT_PARTITION)
+
+        created, _ = partitions.maintain_partitions(ahead=0, retention=None)
+
+        self.assertEqual([partition.name for partition in created], ["proxy_trace_p2023_12", "proxy_trace_p2024_06"])
+        self.assertEqual(get_partition_of(old_trace), "proxy_trace_p2023_12")
+        self.assertEqual(get_partition_of(trace), "proxy_trace_p2024_06")
+
+    def test_drops_expired_partitions(self, _) -> None:
+        expired_trace = get_trace_at(datetime.datetime(2024, 1, 20, tzinfo=datetime.timezone.utc))
+        kept_trace = get_trace_at(datetime.datetime(2024, 3, 1, tzinfo=datetime.timezone.utc))
+        partitions.maintain_partitions(ahead=0, retention=None)
+
+        created, dropped = partitions.maintain_partitions(ahead=0, retention=3)
+
+        self.assertEqual(created, [])
+        self.assertEqual([partition.name for partition in dropped], ["proxy_trace_p2024_01"])
+        self.assertFalse(Trace.objects.filter(pk=expired_trace.pk).exists())
+        self.assertTrue(Trace.objects.filter(pk=kept_trace.pk).exists())
+
+    def test_deletes_expired_traces_of_default_partition(self, _) -> None:
+        expired_trace = get_trace_at(datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc))
+
+        created, _ = partitions.maintain_partitions(ahead=0, retention=3)
+
+        self.assertEqual([partition.name for partition in created], ["proxy_trace_p2024_06"])
+        self.assertFalse(Trace.objects.filter(pk=expired_trace.pk).exists())
+
+    def test_time_range_prunes_partitions(self, _) -> None:
+        partitions.maintain_partitions(ahead=2, retention=None)
+
+        plan = Trace.objects.filter(
+            started_at__gte=datetime.datetime(2024, 7, 1, tzinfo=datetime.timezone.utc),
+            started_at__lt=datetime.datetime(2024, 8, 1, tzinfo=datetime.timezone.utc),
+        ).explain()
+
+        self.assertIn("proxy_trace_p2024_07", plan)
+        self.assertNotIn("proxy_trace_p2024_06", plan)
+        self.assertNotIn("proxy_trace_p2024_08", plan)
+        self.assertNotIn(partitions.DEFAULT_PARTITION, plan)
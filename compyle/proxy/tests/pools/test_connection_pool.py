@@ -0,0 +1,150 @@
+# pylint: disable=missing-function-docstring
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import SimpleTestCase, override_settings
+from psycopg2.pool import PoolError
+
+from compyle.lib.postgresql import pool as pools
+from compyle.lib.postgresql.pool import (
+    ConnectionPool,
+    close_pools,
+    get_pool_metrics,
+    set_process_type,
+)
+
+
+class TestConnectionPool(SimpleTestCase):
+    """TestCase for :class:`compyle.lib.postgresql.pool.ConnectionPool`."""
+
+    databases = {DEFAULT_DB_ALIAS}
+
+    def get_pool(self, minconn: int = 1, maxconn: int = 2, **kwargs) -> ConnectionPool:
+        wrapper = connections.create_connection(DEFAULT_DB_ALIAS)
+        pool = ConnectionPool(
+            lambda: wrapper.get_new_connection(wrapper.get_connection_params()),
+            minconn,
+            maxconn,
+            timeout=kwargs.get("timeout", 0.1),
+            check_idle=kwargs.get("check_idle", 30),
+        )
+        self.addCleanup(pool.closeall)
+        return pool
+
+    def test_reuses_returned_connections(self) -> None:
+        pool = self.get_pool()
+
+        conn = pool.checkout()
+        pool.checkin(conn)
+        self.assertIs(pool.checkout(), conn)
+
+        metrics = pool.get_metrics()
+        self.assertEqual(metrics["created"], 1)
+        self.assertEqual(metrics["checkouts"], 2)
+        self.assertEqual(metrics["in_use"], 1)
+        self.assertEqual(metrics["idle"], 0)
+
+    def test_closes_returned_connections_above_min_size(self) -> None:
+        pool = self.get_pool(minconn=1, maxconn=2)
+
+        first, second = pool.checkout(), pool.checkout()
+        pool.checkin(first)
+        pool.checkin(second)
+
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.get_metrics()["size"], 1)
+
+    def test_replaces_broken_connections(self) -> None:
+        pool = self.get_pool(check_idle=0)
+
+        conn = pool.checkout()
+        pool.checkin(conn)
+        conn.close()
+
+        replacement = pool.checkout()
+        self.assertIsNot(replacement, conn)
+        self.assertFalse(replacement.closed)
+        self.assertEqual(pool.get_metrics()["discarded"], 1)
+
+    def test_checks_idle_connections_with_query(self) -> None:
+        pool = self.get_pool(check_idle=0)
+
+        conn = pool.checkout()
+        pool.checkin(conn)
+
+        self.assertIs(pool.checkout(), conn)
+        self.assertEqual(pool.get_metrics()["discarded"], 0)
+
+    def test_times_out_when_all_connections_are_in_use(self) -> None:
+        pool = self.get_pool(minconn=1, maxconn=1)
+
+        pool.checkout()
+        with self.assertRaises(PoolError):
+            pool.checkout()
+
+        metrics = pool.get_metrics()
+        self.assertEqual(metrics["timeouts"], 1)
+        self.assertEqual(metrics["in_use"], 1)
+
+    def test_rejects_unknown_process_type(self) -> None:
+        with self.assertRaises(ValueError):
+            set_process_type("eventlet")
+
+
+@override_settings(PROXY_DB_POOL=True, PROXY_DB_POOL_SIZES={"web": (1, 2), "prefork": (1, 1), "threads": (1, 2)})
+class TestPooledDatabaseWrapper(SimpleTestCase):
+    """TestCase for :class:`compyle.lib.postgresql.base.DatabaseWrapper` with the pooling enabled.
+
+    The wrappers are created apart from the connections of the tests, so that none of their pools outlives them.
+    """
+
+    databases = {DEFAULT_DB_ALIAS}
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.addCleanup(close_pools)
+        self.wrapper = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(self.wrapper.close)
+
+    def test_returns_connections_to_pool(self) -> None:
+        self.wrapper.ensure_connection()
+        conn = self.wrapper.connection
+        self.wrapper.close()
+
+        self.assertFalse(conn.closed)
+        self.wrapper.ensure_connection()
+        self.assertIs(self.wrapper.connection, conn)
+
+        with self.wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            self.assertEqual(cursor.fetchone(), (1,))
+
+        [metrics] = get_pool_metrics()
+        self.assertEqual(metrics["alias"], DEFAULT_DB_ALIAS)
+        self.assertEqual(metrics["process_type"], "web")
+        self.assertEqual(metrics["created"], 1)
+        self.assertEqual(metrics["checkouts"], 2)
+
+    def test_sizes_pools_by_process_type(self) -> None:
+        self.addCleanup(set_process_type, pools.get_process_type())
+        set_process_type("prefork")
+
+        self.wrapper.ensure_connection()
+
+        [metrics] = get_pool_metrics()
+        self.assertEqual(metrics["process_type"], "prefork")
+        self.assertEqual((metrics["min_size"], metrics["max_size"]), (1, 1))
+
+    def test_rolls_back_returned_connections(self) -> None:
+        self.wrapper.ensure_connection()
+        self.wrapper.set_autocommit(False)
+        with self.wrapper.cursor() as cursor:
+            cursor.execute("CREATE TEMPORARY TABLE pooled (id integer)")
+        conn = self.wrapper.connection
+        self.wrapper.close()
+
+        self.assertEqual(conn.info.transaction_status, 0)
+        self.wrapper.ensure_connection()
+        with self.wrapper.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pooled')")
+            self.assertEqual(cursor.fetchone(), (None,))
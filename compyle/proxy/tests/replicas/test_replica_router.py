@@ -0,0 +1,113 @@
+# pylint: disable=missing-function-docstring
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from compyle.lib.routers import read_from_replica
+from compyle.proxy.models import Service, Trace
+from compyle.proxy.tests.factories import get_trace
+from compyle.proxy.views import ServiceViewSet, TraceViewSet
+
+User = get_user_model()  # pylint: disable=invalid-name
+
+trace_list_url = reverse("proxy:traces-list")
+trace_list_view = TraceViewSet.as_view({"get": "list"})
+
+service_list_url = reverse("proxy:services-list")
+service_list_view = ServiceViewSet.as_view({"get": "list", "post": "create"})
+
+
+@override_settings(PROXY_READ_REPLICA="replica", PROXY_READ_REPLICA_STICKINESS=5)
+class TestReplicaRouter(TransactionTestCase):
+    """TestCase for :class:`compyle.lib.routers.ReplicaRouter` and the routing of the API reads.
+
+    The replica is a mirror of the default test database, the rows being committed for both connections to see them.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_superuser("admin", "admin@test.com", "password")
+
+    def request(self, view, method: str, url: str, **kwargs):
+        request = getattr(self.factory, method)(url, **kwargs)
+        force_authenticate(request, user=self.user)
+
+        with CaptureQueriesContext(connections["replica"]) as replica_queries:
+            with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as default_queries:
+                response = view(request)
+
+        return response, len(default_queries), len(replica_queries)
+
+    def test_routes_reads_within_context(self) -> None:
+        self.assertEqual(Trace.objects.all().db, DEFAULT_DB_ALIAS)
+
+        with read_from_replica() as alias:
+            self.assertEqual(alias, "replica")
+            self.assertEqual(Trace.objects.all().db, "replica")
+            self.assertEqual(router.db_for_write(Trace), DEFAULT_DB_ALIAS)
+
+        self.assertEqual(Trace.objects.all().db, DEFAULT_DB_ALIAS)
+        self.assertFalse(router.allow_migrate("replica", "proxy"))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, "proxy"))
+
+    @override_settings(PROXY_READ_REPLICA=None)
+    def test_reads_from_primary_without_replica(self) -> None:
+        with read_from_replica() as alias:
+            self.assertIsNone(alias)
+            self.assertEqual(Trace.objects.all().db, DEFAULT_DB_ALIAS)
+
+        response, default_queries, replica_queries = self.request(trace_list_view, "get", trace_list_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertGreater(default_queries, 0)
+        self.assertEqual(replica_queries, 0)
+
+    def test_lists_traces_from_replica(self) -> None:
+        trace = get_trace()
+
+        response, default_queries, replica_queries = self.request(trace_list_view, "get", trace_list_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual([result["reference"] for result in response.data["results"]], [str(trace.reference)])
+        self.assertEqual(default_queries, 0)
+        self.assertGreater(replica_queries, 0)
+
+    def test_reads_own_writes_from_primary(self) -> None:
+        response, default_queries, replica_queries = self.request(
+            service_list_view, "post", service_list_url, data={"name": "SERVICE_NAME_001"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(replica_queries, 0)
+
+        # within the stickiness window, the client reads from the primary
+        response, default_queries, replica_queries = self.request(service_list_view, "get", service_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["results"][0]["reference"], Service.objects.get().reference)
+        self.assertGreater(default_queries, 0)
+        self.assertEqual(replica_queries, 0)
+
+        # once it is over, from the replica again
+        cache.clear()
+        response, default_queries, replica_queries = self.request(service_list_view, "get", service_list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(default_queries, 0)
+        self.assertGreater(replica_queries, 0)
+
+    def test_failed_writes_are_not_sticky(self) -> None:
+        response, _, _ = self.request(service_list_view, "post", service_list_url, data={})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        _, default_queries, replica_queries = self.request(service_list_view, "get", service_list_url)
+        self.assertEqual(default_queries, 0)
+        self.assertGreater(replica_queries, 0)
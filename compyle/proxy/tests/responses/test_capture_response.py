@@ -0,0 +1,108 @@
+# pylint: disable=missing-function-docstring, no-value-for-parameter
+
+import datetime
+from unittest import mock
+
+import requests
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+
+from compyle.proxy.choices import ResponseCompression
+from compyle.proxy.models import Trace, TraceResponse
+from compyle.proxy.responses import (
+    capture_response,
+    decompress_body,
+    get_body_text,
+    purge_orphan_responses,
+)
+from compyle.proxy.tasks import async_request
+from compyle.proxy.tests.factories import get_endpoint, get_trace
+
+
+def get_response(content: bytes, content_type: str = "application/json") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status.HTTP_200_OK
+    response.elapsed = datetime.timedelta(milliseconds=50)
+    response.headers["Content-Type"] = content_type
+    # as read by a request that is not streamed
+    response._content, response._content_consumed = content, True  # pylint: disable=protected-access
+    return response
+
+
+class TestCaptureResponse(TestCase):
+    """TestCase for the `capture_response` method and the purge of the orphan responses in the responses module."""
+
+    def test_captures_body_compressed(self) -> None:
+        trace = get_trace(commit=False)
+        content = b'{"items": [' + b'{"value": 1},' * 1000 + b"null]}"
+
+        captured = capture_response(trace, get_response(content))
+
+        self.assertEqual(captured.reference, str(trace.reference))
+        self.assertEqual(captured.headers, {"Content-Type": "application/json"})
+        self.assertEqual(captured.compression, ResponseCompression.ZSTD)
+        self.assertEqual(captured.size, len(content))
+        self.assertFalse(captured.truncated)
+        self.assertLess(len(captured.body), len(content))
+        self.assertEqual(decompress_body(captured), content)
+
+    def test_truncates_body_to_limit(self) -> None:
+        endpoint = get_endpoint(commit=False)
+        endpoint.response_body_limit = 10
+        trace = get_trace(commit=False, endpoint=endpoint)
+
+        captured = capture_response(trace, get_response(b"0123456789abcdef"))
+
+        self.assertEqual(captured.size, 10)
+        self.assertTrue(captured.truncated)
+        self.assertEqual(decompress_body(captured), b"0123456789")
+
+        # a body of exactly the limit is not truncated
+        captured = capture_response(trace, get_response(b"0123456789"))
+        self.assertFalse(captured.truncated)
+
+    @override_settings(PROXY_RESPONSE_BODY_LIMIT=4, PROXY_RESPONSE_COMPRESSION="zlib")
+    def test_falls_back_to_zlib_and_default_limit(self) -> None:
+        trace = get_trace(commit=False)
+
+        captured = capture_response(trace, get_response("héllo".encode("latin-1"), "text/plain; charset=latin-1"))
+
+        self.assertEqual(captured.compression, ResponseCompression.ZLIB)
+        self.assertEqual(get_body_text(captured), "héll")
+
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_async_request_writes_response_of_capturing_endpoint(self, mock_request: mock.MagicMock) -> None:
+        endpoint = get_endpoint()
+        mock_request.return_value = get_response(b'{"data": []}')
+
+        async_request(endpoint.reference, None, {}, {}, None)
+        self.assertFalse(TraceResponse.objects.exists())
+
+        endpoint.capture_response = True
+        endpoint.save()
+        mock_request.return_value = get_response(b'{"data": [1]}')
+
+        result = async_request(endpoint.reference, None, {}, {}, None)
+
+        self.assertEqual(result, {"data": [1]})
+        trace = Trace.objects.latest("started_at")
+        captured = TraceResponse.objects.get()
+        self.assertEqual((captured.reference, captured.started_at), (trace.reference, trace.started_at))
+        self.assertEqual(get_body_text(captured), '{"data": [1]}')
+
+    @override_settings(PROXY_RESPONSE_ORPHAN_DELAY=60)
+    def test_purges_orphan_responses(self) -> None:
+        old = timezone.now() - datetime.timedelta(minutes=5)
+
+        trace = get_trace(commit=False)
+        trace.started_at = old
+        trace.save()
+
+        for reference, started_at in [(trace.reference, old), ("purged", old), ("ingesting", timezone.now())]:
+            TraceResponse.objects.create(
+                reference=reference, started_at=started_at, body=b"", compression=ResponseCompression.ZLIB, size=0
+            )
+
+        self.assertEqual(purge_orphan_responses(batch_size=1), 1)
+        self.assertCountEqual(TraceResponse.objects.values_list("pk", flat=True), [trace.reference, "ingesting"])
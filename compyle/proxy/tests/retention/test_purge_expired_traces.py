@@ -0,0 +1,57 @@
+# pylint: disable=missing-function-docstring
+
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from compyle.proxy.models import Trace
+from compyle.proxy.retention import purge_expired_traces
+from compyle.proxy.tests.factories import get_endpoint, get_trace
+
+
+class TestPurgeExpiredTraces(TestCase):
+    """TestCase for the `purge_expired_traces` method in the retention module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.endpoint = get_endpoint()
+        self.old_traces = [get_trace(endpoint=self.endpoint) for _ in range(5)]
+        self.new_trace = get_trace(endpoint=self.endpoint)
+        Trace.objects.filter(pk__in=[trace.pk for trace in self.old_traces]).update(
+            started_at=timezone.now() - datetime.timedelta(days=10)
+        )
+
+    def test_keeps_traces_without_retention(self) -> None:
+        self.assertEqual(list(purge_expired_traces()), [])
+        self.assertEqual(Trace.objects.count(), 6)
+
+    def test_deletes_expired_traces_in_chunks(self) -> None:
+        self.endpoint.trace_retention_days = 7
+        self.endpoint.save()
+
+        with self.assertNumQueries(4):
+            chunks = list(purge_expired_traces(batch_size=2))
+
+        self.assertEqual(
+            chunks, [(self.endpoint.reference, 2), (self.endpoint.reference, 2), (self.endpoint.reference, 1)]
+        )
+        self.assertEqual(list(Trace.objects.values_list("pk", flat=True)), [self.new_trace.pk])
+
+    def test_inherits_service_retention(self) -> None:
+        self.endpoint.service.trace_retention_days = 7
+        self.endpoint.service.save()
+        other_trace = get_trace()
+        Trace.objects.filter(pk=other_trace.pk).update(started_at=timezone.now() - datetime.timedelta(days=10))
+
+        self.assertEqual(sum(count for _, count in purge_expired_traces()), 5)
+        self.assertCountEqual(Trace.objects.values_list("pk", flat=True), [self.new_trace.pk, other_trace.pk])
+
+    def test_endpoint_retention_overrides_service_retention(self) -> None:
+        self.endpoint.service.trace_retention_days = 7
+        self.endpoint.service.save()
+        self.endpoint.trace_retention_days = 30
+        self.endpoint.save()
+
+        self.assertEqual(list(purge_expired_traces()), [])
@@ -0,0 +1,196 @@
+# pylint: disable=missing-function-docstring
+
+import datetime
+import random
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from compyle.lib.sketches import LatencySketch
+from compyle.proxy.choices import RollupResolution
+from compyle.proxy.models import Trace, TraceRollup
+from compyle.proxy.rollups import compact_rollups, get_endpoint_stats, rollup_traces
+from compyle.proxy.tests.factories import get_endpoint, get_trace
+
+
+class TestLatencySketch(SimpleTestCase):
+    """TestCase for :class:`compyle.lib.sketches.LatencySketch`."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        generator = random.Random(42)
+        self.values = [generator.lognormvariate(4, 1) for _ in range(10000)]
+
+    def test_quantiles_are_within_accuracy(self) -> None:
+        sketch = LatencySketch(0.01)
+        sketch.update(self.values)
+
+        values = sorted(self.values)
+        for q in (0.5, 0.9, 0.95, 0.99):
+            expected = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q), expected, delta=expected * 0.01)
+
+        self.assertAlmostEqual(sketch.quantile(0), values[0], delta=values[0] * 0.01)
+        self.assertAlmostEqual(sketch.quantile(1), values[-1], delta=values[-1] * 0.01)
+
+    def test_merge_equals_sketch_of_union(self) -> None:
+        whole = LatencySketch()
+        whole.update(self.values)
+
+        merged = LatencySketch()
+        for start in range(0, len(self.values), 1000):
+            end = start + 1000
+            part = LatencySketch()
+            part.update(self.values[start:end])
+            merged.merge(LatencySketch.from_dict(part.to_dict()))
+
+        self.assertEqual(merged.buckets, whole.buckets)
+        self.assertEqual(merged.count, whole.count)
+        self.assertAlmostEqual(merged.mean, whole.mean)
+        self.assertEqual(merged.quantile(0.95), whole.quantile(0.95))
+
+    def test_empty_sketch(self) -> None:
+        self.assertIsNone(LatencySketch().quantile(0.5))
+        self.assertIsNone(LatencySketch().mean)
+
+    def test_cannot_merge_different_accuracies(self) -> None:
+        with self.assertRaises(ValueError):
+            LatencySketch(0.01).merge(LatencySketch(0.02))
+
+
+@override_settings(PROXY_ROLLUP_SETTLE_DELAY=60)
+class TestRollupTraces(TestCase):
+    """TestCase for the `rollup_traces` and `compact_rollups` methods in the rollups module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.endpoint = get_endpoint()
+        self.now = timezone.now().replace(second=30, microsecond=0)
+
+    def create_traces(
+        self,
+        started_at: datetime.datetime,
+        latencies: list[int | None],
+        status_code: int = 200,
+        sample_rate: float = 1.0,
+        inserted_at: datetime.datetime | None = None,
+    ) -> None:
+        traces = []
+        for latency in latencies:
+            trace = get_trace(commit=False, endpoint=self.endpoint, authentication=None, status_code=status_code)
+            trace.started_at = started_at
+            trace.completed_at = started_at + datetime.timedelta(milliseconds=latency) if latency is not None else None
+            trace.sample_rate = sample_rate
+            traces.append(trace)
+        Trace.objects.bulk_create(traces)
+        # the insertion datetime is set on insert, the traces are backdated as if inserted once completed
+        Trace.objects.filter(pk__in=[trace.pk for trace in traces]).update(inserted_at=inserted_at or started_at)
+
+    def test_rolls_up_traces_by_minute(self) -> None:
+        minute = self.now - datetime.timedelta(minutes=10)
+        self.create_traces(minute, [100, 200, 300])
+        self.create_traces(minute, [400], status_code=500)
+        self.create_traces(minute + datetime.timedelta(minutes=1), [None], status_code=None)
+
+        self.assertEqual(rollup_traces(), 5)
+
+        rollups = TraceRollup.objects.order_by("bucket")
+        self.assertEqual(
+            [rollup.bucket for rollup in rollups],
+            [minute.replace(second=0), minute.replace(second=0) + datetime.timedelta(minutes=1)],
+        )
+        self.assertEqual(rollups[0].call_count, 4)
+        self.assertEqual(rollups[0].success_count, 3)
+        self.assertEqual(rollups[0].server_error_count, 1)
+        self.assertEqual(LatencySketch.from_dict(rollups[0].sketch).count, 4)
+        self.assertEqual(rollups[1].failure_count, 1)
+        self.assertEqual(LatencySketch.from_dict(rollups[1].sketch).count, 0)
+
+    def test_rolls_up_each_trace_once(self) -> None:
+        minute = self.now - datetime.timedelta(minutes=10)
+        self.create_traces(minute, [100, 200, 300])
+
+        self.assertEqual(rollup_traces(batch_size=2), 2)
+        self.assertEqual(rollup_traces(batch_size=2), 1)
+        self.assertEqual(rollup_traces(batch_size=2), 0)
+
+        self.assertEqual(TraceRollup.objects.get().call_count, 3)
+
+    def test_waits_for_traces_to_settle(self) -> None:
+        self.create_traces(self.now - datetime.timedelta(minutes=10), [100])
+        # a trace started long ago but inserted just now, as when loaded late from the ingestion stream
+        self.create_traces(self.now - datetime.timedelta(minutes=10), [100], inserted_at=timezone.now())
+        self.create_traces(self.now - datetime.timedelta(minutes=10), [100])
+
+        # the traces following an unsettled trace wait for it
+        self.assertEqual(rollup_traces(), 1)
+        self.assertEqual(rollup_traces(settle_delay=0), 2)
+
+    def test_weights_sampled_traces(self) -> None:
+        minute = self.now - datetime.timedelta(minutes=10)
+        self.create_traces(minute, [100, 100], sample_rate=0.25)
+        self.create_traces(minute, [1000], status_code=500)
+
+        rollup_traces()
+
+        rollup = TraceRollup.objects.get()
+        self.assertEqual(rollup.call_count, 9)
+        self.assertEqual(rollup.success_count, 8)
+        self.assertEqual(rollup.server_error_count, 1)
+
+        stats = get_endpoint_stats(self.endpoint, minute - datetime.timedelta(minutes=1), self.now, percentiles=[50])
+        self.assertEqual(stats["latency"]["count"], 9)
+        self.assertAlmostEqual(stats["latency"]["percentiles"]["p50"], 100, delta=1)
+
+    def test_compacts_old_rollups(self) -> None:
+        old = self.now - datetime.timedelta(days=3)
+        self.create_traces(old, [100])
+        self.create_traces(old + datetime.timedelta(minutes=1), [300])
+        self.create_traces(self.now - datetime.timedelta(minutes=10), [200])
+        rollup_traces()
+
+        self.assertEqual(compact_rollups(self.now), 2)
+
+        self.assertEqual(
+            sorted(TraceRollup.objects.values_list("resolution", "call_count")),
+            [(RollupResolution.HOUR, 2), (RollupResolution.MINUTE, 1)],
+        )
+        hour = TraceRollup.objects.get(resolution=RollupResolution.HOUR)
+        self.assertEqual(hour.bucket, RollupResolution.HOUR.truncate(old))
+        self.assertEqual(LatencySketch.from_dict(hour.sketch).max, 300)
+
+    def test_compacts_rollups_in_chunks(self) -> None:
+        old = self.now - datetime.timedelta(days=3)
+        for minute in range(3):
+            self.create_traces(old + datetime.timedelta(minutes=minute), [100 * (minute + 1)])
+        rollup_traces()
+
+        # two chunks of minutes and an empty chunk of hours, each in its own transaction
+        with self.assertNumQueries(15):
+            self.assertEqual(compact_rollups(self.now, batch_size=2), 3)
+
+        hour = TraceRollup.objects.get()
+        self.assertEqual(hour.resolution, RollupResolution.HOUR)
+        self.assertEqual(hour.call_count, 3)
+        self.assertEqual(LatencySketch.from_dict(hour.sketch).count, 3)
+
+    def test_stats_merge_every_resolution(self) -> None:
+        self.create_traces(self.now - datetime.timedelta(days=3), [100] * 90 + [1000] * 10)
+        self.create_traces(self.now - datetime.timedelta(minutes=10), [100] * 90 + [1000] * 10, status_code=404)
+        rollup_traces()
+        compact_rollups(self.now)
+
+        with self.assertNumQueries(1):
+            stats = get_endpoint_stats(
+                self.endpoint, self.now - datetime.timedelta(days=7), self.now, percentiles=[50, 99]
+            )
+
+        self.assertEqual(stats["call_count"], 200)
+        self.assertEqual(stats["success_count"], 100)
+        self.assertEqual(stats["client_error_count"], 100)
+        self.assertEqual(stats["latency"]["count"], 200)
+        self.assertAlmostEqual(stats["latency"]["mean"], 190)
+        self.assertAlmostEqual(stats["latency"]["percentiles"]["p50"], 100, delta=1)
+        self.assertAlmostEqual(stats["latency"]["percentiles"]["p99"], 1000, delta=10)
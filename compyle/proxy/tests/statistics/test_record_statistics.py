@@ -0,0 +1,147 @@
+# pylint: disable=missing-function-docstring
+
+import datetime
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from compyle.proxy.models import EndpointStatistics, Trace
+from compyle.proxy.statistics import (
+    DIRTY_KEY,
+    STATISTICS_KEY,
+    flush_statistics,
+    record_statistics,
+)
+from compyle.proxy.tests.factories import get_endpoint, get_trace
+
+
+@override_settings(PROXY_ENDPOINT_STATISTICS="direct", PROXY_ENDPOINT_STATISTICS_ALPHA=0.5)
+class TestRecordStatistics(TestCase):
+    """TestCase for the `record_statistics` and `flush_statistics` methods in the statistics module."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.endpoint = get_endpoint()
+        self.now = timezone.now()
+
+    def get_trace(
+        self, status_code: int | None, latency: int | None, started_at: datetime.datetime | None = None
+    ) -> Trace:
+        trace = get_trace(commit=False, endpoint=self.endpoint, status_code=status_code)
+        trace.started_at = started_at or self.now
+        trace.completed_at = (
+            trace.started_at + datetime.timedelta(milliseconds=latency) if latency is not None else None
+        )
+        return trace
+
+    def get_increments(self) -> dict[bytes, bytes]:
+        return {
+            b"calls": b"3",
+            b"errors": b"1",
+            b"latency_sum": b"600",
+            b"latencies": b"2",
+            b"last_status_code": b"503",
+            b"last_called_at": (self.now + datetime.timedelta(seconds=1)).isoformat().encode(),
+        }
+
+    def test_counts_calls_in_a_single_query(self) -> None:
+        trace = self.get_trace(200, 100)
+
+        with self.assertNumQueries(1):
+            record_statistics(trace)
+
+        statistics = EndpointStatistics.objects.get(endpoint=self.endpoint)
+        self.assertEqual(statistics.call_count, 1)
+        self.assertEqual(statistics.error_count, 0)
+        self.assertEqual(statistics.last_status_code, 200)
+        self.assertEqual(statistics.last_called_at, self.now)
+        self.assertEqual(statistics.mean_latency, 100)
+
+    def test_merges_calls(self) -> None:
+        record_statistics(self.get_trace(200, 100))
+        record_statistics(self.get_trace(500, 300, self.now + datetime.timedelta(seconds=1)))
+        record_statistics(self.get_trace(None, None, self.now + datetime.timedelta(seconds=2)))
+        # a call completing late does not override the status of the last call
+        record_statistics(self.get_trace(201, 100, self.now - datetime.timedelta(seconds=1)))
+
+        statistics = EndpointStatistics.objects.get(endpoint=self.endpoint)
+        self.assertEqual(statistics.call_count, 4)
+        self.assertEqual(statistics.error_count, 2)
+        self.assertIsNone(statistics.last_status_code)
+        self.assertEqual(statistics.last_called_at, self.now + datetime.timedelta(seconds=2))
+        self.assertAlmostEqual(statistics.mean_latency, 150)
+
+    @override_settings(PROXY_ENDPOINT_STATISTICS="off")
+    def test_does_nothing_when_disabled(self) -> None:
+        trace = self.get_trace(200, 100)
+
+        with self.assertNumQueries(0):
+            record_statistics(trace)
+
+    @override_settings(PROXY_ENDPOINT_STATISTICS="redis")
+    @mock.patch("compyle.proxy.statistics.get_redis")
+    def test_increments_redis_hash(self, mock_redis: mock.MagicMock) -> None:
+        pipeline = mock_redis.return_value.pipeline.return_value
+
+        trace = self.get_trace(404, 100)
+
+        with self.assertNumQueries(0):
+            record_statistics(trace)
+
+        key = STATISTICS_KEY.format(endpoint=self.endpoint.reference)
+        pipeline.hincrby.assert_any_call(key, "calls", 1)
+        pipeline.hincrby.assert_any_call(key, "errors", 1)
+        pipeline.hincrbyfloat.assert_called_once_with(key, "latency_sum", 100.0)
+        pipeline.sadd.assert_called_once_with(DIRTY_KEY, self.endpoint.reference)
+        pipeline.execute.assert_called_once()
+
+    @mock.patch("compyle.proxy.statistics.get_redis")
+    def test_flushes_redis_hashes(self, mock_redis: mock.MagicMock) -> None:
+        record_statistics(self.get_trace(200, 100))
+
+        client = mock_redis.return_value
+        client.spop.return_value = [self.endpoint.reference.encode()]
+        client.pipeline.return_value.execute.return_value = [self.get_increments(), 1]
+
+        with self.assertNumQueries(4):
+            self.assertEqual(flush_statistics(), 1)
+
+        statistics = EndpointStatistics.objects.get(endpoint=self.endpoint)
+        self.assertEqual(statistics.call_count, 4)
+        self.assertEqual(statistics.error_count, 1)
+        self.assertEqual(statistics.last_status_code, 503)
+        # the batch mean of 300ms weighs as much as two successive latencies
+        self.assertAlmostEqual(statistics.mean_latency, 100 + 0.75 * 200)
+
+    @mock.patch("compyle.proxy.statistics.get_redis")
+    def test_drops_increments_of_deleted_endpoints(self, mock_redis: mock.MagicMock) -> None:
+        client = mock_redis.return_value
+        client.spop.return_value = [b"deleted", self.endpoint.reference.encode()]
+        client.pipeline.return_value.execute.return_value = [self.get_increments(), 1]
+
+        self.assertEqual(flush_statistics(), 1)
+
+        self.assertEqual(EndpointStatistics.objects.get(endpoint=self.endpoint).call_count, 3)
+        client.pipeline.return_value.sadd.assert_not_called()
+
+    @mock.patch("compyle.proxy.statistics.merge_statistics", side_effect=[DatabaseError, None])
+    @mock.patch("compyle.proxy.statistics.get_redis")
+    def test_restores_increments_failing_to_merge(self, mock_redis: mock.MagicMock, mock_merge: mock.MagicMock) -> None:
+        other_endpoint = get_endpoint()
+
+        client = mock_redis.return_value
+        client.spop.return_value = [self.endpoint.reference.encode(), other_endpoint.reference.encode()]
+        pipeline = client.pipeline.return_value
+        pipeline.execute.return_value = [self.get_increments(), 1]
+
+        self.assertEqual(flush_statistics(), 1)
+
+        self.assertEqual(mock_merge.call_count, 2)
+        key = STATISTICS_KEY.format(endpoint=self.endpoint.reference)
+        pipeline.hincrby.assert_any_call(key, "calls", 3)
+        pipeline.hincrbyfloat.assert_called_once_with(key, "latency_sum", 600.0)
+        pipeline.hsetnx.assert_any_call(key, "last_status_code", b"503")
+        pipeline.sadd.assert_called_once_with(DIRTY_KEY, self.endpoint.reference)
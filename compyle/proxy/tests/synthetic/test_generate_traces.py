@@ -0,0 +1,74 @@
+# pylint: disable=missing-function-docstring
+
+import io
+import random
+from collections import Counter
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from compyle.proxy.choices import StatusClass
+from compyle.proxy.models import Authentication, Endpoint, Service, Trace
+from compyle.proxy.synthetic import generate_catalog, generate_traces
+from compyle.proxy.utils import group_url_params
+
+
+class TestGenerateTraces(TestCase):
+    """TestCase for the `generate_catalog` and `generate_traces` methods in the synthetic module."""
+
+    def test_generates_catalog(self) -> None:
+        endpoints, authentications = generate_catalog(3, 12, 5, random.Random(0))
+
+        self.assertEqual(Service.objects.count(), 3)
+        self.assertEqual(len(endpoints), 12)
+        self.assertEqual(len(authentications), 5)
+        self.assertEqual(Counter(endpoint.service_id for endpoint in endpoints).most_common(1)[0][1], 4)
+        self.assertEqual(Endpoint.objects.count(), 12)
+        self.assertEqual(Authentication.objects.count(), 5)
+
+    def test_loads_traces_in_chunks(self) -> None:
+        endpoints, authentications = generate_catalog(2, 20, 3, random.Random(0))
+
+        counts = list(generate_traces(endpoints, authentications, 2500, days=2, chunk_size=1000, seed=0))
+
+        self.assertEqual(counts, [1000, 1000, 500])
+        self.assertEqual(Trace.objects.count(), 2500)
+
+        traces = list(Trace.objects.order_by("id"))
+        self.assertEqual(traces, sorted(traces, key=lambda trace: trace.started_at))
+        for trace in traces[:100]:
+            self.assertEqual(trace.status_class, StatusClass.of(trace.status_code))
+            self.assertEqual(trace.url_params, group_url_params(trace.url))
+            self.assertEqual(trace.method, trace.endpoint.method)
+            self.assertEqual(trace.completed_at is None, trace.status_code is None)
+            if trace.completed_at is not None:
+                self.assertGreater(trace.completed_at, trace.started_at)
+
+        # the traffic is skewed towards a few endpoints
+        calls = Counter(trace.endpoint_id for trace in traces).most_common()
+        self.assertGreater(calls[0][1], 5 * calls[-1][1])
+        self.assertFalse(
+            Trace.objects.filter(authentication__isnull=False, endpoint__auth_method__isnull=True).exists()
+        )
+
+    def test_command_defers_indexes(self) -> None:
+        stdout = io.StringIO()
+        call_command(
+            "generate_synthetic_data",
+            "--services=1",
+            "--endpoints=3",
+            "--traces=300",
+            "--chunk-size=200",
+            "--defer-indexes",
+            stdout=stdout,
+        )
+
+        self.assertIn("Loaded 300 traces", stdout.getvalue())
+        self.assertIn("300 traces generated", stdout.getvalue())
+        self.assertEqual(Trace.objects.count(), 300)
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Trace._meta.db_table)
+        for index in Trace._meta.indexes:
+            self.assertIn(index.name, constraints)
@@ -0,0 +1,160 @@
+# pylint: disable=missing-function-docstring, no-value-for-parameter
+
+import datetime
+import json
+from unittest import mock
+
+import requests
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from compyle.proxy import catalog
+from compyle.proxy.models import Trace
+from compyle.proxy.tasks import async_request
+from compyle.proxy.tests.factories import get_endpoint
+from compyle.proxy.tracing import INFLIGHT_KEY
+
+
+class TestAsyncRequest(TestCase):
+    """TestCase for the `async_request` task."""
+
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.endpoint = get_endpoint()
+
+        self.response = mock.MagicMock(spec=requests.Response)
+        self.response.status_code = status.HTTP_200_OK
+        self.response.elapsed = datetime.timedelta(milliseconds=150)
+        self.response.json.return_value = {"data": []}
+
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_writes_trace_once(self, mock_request: mock.MagicMock) -> None:
+        mock_request.return_value = self.response
+
+        with self.assertNumQueries(3):
+            result = async_request(self.endpoint.reference, None, {"q": "test"}, {"Accept": "*/*"}, None, timeout=5)
+
+        self.assertEqual(result, {"data": []})
+        self.assertEqual(mock_request.call_args.kwargs["timeout"], 5)
+
+        trace = Trace.objects.get()
+        self.assertEqual(trace.status_code, status.HTTP_200_OK)
+        self.assertEqual(trace.completed_at - trace.started_at, self.response.elapsed)
+        self.assertEqual(trace.headers, {"Accept": "*/*"})
+        self.assertTrue(trace.url.endswith("?q=test"))
+
+    @override_settings(PROXY_CATALOG_CACHE=True)
+    @mock.patch("compyle.proxy.catalog.start_listener")
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_reads_cached_endpoint(self, mock_request: mock.MagicMock, _) -> None:
+        mock_request.return_value = self.response
+        catalog.clear_cache()
+        catalog._subscribed.set()  # pylint: disable=protected-access
+        self.addCleanup(catalog._subscribed.clear)  # pylint: disable=protected-access
+        self.addCleanup(catalog.clear_cache)
+
+        async_request(self.endpoint.reference, None, {}, {}, None)
+
+        # only the trace and the statistics are written
+        with self.assertNumQueries(2):
+            async_request(self.endpoint.reference, None, {}, {}, None)
+
+        self.assertEqual(Trace.objects.count(), 2)
+
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_writes_trace_when_request_fails(self, mock_request: mock.MagicMock) -> None:
+        mock_request.side_effect = requests.exceptions.ConnectionError
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            async_request(self.endpoint.reference, None, {}, {}, None)
+
+        trace = Trace.objects.get()
+        self.assertIsNone(trace.status_code)
+        self.assertIsNone(trace.completed_at)
+
+    @override_settings(PROXY_TRACE_INFLIGHT=True)
+    @mock.patch("compyle.proxy.tracing.get_redis")
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_publishes_inflight_trace(self, mock_request: mock.MagicMock, mock_redis: mock.MagicMock) -> None:
+        mock_request.return_value = self.response
+
+        async_request(self.endpoint.reference, None, {}, {}, None)
+
+        trace = Trace.objects.get()
+        ((key, members), _) = mock_redis.return_value.zadd.call_args
+        record = next(iter(members))
+
+        self.assertEqual(key, INFLIGHT_KEY)
+        self.assertEqual(json.loads(record)["reference"], trace.reference)
+        self.assertEqual(json.loads(record)["endpoint"], self.endpoint.reference)
+        mock_redis.return_value.zrem.assert_called_once_with(INFLIGHT_KEY, record)
+
+    @mock.patch("compyle.proxy.tracing.get_redis")
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_does_not_publish_inflight_trace_by_default(
+        self, mock_request: mock.MagicMock, mock_redis: mock.MagicMock
+    ) -> None:
+        mock_request.return_value = self.response
+
+        async_request(self.endpoint.reference, None, {}, {}, None)
+
+        mock_redis.assert_not_called()
+
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_drops_unsampled_trace(self, mock_request: mock.MagicMock) -> None:
+        mock_request.return_value = self.response
+        self.endpoint.service.trace_sample_rate = 0.0
+        self.endpoint.service.save()
+
+        with self.assertNumQueries(2):
+            async_request(self.endpoint.reference, None, {}, {}, None)
+
+        self.assertFalse(Trace.objects.exists())
+
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_keeps_error_trace_regardless_of_sampling(self, mock_request: mock.MagicMock) -> None:
+        mock_request.return_value = self.response
+        self.response.status_code = status.HTTP_502_BAD_GATEWAY
+        self.endpoint.trace_sample_rate = 0.0
+        self.endpoint.save()
+
+        async_request(self.endpoint.reference, None, {}, {}, None)
+
+        trace = Trace.objects.get()
+        self.assertEqual(trace.status_code, status.HTTP_502_BAD_GATEWAY)
+        self.assertEqual(trace.sample_rate, 1.0)
+
+    @mock.patch("compyle.proxy.tracing.random.random", return_value=0.1)
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_records_sample_rate_of_kept_trace(self, mock_request: mock.MagicMock, _) -> None:
+        mock_request.return_value = self.response
+        self.endpoint.trace_sample_rate = 0.25
+        self.endpoint.save()
+
+        async_request(self.endpoint.reference, None, {}, {}, None)
+
+        self.assertEqual(Trace.objects.get().sample_rate, 0.25)
+
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_keeps_slow_trace_regardless_of_sampling(self, mock_request: mock.MagicMock) -> None:
+        mock_request.return_value = self.response
+        self.endpoint.trace_sample_rate = 0.0
+        self.endpoint.trace_slow_threshold = 100
+        self.endpoint.save()
+
+        async_request(self.endpoint.reference, None, {}, {}, None)
+
+        self.assertTrue(Trace.objects.exists())
+
+    @mock.patch("compyle.proxy.models.request_with_retry")
+    def test_endpoint_policy_overrides_service_policy(self, mock_request: mock.MagicMock) -> None:
+        mock_request.return_value = self.response
+        self.endpoint.service.trace_sample_rate = 0.0
+        self.endpoint.service.save()
+        self.endpoint.trace_sample_rate = 1.0
+        self.endpoint.save()
+
+        async_request(self.endpoint.reference, None, {}, {}, None)
+
+        self.assertTrue(Trace.objects.exists())
@@ -0,0 +1,39 @@
+# pylint: disable=missing-function-docstring
+
+import unittest
+
+from compyle.proxy import utils
+
+
+class TestCompileUrl(unittest.TestCase):
+    """TestCase for the `compile_url` method in the utils module."""
+
+    def test_builds_same_urls_as_build_and_normalize(self) -> None:
+        for base_url in ("https://example.com", "https://example.com/base/", "https://example.com/path?old=val#frag"):
+            for slug in ("", "api", "/api/v1/"):
+                for trailing_slash in (True, False):
+                    for params in ({}, {"q": "test"}, {"foo": "a b", "bar": "é/&"}):
+                        with self.subTest(base_url=base_url, slug=slug, trailing_slash=trailing_slash, params=params):
+                            self.assertEqual(
+                                utils.compile_url(base_url, slug, trailing_slash).expand(**params),
+                                utils.normalize_url(utils.build_url(base_url, slug, **params), trailing_slash),
+                            )
+
+    def test_substitutes_path_parameters(self) -> None:
+        template = utils.compile_url("https://example.com/", "users/{id}/repos/{repo}", True)
+        result = template.expand(id="a/b", repo=3, page=2)
+
+        self.assertEqual(template.placeholders, ("id", "repo"))
+        self.assertEqual(result, "https://example.com/users/a%2Fb/repos/3/?page=2")
+
+    def test_missing_path_parameter(self) -> None:
+        template = utils.compile_url("https://example.com/", "users/{id}", False)
+
+        with self.assertRaises(ValueError):
+            template.expand(page=2)
+
+    def test_compiles_once(self) -> None:
+        template = utils.compile_url("https://example.com/", "compiled", False)
+
+        self.assertIs(utils.compile_url("https://example.com/", "compiled", False), template)
+        self.assertIsNot(utils.compile_url("https://example.com/", "compiled", True), template)
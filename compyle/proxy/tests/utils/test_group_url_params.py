@@ -0,0 +1,27 @@
+# pylint: disable=missing-function-docstring
+
+import unittest
+
+from compyle.proxy import utils
+
+
+class TestGroupUrlParams(unittest.TestCase):
+    """TestCase for the `group_url_params` and `parse_param_filter` methods in the utils module."""
+
+    def test_no_params(self):
+        self.assertIsNone(utils.group_url_params("https://example.com/path"))
+        self.assertIsNone(utils.group_url_params(None))
+
+    def test_groups_repeated_params(self):
+        url = "https://example.com/path?x=1&y=&x=2"
+
+        self.assertEqual(utils.group_url_params(url), {"x": ["1", "2"], "y": [""]})
+
+    def test_parses_filter_pairs(self):
+        self.assertEqual(utils.parse_param_filter("game_id:123, lang:en"), {"game_id": ["123"], "lang": ["en"]})
+        self.assertEqual(utils.parse_param_filter("time:12:30"), {"time": ["12:30"]})
+        self.assertEqual(utils.parse_param_filter("x:1,x:2"), {"x": ["1", "2"]})
+
+    def test_rejects_invalid_filter_pairs(self):
+        self.assertIsNone(utils.parse_param_filter("game_id"))
+        self.assertIsNone(utils.parse_param_filter(":123"))
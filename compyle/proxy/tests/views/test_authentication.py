@@ -0,0 +1,121 @@
+# pylint: disable=missing-function-docstring
+
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import force_authenticate
+
+from compyle.lib.test import BaseApiTest
+from compyle.proxy.models import Authentication
+from compyle.proxy.tests.factories import get_authentication
+from compyle.proxy.views import AuthenticationImportViewSet
+
+bulk_url = reverse("proxy:authentications-bulk")
+bulk_view = AuthenticationImportViewSet.as_view({"post": "bulk_import"})
+
+
+@override_settings(PROXY_CREDENTIALS_PROCESSES=1, PROXY_CREDENTIALS_BATCH_SIZE=2)
+class AuthenticationImportTest(BaseApiTest):
+    """TestCase for :class:`comprle.proxy.views.AuthenticationImportViewSet`."""
+
+    def test_can_import_authentications(self) -> None:
+        payload = [{"email": f"user-{i}@example.com", "client_id": f"id-{i}", "client_secret": "s"} for i in range(5)]
+
+        with self.assertNumQueries(5):
+            request = self.factory.post(bulk_url, payload, format="json")
+            force_authenticate(request, user=self.user)
+            response = bulk_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual(
+            sorted(Authentication.objects.values_list("client_id", flat=True)),
+            [f"id-{i}" for i in range(5)],
+        )
+
+    def test_can_import_existing_authentications(self) -> None:
+        authentication = get_authentication(email="user@example.com", api_key="old")
+        payload = [{"email": "user@example.com", "api_key": "new"}]
+
+        request = self.factory.post(bulk_url, payload, format="json")
+        force_authenticate(request, user=self.user)
+        response = bulk_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(Authentication.objects.count(), 1)
+        authentication.refresh_from_db()
+        self.assertEqual(authentication.api_key, "new")
+
+    def test_cannot_import_authentications_without_email(self) -> None:
+        request = self.factory.post(bulk_url, [{"api_key": "key"}], format="json")
+        force_authenticate(request, user=self.user)
+        response = bulk_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+        self.assertEqual(Authentication.objects.count(), 0)
+
+    def test_cannot_import_authentications_as_anonymous_user(self) -> None:
+        with self.assertNumQueries(0):
+            request = self.factory.post(bulk_url, [{"email": "user@example.com"}], format="json")
+            force_authenticate(request, user=self.anonymous_user)
+            response = bulk_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
+
+    def test_cannot_import_duplicate_emails(self) -> None:
+        payload = [{"email": "user@example.com", "api_key": "first"}, {"email": "user@example.com", "api_key": "last"}]
+
+        request = self.factory.post(bulk_url, payload, format="json")
+        force_authenticate(request, user=self.user)
+        response = bulk_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+        self.assertIn("user@example.com", str(response.data))
+        self.assertEqual(Authentication.objects.count(), 0)
+
+    def test_cannot_import_duplicate_references(self) -> None:
+        payload = [
+            {"reference": "AUTHENTICATION_001", "email": "first@example.com"},
+            {"reference": "AUTHENTICATION_001", "email": "last@example.com"},
+        ]
+
+        request = self.factory.post(bulk_url, payload, format="json")
+        force_authenticate(request, user=self.user)
+        response = bulk_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+        self.assertEqual(Authentication.objects.count(), 0)
+
+    def test_cannot_import_reference_of_another_email(self) -> None:
+        authentication = get_authentication(email="other@example.com")
+        payload = [{"reference": authentication.reference, "email": "user@example.com"}]
+
+        request = self.factory.post(bulk_url, payload, format="json")
+        force_authenticate(request, user=self.user)
+        response = bulk_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+        self.assertEqual(Authentication.objects.get().email, "other@example.com")
+
+    @override_settings(PROXY_CREDENTIALS_IMPORT_MAX_ROWS=2)
+    def test_cannot_import_too_many_authentications(self) -> None:
+        payload = [{"email": f"user-{i}@example.com"} for i in range(3)]
+
+        request = self.factory.post(bulk_url, payload, format="json")
+        force_authenticate(request, user=self.user)
+        response = bulk_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+        self.assertEqual(Authentication.objects.count(), 0)
+
+    @override_settings(PROXY_CREDENTIALS_PROCESSES=4)
+    @mock.patch("compyle.lib.iterators.ProcessPoolExecutor")
+    def test_imports_without_process_pool(self, mock_executor: mock.MagicMock) -> None:
+        request = self.factory.post(bulk_url, [{"email": "user@example.com"}], format="json")
+        force_authenticate(request, user=self.user)
+        response = bulk_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        mock_executor.assert_not_called()
@@ -1,15 +1,25 @@
 # pylint: disable=missing-function-docstring, too-many-public-methods
 
+import datetime
 import uuid
 from unittest import mock
 
+from django.conf import settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import force_authenticate
 
+from compyle.lib.sketches import LatencySketch
 from compyle.lib.test import BaseApiTest
-from compyle.proxy.models import Endpoint
-from compyle.proxy.tests.factories import get_authentication, get_endpoint, get_service
+from compyle.proxy.choices import RollupResolution
+from compyle.proxy.models import Endpoint, EndpointStatistics, TraceRollup
+from compyle.proxy.tests.factories import (
+    get_authentication,
+    get_endpoint,
+    get_service,
+    get_trace,
+)
 from compyle.proxy.views import EndpointViewSet
 
 list_url = reverse("proxy:endpoints-list")
@@ -20,6 +30,9 @@ detail_view = EndpointViewSet.as_view(
     {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"}
 )
 
+stats_url = reverse("proxy:endpoints-stats", kwargs={"pk": None})
+stats_view = EndpointViewSet.as_view({"get": "stats"})
+
 request_url = reverse("proxy:endpoints-request", kwargs={"pk": None})
 request_view = EndpointViewSet.as_view({"post": "trigger_request"})
 
@@ -300,10 +313,48 @@ class EndpointTest(BaseApiTest):
         self.assertEqual(response.data["response_type"], endpoint.response_type)
         self.assertEqual(response.data["auth_method"], endpoint.auth_method)
         self.assertEqual(response.data["service"], endpoint.service.reference)
-        self.assertEqual(response.data["traces"], [])
+        self.assertEqual(response.data["latest_traces"], [])
+        self.assertTrue(response.data["traces_url"].endswith(f"/proxy/traces/?endpoints={endpoint.reference}"))
+        self.assertIsNone(response.data["statistics"])
         self.assertDateEqual(response.data["created_at"], endpoint.created_at)
         self.assertDateEqual(response.data["updated_at"], endpoint.updated_at)
 
+    def test_can_retrieve_endpoint_latest_traces(self) -> None:
+        endpoint = get_endpoint()
+        traces = [get_trace(endpoint=endpoint) for _ in range(settings.PROXY_ENDPOINT_LATEST_TRACES + 2)]
+        get_trace()  # a trace of another endpoint
+        # the calls whose traces were sampled out are counted
+        EndpointStatistics.objects.create(endpoint=endpoint, call_count=len(traces) + 3)
+
+        with self.assertNumQueries(2):
+            request = self.factory.get(detail_url)
+            force_authenticate(request, user=self.user)
+            response = detail_view(request, pk=endpoint.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["statistics"]["call_count"], len(traces) + 3)
+        self.assertEqual(
+            [trace["reference"] for trace in response.data["latest_traces"]],
+            [trace.reference for trace in reversed(traces[2:])],
+        )
+
+    def test_can_list_endpoints_latest_traces_in_a_single_query(self) -> None:
+        endpoints = [get_endpoint() for _ in range(3)]
+        for endpoint in endpoints:
+            for _ in range(settings.PROXY_ENDPOINT_LATEST_TRACES + 1):
+                get_trace(endpoint=endpoint)
+            EndpointStatistics.objects.create(endpoint=endpoint, call_count=settings.PROXY_ENDPOINT_LATEST_TRACES + 1)
+
+        with self.assertNumQueries(3):
+            request = self.factory.get(list_url)
+            force_authenticate(request, user=self.user)
+            response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        for endpoint in response.data["results"]:
+            self.assertEqual(endpoint["statistics"]["call_count"], settings.PROXY_ENDPOINT_LATEST_TRACES + 1)
+            self.assertEqual(len(endpoint["latest_traces"]), settings.PROXY_ENDPOINT_LATEST_TRACES)
+
     def test_cannot_retrieve_unknown_endpoint(self) -> None:
         with self.assertNumQueries(1):
             request = self.factory.get(detail_url)
@@ -313,7 +364,7 @@ class EndpointTest(BaseApiTest):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, response.data)
 
     def test_can_create_endpoint(self) -> None:
-        with self.assertNumQueries(3):
+        with self.assertNumQueries(4):
             request = self.factory.post(list_url, self.minimal_payload, format="json")
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -366,7 +417,7 @@ class EndpointTest(BaseApiTest):
             "name": "ENDPOINT_NAME_001",
         }
 
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(3):
             request = self.factory.patch(detail_url, payload, format="json")
             force_authenticate(request, user=self.user)
             response = detail_view(request, pk=endpoint.pk)
@@ -403,7 +454,7 @@ class EndpointTest(BaseApiTest):
             "method": endpoint.method,
         }
 
-        with self.assertNumQueries(5):
+        with self.assertNumQueries(4):
             request = self.factory.put(detail_url, payload, format="json")
             force_authenticate(request, user=self.user)
             response = detail_view(request, pk=endpoint.pk)
@@ -455,13 +506,15 @@ class EndpointTest(BaseApiTest):
     def test_can_delete_endpoint(self) -> None:
         endpoint = get_endpoint()
 
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(5):
             request = self.factory.delete(detail_url)
             force_authenticate(request, user=self.user)
             response = detail_view(request, pk=endpoint.pk)
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT, response.data)
         self.assertEqual(Endpoint.objects.count(), 0)
+        # the endpoint is only marked, it is removed by the purge of the deleted endpoints
+        self.assertIsNotNone(Endpoint.all_objects.get(pk=endpoint.pk).deleted_at)
 
     @mock.patch("compyle.proxy.views.async_request")
     def test_can_request_endpoint_with_empty_payload(self, mock_async_request: mock.MagicMock) -> None:
@@ -521,3 +574,33 @@ class EndpointTest(BaseApiTest):
 
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED, response.data)
         self.assertEqual(response.data["task_id"], mock_task_result.id)
+
+    def test_can_get_endpoint_stats(self) -> None:
+        endpoint = get_endpoint()
+        TraceRollup.objects.create(
+            endpoint=endpoint,
+            resolution=RollupResolution.MINUTE,
+            bucket=RollupResolution.MINUTE.truncate(timezone.now() - datetime.timedelta(minutes=5)),
+            call_count=2,
+            success_count=2,
+            sketch=LatencySketch().to_dict(),
+        )
+
+        with self.assertNumQueries(2):
+            request = self.factory.get(stats_url, data={"percentiles": "50,99.9"})
+            force_authenticate(request, user=self.user)
+            response = stats_view(request, pk=endpoint.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["call_count"], 2)
+        self.assertEqual(response.data["success_count"], 2)
+        self.assertEqual(response.data["latency"]["percentiles"], {"p50": None, "p99.9": None})
+
+    def test_cannot_get_endpoint_stats_with_invalid_range(self) -> None:
+        endpoint = get_endpoint()
+
+        request = self.factory.get(stats_url, data={"start": "2024-01-02T00:00:00Z", "end": "2024-01-01T00:00:00Z"})
+        force_authenticate(request, user=self.user)
+        response = stats_view(request, pk=endpoint.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
@@ -0,0 +1,77 @@
+# pylint: disable=missing-function-docstring
+
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import force_authenticate
+
+from compyle.lib.test import BaseApiTest
+from compyle.proxy.views import MetricsViewSet
+
+list_url = reverse("proxy:metrics-list")
+list_view = MetricsViewSet.as_view({"get": "list"})
+
+
+class MetricsTest(BaseApiTest):
+    """TestCase for :class:`comprle.proxy.views.MetricsViewSet`."""
+
+    @override_settings(PROXY_TRACE_INGESTION="stream")
+    @mock.patch("compyle.proxy.views.get_ingestion_metrics")
+    def test_can_read_ingestion_metrics(self, mock_metrics: mock.MagicMock) -> None:
+        mock_metrics.return_value = {"stream_length": 10, "pending": 2, "lag_seconds": 1.5}
+
+        with self.assertNumQueries(0):
+            request = self.factory.get(list_url)
+            force_authenticate(request, user=self.user)
+            response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["trace_ingestion"], mock_metrics.return_value)
+
+    @mock.patch("compyle.proxy.views.get_ingestion_metrics")
+    def test_does_not_read_ingestion_metrics_when_disabled(self, mock_metrics: mock.MagicMock) -> None:
+        request = self.factory.get(list_url)
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertNotIn("trace_ingestion", response.data)
+        mock_metrics.assert_not_called()
+
+    @override_settings(PROXY_DB_POOL=True)
+    @mock.patch("compyle.proxy.views.get_pool_metrics")
+    def test_can_read_database_pool_metrics(self, mock_metrics: mock.MagicMock) -> None:
+        mock_metrics.return_value = [
+            {
+                "alias": "default",
+                "process_type": "web",
+                "pid": 1,
+                "min_size": 1,
+                "max_size": 4,
+                "size": 2,
+                "idle": 1,
+                "in_use": 1,
+                "checkouts": 10,
+                "waits": 1,
+                "wait_ms": 5,
+                "timeouts": 0,
+                "created": 2,
+                "discarded": 0,
+            }
+        ]
+
+        request = self.factory.get(list_url)
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["database_pools"], mock_metrics.return_value)
+
+    def test_cannot_read_metrics_as_anonymous_user(self) -> None:
+        request = self.factory.get(list_url)
+        force_authenticate(request, user=self.anonymous_user)
+        response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN, response.data)
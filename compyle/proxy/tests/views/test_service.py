@@ -1,13 +1,15 @@
 # pylint: disable=missing-function-docstring, too-many-public-methods
 
 import uuid
+from datetime import timedelta
 
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import force_authenticate
 
 from compyle.lib.test import BaseApiTest
-from compyle.proxy.models import Endpoint, Service
+from compyle.proxy.models import Endpoint, EndpointStatistics, Service
 from compyle.proxy.tests.factories import get_endpoint, get_service
 from compyle.proxy.views import ServiceViewSet
 
@@ -274,9 +276,48 @@ class ServiceTestCase(BaseApiTest):
         self.assertEqual(response.data["trailing_slash"], service.trailing_slash)
         self.assertEqual(response.data["auth_flow"], service.auth_flow)
         self.assertEqual(response.data["endpoints"], [])
+        self.assertIsNone(response.data["statistics"])
         self.assertDateEqual(response.data["created_at"], service.created_at)
         self.assertDateEqual(response.data["updated_at"], service.updated_at)
 
+    def test_can_retrieve_service_statistics(self) -> None:
+        service = get_service()
+        endpoints = [get_endpoint(service=service) for _ in range(3)]
+        now = timezone.now()
+        EndpointStatistics.objects.create(
+            endpoint=endpoints[0],
+            call_count=1,
+            error_count=0,
+            last_status_code=200,
+            last_called_at=now,
+            mean_latency=100,
+        )
+        EndpointStatistics.objects.create(
+            endpoint=endpoints[1],
+            call_count=3,
+            error_count=2,
+            last_status_code=500,
+            last_called_at=now,
+            mean_latency=200,
+        )
+        EndpointStatistics.objects.filter(endpoint=endpoints[1]).update(last_called_at=now - timedelta(minutes=1))
+
+        with self.assertNumQueries(3):
+            request = self.factory.get(detail_url)
+            force_authenticate(request, user=self.user)
+            response = detail_view(request, pk=service.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["statistics"]["call_count"], 4)
+        self.assertEqual(response.data["statistics"]["error_count"], 2)
+        self.assertEqual(response.data["statistics"]["last_status_code"], 200)
+        self.assertEqual(response.data["statistics"]["mean_latency"], 175)
+        self.assertDateEqual(response.data["statistics"]["last_called_at"], now)
+        self.assertEqual(
+            [endpoint["statistics"] is not None for endpoint in response.data["endpoints"]].count(True),
+            2,
+        )
+
     def test_cannot_retrieve_unknown_service(self) -> None:
         with self.assertNumQueries(1):
             request = self.factory.get(detail_url)
@@ -286,7 +327,7 @@ class ServiceTestCase(BaseApiTest):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, response.data)
 
     def test_can_create_service(self) -> None:
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(5):
             request = self.factory.post(list_url, self.minimal_payload, format="json")
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -309,7 +350,7 @@ class ServiceTestCase(BaseApiTest):
             }
         ]
 
-        with self.assertNumQueries(6):
+        with self.assertNumQueries(8):
             request = self.factory.post(list_url, payload, format="json")
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -346,7 +387,7 @@ class ServiceTestCase(BaseApiTest):
             },
         ]
 
-        with self.assertNumQueries(7):
+        with self.assertNumQueries(10):
             request = self.factory.post(list_url, payload, format="json")
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -376,7 +417,7 @@ class ServiceTestCase(BaseApiTest):
     def test_can_partial_update_service(self) -> None:
         service = get_service()
 
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(5):
             request = self.factory.patch(detail_url, self.minimal_payload, format="json")
             force_authenticate(request, user=self.user)
             response = detail_view(request, pk=service.pk)
@@ -428,7 +469,7 @@ class ServiceTestCase(BaseApiTest):
     def test_can_update_service(self) -> None:
         service = get_service()
 
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(5):
             request = self.factory.put(detail_url, self.minimal_payload, format="json")
             force_authenticate(request, user=self.user)
             response = detail_view(request, pk=service.pk)
@@ -457,11 +498,15 @@ class ServiceTestCase(BaseApiTest):
 
     def test_can_delete_service(self) -> None:
         service = get_service()
+        endpoint = get_endpoint(service=service)
 
-        with self.assertNumQueries(4):
+        with self.assertNumQueries(7):
             request = self.factory.delete(detail_url)
             force_authenticate(request, user=self.user)
             response = detail_view(request, pk=service.pk)
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT, response.data)
         self.assertEqual(Service.objects.count(), 0)
+        # the service and its endpoints are only marked, they are removed by the purge of the deleted endpoints
+        self.assertIsNotNone(Service.all_objects.get(pk=service.pk).deleted_at)
+        self.assertIsNotNone(Endpoint.all_objects.get(pk=endpoint.pk).deleted_at)
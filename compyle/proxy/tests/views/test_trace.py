@@ -1,13 +1,25 @@
 # pylint: disable=missing-function-docstring, too-many-public-methods
 
+import base64
+import datetime
+import json
+import tempfile
 import uuid
+from unittest import mock, skipIf
 
+from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import force_authenticate
 
 from compyle.lib.test import BaseApiTest
+from compyle.proxy.archives import archive_traces
+from compyle.proxy.blobs import clear_cache, detach_contents
+from compyle.proxy.exports import pyarrow
 from compyle.proxy.models import Trace
+from compyle.proxy.responses import capture_response
+from compyle.proxy.rollups import rollup_traces
 from compyle.proxy.tests.factories import get_authentication, get_endpoint, get_trace
 from compyle.proxy.views import TraceViewSet
 
@@ -17,6 +29,18 @@ list_view = TraceViewSet.as_view({"get": "list"})
 detail_url = reverse("proxy:services-detail", kwargs={"pk": None})
 detail_view = TraceViewSet.as_view({"get": "retrieve"})
 
+inflight_url = reverse("proxy:traces-inflight")
+inflight_view = TraceViewSet.as_view({"get": "inflight"})
+
+analytics_url = reverse("proxy:traces-analytics")
+analytics_view = TraceViewSet.as_view({"get": "analytics"})
+
+export_url = reverse("proxy:traces-export")
+export_view = TraceViewSet.as_view({"get": "export"})
+
+response_url = reverse("proxy:traces-response", kwargs={"reference": "reference"})
+response_view = TraceViewSet.as_view({"get": "captured_response"})
+
 
 class TraceTest(BaseApiTest):
     """TestCase for :class:`comprle.proxy.views.TraceViewSet`."""
@@ -24,7 +48,7 @@ class TraceTest(BaseApiTest):
     def test_can_list_traces(self) -> None:
         traces = [get_trace() for _ in range(5)]
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url)
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -35,10 +59,28 @@ class TraceTest(BaseApiTest):
             [trace.reference for trace in traces],
         )
 
+    def test_can_list_traces_with_blobs(self) -> None:
+        endpoint = get_endpoint()
+        for index in range(4):
+            trace = get_trace(commit=False, endpoint=endpoint, headers={"X-Id": "1"}, payload={"index": index % 2})
+            detach_contents([trace])
+            trace.save()
+        clear_cache()
+        self.addCleanup(clear_cache)
+
+        with self.assertNumQueries(2):
+            request = self.factory.get(list_url)
+            force_authenticate(request, user=self.user)
+            response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual({trace["headers"]["X-Id"] for trace in response.data["results"]}, {"1"})
+        self.assertCountEqual([trace["payload"]["index"] for trace in response.data["results"]], [0, 0, 1, 1])
+
     def test_can_list_traces_search_by_reference(self) -> None:
         traces = [get_trace() for _ in range(5)]
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"search": traces[0].reference})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -46,6 +88,42 @@ class TraceTest(BaseApiTest):
         self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
         self.assertEqual(response.data["results"][0]["reference"], traces[0].reference)
 
+    def test_can_list_traces_search_by_url(self) -> None:
+        traces = [
+            get_trace(url="https://example.com/games?game_id=123"),
+            get_trace(url="https://example.com/GAMES/1"),
+            get_trace(url="https://example.com/players"),
+        ]
+
+        with self.assertNumQueries(1):
+            request = self.factory.get(list_url, data={"search": "games"})
+            force_authenticate(request, user=self.user)
+            response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertCountEqual(
+            [trace["reference"] for trace in response.data["results"]],
+            [trace.reference for trace in traces[:2]],
+        )
+
+    def test_can_list_traces_search_by_uuid(self) -> None:
+        reference = str(uuid.uuid4())
+        traces = [
+            get_trace(reference=reference),
+            get_trace(url=f"https://example.com/games/{reference}"),
+            get_trace(),
+        ]
+
+        request = self.factory.get(list_url, data={"search": reference.upper()})
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertCountEqual(
+            [trace["reference"] for trace in response.data["results"]],
+            [trace.reference for trace in traces[:2]],
+        )
+
     def test_can_list_trace_search_by_endpoint_reference(self) -> None:
         endpoint = get_endpoint()
         traces = [
@@ -54,7 +132,7 @@ class TraceTest(BaseApiTest):
             get_trace(),
         ]
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"search": traces[0].endpoint.reference})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -73,7 +151,7 @@ class TraceTest(BaseApiTest):
             get_trace(),
         ]
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"search": traces[0].authentication.reference})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -127,7 +205,7 @@ class TraceTest(BaseApiTest):
     def test_can_list_traces_order_asc_by_started_at(self) -> None:
         traces = [get_trace() for _ in range(5)]
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"ordering": "started_at"})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -147,7 +225,7 @@ class TraceTest(BaseApiTest):
     def test_can_list_traces_order_desc_by_started_at(self) -> None:
         traces = [get_trace() for _ in range(5)]
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"ordering": "-started_at"})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -250,7 +328,7 @@ class TraceTest(BaseApiTest):
         traces = [get_trace() for _ in range(5)]
         reference = traces[0].reference
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"references": reference})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -263,7 +341,7 @@ class TraceTest(BaseApiTest):
         traces = [get_trace() for _ in range(5)]
         references = [trace.reference for trace in traces[:2]]
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"references": ",".join(references)})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -279,7 +357,7 @@ class TraceTest(BaseApiTest):
         traces = [get_trace() for _ in range(5)]
         reference = traces[0].endpoint.reference
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"endpoints": reference})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -292,7 +370,7 @@ class TraceTest(BaseApiTest):
         traces = [get_trace() for _ in range(5)]
         references = [trace.endpoint.reference for trace in traces[:2]]
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"endpoints": ",".join(references)})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -308,7 +386,7 @@ class TraceTest(BaseApiTest):
         traces = [get_trace() for _ in range(5)]
         reference = traces[0].endpoint.service.reference
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"services": reference})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -321,7 +399,7 @@ class TraceTest(BaseApiTest):
         traces = [get_trace() for _ in range(5)]
         references = [trace.endpoint.service.reference for trace in traces[:2]]
 
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             request = self.factory.get(list_url, data={"services": ",".join(references)})
             force_authenticate(request, user=self.user)
             response = list_view(request)
@@ -374,13 +452,194 @@ class TraceTest(BaseApiTest):
             [trace.reference for trace in traces[:2]],
         )
 
+    def test_filter_by_url_params(self) -> None:
+        traces = [
+            get_trace(url="https://example.com/games?game_id=123&lang=en"),
+            get_trace(url="https://example.com/games?game_id=123&game_id=456"),
+            get_trace(url="https://example.com/games?game_id=1234"),
+            get_trace(url="https://example.com/games"),
+        ]
+
+        for param, expected in [
+            ("game_id:123", traces[:2]),
+            ("game_id:123,lang:en", traces[:1]),
+            ("game_id:456,game_id:123", traces[1:2]),
+            ("game_id", []),
+        ]:
+            request = self.factory.get(list_url, {"param": param})
+            force_authenticate(request, user=self.user)
+            response = list_view(request)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertCountEqual(
+                [trace["reference"] for trace in response.data["results"]],
+                [trace.reference for trace in expected],
+                param,
+            )
+
+    def test_filter_by_longer_status_code_prefix(self) -> None:
+        traces = [get_trace(status_code=400), get_trace(status_code=404), get_trace(status_code=410)]
+
+        request = self.factory.get(list_url, {"status_code_startswith": "40"})
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            [trace["reference"] for trace in response.data["results"]],
+            [trace.reference for trace in traces[:2]],
+        )
+
+    def test_can_list_traces_filter_by_status_classes(self) -> None:
+        traces = [get_trace(status_code=200), get_trace(status_code=404), get_trace(status_code=503), get_trace()]
+
+        request = self.factory.get(list_url, {"status_classes": "4,5"})
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            [trace["reference"] for trace in response.data["results"]],
+            [trace.reference for trace in traces[1:3]],
+        )
+
+    def test_can_list_traces_filter_by_started_at_range(self) -> None:
+        traces = [get_trace() for _ in range(3)]
+        now = datetime.datetime(2024, 3, 15, tzinfo=datetime.timezone.utc)
+        for months, trace in zip((-1, 0, 1), traces):
+            Trace.objects.filter(pk=trace.pk).update(started_at=now + datetime.timedelta(days=31 * months))
+
+        with self.assertNumQueries(1):
+            request = self.factory.get(
+                list_url, data={"started_after": "2024-03-01T00:00:00Z", "started_before": "2024-04-01T00:00:00Z"}
+            )
+            force_authenticate(request, user=self.user)
+            response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual([trace["reference"] for trace in response.data["results"]], [traces[1].reference])
+
+    def test_can_paginate_traces_with_cursor(self) -> None:
+        traces = [get_trace() for _ in range(5)]
+        started_at = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        Trace.objects.filter(pk__in=[trace.pk for trace in traces[:3]]).update(started_at=started_at)
+        expected = list(Trace.objects.order_by("started_at", "reference").values_list("reference", flat=True))
+
+        references, url = [], list_url + "?limit=2"
+        while url:
+            request = self.factory.get(url)
+            force_authenticate(request, user=self.user)
+            response = list_view(request)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+            self.assertNotIn("count", response.data)
+            references.extend(trace["reference"] for trace in response.data["results"])
+            previous, url = response.data["previous"], response.data["next"]
+
+        self.assertEqual(references, expected)
+
+        request = self.factory.get(previous)
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        self.assertEqual([trace["reference"] for trace in response.data["results"]], expected[2:4])
+
+    def test_can_paginate_traces_with_cursor_desc(self) -> None:
+        for _ in range(3):
+            get_trace()
+        expected = list(Trace.objects.order_by("-started_at", "-reference").values_list("reference", flat=True))
+
+        request = self.factory.get(list_url, data={"ordering": "-started_at", "limit": 2})
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        request = self.factory.get(response.data["next"])
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        self.assertEqual([trace["reference"] for trace in response.data["results"]], expected[2:])
+        self.assertIsNone(response.data["next"])
+
+    def test_cursor_is_stable_under_inserts(self) -> None:
+        traces = [get_trace() for _ in range(4)]
+
+        request = self.factory.get(list_url, data={"limit": 2})
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+        get_trace()  # inserted before the first page, as if by a concurrent request
+        Trace.objects.filter(pk=get_trace().pk).update(
+            started_at=datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+
+        request = self.factory.get(response.data["next"])
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        self.assertEqual(
+            [trace["reference"] for trace in response.data["results"]], [trace.reference for trace in traces[2:]]
+        )
+
+    def test_can_paginate_traces_with_offset(self) -> None:
+        for _ in range(5):
+            get_trace()
+
+        with self.assertNumQueries(2):
+            request = self.factory.get(list_url, data={"offset": 2, "limit": 2})
+            force_authenticate(request, user=self.user)
+            response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["count"], 5)
+        self.assertFalse(response.data["count_estimated"])
+        self.assertEqual(len(response.data["results"]), 2)
+
+    @override_settings(COUNT_ESTIMATE_THRESHOLD=2)
+    def test_can_paginate_traces_with_estimated_count(self) -> None:
+        for _ in range(5):
+            get_trace()
+
+        with self.assertNumQueries(3):
+            request = self.factory.get(list_url, data={"offset": 0, "limit": 2})
+            force_authenticate(request, user=self.user)
+            response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertTrue(response.data["count_estimated"])
+        self.assertGreaterEqual(response.data["count"], 3)
+        self.assertIsNotNone(response.data["next"])
+
+        request = self.factory.get(list_url, data={"offset": 4, "limit": 2})
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        self.assertEqual(response.data["count"], 5)
+        self.assertFalse(response.data["count_estimated"])
+        self.assertIsNone(response.data["next"])
+
+    def test_cannot_paginate_traces_with_invalid_cursor(self) -> None:
+        request = self.factory.get(list_url, data={"cursor": "invalid"})
+        force_authenticate(request, user=self.user)
+        response = list_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cannot_paginate_traces_with_mistyped_cursor(self) -> None:
+        for values in ([None, None], [1, 2], ["yesterday", "1"], ["2024-13-45T00:00:00+00:00", "abc"]):
+            with self.subTest(values=values):
+                cursor = base64.urlsafe_b64encode(json.dumps({"v": values}).encode()).decode()
+                request = self.factory.get(list_url, data={"cursor": cursor})
+                force_authenticate(request, user=self.user)
+                response = list_view(request)
+
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_can_retrieve_trace(self) -> None:
         trace = get_trace()
 
         with self.assertNumQueries(1):
             request = self.factory.get(detail_url)
             force_authenticate(request, user=self.user)
-            response = detail_view(request, pk=trace.pk)
+            response = detail_view(request, reference=trace.reference)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
         self.assertEqual(response.data["reference"], trace.reference)
@@ -398,7 +657,62 @@ class TraceTest(BaseApiTest):
         with self.assertNumQueries(1):
             request = self.factory.get(detail_url)
             force_authenticate(request, user=self.user)
-            response = detail_view(request, pk=str(uuid.uuid4()))
+            response = detail_view(request, reference=str(uuid.uuid4()))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, response.data)
+
+    def test_can_retrieve_captured_response(self) -> None:
+        trace = get_trace()
+        http_response = mock.MagicMock(headers={"Content-Type": "text/plain"})
+        http_response.iter_content.return_value = [b"hello ", b"world"]
+        capture_response(trace, http_response).save()
+
+        with self.assertNumQueries(2):
+            request = self.factory.get(response_url)
+            force_authenticate(request, user=self.user)
+            response = response_view(request, reference=trace.reference)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["body"], "hello world")
+        self.assertEqual(response.data["headers"], {"Content-Type": "text/plain"})
+        self.assertEqual(response.data["size"], 11)
+        self.assertFalse(response.data["truncated"])
+
+    def test_cannot_retrieve_uncaptured_response(self) -> None:
+        trace = get_trace()
+
+        request = self.factory.get(response_url)
+        force_authenticate(request, user=self.user)
+        response = response_view(request, reference=trace.reference)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(PROXY_TRACE_INFLIGHT=True)
+    @mock.patch("compyle.proxy.tracing.get_redis")
+    def test_can_list_inflight_traces(self, mock_redis: mock.MagicMock) -> None:
+        record = {
+            "reference": str(uuid.uuid4()),
+            "endpoint": "endpoint",
+            "method": "get",
+            "url": "https://example.com/api",
+            "started_at": "2025-01-01T00:00:00+00:00",
+        }
+        mock_redis.return_value.zrange.return_value = [json.dumps(record).encode()]
+
+        with self.assertNumQueries(0):
+            request = self.factory.get(inflight_url)
+            force_authenticate(request, user=self.user)
+            response = inflight_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data[0]["reference"], record["reference"])
+        self.assertEqual(response.data[0]["started_at"], "2025-01-01T00:00:00Z")
+        mock_redis.return_value.zremrangebyscore.assert_called_once()
+
+    def test_cannot_list_inflight_traces_when_disabled(self) -> None:
+        request = self.factory.get(inflight_url)
+        force_authenticate(request, user=self.user)
+        response = inflight_view(request)
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, response.data)
 
@@ -416,17 +730,103 @@ class TraceTest(BaseApiTest):
         with self.assertNumQueries(0):
             request = self.factory.patch(list_url, {}, format="json")
             force_authenticate(request, user=self.user)
-            response = detail_view(request, pk=trace.pk)
+            response = detail_view(request, reference=trace.reference)
 
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED, response.data)
 
+    def test_can_get_traces_analytics(self) -> None:
+        endpoint = get_endpoint()
+        for status_code in (200, 200, 500):
+            get_trace(endpoint=endpoint, status_code=status_code)
+        get_trace(status_code=200)
+
+        with self.assertNumQueries(1):
+            request = self.factory.get(
+                analytics_url, data={"endpoints": endpoint.reference, "group_by": "status_code", "percentiles": "50"}
+            )
+            force_authenticate(request, user=self.user)
+            response = analytics_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(response.data["total"]["count"], 3)
+        self.assertEqual(response.data["total"]["error_count"], 1)
+        self.assertEqual([(group["key"], group["count"]) for group in response.data["groups"]], [(200, 2), (500, 1)])
+
+    @skipIf(pyarrow is None, "PyArrow is not installed")
+    def test_can_get_traces_analytics_with_archives(self) -> None:
+        endpoint = get_endpoint()
+        old_trace = get_trace(endpoint=endpoint, status_code=500, authentication=None)
+        Trace.objects.filter(pk=old_trace.pk).update(started_at=timezone.now() - datetime.timedelta(days=365))
+        get_trace(endpoint=endpoint, status_code=200, authentication=None)
+        rollup_traces(settle_delay=0)
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(PROXY_TRACE_ARCHIVE_PATH=directory):
+            list(archive_traces())
+
+            request = self.factory.get(analytics_url, data={"services": endpoint.service.reference})
+            force_authenticate(request, user=self.user)
+            response = analytics_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(Trace.objects.count(), 1)
+        self.assertEqual(response.data["total"]["count"], 2)
+        self.assertEqual(response.data["total"]["error_count"], 1)
+
+    def test_cannot_get_traces_analytics_with_invalid_group(self) -> None:
+        request = self.factory.get(analytics_url, data={"group_by": "authentication"})
+        force_authenticate(request, user=self.user)
+        response = analytics_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+
+    def test_can_export_traces(self) -> None:
+        endpoint = get_endpoint()
+        traces = [get_trace(endpoint=endpoint, status_code=200) for _ in range(3)]
+        get_trace(status_code=200)
+
+        request = self.factory.get(export_url, data={"endpoints": endpoint.reference})
+        force_authenticate(request, user=self.user)
+        response = export_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn('filename="traces.ndjson"', response["Content-Disposition"])
+
+        with self.assertNumQueries(1):
+            content = b"".join(response.streaming_content).decode()
+
+        self.assertCountEqual(
+            [json.loads(line)["reference"] for line in content.splitlines()], [trace.reference for trace in traces]
+        )
+
+    def test_can_export_traces_as_csv(self) -> None:
+        trace = get_trace(status_code=200)
+
+        request = self.factory.get(export_url, data={"file_format": "csv"})
+        force_authenticate(request, user=self.user)
+        response = export_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith(trace.reference))
+
+    def test_cannot_export_traces_as_parquet(self) -> None:
+        request = self.factory.get(export_url, data={"file_format": "parquet"})
+        force_authenticate(request, user=self.user)
+        response = export_view(request)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, response.data)
+
     def cannot_partial_update(self) -> None:
         trace = get_trace()
 
         with self.assertNumQueries(0):
             request = self.factory.put(detail_url, {}, format="json")
             force_authenticate(request, user=self.user)
-            response = detail_view(request, pk=trace.pk)
+            response = detail_view(request, reference=trace.reference)
 
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED, response.data)
 
@@ -436,6 +836,6 @@ class TraceTest(BaseApiTest):
         with self.assertNumQueries(0):
             request = self.factory.delete(detail_url, {}, format="json")
             force_authenticate(request, user=self.user)
-            response = detail_view(request, pk=trace.pk)
+            response = detail_view(request, reference=trace.reference)
 
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED, response.data)
@@ -0,0 +1,205 @@
+import json
+import random
+from dataclasses import dataclass
+from typing import Any
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from compyle.lib.redis import get_redis
+from compyle.proxy.blobs import detach_contents
+from compyle.proxy.ingestion import publish_trace
+from compyle.proxy.models import Authentication, Endpoint, Trace
+from compyle.proxy.responses import capture_response
+from compyle.proxy.statistics import record_statistics
+
+INFLIGHT_KEY = "proxy:traces:inflight"
+"""The Redis sorted set of the in-flight traces, scored by their start timestamp."""
+
+
+@dataclass(frozen=True)
+class TracePolicy:
+    """The tracing policy of an endpoint, resolved from the endpoint, its service and the settings."""
+
+    sample_rate: float
+    slow_threshold: int | None
+    retention_days: int | None
+
+
+def get_trace_policy(endpoint: Endpoint) -> TracePolicy:
+    """Resolves the tracing policy of an endpoint, its own values taking precedence over the ones of its service.
+
+    Args:
+        endpoint: The endpoint, with its service.
+
+    Returns:
+        The tracing policy.
+    """
+
+    def resolve(field: str, default: Any) -> Any:
+        for value in (getattr(endpoint, field), getattr(endpoint.service, field)):
+            if value is not None:
+                return value
+        return default
+
+    return TracePolicy(
+        sample_rate=resolve("trace_sample_rate", settings.PROXY_TRACE_SAMPLE_RATE),
+        slow_threshold=resolve("trace_slow_threshold", settings.PROXY_TRACE_SLOW_THRESHOLD),
+        retention_days=resolve("trace_retention_days", None),
+    )
+
+
+def get_sample_rate(trace: Trace, policy: TracePolicy) -> float:
+    """Returns the rate at which a trace is kept according to a tracing policy.
+
+    Traces of failed, non-2xx or slow calls are always kept, the others are kept at the sample rate.
+
+    Args:
+        trace: The trace, completed or not.
+        policy: The tracing policy of the endpoint.
+
+    Returns:
+        The rate, between 0 and 1.
+    """
+    if trace.status_code is None or not 200 <= trace.status_code < 300:
+        return 1.0
+
+    if policy.slow_threshold is not None and trace.completed_at is not None:
+        elapsed = (trace.completed_at - trace.started_at).total_seconds() * 1000
+        if elapsed >= policy.slow_threshold:
+            return 1.0
+
+    return min(policy.sample_rate, 1.0)
+
+
+def is_sampled(trace: Trace, policy: TracePolicy) -> bool:
+    """Tells whether a trace is to be written according to a tracing policy.
+
+    The rate at which it is kept is set as its `sample_rate`, for its call to be weighted when rolled up.
+
+    Args:
+        trace: The trace, completed or not.
+        policy: The tracing policy of the endpoint.
+
+    Returns:
+        True if the trace is to be written, False otherwise.
+    """
+    trace.sample_rate = get_sample_rate(trace, policy)
+    return trace.sample_rate >= 1.0 or random.random() < trace.sample_rate  # nosec
+
+
+def start_trace(
+    endpoint: Endpoint,
+    authentication: Authentication | None,
+    url: str,
+    headers: dict[str, str],
+    body: dict[str, Any] | None,
+) -> Trace:
+    """Builds the trace of a request about to be sent, without writing it to the database.
+
+    If `PROXY_TRACE_INFLIGHT` is enabled, the trace is also published to Redis until it is recorded.
+
+    Args:
+        endpoint: The requested endpoint.
+        authentication: The authentication used for the request, if any.
+        url: The requested URL.
+        headers: The headers of the request.
+        body: The body of the request.
+
+    Returns:
+        The unsaved trace.
+    """
+    trace = Trace(
+        started_at=timezone.now(),
+        endpoint=endpoint,
+        authentication=authentication,
+        method=endpoint.method,
+        url=url,
+        headers=headers,
+        payload=body,
+    )
+
+    if settings.PROXY_TRACE_INFLIGHT:
+        trace.inflight_record = json.dumps(
+            {
+                "reference": str(trace.reference),
+                "endpoint": endpoint.reference,
+                "method": trace.method,
+                "url": url,
+                "started_at": trace.started_at.isoformat(),
+            }
+        )
+        get_redis().zadd(INFLIGHT_KEY, {trace.inflight_record: trace.started_at.timestamp()})
+
+    return trace
+
+
+def complete_trace(trace: Trace, response: requests.Response) -> None:
+    """Fills the trace with the outcome of the request, and captures the response if its endpoint requires it.
+
+    Args:
+        trace: The trace of the request.
+        response: The response of the request.
+    """
+    trace.completed_at = trace.started_at + response.elapsed
+    trace.status_code = response.status_code
+
+    if trace.endpoint.capture_response:
+        trace.captured_response = capture_response(trace, response)
+
+
+def record_trace(trace: Trace) -> bool:
+    """Writes the trace if sampled, counts it in the endpoint statistics and withdraws it from the in-flight traces.
+
+    Depending on `PROXY_TRACE_INGESTION`, the trace is either inserted in the database right away or appended to
+    the Redis ingestion stream, to be loaded in bulk by the `consume_traces` command. If `PROXY_TRACE_BLOBS` is
+    enabled, its headers and payload are stored as blobs when inserted. Its captured response, if any, is inserted
+    in the database in both cases.
+
+    Args:
+        trace: The trace to be written, completed or not.
+
+    Returns:
+        True if the trace was sampled and written, False if it was dropped.
+    """
+    sampled = is_sampled(trace, get_trace_policy(trace.endpoint))
+
+    if sampled and settings.PROXY_TRACE_INGESTION == "stream":
+        publish_trace(trace)
+    elif sampled:
+        if settings.PROXY_TRACE_BLOBS:
+            detach_contents([trace])
+        trace.save(force_insert=True)
+
+    if sampled and (response := getattr(trace, "captured_response", None)) is not None:
+        response.save(force_insert=True)
+
+    record_statistics(trace)
+
+    if record := getattr(trace, "inflight_record", None):
+        get_redis().zrem(INFLIGHT_KEY, record)
+
+    return sampled
+
+
+def get_inflight_traces() -> list[dict[str, Any]]:
+    """Returns the traces of the requests currently in flight, oldest first.
+
+    Records older than `PROXY_TRACE_INFLIGHT_TTL` seconds are considered lost, by a killed worker for instance,
+    and are pruned.
+
+    Returns:
+        The in-flight traces records.
+    """
+    client = get_redis()
+    expired_before = timezone.now().timestamp() - settings.PROXY_TRACE_INFLIGHT_TTL
+
+    client.zremrangebyscore(INFLIGHT_KEY, "-inf", f"({expired_before}")
+
+    records = [json.loads(record) for record in client.zrange(INFLIGHT_KEY, 0, -1)]
+    for record in records:
+        record["started_at"] = parse_datetime(record["started_at"])
+
+    return records
@@ -8,6 +8,8 @@ router.register(r"services", views.ServiceViewSet, basename="services")
 router.register(r"endpoints", views.EndpointViewSet, basename="endpoints")
 router.register(r"traces", views.TraceViewSet, basename="traces")
 # router.register(r"authentications", views.AuthenticationViewSet, basename="authentications")
+router.register(r"authentications", views.AuthenticationImportViewSet, basename="authentications")
+router.register(r"metrics", views.MetricsViewSet, basename="metrics")
 
 urlpatterns: list[URLPattern | URLResolver] = [
     path("", include(router.urls)),
@@ -1,4 +1,7 @@
-from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+import functools
+import re
+from dataclasses import dataclass
+from urllib.parse import parse_qsl, quote, urlencode, urlparse, urlunparse
 
 import requests
 from requests.adapters import HTTPAdapter
@@ -20,6 +23,41 @@ def extract_url_params(url: str) -> list[tuple[str, str]]:
     return parse_qsl(urlparse(url).query, keep_blank_values=True)
 
 
+def group_url_params(url: str | None) -> dict[str, list[str]] | None:
+    """Groups the parameters of the specified URL by name, as stored by the traces.
+
+    Args:
+        url: The URL to extract the parameters from, if any.
+
+    Returns:
+        The values of each parameter in order, None if the URL has no parameters.
+    """
+    params: dict[str, list[str]] = {}
+    for name, value in extract_url_params(url or ""):
+        params.setdefault(name, []).append(value)
+
+    return params or None
+
+
+def parse_param_filter(value: str) -> dict[str, list[str]] | None:
+    """Parses the comma-separated `name:value` pairs of a filter on the URL parameters.
+
+    Args:
+        value: The pairs, e.g. `game_id:123,lang:en`.
+
+    Returns:
+        The values of each parameter, as stored by the traces, None if a pair has no name or no separator.
+    """
+    params: dict[str, list[str]] = {}
+    for pair in value.split(","):
+        name, separator, param = pair.strip().partition(":")
+        if not separator or not name:
+            return None
+        params.setdefault(name, []).append(param)
+
+    return params
+
+
 def add_url_params(url: str, **params) -> str:
     """Adds the specified parameters to the URL.
 
@@ -79,6 +117,75 @@ def normalize_url(url: str, trailling_slash: bool) -> str:
     return urlunparse(parsed._replace(path=path))
 
 
+PLACEHOLDER_PATTERN = re.compile(r"\{(\w+)\}")
+"""The placeholders of the path parameters in the URLs of the endpoints, such as `{id}` in `/users/{id}`."""
+
+
+@dataclass(frozen=True)
+class UrlTemplate:
+    """A URL compiled by :func:`compile_url`, expanded per request by substituting parameters.
+
+    Args:
+        segments: The literal parts of the URL up to its query, alternating with the names of its placeholders.
+        fragment: The fragment of the URL, with its `#`, empty if none.
+    """
+
+    segments: tuple[str, ...]
+    fragment: str
+
+    @property
+    def placeholders(self) -> tuple[str, ...]:
+        """The names of the placeholders of the path parameters, in order."""
+        return self.segments[1::2]
+
+    def expand(self, **params) -> str:
+        """Builds the URL of a request, as :func:`normalize_url` of :func:`build_url` does from scratch.
+
+        Args:
+            **params: The parameters of the request, the ones named after a placeholder being substituted in the
+                path, escaped, and the others encoded as the query.
+
+        Returns:
+            The URL built with the parameters.
+
+        Raises:
+            ValueError: if a placeholder has no parameter.
+        """
+        if len(self.segments) == 1:
+            url = self.segments[0]
+        else:
+            parts = list(self.segments)
+            for index in range(1, len(parts), 2):
+                if (name := parts[index]) not in params:
+                    raise ValueError(f"missing path parameter {name}")
+                parts[index] = quote(str(params.pop(name)), safe="")
+            url = "".join(parts)
+
+        if params:
+            url += "?" + urlencode(params)
+        return url + self.fragment
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_url(url: str, slug: str, trailing_slash: bool) -> UrlTemplate:
+    """Compiles the URL of an endpoint once, so that a request only substitutes and encodes its parameters.
+
+    The compiled URL is the one of :func:`build_url` normalized by :func:`normalize_url`, so that both build the
+    same URLs, the placeholders such as `{id}` being kept as is up to the expansion.
+
+    Args:
+        url: The base URL.
+        slug: The slug for that URL, which may hold placeholders.
+        trailing_slash: Whether the path ends with a slash or not.
+
+    Returns:
+        The template of the URL.
+    """
+    base, separator, fragment = normalize_url(build_url(url, slug), trailing_slash).partition("#")
+
+    return UrlTemplate(segments=tuple(PLACEHOLDER_PATTERN.split(base)), fragment=separator + fragment)
+
+
 # pylint: disable=too-many-arguments
 def request_with_retry(
     method: HttpMethod,
@@ -1,20 +1,36 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.db.models import Prefetch
 from django.db.models.query import QuerySet
+from django.http import Http404, StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema
-from rest_framework import filters, response, status, viewsets
+from rest_framework import exceptions, filters, response, status, viewsets
 from rest_framework.decorators import action
 
-from compyle.lib.views import BaseModelViewSet
+from compyle.lib.pagination import KeysetPagination
+from compyle.lib.postgresql.pool import get_pool_metrics
+from compyle.lib.views import BaseModelViewSet, ReplicaReadMixin
 from compyle.proxy import filtersets, models, serializers
+from compyle.proxy.analytics import analyze_traces
+from compyle.proxy.archives import ArchiveQuery, is_archive_enabled
+from compyle.proxy.credentials import import_authentications
+from compyle.proxy.deletions import mark_deleted
+from compyle.proxy.exports import TEXT_FORMATS, stream_traces
+from compyle.proxy.ingestion import get_ingestion_metrics
+from compyle.proxy.rollups import get_endpoint_stats
 from compyle.proxy.tasks import async_request
+from compyle.proxy.tracing import get_inflight_traces
 
 
 class ServiceViewSet(BaseModelViewSet):
     """Viewset for :class:`compyle.proxy.models.Service`."""
 
-    queryset = models.Service.objects.all().prefetch_related("endpoints")
+    queryset = models.Service.objects.all().prefetch_related(
+        Prefetch("endpoints", queryset=models.Endpoint.objects.select_related("statistics").with_latest_traces())
+    )
     serializer_class = serializers.ServiceSerializer
     serializer_classes = {
         "create": serializers.ServiceCreateSerializer,
@@ -26,29 +42,19 @@ class ServiceViewSet(BaseModelViewSet):
     search_fields = ["reference", "name"]
     ordering_fields = ["reference", "name", "created_at", "updated_at"]
 
-    def get_queryset(self) -> QuerySet[models.Service]:
-        """Returns the queryset of `Service` objects with prefetch optimization for GET requests.
+    def perform_destroy(self, instance: models.Service) -> None:
+        """Mark the service and its endpoints as deleted, their traces being deleted in the background.
 
-        Returns:
-            The queryset of `Service` objects.
+        Args:
+            instance: The service to delete.
         """
-        queryset = super().get_queryset()
-
-        if self.request.method == "GET":
-            queryset.prefetch_related(
-                Prefetch(
-                    "endpoints__endpoint_traces",
-                    queryset=models.Trace.objects.only("pk"),
-                )
-            )
-
-        return queryset
+        mark_deleted(models.Service.objects.filter(pk=instance.pk))
 
 
 class EndpointViewSet(BaseModelViewSet):
     """Viewset for :class:`compyle.proxy.models.Service`."""
 
-    queryset = models.Endpoint.objects.all().select_related("service").prefetch_related("endpoint_traces")
+    queryset = models.Endpoint.objects.all().select_related("service", "statistics").with_latest_traces()
     serializer_class = serializers.EndpointSerializer
     serializer_classes = {
         "trigger_request": serializers.RequestSerializer,
@@ -60,6 +66,14 @@ class EndpointViewSet(BaseModelViewSet):
     search_fields = ["reference", "name", "service__reference"]
     ordering_fields = ["reference", "name", "created_at", "updated_at"]
 
+    def perform_destroy(self, instance: models.Endpoint) -> None:
+        """Mark the endpoint as deleted, its traces being deleted in the background.
+
+        Args:
+            instance: The endpoint to delete.
+        """
+        mark_deleted(models.Endpoint.objects.filter(pk=instance.pk))
+
     @extend_schema(
         description=_("Action for triggering an endpoint request."),
         request=serializers.RequestSerializer,
@@ -97,19 +111,173 @@ class EndpointViewSet(BaseModelViewSet):
 
         return response.Response(response_data, status=status.HTTP_202_ACCEPTED)
 
+    @extend_schema(
+        description=_("Action for the statistics of an endpoint over a time range, merged from its rollups."),
+        parameters=[serializers.EndpointStatsQuerySerializer],
+        responses={
+            status.HTTP_200_OK: serializers.EndpointStatsSerializer,
+            status.HTTP_400_BAD_REQUEST: {},
+            status.HTTP_404_NOT_FOUND: {},
+        },
+    )
+    @action(detail=True, methods=["get"], url_path="stats", url_name="stats")
+    def stats(self, request, *args, **kwargs) -> response.Response:  # pylint: disable=unused-argument
+        """Compute the call counts and the latency percentiles of an endpoint, without reading its traces.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            The response object.
+        """
+        endpoint = self.get_object()
+
+        serializer = serializers.EndpointStatsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        stats = get_endpoint_stats(endpoint, **serializer.validated_data)
+
+        return response.Response(serializers.EndpointStatsSerializer(stats).data)
+
+    def get_queryset(self) -> QuerySet[models.Endpoint]:
+        """Returns the queryset of `Endpoint` objects, without their traces for the statistics.
+
+        Returns:
+            The queryset of `Endpoint` objects.
+        """
+        if self.action == "stats":
+            return models.Endpoint.objects.all()
+
+        return super().get_queryset()
+
 
-class TraceViewSet(viewsets.ReadOnlyModelViewSet[models.Trace]):
+class TraceViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet[models.Trace]):
     """Readonly viewset for :class:`compyle.proxy.models.Trace`."""
 
     queryset = models.Trace.objects.all().select_related("endpoint", "endpoint__service", "authentication")
     serializer_class = serializers.TraceSerializer
+    pagination_class = KeysetPagination
+    lookup_field = "reference"
 
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filtersets.TraceSearchFilter]
     filterset_class = filtersets.TraceFilterSet
 
-    search_fields = ["reference", "endpoint__reference", "authentication__reference"]
+    search_fields = ["reference", "url", "endpoint__reference", "authentication__reference"]
     ordering_fields = ["reference", "status_code", "started_at", "completed_at"]
 
+    def get_archive_query(self) -> ArchiveQuery | None:
+        """Returns the query of the archived traces matching the filters of the request, None if not archived."""
+        if not is_archive_enabled():
+            return None
+
+        filterset = self.filterset_class(self.request.query_params, queryset=self.get_queryset())
+        filterset.is_valid()
+
+        return ArchiveQuery.from_filterset(filterset, self.request.query_params.get("search"))
+
+    @extend_schema(
+        description=_("Action for listing the requests in flight, whose traces are not written yet."),
+        responses={
+            status.HTTP_200_OK: serializers.InflightTraceSerializer(many=True),
+            status.HTTP_404_NOT_FOUND: {},
+        },
+    )
+    @action(detail=False, methods=["get"], url_path="inflight", url_name="inflight", pagination_class=None)
+    def inflight(self, request, *args, **kwargs) -> response.Response:  # pylint: disable=unused-argument
+        """List the in-flight traces published to Redis, if enabled by `PROXY_TRACE_INFLIGHT`.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            The response object.
+        """
+        if not settings.PROXY_TRACE_INFLIGHT:
+            raise Http404(_("In-flight traces are not enabled."))
+
+        serializer = serializers.InflightTraceSerializer(get_inflight_traces(), many=True)
+
+        return response.Response(serializer.data)
+
+    @extend_schema(
+        description=_("Action for the captured response of a trace, its body decompressed."),
+        responses={
+            status.HTTP_200_OK: serializers.TraceResponseSerializer,
+            status.HTTP_404_NOT_FOUND: {},
+        },
+    )
+    @action(detail=True, methods=["get"], url_path="response", url_name="response")
+    def captured_response(self, request, *args, **kwargs) -> response.Response:  # pylint: disable=unused-argument
+        """Retrieve the response captured for the trace, loaded only on demand as its body may be large.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            The response object.
+        """
+        trace = self.get_object()
+        captured = models.TraceResponse.objects.filter(reference=trace.reference, started_at=trace.started_at).first()
+        if captured is None:
+            raise Http404(_("No response was captured for this trace."))
+
+        return response.Response(serializers.TraceResponseSerializer(captured).data)
+
+    @extend_schema(
+        description=_("Action for the counts, latency percentiles and latency histogram of the filtered traces."),
+        parameters=[serializers.TraceAnalyticsQuerySerializer],
+        responses={
+            status.HTTP_200_OK: serializers.TraceAnalyticsSerializer,
+            status.HTTP_400_BAD_REQUEST: {},
+        },
+    )
+    @action(detail=False, methods=["get"], url_path="analytics", url_name="analytics", pagination_class=None)
+    def analytics(self, request, *args, **kwargs) -> response.Response:  # pylint: disable=unused-argument
+        """Compute the analytics of the filtered traces, read in chunks from a server-side cursor and the archives.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            The response object.
+        """
+        serializer = serializers.TraceAnalyticsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        results = analyze_traces(queryset, archives=self.get_archive_query(), **serializer.validated_data)
+
+        return response.Response(serializers.TraceAnalyticsSerializer(results).data)
+
+    @extend_schema(
+        description=_("Action for exporting the filtered traces, streamed as NDJSON or CSV."),
+        parameters=[serializers.TraceExportQuerySerializer],
+        responses={
+            (status.HTTP_200_OK, "application/x-ndjson"): OpenApiTypes.STR,
+            (status.HTTP_200_OK, "text/csv"): OpenApiTypes.STR,
+            status.HTTP_400_BAD_REQUEST: {},
+        },
+    )
+    @action(detail=False, methods=["get"], url_path="export", url_name="export", pagination_class=None)
+    def export(self, request, *args, **kwargs) -> StreamingHttpResponse:  # pylint: disable=unused-argument
+        """Stream the filtered traces, the archived ones first, read in chunks through a server-side cursor.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            The streaming response object.
+        """
+        serializer = serializers.TraceExportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        file_format = serializer.validated_data["file_format"]
+
+        return StreamingHttpResponse(
+            stream_traces(self.filter_queryset(self.get_queryset()), file_format, archives=self.get_archive_query()),
+            content_type=TEXT_FORMATS[file_format],
+            headers={"Content-Disposition": f'attachment; filename="traces.{file_format}"'},
+        )
+
 
 class AuthenticationViewSet(BaseModelViewSet):
     """Viewset for :class:`compyle.proxy.models.Authentication`."""
@@ -123,3 +291,70 @@ class AuthenticationViewSet(BaseModelViewSet):
 
     search_fields = ["reference", "email"]
     ordering_fields = ["reference", "created_at", "updated_at"]
+
+
+class AuthenticationImportViewSet(ReplicaReadMixin, viewsets.GenericViewSet[models.Authentication]):
+    """Viewset for the bulk import of :class:`compyle.proxy.models.Authentication`."""
+
+    queryset = models.Authentication.objects.none()
+    serializer_class = serializers.AuthenticationImportSerializer
+
+    @extend_schema(
+        description=_("Action for creating or updating authentications in bulk, matched on their email."),
+        request=serializers.AuthenticationImportSerializer(many=True),
+        responses={
+            status.HTTP_201_CREATED: serializers.AuthenticationImportResultSerializer,
+        },
+    )
+    @action(detail=False, methods=["post"], url_path="bulk", url_name="bulk")
+    def bulk_import(self, request, *args, **kwargs) -> response.Response:  # pylint: disable=unused-argument
+        """Import the given authentications, at most `PROXY_CREDENTIALS_IMPORT_MAX_ROWS` of them.
+
+        Their credentials are encrypted within the request, without a process pool in the web worker, the larger
+        imports being left to the `import_authentications` command.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            The response object.
+        """
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=settings.PROXY_CREDENTIALS_IMPORT_MAX_ROWS
+        )
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            with transaction.atomic():
+                count = sum(import_authentications(serializer.validated_data, processes=1))
+        except IntegrityError as error:
+            # a given reference that belongs to the authentication of another email
+            raise exceptions.ValidationError(_("The authentications conflict with existing ones.")) from error
+
+        return response.Response({"count": count}, status=status.HTTP_201_CREATED)
+
+
+class MetricsViewSet(viewsets.ViewSet):
+    """Viewset for the operational gauges of the proxy."""
+
+    @extend_schema(
+        description=_("Action for reading the operational gauges of the proxy."),
+        responses={status.HTTP_200_OK: serializers.MetricsSerializer},
+    )
+    def list(self, request, *args, **kwargs) -> response.Response:  # pylint: disable=unused-argument
+        """Read the gauges, such as the trace ingestion lag and the database connection pools of the process.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            The response object.
+        """
+        metrics = {}
+
+        if settings.PROXY_TRACE_INGESTION == "stream":
+            metrics["trace_ingestion"] = get_ingestion_metrics()
+        if settings.PROXY_DB_POOL:
+            metrics["database_pools"] = get_pool_metrics()
+
+        return response.Response(serializers.MetricsSerializer(metrics).data)
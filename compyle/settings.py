@@ -12,6 +12,10 @@ TESTING = sys.argv[1:2] == ["test"]
 
 SECRET_KEY = "django-insecure-+$))w01^9gwz#7fal8+al7s4h_*wt=!tt7&eve2w039$=$oj0-"  # nosec
 
+# The secret the encrypted fields keys are derived from, defaults to the SECRET_KEY when unset.
+# https://django-cryptography.readthedocs.io/en/latest/settings.html
+CRYPTOGRAPHY_KEY = os.getenv("CRYPTOGRAPHY_KEY")
+
 DEBUG = False
 
 ALLOWED_HOSTS = ["*"]
@@ -28,6 +32,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "drf_spectacular",
     "drf_spectacular_sidecar",
@@ -73,7 +78,7 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "compyle.lib.pagination.EstimatedCountPagination",
     "DEFAULT_RENDERER_CLASSES": [
         "rest_framework.renderers.JSONRenderer",
         "rest_framework.renderers.BrowsableAPIRenderer",
@@ -85,6 +90,9 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 20,
 }
 
+# Paginated counts are exact up to this number of rows, and estimated by the query planner above
+COUNT_ESTIMATE_THRESHOLD = int(os.getenv("COUNT_ESTIMATE_THRESHOLD", "10000"))
+
 # DRF Spectacular settings
 # https://drf-spectacular.readthedocs.io/en/latest/settings.html
 
@@ -130,6 +138,40 @@ CELERY_TASK_RETRY_MAX = int(os.getenv("CELERY_TASK_RETRY_MAX", "3"))
 CELERY_TASK_RETRY_DELAY = int(os.getenv("CELERY_TASK_RETRY_DELAY", "60"))
 CELERY_TIMEZONE = "UTC"
 CELERY_ENABLE_UTC = True
+CELERY_BEAT_SCHEDULE = {
+    "maintain-trace-partitions": {
+        "task": "compyle.proxy.tasks.maintain_trace_partitions",
+        "schedule": 24 * 60 * 60,
+    },
+    "purge-expired-traces": {
+        "task": "compyle.proxy.tasks.purge_expired_traces",
+        "schedule": 60 * 60,
+    },
+    "flush-endpoint-statistics": {
+        "task": "compyle.proxy.tasks.flush_endpoint_statistics",
+        "schedule": int(os.getenv("PROXY_ENDPOINT_STATISTICS_FLUSH_INTERVAL", "10")),
+    },
+    "rollup-traces": {
+        "task": "compyle.proxy.tasks.rollup_traces",
+        "schedule": 60,
+    },
+    "compact-trace-rollups": {
+        "task": "compyle.proxy.tasks.compact_trace_rollups",
+        "schedule": 60 * 60,
+    },
+    "archive-traces": {
+        "task": "compyle.proxy.tasks.archive_traces",
+        "schedule": 24 * 60 * 60,
+    },
+    "purge-orphan-responses": {
+        "task": "compyle.proxy.tasks.purge_orphan_responses",
+        "schedule": 60 * 60,
+    },
+    "purge-deleted-endpoints": {
+        "task": "compyle.proxy.tasks.purge_deleted_endpoints",
+        "schedule": 60,
+    },
+}
 
 # Redis configuration
 # https://docs.celeryproject.org/en/stable/userguide/configuration.html#std:setting-REDIS_URL
@@ -183,16 +225,39 @@ if not TESTING:
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "compyle.lib.postgresql",
         "NAME": os.getenv("POSTGRES_DB", "compyle"),
         "USER": os.getenv("POSTGRES_USER", "compyle"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "compyle"),
         "HOST": os.getenv("POSTGRES_HOST", "localhost"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
         "CONN_HEALTH_CHECKS": True,
-    }
+    },
+}
+
+# The read replica of the primary, connected to with the same credentials, the reads being routed to it only if
+# PROXY_READ_REPLICA names it, and the tests reading it from the test database of the primary
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "HOST": os.getenv("POSTGRES_REPLICA_HOST", DATABASES["default"]["HOST"]),
+    "PORT": os.getenv("POSTGRES_REPLICA_PORT", DATABASES["default"]["PORT"]),
+    "TEST": {"MIRROR": "default"},
 }
 
+DATABASE_ROUTERS = ["compyle.lib.routers.ReplicaRouter"]
+
+# Pool the connections of each process to each database, except in the tests, as "MIN,MAX" per type of process: the
+# gunicorn workers (WEB), the Celery prefork children (PREFORK) and the Celery thread pools (THREADS), MIN connections
+# being kept open and at most MAX opened. A checkout waits up to TIMEOUT seconds for a connection when all are in use,
+# and checks with a query the connections idle for more than CHECK_IDLE seconds
+PROXY_DB_POOL = os.getenv("PROXY_DB_POOL", "true").lower() == "true" and not TESTING
+PROXY_DB_POOL_SIZES = {
+    process_type: tuple(int(size) for size in os.getenv(f"PROXY_DB_POOL_{process_type.upper()}", default).split(","))
+    for process_type, default in (("web", "1,4"), ("prefork", "1,1"), ("threads", "4,16"))
+}
+PROXY_DB_POOL_TIMEOUT = float(os.getenv("PROXY_DB_POOL_TIMEOUT", "10"))
+PROXY_DB_POOL_CHECK_IDLE = float(os.getenv("PROXY_DB_POOL_CHECK_IDLE", "30"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -271,6 +336,106 @@ SERVE_MEDIA = True
 CORS_ALLOW_CREDENTIALS = True
 CORS_EXPOSE_HEADERS = ["Content-Disposition"]
 
+# Proxy configuration
+
+# The credentials are encrypted in batches of BATCH_SIZE across PROCESSES processes by the commands, the API importing
+# at most IMPORT_MAX_ROWS authentications at once, encrypted within the request
+PROXY_CREDENTIALS_BATCH_SIZE = int(os.getenv("PROXY_CREDENTIALS_BATCH_SIZE", "500"))
+PROXY_CREDENTIALS_PROCESSES = int(os.getenv("PROXY_CREDENTIALS_PROCESSES", str(os.cpu_count() or 1)))
+PROXY_CREDENTIALS_IMPORT_MAX_ROWS = int(os.getenv("PROXY_CREDENTIALS_IMPORT_MAX_ROWS", "5000"))
+
+# Publish the requests in flight to Redis, records older than the TTL (in seconds) are considered lost
+PROXY_TRACE_INFLIGHT = os.getenv("PROXY_TRACE_INFLIGHT", "false").lower() == "true"
+PROXY_TRACE_INFLIGHT_TTL = int(os.getenv("PROXY_TRACE_INFLIGHT_TTL", "3600"))
+
+# Either insert the traces from the workers ("direct") or append them to a Redis stream ("stream"),
+# loaded in bulk by the `consume_traces` command, entries idle for longer than CLAIM_IDLE (in ms) are redelivered
+PROXY_TRACE_INGESTION = os.getenv("PROXY_TRACE_INGESTION", "direct")
+PROXY_TRACE_STREAM = os.getenv("PROXY_TRACE_STREAM", "proxy:traces")
+PROXY_TRACE_STREAM_GROUP = os.getenv("PROXY_TRACE_STREAM_GROUP", "proxy:traces:ingestion")
+PROXY_TRACE_STREAM_CLAIM_IDLE = int(os.getenv("PROXY_TRACE_STREAM_CLAIM_IDLE", "60000"))
+
+# The default tracing policy of the endpoints: the fraction of successful calls whose trace is kept
+# and the duration (in ms) from which a call is slow and always traced (never if unset)
+PROXY_TRACE_SAMPLE_RATE = float(os.getenv("PROXY_TRACE_SAMPLE_RATE", "1.0"))
+PROXY_TRACE_SLOW_THRESHOLD = (
+    int(os.getenv("PROXY_TRACE_SLOW_THRESHOLD")) if os.getenv("PROXY_TRACE_SLOW_THRESHOLD") else None
+)
+PROXY_TRACE_PURGE_BATCH_SIZE = int(os.getenv("PROXY_TRACE_PURGE_BATCH_SIZE", "1000"))
+
+# Route the safe API requests, e.g. the trace listings and analytics, to the database alias READ_REPLICA if set,
+# except for the clients that wrote in the last STICKINESS seconds, which read their writes from the primary
+PROXY_READ_REPLICA = os.getenv("PROXY_READ_REPLICA")
+PROXY_READ_REPLICA_STICKINESS = int(os.getenv("PROXY_READ_REPLICA_STICKINESS", "5"))
+
+# Delete the traces and rollups of the deleted endpoints and services in batches of BATCH_SIZE rows, every minute
+# for at most RUN_TIME seconds, which must be shorter for the runs not to overlap
+PROXY_DELETION_BATCH_SIZE = int(os.getenv("PROXY_DELETION_BATCH_SIZE", "1000"))
+PROXY_DELETION_RUN_TIME = int(os.getenv("PROXY_DELETION_RUN_TIME", "50"))
+
+# Backfill the URL parameters of the traces written before they were stored, in batches of BATCH_SIZE
+PROXY_TRACE_BACKFILL_BATCH_SIZE = int(os.getenv("PROXY_TRACE_BACKFILL_BATCH_SIZE", "1000"))
+
+# Store the headers and payloads of the traces once per distinct document, as content-addressed blobs of which
+# CACHE_SIZE are cached by each process; existing traces are moved to blobs in batches of BATCH_SIZE
+PROXY_TRACE_BLOBS = os.getenv("PROXY_TRACE_BLOBS", "false").lower() == "true"
+PROXY_TRACE_BLOB_CACHE_SIZE = int(os.getenv("PROXY_TRACE_BLOB_CACHE_SIZE", "10000"))
+PROXY_TRACE_BLOB_BATCH_SIZE = int(os.getenv("PROXY_TRACE_BLOB_BATCH_SIZE", "1000"))
+
+# Capture the responses of the endpoints enabling it, their bodies truncated to BODY_LIMIT bytes unless the endpoint
+# sets its own and compressed with COMPRESSION, either "zstd" or "zlib"; the responses whose trace was not written,
+# purged or archived are deleted once ORPHAN_DELAY seconds old, in batches of PURGE_BATCH_SIZE
+PROXY_RESPONSE_BODY_LIMIT = int(os.getenv("PROXY_RESPONSE_BODY_LIMIT", str(64 * 1024)))
+PROXY_RESPONSE_COMPRESSION = os.getenv("PROXY_RESPONSE_COMPRESSION", "zstd")
+PROXY_RESPONSE_ORPHAN_DELAY = int(os.getenv("PROXY_RESPONSE_ORPHAN_DELAY", "3600"))
+PROXY_RESPONSE_PURGE_BATCH_SIZE = int(os.getenv("PROXY_RESPONSE_PURGE_BATCH_SIZE", "1000"))
+
+# Either increment the endpoint statistics in Redis ("redis"), flushed to the database every FLUSH_INTERVAL seconds,
+# update them on every call ("direct"), as in the tests, or do not maintain them ("off"); ALPHA is the weight of a
+# call in the moving average of the latency
+PROXY_ENDPOINT_STATISTICS = os.getenv("PROXY_ENDPOINT_STATISTICS", "direct" if TESTING else "redis")
+PROXY_ENDPOINT_STATISTICS_FLUSH_INTERVAL = int(os.getenv("PROXY_ENDPOINT_STATISTICS_FLUSH_INTERVAL", "10"))
+PROXY_ENDPOINT_STATISTICS_ALPHA = float(os.getenv("PROXY_ENDPOINT_STATISTICS_ALPHA", "0.1"))
+
+# The number of latest traces nested in the endpoints, the others are listed by the traces collection
+PROXY_ENDPOINT_LATEST_TRACES = int(os.getenv("PROXY_ENDPOINT_LATEST_TRACES", "5"))
+
+# Cache up to CACHE_SIZE endpoints with their service in each process, except in the tests, for at most CACHE_TTL
+# seconds; the saves and deletions are published to Redis for every process to evict the endpoints that changed
+PROXY_CATALOG_CACHE = os.getenv("PROXY_CATALOG_CACHE", "true").lower() == "true" and not TESTING
+PROXY_CATALOG_CACHE_SIZE = int(os.getenv("PROXY_CATALOG_CACHE_SIZE", "10000"))
+PROXY_CATALOG_CACHE_TTL = int(os.getenv("PROXY_CATALOG_CACHE_TTL", "300"))
+
+# The traces are rolled up by minute in batches of BATCH_SIZE once inserted SETTLE_DELAY seconds ago, weighted by
+# their sample rate, with a latency sketch of relative ACCURACY; minutes are compacted to hours after MINUTE_RETENTION
+# hours, hours to days after HOUR_RETENTION days, in batches of COMPACT_BATCH_SIZE rollups
+PROXY_ROLLUP_BATCH_SIZE = int(os.getenv("PROXY_ROLLUP_BATCH_SIZE", "10000"))
+PROXY_ROLLUP_SETTLE_DELAY = int(os.getenv("PROXY_ROLLUP_SETTLE_DELAY", "120"))
+PROXY_ROLLUP_ACCURACY = float(os.getenv("PROXY_ROLLUP_ACCURACY", "0.01"))
+PROXY_ROLLUP_MINUTE_RETENTION = int(os.getenv("PROXY_ROLLUP_MINUTE_RETENTION", "48"))
+PROXY_ROLLUP_HOUR_RETENTION = int(os.getenv("PROXY_ROLLUP_HOUR_RETENTION", "30"))
+PROXY_ROLLUP_COMPACT_BATCH_SIZE = int(os.getenv("PROXY_ROLLUP_COMPACT_BATCH_SIZE", "1000"))
+
+# The number of traces read at once by the analytics, which bounds their memory use
+PROXY_ANALYTICS_CHUNK_SIZE = int(os.getenv("PROXY_ANALYTICS_CHUNK_SIZE", "50000"))
+
+# The number of traces read at once by the exports, which is also the size of the Parquet row groups
+PROXY_EXPORT_CHUNK_SIZE = int(os.getenv("PROXY_EXPORT_CHUNK_SIZE", "10000"))
+
+# The traces older than ARCHIVE_AFTER days are moved in batches of ARCHIVE_BATCH_SIZE to compressed Arrow files,
+# partitioned by day under ARCHIVE_PATH (not archived if unset), which the analytics and exports read as well;
+# archiving requires the `archives` extra, i.e. PyArrow
+PROXY_TRACE_ARCHIVE_PATH = os.getenv("PROXY_TRACE_ARCHIVE_PATH")
+PROXY_TRACE_ARCHIVE_AFTER = int(os.getenv("PROXY_TRACE_ARCHIVE_AFTER", "90"))
+PROXY_TRACE_ARCHIVE_BATCH_SIZE = int(os.getenv("PROXY_TRACE_ARCHIVE_BATCH_SIZE", "100000"))
+
+# The trace table is partitioned by month, partitions are created AHEAD months in advance
+# and dropped once older than RETENTION_MONTHS (kept forever if unset)
+PROXY_TRACE_PARTITIONS_AHEAD = int(os.getenv("PROXY_TRACE_PARTITIONS_AHEAD", "3"))
+PROXY_TRACE_RETENTION_MONTHS = (
+    int(os.getenv("PROXY_TRACE_RETENTION_MONTHS")) if os.getenv("PROXY_TRACE_RETENTION_MONTHS") else None
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 